@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+# Backends that keep entries inside one process. A delete issued by one
+# gunicorn worker would leave every other worker serving the stale entry.
+PROCESS_LOCAL_CACHE_BACKENDS = {
+    "django.core.cache.backends.locmem.LocMemCache",
+}
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """Pick lists and the tenant-context session registry need a cache shared by all workers."""
+    backend = settings.CACHES.get("default", {}).get("BACKEND", "django.core.cache.backends.locmem.LocMemCache")
+    if backend in PROCESS_LOCAL_CACHE_BACKENDS:
+        return [
+            Error(
+                f"The default cache ({backend}) is local to each process.",
+                hint=(
+                    "Cached pick lists and tenant-context session registries are invalidated on write and "
+                    "must be invalidated in every worker. Configure a shared cache such as DatabaseCache or RedisCache."
+                ),
+                id="core.E001",
+            )
+        ]
+    return []
@@ -120,6 +120,18 @@ INVENTORY_ADJUSTMENT_REASON_CHOICES = [
     ('other', 'Other'),
 ]
 
+INVENTORY_MOVEMENT_TYPE_CHOICES = [
+    ('opening', 'Opening Balance'),
+    ('receive', 'Receive'),
+    ('produce', 'Produce'),
+    ('consume', 'Consume'),
+    ('restore', 'Restore'),
+    ('allocate', 'Allocate'),
+    ('release', 'Release Allocation'),
+    ('adjust', 'Adjust'),
+    ('delete', 'Lot Deleted'),
+]
+
 
 # =============================================================================
 # PROCESSING WASTE / BYPRODUCT
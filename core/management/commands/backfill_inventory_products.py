@@ -0,0 +1,39 @@
+"""
+Populate Product.normalized_* lookup columns and Inventory.product.
+
+New and edited rows are handled on save; run this after bulk loads, manual
+SQL, or catalog changes made outside the app. Summaries are rebuilt
+afterwards so the item library matches the new lot assignments.
+
+Usage:
+    python manage.py backfill_inventory_products
+    python manage.py backfill_inventory_products --tenant acme --batch-size 5000
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.models import Tenant
+from core.services.inventory_summary import rebuild_inventory_summaries
+from core.services.product_lookup import backfill_lot_products
+
+
+class Command(BaseCommand):
+    help = 'Backfill normalized product lookup keys and the Inventory.product foreign key'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', help='Subdomain of a single tenant to backfill (default: all tenants)')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per bulk update')
+
+    def handle(self, *args, **options):
+        tenants = Tenant.objects.order_by('id')
+        if options['tenant']:
+            tenants = tenants.filter(subdomain=options['tenant'])
+            if not tenants.exists():
+                raise CommandError(f'Tenant "{options["tenant"]}" not found.')
+
+        for tenant in tenants:
+            with transaction.atomic():
+                products, lots = backfill_lot_products(tenant, batch_size=options['batch_size'])
+                rebuild_inventory_summaries(tenant)
+            self.stdout.write(f'{tenant.subdomain}: {products} products re-keyed, {lots} lots re-linked')
+        self.stdout.write(self.style.SUCCESS('Done.'))
@@ -0,0 +1,195 @@
+"""
+Compare the sync (WSGI) and async (ASGI) read endpoints under concurrent load.
+
+Both handlers are driven in-process against the configured database. Each
+simulated client sends its requests back to back; the WSGI side only has
+--wsgi-threads request slots, like a gthread worker, while the ASGI side
+serves every client from one event loop, like a single uvicorn worker.
+
+Usage:
+    python manage.py benchmark_async_api --username demo
+    python manage.py benchmark_async_api --username demo --clients 50,100,200 --db-latency-ms 5
+"""
+import asyncio
+import io
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db.backends.signals import connection_created
+from django.test import Client
+
+DEFAULT_PATHS = [
+    "purchasing/orders/",
+    "receiving/lots/",
+    "inventory/items/",
+    "processing/source-lots/",
+    "processing/sold-results/",
+    "trace/?q=LOT",
+]
+
+
+def _split_path(path):
+    path, _, query = path.partition("?")
+    return path, query
+
+
+class Command(BaseCommand):
+    help = 'Benchmark WSGI vs ASGI throughput for the read-heavy operations API endpoints'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', required=True, help='Tenant user to authenticate as')
+        parser.add_argument('--clients', default='50,100,200', help='Comma-separated concurrent client counts')
+        parser.add_argument('--requests-per-client', type=int, default=5)
+        parser.add_argument('--wsgi-threads', type=int, default=4, help='Request slots on the WSGI side')
+        parser.add_argument(
+            '--db-latency-ms', type=float, default=0,
+            help='Extra delay added to every query, to emulate a database across the network',
+        )
+        parser.add_argument('--path', action='append', dest='paths', help='Endpoint under /api/ (repeatable)')
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['username']).first()
+        if user is None:
+            raise CommandError(f'User "{options["username"]}" not found.')
+        client_counts = [int(value) for value in options['clients'].split(',') if value.strip()]
+        paths = options['paths'] or DEFAULT_PATHS
+
+        login = Client()
+        login.force_login(user)
+        cookie = f'{settings.SESSION_COOKIE_NAME}={login.cookies[settings.SESSION_COOKIE_NAME].value}'
+
+        if options['db_latency_ms']:
+            self._add_query_latency(options['db_latency_ms'] / 1000)
+
+        wsgi = WSGIHandler()
+        asgi = ASGIHandler()
+        per_client = options['requests_per_client']
+
+        self.stdout.write(
+            f'{"mode":<6} {"clients":>7} {"reqs":>6} {"req/s":>9} {"p50 ms":>9} {"p95 ms":>9} {"errors":>7}'
+        )
+        for clients in client_counts:
+            results = {
+                'wsgi': self._run_wsgi(wsgi, cookie, paths, clients, per_client, options['wsgi_threads']),
+                'asgi': asyncio.run(self._run_asgi(asgi, cookie, paths, clients, per_client)),
+            }
+            for mode, (elapsed, latencies, errors) in results.items():
+                self.stdout.write(
+                    f'{mode:<6} {clients:>7} {len(latencies):>6} {len(latencies) / elapsed:>9.1f} '
+                    f'{statistics.median(latencies) * 1000:>9.1f} '
+                    f'{statistics.quantiles(latencies, n=20)[-1] * 1000:>9.1f} {errors:>7}'
+                )
+            gain = (results['wsgi'][0] / results['asgi'][0]) if results['asgi'][0] else 0
+            self.stdout.write(self.style.SUCCESS(f'{clients} clients: ASGI throughput x{gain:.2f} vs WSGI'))
+
+    def _add_query_latency(self, seconds):
+        def delay(execute, sql, params, many, context):
+            time.sleep(seconds)
+            return execute(sql, params, many, context)
+
+        def install(sender, connection, **kwargs):
+            connection.execute_wrappers.append(delay)
+
+        connection_created.connect(install, weak=False)
+
+    def _run_wsgi(self, handler, cookie, paths, clients, per_client, threads):
+        slots = threading.BoundedSemaphore(threads)
+        latencies = []
+        errors = []
+
+        def call(path):
+            path_info, query = _split_path(f'/api/{path}')
+            environ = {
+                'REQUEST_METHOD': 'GET',
+                'PATH_INFO': path_info,
+                'QUERY_STRING': query,
+                'SCRIPT_NAME': '',
+                'SERVER_NAME': 'localhost',
+                'SERVER_PORT': '80',
+                'SERVER_PROTOCOL': 'HTTP/1.1',
+                'HTTP_HOST': 'localhost',
+                'HTTP_COOKIE': cookie,
+                'wsgi.input': io.BytesIO(),
+                'wsgi.errors': io.StringIO(),
+                'wsgi.url_scheme': 'http',
+                'wsgi.multithread': True,
+                'wsgi.multiprocess': False,
+            }
+            statuses = []
+            response = handler(environ, lambda status, headers: statuses.append(status))
+            b''.join(response)
+            response.close()
+            return statuses[0].startswith('200')
+
+        def client(index):
+            for n in range(per_client):
+                started = time.perf_counter()
+                with slots:
+                    ok = call(paths[(index + n) % len(paths)])
+                latencies.append(time.perf_counter() - started)
+                if not ok:
+                    errors.append(1)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            list(pool.map(client, range(clients)))
+        return time.perf_counter() - started, latencies, len(errors)
+
+    async def _run_asgi(self, handler, cookie, paths, clients, per_client):
+        latencies = []
+        errors = []
+
+        async def call(path):
+            path_info, query = _split_path(f'/api/async/{path}')
+            done = asyncio.Event()
+            messages = []
+            requested = False
+
+            async def receive():
+                nonlocal requested
+                if not requested:
+                    requested = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                await done.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                messages.append(message)
+                if message['type'] == 'http.response.body' and not message.get('more_body'):
+                    done.set()
+
+            scope = {
+                'type': 'http',
+                'asgi': {'version': '3.0'},
+                'http_version': '1.1',
+                'method': 'GET',
+                'scheme': 'http',
+                'path': path_info,
+                'raw_path': path_info.encode(),
+                'root_path': '',
+                'query_string': query.encode(),
+                'headers': [(b'host', b'localhost'), (b'cookie', cookie.encode())],
+                'client': ('127.0.0.1', 0),
+                'server': ('localhost', 80),
+            }
+            await handler(scope, receive, send)
+            return messages[0]['status'] == 200
+
+        async def client(index):
+            for n in range(per_client):
+                started = time.perf_counter()
+                ok = await call(paths[(index + n) % len(paths)])
+                latencies.append(time.perf_counter() - started)
+                if not ok:
+                    errors.append(1)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client(index) for index in range(clients)))
+        return time.perf_counter() - started, latencies, len(errors)
@@ -0,0 +1,134 @@
+"""
+Benchmark every read-only endpoint in core/urls/api.py against synthetic data.
+
+A throwaway test database is created, one synthetic tenant is generated per
+--scales entry, and each GET endpoint is timed through the Django test
+client as that tenant's admin. Results (p50/p95, query and duplicate query
+counts, peak memory, response size) are written to a JSON baseline;
+--compare checks a run against an earlier baseline and fails when anything
+regressed.
+
+Usage:
+    python manage.py benchmark_endpoints --output benchmarks/baseline.json
+    python manage.py benchmark_endpoints --scales 0.1,1 --endpoint inventory --endpoint trace
+    python manage.py benchmark_endpoints --compare benchmarks/baseline.json --threshold 15
+"""
+import json
+import re
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from core.services.endpoint_benchmarks import benchmark_tenant, compare_results, discover_endpoints
+from core.services.synthetic_data import SyntheticDataGenerator
+
+
+class Command(BaseCommand):
+    help = 'Time the GET endpoints in core/urls/api.py at several data scales and compare against a stored baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', default='0.05,0.2,1', help='Comma-separated synthetic data scales')
+        parser.add_argument('--iterations', type=int, default=5, help='Timed requests per endpoint')
+        parser.add_argument(
+            '--endpoint', action='append', dest='endpoints',
+            help='Only run endpoints whose URL name or route matches this regex (repeatable)',
+        )
+        parser.add_argument('--seed', type=int, default=1, help='Random seed for the synthetic data')
+        parser.add_argument('--output', help='Write results to this JSON file')
+        parser.add_argument('--compare', help='Baseline JSON file to compare the results against')
+        parser.add_argument(
+            '--threshold', type=float, default=20.0,
+            help='Percent growth in p50/p95/peak memory that counts as a regression',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            scales = [float(value) for value in options['scales'].split(',') if value.strip()]
+        except ValueError:
+            raise CommandError('--scales must be a comma-separated list of numbers.')
+        if not scales:
+            raise CommandError('--scales must name at least one scale.')
+
+        baseline = None
+        if options['compare']:
+            try:
+                baseline = json.loads(Path(options['compare']).read_text())
+            except (OSError, ValueError) as exc:
+                raise CommandError(f'Could not read baseline {options["compare"]}: {exc}')
+
+        endpoints = discover_endpoints()
+        if options['endpoints']:
+            patterns = [re.compile(pattern) for pattern in options['endpoints']]
+            endpoints = [
+                (name, route) for name, route in endpoints
+                if any(pattern.search(name) or pattern.search(route) for pattern in patterns)
+            ]
+        if not endpoints:
+            raise CommandError('No endpoints matched.')
+
+        results = {
+            'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'database': connection.vendor,
+            'iterations': options['iterations'],
+            'scales': {},
+        }
+
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            for index, scale in enumerate(scales, start=1):
+                results['scales'][str(scale)] = self._run_scale(scale, index, endpoints, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if options['output']:
+            output = Path(options['output'])
+            output.parent.mkdir(parents=True, exist_ok=True)
+            output.write_text(json.dumps(results, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Wrote {output}'))
+
+        if baseline is not None:
+            regressions = compare_results(baseline, results, threshold_pct=options['threshold'])
+            if regressions:
+                for item in regressions:
+                    change = f' ({item["change_pct"]:+.1f}%)' if item['change_pct'] is not None else ''
+                    self.stdout.write(self.style.ERROR(
+                        f'scale {item["scale"]} {item["endpoint"]} {item["metric"]}: '
+                        f'{item["baseline"]} -> {item["current"]}{change}'
+                    ))
+                raise CommandError(f'{len(regressions)} regression(s) against {options["compare"]}.')
+            self.stdout.write(self.style.SUCCESS(f'No regressions against {options["compare"]}.'))
+
+    def _run_scale(self, scale, index, endpoints, options):
+        self.stdout.write(f'Generating synthetic tenant at scale {scale}...')
+        started = time.monotonic()
+        generator = SyntheticDataGenerator(scale=scale, seed=options['seed'], subdomain_prefix=f'bench{index}')
+        tenant = generator.generate(tenant_count=1)[0]
+        self.stdout.write(
+            f'  {sum(generator.writer.counts.values())} rows in {time.monotonic() - started:.1f}s'
+        )
+
+        client = Client()
+        client.force_login(generator.user)
+
+        self.stdout.write(
+            f'  {"endpoint":<40} {"p50 ms":>9} {"p95 ms":>9} {"queries":>8} {"dup":>5} {"peak KB":>10} {"bytes":>10}'
+        )
+
+        def report(name, result):
+            self.stdout.write(
+                f'  {name:<40} {result["p50_ms"]:>9.2f} {result["p95_ms"]:>9.2f} {result["queries"]:>8} {result["duplicate_queries"]:>5} '
+                f'{result["peak_memory_kb"]:>10.1f} {result["response_bytes"]:>10}'
+            )
+
+        endpoint_results = benchmark_tenant(
+            client, tenant, endpoints, iterations=options['iterations'], progress=report,
+        )
+        return {'rows': dict(generator.writer.counts), 'endpoints': endpoint_results}
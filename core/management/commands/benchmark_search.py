@@ -0,0 +1,94 @@
+"""
+Benchmark core.services.search against the chained ``__icontains`` filters it replaced.
+
+A throwaway test database is created and filled with --lots inventory lots
+for one tenant (plus a tenth as many for a second tenant, so tenant scoping
+matters). Each --term is then searched both ways the receiving lots endpoint
+would: first page of 50 plus the total count.
+
+Usage:
+    python manage.py benchmark_search
+    python manage.py benchmark_search --lots 100000 --term halibut --term LOT-0004242
+"""
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Q
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from core.models import Inventory, Tenant
+from core.services.search import search
+from core.services.synthetic_data import RAW_FORMS, SPECIES
+
+FIELDS = ("desc", "vendorid", "vendorlot", "poid")
+DEFAULT_TERMS = ["halibut", "LOT-0250000", "vendor 017", "no such lot"]
+
+
+class Command(BaseCommand):
+    help = 'Time search() against chained icontains filters on a large synthetic lot table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lots', type=int, default=500000, help='Lots to generate for the benchmark tenant')
+        parser.add_argument('--iterations', type=int, default=5, help='Timed runs per term and method')
+        parser.add_argument('--term', action='append', dest='terms', help='Search term (repeatable)')
+
+    def handle(self, *args, **options):
+        if options['lots'] < 1:
+            raise CommandError('--lots must be at least 1.')
+        terms = options['terms'] or DEFAULT_TERMS
+
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            tenant = self._generate(options['lots'])
+            self.stdout.write(f'  {"term":<20} {"method":<10} {"p50 ms":>9} {"matches":>9}')
+            for term in terms:
+                for method, queryset in (
+                    ('icontains', self._icontains(tenant, term)),
+                    ('search', search(Inventory.all_objects.filter(tenant=tenant).order_by('-id'), FIELDS, term)),
+                ):
+                    p50, matches = self._time(queryset, options['iterations'])
+                    self.stdout.write(f'  {term:<20} {method:<10} {p50:>9.2f} {matches:>9}')
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def _generate(self, lot_count):
+        started = time.monotonic()
+        tenant = Tenant.objects.create(name='Search Benchmark', subdomain='bench-search', is_active=True)
+        other = Tenant.objects.create(name='Search Benchmark Other', subdomain='bench-search-other', is_active=True)
+        names = [f'{form} {species}' for species, *_ in SPECIES for form in RAW_FORMS]
+        batch = []
+        for number in range(1, lot_count + lot_count // 10 + 1):
+            batch.append(Inventory(
+                tenant=tenant if number <= lot_count else other,
+                desc=names[number * 5 % len(names)],
+                productid=f'RAW-{number * 5 % len(names):03d}',
+                vendorid=f'Vendor {number * 13 % 200:03d}',
+                vendorlot=f'LOT-{number:07d}',
+                poid=f'PO-{number // 3:06d}',
+            ))
+            if len(batch) == 5000:
+                Inventory.all_objects.bulk_create(batch)
+                batch = []
+        Inventory.all_objects.bulk_create(batch)
+        self.stdout.write(f'Generated {lot_count} lots in {time.monotonic() - started:.1f}s ({connection.vendor})')
+        return tenant
+
+    def _icontains(self, tenant, term):
+        condition = Q()
+        for field in FIELDS:
+            condition |= Q(**{f'{field}__icontains': term})
+        return Inventory.all_objects.filter(tenant=tenant).filter(condition).order_by('-id')
+
+    def _time(self, queryset, iterations):
+        timings = []
+        for _ in range(max(iterations, 1)):
+            started = time.perf_counter()
+            list(queryset[:50])
+            matches = queryset.count()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings), matches
@@ -0,0 +1,51 @@
+"""
+Compare inventory lots against their movement ledger.
+
+Lot quantities are changed through core.services.inventory_ledger, which
+appends a movement for every change. Lots written with bulk_create,
+QuerySet.update() or manual SQL have no movement or one that no longer
+matches; this reports them, and --fix appends the missing opening or
+adjusting movements.
+
+Usage:
+    python manage.py check_inventory_ledger
+    python manage.py check_inventory_ledger --tenant acme --fix
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Tenant
+from core.services.inventory_ledger import find_ledger_drift, repair_ledger
+
+
+class Command(BaseCommand):
+    help = 'Report (and optionally repair) lots whose quantities disagree with the inventory movement ledger'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', help='Subdomain of a single tenant to check (default: all tenants)')
+        parser.add_argument('--fix', action='store_true', help='Append movements that bring the ledger in line with the lots')
+
+    def handle(self, *args, **options):
+        tenants = Tenant.objects.order_by('id')
+        if options['tenant']:
+            tenants = tenants.filter(subdomain=options['tenant'])
+            if not tenants.exists():
+                raise CommandError(f'Tenant "{options["tenant"]}" not found.')
+
+        total = 0
+        for tenant in tenants:
+            if options['fix']:
+                missing, drifted = repair_ledger(tenant)
+            else:
+                missing, drifted = (len(lots) for lots in find_ledger_drift(tenant))
+            total += missing + drifted
+            if missing or drifted:
+                verb = 'repaired' if options['fix'] else 'found'
+                self.stdout.write(self.style.WARNING(
+                    f'{tenant.subdomain}: {verb} {missing} lots without movements and {drifted} drifted lots'
+                ))
+            else:
+                self.stdout.write(f'{tenant.subdomain}: ledger up to date')
+        if options['fix']:
+            self.stdout.write(self.style.SUCCESS(f'Done. {total} lots repaired.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Done. {total} lots out of line with the ledger.'))
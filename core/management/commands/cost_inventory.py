@@ -0,0 +1,37 @@
+"""
+Run FIFO costing and write cost of goods and gross margin on sales lines.
+
+Usage:
+    python manage.py cost_inventory
+    python manage.py cost_inventory --tenant acme
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Tenant
+from core.services.costing import cost_tenant
+
+
+class Command(BaseCommand):
+    help = 'Cost sales allocations and processing consumption FIFO and update sales line COGS and margin'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', help='Subdomain of a single tenant to cost (default: all tenants)')
+
+    def handle(self, *args, **options):
+        tenants = Tenant.objects.order_by('id')
+        if options['tenant']:
+            tenants = tenants.filter(subdomain=options['tenant'])
+            if not tenants.exists():
+                raise CommandError(f'Tenant "{options["tenant"]}" not found.')
+
+        for tenant in tenants:
+            started = time.monotonic()
+            result = cost_tenant(tenant)
+            self.stdout.write(
+                f'{tenant.subdomain}: {result.outflows} movements over {result.lots} lots costed in '
+                f'{result.passes} passes, {result.lines_updated} of {result.lines_costed} sales lines updated '
+                f'({time.monotonic() - started:.2f}s)'
+            )
+        self.stdout.write(self.style.SUCCESS('Done.'))
@@ -0,0 +1,53 @@
+"""
+Generate synthetic tenants for load testing.
+
+Usage:
+    python manage.py generate_synthetic_data
+    python manage.py generate_synthetic_data --tenants 3 --scale 30 --seed 7
+    python manage.py generate_synthetic_data --purchase-orders 50000 --sales-orders 120000
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.services.synthetic_data import DEFAULT_COUNTS, SyntheticDataGenerator
+
+
+class Command(BaseCommand):
+    help = 'Generate scale-parametric synthetic tenants (catalog, POs, lots, batches, sales, CCP logs) for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenants', type=int, default=1, help='Number of tenants to create')
+        parser.add_argument(
+            '--scale', type=float, default=1.0,
+            help='Multiplier for transaction counts (catalog sizes grow with its square root); scale 1 is roughly 6k lots and 60k rows per tenant',
+        )
+        for key, value in DEFAULT_COUNTS.items():
+            parser.add_argument(
+                f'--{key.replace("_", "-")}', type=int, dest=key,
+                help=f'{key.replace("_", " ").capitalize()} per tenant at scale 1 (default {value})',
+            )
+        parser.add_argument('--days', type=int, default=365, help='Days of history to simulate')
+        parser.add_argument('--seed', type=int, help='Random seed for reproducible data')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Rows per bulk_create batch')
+        parser.add_argument('--prefix', default='loadtest', help='Subdomain prefix for generated tenants')
+
+    def handle(self, *args, **options):
+        counts = {key: options[key] for key in DEFAULT_COUNTS if options.get(key) is not None}
+        generator = SyntheticDataGenerator(
+            scale=options['scale'],
+            seed=options['seed'],
+            chunk_size=options['chunk_size'],
+            subdomain_prefix=options['prefix'],
+            counts=counts,
+            days=options['days'],
+        )
+        started = time.monotonic()
+        tenants = generator.generate(tenant_count=options['tenants'], progress=self.stdout.write)
+        elapsed = time.monotonic() - started
+        if generator.stats:
+            self.stdout.write(", ".join(f"{name}={count}" for name, count in sorted(generator.stats.items())))
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(tenants)} tenant(s) in {elapsed:.1f}s: '
+            + ", ".join(f"{tenant.subdomain} (login {tenant.subdomain}-admin)" for tenant in tenants)
+        ))
@@ -0,0 +1,42 @@
+"""
+Recompute ProductInventorySummary rows from the inventory lots.
+
+The summaries are kept up to date by the Inventory signals; this repairs
+drift left by bulk writes, QuerySet.update() calls or manual SQL.
+
+Usage:
+    python manage.py rebuild_inventory_summaries
+    python manage.py rebuild_inventory_summaries --tenant acme
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Tenant
+from core.services.inventory_summary import rebuild_inventory_summaries
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-product inventory summaries and report products whose totals had drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', help='Subdomain of a single tenant to rebuild (default: all tenants)')
+
+    def handle(self, *args, **options):
+        tenants = Tenant.objects.order_by('id')
+        if options['tenant']:
+            tenants = tenants.filter(subdomain=options['tenant'])
+            if not tenants.exists():
+                raise CommandError(f'Tenant "{options["tenant"]}" not found.')
+
+        total_drifted = 0
+        for tenant in tenants:
+            drifted = rebuild_inventory_summaries(tenant)
+            total_drifted += len(drifted)
+            if drifted:
+                self.stdout.write(self.style.WARNING(
+                    f'{tenant.subdomain}: corrected {len(drifted)} product summaries '
+                    f'(product ids {", ".join(str(product_id) for product_id in drifted[:20])}'
+                    f'{", ..." if len(drifted) > 20 else ""})'
+                ))
+            else:
+                self.stdout.write(f'{tenant.subdomain}: summaries up to date')
+        self.stdout.write(self.style.SUCCESS(f'Done. {total_drifted} product summaries corrected.'))
@@ -0,0 +1,41 @@
+"""
+Recompute the rollup columns on sales and purchase orders from their lines.
+
+The rollups are kept up to date by the order item signals; this repairs
+orders whose lines were written with bulk_create, QuerySet.update() or
+manual SQL.
+
+Usage:
+    python manage.py rebuild_order_rollups
+    python manage.py rebuild_order_rollups --tenant acme
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Tenant
+from core.services.order_rollups import rebuild_order_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the stored totals, line counts and product summaries of sales and purchase orders'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', help='Subdomain of a single tenant to rebuild (default: all tenants)')
+
+    def handle(self, *args, **options):
+        tenants = Tenant.objects.order_by('id')
+        if options['tenant']:
+            tenants = tenants.filter(subdomain=options['tenant'])
+            if not tenants.exists():
+                raise CommandError(f'Tenant "{options["tenant"]}" not found.')
+
+        total_corrected = 0
+        for tenant in tenants:
+            sales, purchases = rebuild_order_rollups(tenant)
+            total_corrected += sales + purchases
+            if sales or purchases:
+                self.stdout.write(self.style.WARNING(
+                    f'{tenant.subdomain}: corrected {sales} sales orders and {purchases} purchase orders'
+                ))
+            else:
+                self.stdout.write(f'{tenant.subdomain}: order rollups up to date')
+        self.stdout.write(self.style.SUCCESS(f'Done. {total_corrected} orders corrected.'))
@@ -8,6 +8,7 @@ from django.utils import timezone
 from core.models import (
     Customer,
     Inventory,
+    InventoryMovement,
     ProcessBatch,
     ProcessBatchOutput,
     ProcessBatchSource,
@@ -23,6 +24,7 @@ from core.models import (
     TenantUser,
     Vendor,
 )
+from core.services.inventory_ledger import record_movement
 
 
 DEMO_PO_PREFIX = "DEMO-PO-"
@@ -63,7 +65,10 @@ class Command(BaseCommand):
         SalesOrder.objects.filter(tenant=tenant, order_number__startswith=DEMO_SO_PREFIX).delete()
         PurchaseOrder.objects.filter(tenant=tenant, po_number__startswith=DEMO_PO_PREFIX).delete()
         ProcessBatch.objects.filter(tenant=tenant, batch_number__startswith=DEMO_BATCH_PREFIX).delete()
-        Inventory.objects.filter(tenant=tenant, vendorlot__startswith=DEMO_LOT_PREFIX).delete()
+        demo_lots = Inventory.all_objects.filter(tenant=tenant, vendorlot__startswith=DEMO_LOT_PREFIX)
+        # Demo lots are thrown away with their ledger; real lots are only ever soft-deleted.
+        InventoryMovement.all_objects.filter(inventory__in=demo_lots).delete()
+        demo_lots.delete()
 
     def _pick_vendors(self, tenant):
         names = [
@@ -279,7 +284,7 @@ class Command(BaseCommand):
         lots = {}
         for spec in lot_specs:
             product = spec["product"]
-            lot = Inventory.objects.create(
+            lot = Inventory(
                 tenant=tenant,
                 productid=product.product_id,
                 desc=product.item_name or product.description,
@@ -287,10 +292,8 @@ class Command(BaseCommand):
                 vendorlot=spec["lot"],
                 actualcost=spec["cost"],
                 unittype=product.unit_type or "Lbs",
-                unitsonhand=spec["qty"],
-                unitsavailable=spec["qty"],
                 unitsin=spec["qty"],
-                receivedate=spec["date"].strftime("%Y-%m-%d"),
+                receivedate=spec["date"],
                 poid=spec["po"].po_number if spec["po"] else "",
                 purchase_order=spec["po"],
                 po_item=spec["po_item"],
@@ -300,6 +303,7 @@ class Command(BaseCommand):
                 vendor_type=spec["vendor"].vendor_type if spec["vendor"] else "",
                 age=Decimal("1"),
             )
+            record_movement(lot, "receive", on_hand=spec["qty"], reference=lot.poid, user=user)
             ReceivingQualityCheck.objects.create(
                 tenant=tenant,
                 inventory=lot,
@@ -0,0 +1,60 @@
+"""
+Write end-of-day inventory snapshots used by the valuation report.
+
+Schedule it nightly (after midnight, for the day that just ended). Re-running
+a day replaces that day's snapshot; --since backfills every day up to --date
+from the movement ledger.
+
+Usage:
+    python manage.py snapshot_inventory
+    python manage.py snapshot_inventory --tenant acme --date 2026-03-31
+    python manage.py snapshot_inventory --since 2026-01-01 --date 2026-03-31
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.models import Tenant
+from core.services.inventory_snapshots import take_inventory_snapshot
+from core.utils import parse_date_value
+
+
+class Command(BaseCommand):
+    help = 'Snapshot each lot\'s on-hand quantity, unit cost and value at the end of a day'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', help='Subdomain of a single tenant to snapshot (default: all active tenants)')
+        parser.add_argument('--date', help='Day to snapshot, YYYY-MM-DD (default: today)')
+        parser.add_argument('--since', help='First day to snapshot when backfilling a range ending at --date')
+
+    def handle(self, *args, **options):
+        tenants = Tenant.objects.filter(is_active=True).order_by('id')
+        if options['tenant']:
+            tenants = Tenant.objects.filter(subdomain=options['tenant'])
+            if not tenants.exists():
+                raise CommandError(f'Tenant "{options["tenant"]}" not found.')
+
+        last_day = self._parse_day(options['date']) if options['date'] else timezone.localdate()
+        first_day = self._parse_day(options['since']) if options['since'] else last_day
+        if first_day > last_day:
+            raise CommandError('--since must not be after --date.')
+
+        count = 0
+        for tenant in tenants:
+            day = first_day
+            while day <= last_day:
+                snapshot = take_inventory_snapshot(tenant, day)
+                count += 1
+                self.stdout.write(
+                    f'{tenant.subdomain} {day}: {snapshot.lot_count} lots, '
+                    f'{snapshot.total_quantity:.2f} units, value {snapshot.total_value:.2f}'
+                )
+                day += timedelta(days=1)
+        self.stdout.write(self.style.SUCCESS(f'Done. {count} snapshots written.'))
+
+    def _parse_day(self, value):
+        day = parse_date_value(value)
+        if day is None:
+            raise CommandError(f'Invalid date "{value}"; use YYYY-MM-DD.')
+        return day
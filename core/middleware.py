@@ -1,19 +1,158 @@
-from django.utils.deprecation import MiddlewareMixin
-from .models import TenantUser, set_current_tenant
+import time
 
-class TenantMiddleware(MiddlewareMixin):
-    """Automatically set current tenant based on logged-in user."""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from whitenoise.middleware import WhiteNoiseMiddleware
 
-    def process_request(self, request):
-        request.tenant = None
-        set_current_tenant(None)
+from .services.request_metrics import capture_request_metrics, current_request_metrics, record_request
+from .services.tenant_cache import resolve_tenant_context, tenant_from_context
+from .tenancy import tenant_context
 
-        if request.user.is_authenticated:
-            try:
-                tenant_user = TenantUser.objects.select_related('tenant').get(user=request.user)
-                request.tenant = tenant_user.tenant
-                set_current_tenant(tenant_user.tenant)
-            except TenantUser.DoesNotExist:
-                pass
 
-        return None
+class TenantMiddleware:
+    """
+    Automatically set current tenant based on logged-in user.
+
+    The tenant is bound with tenant_context() for the duration of the request,
+    so it is reset afterwards and follows the request into async views.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        context = resolve_tenant_context(request, request.user) if request.user.is_authenticated else None
+        tenant = self._apply(request, context)
+        with tenant_context(tenant):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        user = await request.auser()
+        context = await sync_to_async(resolve_tenant_context)(request, user) if user.is_authenticated else None
+        tenant = self._apply(request, context)
+        with tenant_context(tenant):
+            return await self.get_response(request)
+
+    def _apply(self, request, context):
+        request.tenant = tenant_from_context(context) if context else None
+        request.tenant_is_admin = bool(context and context["is_admin"])
+        return request.tenant
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise with an async path.
+
+    WhiteNoiseMiddleware is sync-only, which makes Django run every request
+    below it on a single thread under ASGI. Only static file hits need the
+    sync code, so everything else is passed straight through.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+
+class RequestMetricsMiddleware:
+    """Record query count, DB time, serialization time and response size for /api/ requests."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._should_record(request):
+            return self.get_response(request)
+        started = time.perf_counter()
+        with capture_request_metrics() as metrics:
+            response = self.get_response(request)
+        self._record(request, response, metrics, started)
+        return response
+
+    async def __acall__(self, request):
+        if not self._should_record(request):
+            return await self.get_response(request)
+        started = time.perf_counter()
+        with capture_request_metrics() as metrics:
+            response = await self.get_response(request)
+        self._record(request, response, metrics, started)
+        return response
+
+    def _should_record(self, request):
+        return getattr(settings, "REQUEST_METRICS_ENABLED", True) and request.path_info.startswith("/api/")
+
+    def _record(self, request, response, metrics, started):
+        match = getattr(request, "resolver_match", None)
+        view_name = match.view_name if match else "unresolved"
+        size = 0 if response.streaming else len(response.content)
+        record_request(view_name, metrics, time.perf_counter() - started, size)
+
+
+class RequestMetricsViewMiddleware:
+    """
+    Mark where the view starts and ends for RequestMetricsMiddleware.
+
+    Must be last in MIDDLEWARE so that the session, auth and tenant lookups
+    above it are counted as overhead, not as the view's queries.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = current_request_metrics()
+        if metrics is None:
+            return self.get_response(request)
+        metrics.view_started()
+        try:
+            return self.get_response(request)
+        finally:
+            metrics.view_finished()
+
+    async def __acall__(self, request):
+        metrics = current_request_metrics()
+        if metrics is None:
+            return await self.get_response(request)
+        metrics.view_started()
+        try:
+            return await self.get_response(request)
+        finally:
+            metrics.view_finished()
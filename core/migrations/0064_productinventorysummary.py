@@ -0,0 +1,65 @@
+from decimal import Decimal
+
+from django.db import migrations, models
+
+from core.services.product_lookup import build_product_lookup_maps, resolve_product_from_values
+
+
+def build_summaries(apps, schema_editor):
+    Inventory = apps.get_model("core", "Inventory")
+    Product = apps.get_model("core", "Product")
+    ProductInventorySummary = apps.get_model("core", "ProductInventorySummary")
+    Tenant = apps.get_model("core", "Tenant")
+
+    for tenant_id in Tenant.objects.values_list("id", flat=True):
+        maps = build_product_lookup_maps(Product.objects.filter(tenant_id=tenant_id).order_by("id"))
+        totals = {}
+        lots = Inventory.objects.filter(tenant_id=tenant_id).values_list(
+            "po_item__product_id", "productid", "desc", "unitsin", "unitsallocated", "unitsonhand",
+        )
+        for po_product_id, productid, desc, expected, allocated, on_hand in lots.iterator(chunk_size=5000):
+            product_id = po_product_id
+            if not product_id:
+                product = resolve_product_from_values(*maps, productid, desc)
+                product_id = product.id if product else None
+            if product_id is None:
+                continue
+            entry = totals.setdefault(product_id, [Decimal("0"), Decimal("0"), Decimal("0"), 0])
+            entry[0] += expected or 0
+            entry[1] += allocated or 0
+            entry[2] += on_hand or 0
+            entry[3] += 1
+        ProductInventorySummary.objects.bulk_create(
+            ProductInventorySummary(
+                tenant_id=tenant_id, product_id=product_id,
+                expected=expected, allocated=allocated, on_hand=on_hand, lot_count=lot_count,
+            )
+            for product_id, (expected, allocated, on_hand, lot_count) in totals.items()
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0063_tenantbillingprofile"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductInventorySummary",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("expected", models.DecimalField(decimal_places=4, default=0, max_digits=14)),
+                ("allocated", models.DecimalField(decimal_places=4, default=0, max_digits=14)),
+                ("on_hand", models.DecimalField(decimal_places=4, default=0, max_digits=14)),
+                ("lot_count", models.IntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("product", models.OneToOneField(on_delete=models.deletion.CASCADE, related_name="inventory_summary", to="core.product")),
+                ("tenant", models.ForeignKey(on_delete=models.deletion.CASCADE, to="core.tenant")),
+            ],
+            options={
+                "db_table": "inventory_product_summary",
+            },
+        ),
+        migrations.RunPython(build_summaries, migrations.RunPython.noop),
+    ]
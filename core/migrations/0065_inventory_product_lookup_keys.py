@@ -0,0 +1,131 @@
+from django.db import migrations, models
+
+LOOKUP_FIELDS = ("product_id", "description", "item_name", "friendly_name", "qb_item_name")
+
+# The helpers below are frozen copies of core.services.product_lookup as of
+# this migration, so the backfill keeps today's matching rules whatever that
+# module becomes later.
+
+
+def normalize_product_lookup(value):
+    return " ".join(str(value or "").strip().lower().split())
+
+
+def build_product_lookup_maps(products):
+    """Map normalized keys to products; pass the products ordered by id."""
+    products_by_id = {}
+    products_by_name = {}
+    for product in products:
+        product_id_key = normalize_product_lookup(product.product_id)
+        if product_id_key:
+            products_by_id[product_id_key] = product
+        for candidate in (product.description, product.item_name, product.friendly_name, product.qb_item_name):
+            name_key = normalize_product_lookup(candidate)
+            if name_key and name_key not in products_by_name:
+                products_by_name[name_key] = product
+    return products_by_id, products_by_name
+
+
+def resolve_product_from_values(products_by_id, products_by_name, *values):
+    for value in values:
+        lookup_key = normalize_product_lookup(value)
+        if not lookup_key:
+            continue
+        if lookup_key in products_by_id:
+            return products_by_id[lookup_key]
+        if lookup_key in products_by_name:
+            return products_by_name[lookup_key]
+    return None
+
+
+def backfill(apps, schema_editor):
+    Inventory = apps.get_model("core", "Inventory")
+    Product = apps.get_model("core", "Product")
+    Tenant = apps.get_model("core", "Tenant")
+
+    for tenant_id in Tenant.objects.values_list("id", flat=True):
+        products = list(Product.objects.filter(tenant_id=tenant_id).order_by("id"))
+        for product in products:
+            for field in LOOKUP_FIELDS:
+                setattr(product, f"normalized_{field}", normalize_product_lookup(getattr(product, field)))
+        Product.objects.bulk_update(products, [f"normalized_{field}" for field in LOOKUP_FIELDS], batch_size=2000)
+
+        maps = build_product_lookup_maps(products)
+        lots = []
+        rows = Inventory.objects.filter(tenant_id=tenant_id).values_list("id", "po_item__product_id", "productid", "desc")
+        for lot_id, po_product_id, productid, desc in rows.iterator(chunk_size=2000):
+            product_id = po_product_id
+            if not product_id:
+                product = resolve_product_from_values(*maps, productid, desc)
+                product_id = product.id if product else None
+            if product_id:
+                lots.append(Inventory(id=lot_id, product_id=product_id))
+        Inventory.objects.bulk_update(lots, ["product"], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0064_productinventorysummary"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="normalized_product_id",
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="normalized_description",
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="normalized_item_name",
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="normalized_friendly_name",
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="normalized_qb_item_name",
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(fields=["tenant", "normalized_product_id"], name="product_lookup_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(fields=["tenant", "normalized_description"], name="product_lookup_desc_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(fields=["tenant", "normalized_item_name"], name="product_lookup_item_name_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(fields=["tenant", "normalized_friendly_name"], name="product_lookup_friendly_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(fields=["tenant", "normalized_qb_item_name"], name="product_lookup_qb_name_idx"),
+        ),
+        migrations.AddField(
+            model_name="inventory",
+            name="product",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="Catalog product, resolved from po_item or productid/desc on save",
+                null=True,
+                on_delete=models.deletion.SET_NULL,
+                related_name="inventory_lots",
+                to="core.product",
+            ),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
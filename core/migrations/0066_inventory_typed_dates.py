@@ -0,0 +1,141 @@
+from datetime import date, datetime
+
+from django.db import migrations, models
+from django.utils import timezone
+
+# Frozen copies of core.utils' date parsers as of this migration: the backfill
+# reads the formats the text columns held then, whatever core.utils accepts later.
+DATE_INPUT_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y", "%Y/%m/%d", "%m-%d-%Y", "%d-%b-%Y", "%b %d, %Y")
+DATETIME_INPUT_FORMATS = ("%m/%d/%Y %H:%M:%S", "%m/%d/%Y %H:%M", "%m/%d/%Y %I:%M %p", "%m/%d/%Y %I:%M:%S %p")
+
+
+def parse_date_value(value):
+    value = str(value or "").strip()
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value[:10])
+    except ValueError:
+        pass
+    for fmt in DATE_INPUT_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    parsed = parse_datetime_value(value)
+    return parsed.date() if parsed else None
+
+
+def parse_datetime_value(value):
+    value = str(value or "").strip()
+    if not value:
+        return None
+    parsed = None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        for fmt in DATETIME_INPUT_FORMATS + DATE_INPUT_FORMATS:
+            try:
+                parsed = datetime.strptime(value, fmt)
+                break
+            except ValueError:
+                continue
+    if parsed is None:
+        return None
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+TEXT_COLUMNS = (
+    ("receivedate", parse_date_value),
+    ("packdate", parse_date_value),
+    ("updatetime", parse_datetime_value),
+)
+
+
+PARSED_FIELDS = [name for name, _ in TEXT_COLUMNS] + ["legacy_dates"]
+
+
+def parse_text_dates(apps, schema_editor):
+    Inventory = apps.get_model("core", "Inventory")
+    rows = (
+        Inventory.objects.exclude(receivedate_text="", packdate_text="", updatetime_text="")
+        .values_list("id", *(f"{name}_text" for name, _ in TEXT_COLUMNS))
+    )
+    batch = []
+    for lot_id, *values in rows.iterator(chunk_size=2000):
+        lot = Inventory(id=lot_id)
+        unparsed = {}
+        for (name, parse), value in zip(TEXT_COLUMNS, values):
+            parsed = parse(value)
+            setattr(lot, name, parsed)
+            # The *_text columns are dropped below; keep whatever could not be read.
+            if parsed is None and (value or "").strip():
+                unparsed[name] = value
+        lot.legacy_dates = unparsed or None
+        batch.append(lot)
+        if len(batch) >= 2000:
+            Inventory.objects.bulk_update(batch, PARSED_FIELDS)
+            batch = []
+    Inventory.objects.bulk_update(batch, PARSED_FIELDS)
+
+
+def format_dates(apps, schema_editor):
+    Inventory = apps.get_model("core", "Inventory")
+    rows = Inventory.objects.values_list("id", *(name for name, _ in TEXT_COLUMNS), "legacy_dates")
+    batch = []
+    for lot_id, receivedate, packdate, updatetime, legacy in rows.iterator(chunk_size=2000):
+        legacy = legacy or {}
+        batch.append(Inventory(
+            id=lot_id,
+            receivedate_text=receivedate.isoformat() if receivedate else legacy.get("receivedate", ""),
+            packdate_text=packdate.isoformat() if packdate else legacy.get("packdate", ""),
+            updatetime_text=updatetime.isoformat() if updatetime else legacy.get("updatetime", ""),
+        ))
+    Inventory.objects.bulk_update(batch, [f"{name}_text" for name, _ in TEXT_COLUMNS], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0065_inventory_product_lookup_keys"),
+    ]
+
+    operations = [
+        migrations.RenameField(model_name="inventory", old_name="receivedate", new_name="receivedate_text"),
+        migrations.RenameField(model_name="inventory", old_name="packdate", new_name="packdate_text"),
+        migrations.RenameField(model_name="inventory", old_name="updatetime", new_name="updatetime_text"),
+        migrations.AddField(
+            model_name="inventory",
+            name="receivedate",
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="inventory",
+            name="packdate",
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="inventory",
+            name="updatetime",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="inventory",
+            name="legacy_dates",
+            field=models.JSONField(blank=True, editable=False, help_text="Date text that could not be parsed when the date columns became typed, by field", null=True),
+        ),
+        migrations.RunPython(parse_text_dates, format_dates),
+        migrations.RemoveField(model_name="inventory", name="receivedate_text"),
+        migrations.RemoveField(model_name="inventory", name="packdate_text"),
+        migrations.RemoveField(model_name="inventory", name="updatetime_text"),
+        migrations.AddIndex(
+            model_name="inventory",
+            index=models.Index(fields=["tenant", "receivedate"], name="inventory_tenant_received_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="inventory",
+            index=models.Index(fields=["tenant", "product", "receivedate"], name="inventory_product_received_idx"),
+        ),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0066_inventory_typed_dates'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(fields=['tenant', 'productid', 'unitsonhand'], name='inventory_productid_onhand_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='processbatchoutput',
+            index=models.Index(fields=['tenant', 'inventory'], name='batch_output_inventory_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='processbatchsource',
+            index=models.Index(fields=['tenant', 'inventory'], name='batch_source_inventory_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['tenant', '-order_date', '-created_at'], name='purchasing_order_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salesorder',
+            index=models.Index(fields=['tenant', '-order_date', '-created_at'], name='sales_order_order_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salesorder',
+            index=models.Index(fields=['tenant', '-ship_date', '-created_at'], name='sales_order_ship_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salesorderallocation',
+            index=models.Index(fields=['tenant', 'inventory'], name='so_allocation_inventory_idx'),
+        ),
+    ]
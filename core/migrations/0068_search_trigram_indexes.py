@@ -0,0 +1,72 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+from django.db import migrations, models
+from django.db.models.functions import Cast, Upper
+
+# Frozen copy of core.services.search.SEARCH_COLUMNS as of this migration, by
+# model. It mirrors search.py deliberately rather than importing it: later
+# edits to the live list need a migration of their own.
+TRIGRAM_INDEX_COLUMNS = {
+    "inventory": ("desc", "vendorid", "vendorlot", "poid", "productid"),
+    "product": ("item_name", "description", "sku", "product_id", "friendly_name", "qb_item_name"),
+    "processbatch": ("batch_number", "process_type"),
+    "purchaseorder": ("po_number", "vendor_name", "qb_po_number", "buyer"),
+    "salesorder": ("order_number", "customer_name", "shipper", "shipping_route"),
+}
+
+INDEX_NAMES = {
+    "inventory": "inventory_search_trgm",
+    "product": "product_search_trgm",
+    "processbatch": "batch_search_trgm",
+    "purchaseorder": "purchase_order_search_trgm",
+    "salesorder": "sales_order_search_trgm",
+}
+
+
+class CreateTrigramExtension(TrigramExtension):
+    """Leaves pg_trgm installed on reverse; other schemas or indexes may use it."""
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        pass
+
+
+class AddTrigramIndexConcurrently(AddIndexConcurrently):
+    """AddIndexConcurrently on PostgreSQL only; SQLite searches through FTS5 tables instead."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+def trigram_index(model_name, columns):
+    # One multi-column GIN index per table serves any OR of ``UPPER(col::text) LIKE`` conditions.
+    return GinIndex(
+        *(OpClass(Upper(Cast(column, models.TextField())), name="gin_trgm_ops") for column in columns),
+        name=INDEX_NAMES[model_name],
+    )
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction; it builds the
+    # index without blocking writes to the table.
+    atomic = False
+
+    dependencies = [
+        ('core', '0067_tenant_scoped_indexes'),
+    ]
+
+    operations = [
+        CreateTrigramExtension(),
+        # The indexes exist only in the database: the models do not declare
+        # them, because SQLite cannot build GIN indexes.
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                AddTrigramIndexConcurrently(model_name=model_name, index=trigram_index(model_name, columns))
+                for model_name, columns in TRIGRAM_INDEX_COLUMNS.items()
+            ],
+        ),
+    ]
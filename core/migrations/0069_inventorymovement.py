@@ -0,0 +1,99 @@
+import datetime
+from decimal import Decimal
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def open_ledger(apps, schema_editor):
+    """
+    Reconcile lot allocations with their sales allocations and open each lot's ledger.
+
+    unitsallocated was never maintained by the allocation views, so it is
+    recomputed from SalesOrderAllocation before the opening balances are
+    written; the product summaries follow.
+    """
+    Inventory = apps.get_model("core", "Inventory")
+    InventoryMovement = apps.get_model("core", "InventoryMovement")
+    ProductInventorySummary = apps.get_model("core", "ProductInventorySummary")
+    SalesOrderAllocation = apps.get_model("core", "SalesOrderAllocation")
+    zero = Decimal("0")
+    now = django.utils.timezone.now()
+
+    allocated_by_lot = dict(
+        SalesOrderAllocation.objects.values("inventory_id")
+        .annotate(total=Sum("quantity"))
+        .order_by()
+        .values_list("inventory_id", "total")
+    )
+    changed, movements = [], []
+    lots = Inventory.objects.only("id", "tenant_id", "receivedate", "unitsonhand", "unitsallocated", "unitsavailable")
+    for lot in lots.iterator(chunk_size=5000):
+        on_hand = lot.unitsonhand or zero
+        allocated = allocated_by_lot.get(lot.id) or zero
+        if (lot.unitsallocated, lot.unitsavailable) != (allocated, on_hand - allocated):
+            lot.unitsallocated, lot.unitsavailable = allocated, on_hand - allocated
+            changed.append(lot)
+        occurred_at = now
+        if lot.receivedate:
+            occurred_at = datetime.datetime.combine(lot.receivedate, datetime.time.min, tzinfo=datetime.timezone.utc)
+        movements.append(InventoryMovement(
+            tenant_id=lot.tenant_id, inventory_id=lot.id, movement_type="opening",
+            on_hand_delta=on_hand, allocated_delta=allocated, on_hand_balance=on_hand,
+            allocated_balance=allocated, available_balance=on_hand - allocated,
+            reference="opening balance", occurred_at=occurred_at,
+        ))
+        if len(movements) >= 5000:
+            InventoryMovement.objects.bulk_create(movements)
+            movements = []
+    InventoryMovement.objects.bulk_create(movements)
+    Inventory.objects.bulk_update(changed, ["unitsallocated", "unitsavailable"], batch_size=5000)
+
+    allocated_by_product = dict(
+        Inventory.objects.filter(product__isnull=False)
+        .values("product_id")
+        .annotate(total=Sum("unitsallocated"))
+        .order_by()
+        .values_list("product_id", "total")
+    )
+    summaries = list(ProductInventorySummary.objects.only("id", "product_id", "allocated"))
+    for summary in summaries:
+        summary.allocated = allocated_by_product.get(summary.product_id) or zero
+    ProductInventorySummary.objects.bulk_update(summaries, ["allocated"], batch_size=5000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0068_search_trigram_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('movement_type', models.CharField(choices=[('opening', 'Opening Balance'), ('receive', 'Receive'), ('produce', 'Produce'), ('consume', 'Consume'), ('restore', 'Restore'), ('allocate', 'Allocate'), ('release', 'Release Allocation'), ('adjust', 'Adjust')], max_length=20)),
+                ('on_hand_delta', models.DecimalField(decimal_places=4, default=0, max_digits=14)),
+                ('allocated_delta', models.DecimalField(decimal_places=4, default=0, max_digits=14)),
+                ('on_hand_balance', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('allocated_balance', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('available_balance', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('reference', models.CharField(blank=True, help_text='Batch, order or reason this movement came from', max_length=100)),
+                ('occurred_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='inventory_movements', to=settings.AUTH_USER_MODEL)),
+                ('inventory', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movements', to='core.inventory')),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.tenant')),
+            ],
+            options={
+                'db_table': 'inventory_movement',
+                'ordering': ['occurred_at', 'id'],
+                'indexes': [models.Index(fields=['inventory', 'occurred_at', 'id'], name='movement_lot_time_idx'), models.Index(fields=['tenant', 'occurred_at'], name='movement_tenant_time_idx')],
+            },
+        ),
+        migrations.RunPython(open_ledger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0069_inventorymovement'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventorySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('snapshot_date', models.DateField()),
+                ('taken_at', models.DateTimeField(help_text='Ledger moment the lines were read at (end of snapshot_date)')),
+                ('lot_count', models.IntegerField(default=0)),
+                ('total_quantity', models.DecimalField(decimal_places=4, default=0, max_digits=16)),
+                ('total_value', models.DecimalField(decimal_places=4, default=0, max_digits=16)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.tenant')),
+            ],
+            options={
+                'db_table': 'inventory_snapshot',
+                'ordering': ['-snapshot_date'],
+                'constraints': [models.UniqueConstraint(fields=('tenant', 'snapshot_date'), name='inventory_snapshot_tenant_date_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='InventorySnapshotLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('unit_cost', models.DecimalField(decimal_places=4, default=0, max_digits=12)),
+                ('value', models.DecimalField(decimal_places=4, default=0, max_digits=16)),
+                ('inventory', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshot_lines', to='core.inventory')),
+                ('product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='snapshot_lines', to='core.product')),
+                ('snapshot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='core.inventorysnapshot')),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.tenant')),
+            ],
+            options={
+                'db_table': 'inventory_snapshot_line',
+                'constraints': [models.UniqueConstraint(fields=('snapshot', 'inventory'), name='snapshot_line_lot_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0070_inventory_snapshots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salesorderitem',
+            name='cost_of_goods',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='FIFO cost of the allocated quantity (see core.services.costing)', max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='salesorderitem',
+            name='gross_margin',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Amount less cost of goods', max_digits=12, null=True),
+        ),
+    ]
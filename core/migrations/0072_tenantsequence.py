@@ -0,0 +1,34 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0071_salesorderitem_costing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TenantSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=50)),
+                ('last_value', models.BigIntegerField(default=0)),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.tenant')),
+            ],
+            options={
+                'db_table': 'tenant_sequence',
+                'constraints': [models.UniqueConstraint(fields=('tenant', 'kind'), name='tenant_sequence_kind_uniq')],
+            },
+        ),
+        migrations.AlterField(
+            model_name='processbatch',
+            name='batch_number',
+            field=models.CharField(max_length=100),
+        ),
+        migrations.AddConstraint(
+            model_name='processbatch',
+            constraint=models.UniqueConstraint(fields=('tenant', 'batch_number'), name='processing_batch_number_uniq'),
+        ),
+    ]
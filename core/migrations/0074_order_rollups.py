@@ -0,0 +1,101 @@
+from collections import defaultdict
+
+from django.db import migrations, models
+
+from core.services.order_rollups import (
+    PURCHASE_ROLLUP_FIELDS,
+    ROLLUP_ITEM_VALUES,
+    SALES_ROLLUP_FIELDS,
+    purchase_order_rollup,
+    sales_order_rollup,
+)
+
+RECEIVE_STATUS_CHOICES = [('not_received', 'Not Received'), ('partial', 'Partial'), ('received', 'Received')]
+
+
+def fill_rollups(apps, schema_editor):
+    for order_name, item_name, order_field, values, rollup, fields in (
+        ('SalesOrder', 'SalesOrderItem', 'sales_order_id', ROLLUP_ITEM_VALUES, sales_order_rollup, SALES_ROLLUP_FIELDS),
+        (
+            'PurchaseOrder', 'PurchaseOrderItem', 'purchase_order_id', (*ROLLUP_ITEM_VALUES, 'received_quantity'),
+            purchase_order_rollup, PURCHASE_ROLLUP_FIELDS,
+        ),
+    ):
+        Order = apps.get_model('core', order_name)
+        Item = apps.get_model('core', item_name)
+        lines = defaultdict(list)
+        for row in Item.objects.order_by().values(order_field, *values).iterator(chunk_size=5000):
+            lines[row[order_field]].append(row)
+        orders = []
+        for order in Order.objects.filter(id__in=list(lines)).only('id').iterator(chunk_size=2000):
+            for field, value in rollup(lines[order.id]).items():
+                setattr(order, field, value)
+            orders.append(order)
+            if len(orders) >= 2000:
+                Order.objects.bulk_update(orders, fields)
+                orders = []
+        Order.objects.bulk_update(orders, fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0073_inventory_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salesorder',
+            name='items_total',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='salesorder',
+            name='line_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='salesorder',
+            name='products_summary',
+            field=models.TextField(blank=True, help_text='Product names on the item lines, comma-separated'),
+        ),
+        migrations.AddField(
+            model_name='purchaseorder',
+            name='items_total',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='purchaseorder',
+            name='line_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='purchaseorder',
+            name='products_summary',
+            field=models.TextField(blank=True, help_text='Product names on the item lines, comma-separated'),
+        ),
+        migrations.AddField(
+            model_name='purchaseorder',
+            name='expected_quantity',
+            field=models.DecimalField(decimal_places=4, default=0, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='purchaseorder',
+            name='received_quantity',
+            field=models.DecimalField(decimal_places=4, default=0, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='purchaseorder',
+            name='unit_types',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='purchaseorder',
+            name='item_receive_status',
+            field=models.CharField(
+                blank=True, choices=RECEIVE_STATUS_CHOICES, max_length=20,
+                help_text='Receive status derived from the item lines; blank without any',
+            ),
+        ),
+        migrations.RunPython(fill_rollups, migrations.RunPython.noop),
+    ]
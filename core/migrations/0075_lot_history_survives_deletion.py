@@ -0,0 +1,67 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+MOVEMENT_TYPE_CHOICES = [
+    ('opening', 'Opening Balance'), ('receive', 'Receive'), ('produce', 'Produce'), ('consume', 'Consume'),
+    ('restore', 'Restore'), ('allocate', 'Allocate'), ('release', 'Release Allocation'), ('adjust', 'Adjust'),
+    ('delete', 'Lot Deleted'),
+]
+
+
+def copy_lot_details_to_snapshot_lines(apps, schema_editor):
+    InventorySnapshotLine = apps.get_model('core', 'InventorySnapshotLine')
+    lines = []
+    for line in InventorySnapshotLine.objects.select_related('inventory', 'product').iterator(chunk_size=2000):
+        lot, product = line.inventory, line.product
+        line.vendorlot = (lot.vendorlot if lot else '') or ''
+        names = (
+            product.description, product.item_name, product.product_id,
+        ) if product else ()
+        names += (lot.desc, lot.productid) if lot else ()
+        line.product_name = next((name for name in names if name), '')[:255]
+        lines.append(line)
+        if len(lines) >= 2000:
+            InventorySnapshotLine.objects.bulk_update(lines, ['vendorlot', 'product_name'])
+            lines = []
+    InventorySnapshotLine.objects.bulk_update(lines, ['vendorlot', 'product_name'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0074_order_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventory',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Set when the lot is deleted; the row stays for its ledger history', null=True),
+        ),
+        migrations.AlterField(
+            model_name='inventorymovement',
+            name='inventory',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.RESTRICT, related_name='movements', to='core.inventory'),
+        ),
+        migrations.AlterField(
+            model_name='inventorymovement',
+            name='movement_type',
+            field=models.CharField(choices=MOVEMENT_TYPE_CHOICES, max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='inventorysnapshotline',
+            name='inventory',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='snapshot_lines', to='core.inventory'),
+        ),
+        migrations.AddField(
+            model_name='inventorysnapshotline',
+            name='vendorlot',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='inventorysnapshotline',
+            name='product_name',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.RunPython(copy_lot_details_to_snapshot_lines, migrations.RunPython.noop),
+    ]
@@ -1,17 +1,10 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User as DjangoUser
-from threading import local
 from django.conf import settings
+from django.utils import timezone
 import uuid
 from . import constants as C
-
-_thread_locals = local()
-
-def get_current_tenant():
-    return getattr(_thread_locals, 'tenant', None)
-
-def set_current_tenant(tenant):
-    _thread_locals.tenant = tenant
+from .tenancy import TenantContextError, get_current_tenant, is_strict_mode, set_current_tenant, tenant_context  # noqa: F401
 
 class TenantManager(models.Manager):
     """Manager that automatically filters by current tenant"""
@@ -19,10 +12,22 @@ class TenantManager(models.Manager):
     def get_queryset(self):
         qs = super().get_queryset()
         tenant = get_current_tenant()
-        if tenant:
+        if tenant is not None:
             return qs.filter(tenant=tenant)
+        if is_strict_mode():
+            raise TenantContextError(
+                f"{self.model.__name__}.objects was queried without a tenant context. "
+                f"Wrap the call in tenant_context() or use {self.model.__name__}.all_objects."
+            )
         return qs
 
+class InventoryManager(TenantManager):
+    """TenantManager that leaves out deleted lots (see Inventory.deleted_at)."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class TenantModel(models.Model):
     """Abstract base model for tenant-scoped models"""
     tenant = models.ForeignKey('Tenant', on_delete=models.CASCADE)
@@ -116,6 +121,22 @@ class User(TenantModel):
     
     def __str__(self):
         return self.name if self.name else f"User #{self.id}"
+
+
+class TenantSequence(TenantModel):
+    """Last number handed out per tenant for a kind of document (see core.services.sequences)."""
+
+    kind = models.CharField(max_length=50)
+    last_value = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'tenant_sequence'
+        constraints = [
+            models.UniqueConstraint(fields=['tenant', 'kind'], name='tenant_sequence_kind_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.tenant_id} {self.kind} {self.last_value}"
     
 
 # =============================================================================
@@ -400,14 +421,64 @@ class Product(TenantModel):
     buying_volume = models.CharField(max_length=50, blank=True)
     buying_piece_count = models.CharField(max_length=50, blank=True)
     profit_margin_target = models.DecimalField(max_digits=6, decimal_places=2, null=True, blank=True, help_text="Target profit margin %")
+    # Lowercased, whitespace-collapsed copies of the fields lots are matched on (see set_lookup_keys)
+    normalized_product_id = models.CharField(max_length=100, blank=True, editable=False)
+    normalized_description = models.CharField(max_length=255, blank=True, editable=False)
+    normalized_item_name = models.CharField(max_length=255, blank=True, editable=False)
+    normalized_friendly_name = models.CharField(max_length=255, blank=True, editable=False)
+    normalized_qb_item_name = models.CharField(max_length=255, blank=True, editable=False)
+
+    LOOKUP_FIELDS = ('product_id', 'description', 'item_name', 'friendly_name', 'qb_item_name')
 
     class Meta:
         db_table = 'inventory_product'
         ordering = ['sort_order', 'description']
+        indexes = [
+            models.Index(fields=['tenant', 'normalized_product_id'], name='product_lookup_id_idx'),
+            models.Index(fields=['tenant', 'normalized_description'], name='product_lookup_desc_idx'),
+            models.Index(fields=['tenant', 'normalized_item_name'], name='product_lookup_item_name_idx'),
+            models.Index(fields=['tenant', 'normalized_friendly_name'], name='product_lookup_friendly_idx'),
+            models.Index(fields=['tenant', 'normalized_qb_item_name'], name='product_lookup_qb_name_idx'),
+        ]
 
     def __str__(self):
         return self.description or f"{self.item_number} - {self.product_id}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_loaded_values()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        self.remember_loaded_values()
+
+    def remember_loaded_values(self):
+        """Record the loaded field values as stored in the database; the save signals compare against them."""
+        self._loaded_values = {
+            field.attname: self.__dict__[field.attname]
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+        }
+
+    def set_lookup_keys(self):
+        """Refresh the normalized_* columns; call before bulk_create, which skips save()."""
+        for field in self.LOOKUP_FIELDS:
+            setattr(self, f"normalized_{field}", " ".join(str(getattr(self, field) or "").lower().split()))
+
+    def save(self, *args, **kwargs):
+        self.set_lookup_keys()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and set(update_fields) & set(self.LOOKUP_FIELDS):
+            kwargs["update_fields"] = {*update_fields, *(f"normalized_{field}" for field in self.LOOKUP_FIELDS)}
+        super().save(*args, **kwargs)
+        if kwargs.get("update_fields") is None or getattr(self, "_loaded_values", None) is None:
+            self.remember_loaded_values()
+        else:
+            attnames = {self._meta.get_field(field).attname for field in kwargs["update_fields"]}
+            self._loaded_values.update((attname, self.__dict__[attname]) for attname in attnames if attname in self.__dict__)
+
     def generate_item_name(self):
         """Keep product naming clean and let units or pack live in dedicated fields."""
         if self.description:
@@ -426,7 +497,7 @@ class Inventory(TenantModel):
     productid = models.CharField(max_length=100, null=True, blank=True)
     desc = models.CharField(max_length=255, blank=True)
     vendorid = models.CharField(max_length=100, blank=True)
-    receivedate = models.CharField(max_length=50, blank=True)
+    receivedate = models.DateField(null=True, blank=True)
     vendorlot = models.CharField(max_length=100, blank=True)
     actualcost = models.DecimalField(max_digits=12, decimal_places=4, null=True, blank=True)
     unittype = models.CharField(max_length=50, blank=True)
@@ -447,7 +518,7 @@ class Inventory(TenantModel):
     origin = models.CharField(max_length=100, blank=True)
     shelflife = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     critical = models.CharField(max_length=100, blank=True)
-    packdate = models.CharField(max_length=50, blank=True)
+    packdate = models.DateField(null=True, blank=True)
     poid = models.CharField(max_length=100, blank=True)
     purchase_order = models.ForeignKey('PurchaseOrder', on_delete=models.SET_NULL, null=True, blank=True,
                                       related_name='received_lots', help_text="Linked purchase order")
@@ -468,18 +539,127 @@ class Inventory(TenantModel):
     flagged = models.IntegerField(default=0)
     fixed = models.IntegerField(default=0)
     hidden = models.IntegerField(default=0)
-    updatetime = models.CharField(max_length=50, blank=True)
+    updatetime = models.DateTimeField(null=True, blank=True)
+    legacy_dates = models.JSONField(null=True, blank=True, editable=False,
+                                    help_text="Date text that could not be parsed when the date columns became typed, by field")
     # Receiving fields
     location = models.CharField(max_length=100, blank=True, help_text="Storage location e.g. Cooler A")
     receive_time = models.CharField(max_length=20, blank=True, help_text="Time received e.g. 9:21 am")
     vendor_type = models.CharField(max_length=50, blank=True, help_text="e.g. Dealer, Harvester")
+    product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True, blank=True, related_name='inventory_lots',
+                                help_text="Catalog product, resolved from po_item or productid/desc on save")
+    version = models.PositiveIntegerField(default=0,
+                                          help_text="Bumped on every quantity change; guards concurrent updates")
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False,
+                                      help_text="Set when the lot is deleted; the row stays for its ledger history")
+
+    # Inventory.objects hides deleted lots; all_objects still sees them.
+    objects = InventoryManager()
+
+    LOOKUP_FIELDS = ('po_item_id', 'productid', 'desc')
+    # Written only by the inventory ledger (services/inventory_ledger.py), never by a plain save().
+    LEDGER_FIELDS = ('unitsonhand', 'unitsallocated', 'unitsavailable', 'version')
+    # What the lot contributes to ProductInventorySummary; the saved values are remembered so the
+    # save signals can apply the difference without reading the row again.
+    SUMMARY_FIELDS = ('product_id', 'deleted_at', 'unitsin', 'unitsallocated', 'unitsonhand')
 
     class Meta:
         db_table = 'inventory_inventory'
+        indexes = [
+            models.Index(fields=['tenant', 'receivedate'], name='inventory_tenant_received_idx'),
+            models.Index(fields=['tenant', 'product', 'receivedate'], name='inventory_product_received_idx'),
+            models.Index(fields=['tenant', 'productid', 'unitsonhand'], name='inventory_productid_onhand_idx'),
+        ]
 
     def __str__(self):
         return f"{self.productid} - {self.desc}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_lookup = instance._lookup_values()
+        instance.remember_summary_values()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        if fields is None:
+            self.remember_summary_values()
+        elif getattr(self, "_loaded_summary", None) is not None:
+            attnames = {self._meta.get_field(field).attname for field in fields}
+            self._loaded_summary.update(
+                (field, self.__dict__[field]) for field in self.SUMMARY_FIELDS if field in attnames
+            )
+
+    def _lookup_values(self):
+        # Deferred fields are missing from __dict__; treat them as unknown rather than loading them.
+        return tuple(self.__dict__.get(field, models.DEFERRED) for field in self.LOOKUP_FIELDS)
+
+    def remember_summary_values(self):
+        """Record the summary fields as stored in the database; None while any of them is deferred."""
+        if all(field in self.__dict__ for field in self.SUMMARY_FIELDS):
+            self._loaded_summary = {field: self.__dict__[field] for field in self.SUMMARY_FIELDS}
+        else:
+            self._loaded_summary = None
+
+    def resolve_product(self):
+        """Point ``product`` at the catalog product this lot's PO line or productid/desc matches."""
+        from .services.product_lookup import resolve_lot_product_id
+
+        self.product_id = resolve_lot_product_id(self.tenant_id, self.po_item_id, self.productid, self.desc)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None and not self._state.adding and not kwargs.get("force_insert"):
+            # A lot edited in a form must not write back quantities other requests changed since it was loaded.
+            current = Inventory.all_objects.filter(pk=self.pk).values_list(*self.LEDGER_FIELDS).first()
+            if current is not None:
+                for field, value in zip(self.LEDGER_FIELDS, current):
+                    setattr(self, field, value)
+                    if getattr(self, "_loaded_summary", None) is not None and field in self._loaded_summary:
+                        self._loaded_summary[field] = value
+                update_fields = kwargs["update_fields"] = [
+                    field.name for field in self._meta.concrete_fields
+                    if not field.primary_key and field.name not in self.LEDGER_FIELDS
+                ]
+        lookup_saved = update_fields is None or bool({"po_item", *self.LOOKUP_FIELDS} & set(update_fields))
+        if lookup_saved:
+            lookup_changed = getattr(self, "_loaded_lookup", None) != self._lookup_values()
+            if self.product_id is None or (not self._state.adding and lookup_changed):
+                self.resolve_product()
+                if update_fields is not None:
+                    kwargs["update_fields"] = {*update_fields, "product"}
+        # The save signals update ProductInventorySummary; keep both writes in one transaction.
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+        self._loaded_lookup = self._lookup_values()
+        self.remember_summary_values()
+
+
+class ProductInventorySummary(TenantModel):
+    """Running lot totals per product, maintained by the Inventory signals and the inventory ledger."""
+
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, related_name='inventory_summary')
+    expected = models.DecimalField(max_digits=14, decimal_places=4, default=0)
+    allocated = models.DecimalField(max_digits=14, decimal_places=4, default=0)
+    on_hand = models.DecimalField(max_digits=14, decimal_places=4, default=0)
+    lot_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'inventory_product_summary'
+
+    def __str__(self):
+        return f"{self.product_id} on hand {self.on_hand}"
+
+    def totals(self):
+        return {
+            "expected": self.expected,
+            "allocated": self.allocated,
+            "on_hand": self.on_hand,
+            "available": self.on_hand - self.allocated,
+        }
+
 
 class InventoryAdjustment(TenantModel):
     """Audit log for inventory quantity adjustments."""
@@ -509,6 +689,82 @@ class InventoryAdjustment(TenantModel):
         return f"{self.inventory_id} {self.adjustment_type} {self.quantity_delta}"
 
 
+class InventoryMovement(TenantModel):
+    """Append-only ledger of lot quantity changes, with the lot's balances after each one."""
+    MOVEMENT_TYPE_CHOICES = C.INVENTORY_MOVEMENT_TYPE_CHOICES
+
+    # RESTRICT keeps a lot's ledger from being deleted with it (lots are soft-deleted instead); unlike
+    # PROTECT it still lets deleting the tenant cascade to both.
+    inventory = models.ForeignKey('Inventory', on_delete=models.RESTRICT, related_name='movements')
+    movement_type = models.CharField(max_length=20, choices=MOVEMENT_TYPE_CHOICES)
+    on_hand_delta = models.DecimalField(max_digits=14, decimal_places=4, default=0)
+    allocated_delta = models.DecimalField(max_digits=14, decimal_places=4, default=0)
+    on_hand_balance = models.DecimalField(max_digits=14, decimal_places=4)
+    allocated_balance = models.DecimalField(max_digits=14, decimal_places=4)
+    available_balance = models.DecimalField(max_digits=14, decimal_places=4)
+    reference = models.CharField(max_length=100, blank=True, help_text="Batch, order or reason this movement came from")
+    occurred_at = models.DateTimeField(default=timezone.now)
+    created_by = models.ForeignKey(
+        'auth.User', on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='inventory_movements',
+    )
+
+    class Meta:
+        db_table = 'inventory_movement'
+        ordering = ['occurred_at', 'id']
+        indexes = [
+            models.Index(fields=['inventory', 'occurred_at', 'id'], name='movement_lot_time_idx'),
+            models.Index(fields=['tenant', 'occurred_at'], name='movement_tenant_time_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.inventory_id} {self.movement_type} {self.on_hand_delta}"
+
+
+class InventorySnapshot(TenantModel):
+    """End-of-day stock and valuation for a tenant; one line per lot with stock on hand."""
+
+    snapshot_date = models.DateField()
+    taken_at = models.DateTimeField(help_text="Ledger moment the lines were read at (end of snapshot_date)")
+    lot_count = models.IntegerField(default=0)
+    total_quantity = models.DecimalField(max_digits=16, decimal_places=4, default=0)
+    total_value = models.DecimalField(max_digits=16, decimal_places=4, default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'inventory_snapshot'
+        ordering = ['-snapshot_date']
+        constraints = [
+            models.UniqueConstraint(fields=['tenant', 'snapshot_date'], name='inventory_snapshot_tenant_date_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.tenant_id} {self.snapshot_date}"
+
+
+class InventorySnapshotLine(TenantModel):
+    """A lot's quantity, unit cost and value in an InventorySnapshot."""
+
+    snapshot = models.ForeignKey(InventorySnapshot, on_delete=models.CASCADE, related_name='lines')
+    # Snapshots are history: a line outlives its lot and product and keeps copies of what it showed.
+    inventory = models.ForeignKey('Inventory', on_delete=models.SET_NULL, null=True, blank=True, related_name='snapshot_lines')
+    product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True, blank=True, related_name='snapshot_lines')
+    vendorlot = models.CharField(max_length=100, blank=True)
+    product_name = models.CharField(max_length=255, blank=True)
+    quantity = models.DecimalField(max_digits=14, decimal_places=4)
+    unit_cost = models.DecimalField(max_digits=12, decimal_places=4, default=0)
+    value = models.DecimalField(max_digits=16, decimal_places=4, default=0)
+
+    class Meta:
+        db_table = 'inventory_snapshot_line'
+        constraints = [
+            models.UniqueConstraint(fields=['snapshot', 'inventory'], name='snapshot_line_lot_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.snapshot_id} {self.inventory_id} {self.quantity}"
+
+
 class ReceivingQualityCheck(TenantModel):
     """Freshness and receiving quality checklist for a received lot."""
     STATUS_CHOICES = C.RECEIVING_QUALITY_STATUS_CHOICES
@@ -596,6 +852,11 @@ class SalesOrder(TenantModel):
     delivery_temperature = models.DecimalField(max_digits=6, decimal_places=2, null=True, blank=True,
                                                help_text="Product temperature at delivery (°F)")
 
+    # Rollups of the order's lines, maintained by core.services.order_rollups
+    items_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    line_count = models.IntegerField(default=0)
+    products_summary = models.TextField(blank=True, help_text="Product names on the item lines, comma-separated")
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -603,6 +864,10 @@ class SalesOrder(TenantModel):
         db_table = 'sales_order'
         unique_together = [['tenant', 'order_number']]
         ordering = ['-order_date', '-created_at']
+        indexes = [
+            models.Index(fields=['tenant', '-order_date', '-created_at'], name='sales_order_order_date_idx'),
+            models.Index(fields=['tenant', '-ship_date', '-created_at'], name='sales_order_ship_date_idx'),
+        ]
 
     def __str__(self):
         return f"SO-{self.order_number} ({self.customer_name})"
@@ -622,6 +887,10 @@ class SalesOrderItem(TenantModel):
     unit_price = models.DecimalField(max_digits=12, decimal_places=4, null=True, blank=True)
     margin = models.CharField(max_length=50, blank=True)
     amount = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    cost_of_goods = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True,
+                                        help_text="FIFO cost of the allocated quantity (see core.services.costing)")
+    gross_margin = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True,
+                                       help_text="Amount less cost of goods")
     process_type = models.CharField(max_length=30, choices=C.PROCESS_TYPE_CHOICES, blank=True)
     process_source_lot_ids = models.TextField(blank=True, help_text="Comma-separated inventory IDs selected as process sources")
     process_batch = models.ForeignKey('ProcessBatch', on_delete=models.SET_NULL, null=True, blank=True, related_name='sales_items')
@@ -651,6 +920,9 @@ class SalesOrderAllocation(TenantModel):
     class Meta:
         db_table = 'sales_order_allocation'
         ordering = ['created_at', 'id']
+        indexes = [
+            models.Index(fields=['tenant', 'inventory'], name='so_allocation_inventory_idx'),
+        ]
 
     def __str__(self):
         return f"SO item {self.sales_order_item_id} <- inventory {self.inventory_id}"
@@ -680,6 +952,16 @@ class PurchaseOrder(TenantModel):
         'auth.User', on_delete=models.SET_NULL, null=True, blank=True,
         related_name='purchase_orders',
     )
+
+    # Rollups of the order's lines, maintained by core.services.order_rollups
+    items_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    line_count = models.IntegerField(default=0)
+    products_summary = models.TextField(blank=True, help_text="Product names on the item lines, comma-separated")
+    expected_quantity = models.DecimalField(max_digits=14, decimal_places=4, default=0)
+    received_quantity = models.DecimalField(max_digits=14, decimal_places=4, default=0)
+    unit_types = models.CharField(max_length=255, blank=True)
+    item_receive_status = models.CharField(max_length=20, choices=RECEIVE_STATUS_CHOICES, blank=True,
+                                           help_text="Receive status derived from the item lines; blank without any")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -687,14 +969,13 @@ class PurchaseOrder(TenantModel):
         db_table = 'purchasing_order'
         unique_together = [['tenant', 'po_number']]
         ordering = ['-order_date', '-created_at']
+        indexes = [
+            models.Index(fields=['tenant', '-order_date', '-created_at'], name='purchasing_order_date_idx'),
+        ]
 
     def __str__(self):
         return f"PO-{self.po_number} ({self.vendor_name})"
 
-    @property
-    def total(self):
-        return sum(item.amount or 0 for item in self.items.all())
-
 
 class PurchaseOrderItem(TenantModel):
     """Line items on a purchase order."""
@@ -742,7 +1023,7 @@ class ProcessBatch(TenantModel):
     PROCESS_TYPES = C.PROCESS_TYPE_CHOICES
     STATUS_CHOICES = C.PROCESS_STATUS_CHOICES
 
-    batch_number = models.CharField(max_length=100, unique=True)
+    batch_number = models.CharField(max_length=100)
     process_type = models.CharField(max_length=30, choices=PROCESS_TYPES)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft')
     started_at = models.DateTimeField(auto_now_add=True)
@@ -770,6 +1051,9 @@ class ProcessBatch(TenantModel):
     class Meta:
         db_table = 'processing_batch'
         ordering = ['-started_at']
+        constraints = [
+            models.UniqueConstraint(fields=['tenant', 'batch_number'], name='processing_batch_number_uniq'),
+        ]
 
     def __str__(self):
         return f"{self.batch_number} ({self.get_process_type_display()})"
@@ -802,6 +1086,9 @@ class ProcessBatchSource(TenantModel):
 
     class Meta:
         db_table = 'processing_batch_source'
+        indexes = [
+            models.Index(fields=['tenant', 'inventory'], name='batch_source_inventory_idx'),
+        ]
 
     def __str__(self):
         return f"{self.batch.batch_number} <- {self.inventory}"
@@ -820,6 +1107,9 @@ class ProcessBatchOutput(TenantModel):
 
     class Meta:
         db_table = 'processing_batch_output'
+        indexes = [
+            models.Index(fields=['tenant', 'inventory'], name='batch_output_inventory_idx'),
+        ]
 
     def __str__(self):
         return f"{self.batch.batch_number} -> {self.lot_id}"
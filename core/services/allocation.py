@@ -0,0 +1,249 @@
+"""
+FIFO allocation of inventory lots to sales order lines.
+
+allocate_order_fifo() replaces an order's allocations with a fresh FIFO
+plan: each item line takes from its product's lots (or, for lines without a
+product, lots whose description matches), oldest receive date first. Only
+stock not allocated to other orders counts as available. allocate_wave()
+does the same for many orders at once (e.g. everything shipping on a day),
+serving them in a configurable priority from shared per-product queues.
+
+The plan is set-based. The orders' lines, their current allocations and
+every candidate lot are read in three queries, FIFO queues are built in
+memory, and the result is written with one delete, one bulk_create and one
+ledger update (record_lot_movements) per batch of lots. Each lot gets a
+single net movement. The query count does not grow with the number of
+orders or lines. If another request changes one of the lots in the
+meantime, the plan is rebuilt from fresh balances.
+"""
+from collections import defaultdict
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.functions import Lower
+
+from ..models import Inventory, SalesOrder, SalesOrderAllocation, SalesOrderItem
+from .inventory_ledger import LOT_UPDATE_ATTEMPTS, LotConflictError, allocations_recorded_by_caller, record_lot_movements
+from .pick_lists import invalidate_pick_lists
+
+# Keys accepted by allocate_wave(priority=...) and the SalesOrder ordering each stands for.
+WAVE_PRIORITIES = {
+    "ship_date": F("ship_date").asc(nulls_last=True),
+    "delivery_date": F("delivery_date").asc(nulls_last=True),
+    "order_date": F("order_date").asc(nulls_last=True),
+    "customer": "customer_name",
+    "route": "shipping_route",
+}
+DEFAULT_WAVE_PRIORITY = ("ship_date", "order_date")
+WAVE_EXCLUDED_STATUSES = ("closed", "cancelled")
+
+_ZERO = Decimal("0")
+
+
+@dataclass
+class WaveResult:
+    orders: int
+    lines: int
+    allocations: int
+    # [{"order_id", "order_number", "customer_name", "item_id", "item_name", "short_qty"}]
+    shortages: list
+
+
+def _decimal(value):
+    return Decimal(str(value or 0))
+
+
+def _line_key(item):
+    """The FIFO queue a line draws from, or None when it names neither a product nor a description."""
+    if item.product_id:
+        return ("product", item.product_id)
+    if item.description:
+        return ("desc", item.description.lower())
+    return None
+
+
+def _item_name(item):
+    product = item.product
+    return item.description or (product.item_name or product.description or product.product_id if product else "")
+
+
+def candidate_lots(tenant, keys, released_lot_ids=()):
+    """
+    Lots with free stock for the given line keys, oldest first, as {key: [lot, ...]}.
+
+    A lot can serve several keys. Lots in ``released_lot_ids`` (stock the
+    caller is about to release) are included even when fully allocated.
+    """
+    product_ids = {value for kind, value in keys if kind == "product"}
+    descriptions = {value for kind, value in keys if kind == "desc"}
+    if not product_ids and not descriptions:
+        return {}
+    lots = (
+        Inventory.all_objects.filter(tenant=tenant, unitsonhand__gt=0)
+        .filter(Q(unitsavailable__gt=0) | Q(id__in=released_lot_ids))
+        .annotate(desc_key=Lower("desc"))
+        .filter(Q(product_id__in=product_ids) | Q(desc_key__in=descriptions))
+        .only("id", "tenant_id", "product_id", "desc", "unittype", "unitsonhand", "unitsallocated", "version")
+        .order_by(F("receivedate").asc(nulls_last=True), "id")
+    )
+    queues = defaultdict(list)
+    for lot in lots:
+        if lot.product_id in product_ids:
+            queues[("product", lot.product_id)].append(lot)
+        if lot.desc_key in descriptions:
+            queues[("desc", lot.desc_key)].append(lot)
+    return queues
+
+
+def allocate_order_fifo(order, user=None):
+    """
+    Re-allocate ``order``'s item lines FIFO and return the shortages.
+
+    Shortages are [{"item_name", "short_qty"}] for lines that could not be
+    covered in full.
+    """
+    result = _run([order], user, reference=f"SO {order.order_number}")
+    return [{"item_name": row["item_name"], "short_qty": row["short_qty"]} for row in result.shortages]
+
+
+def wave_orders(tenant, ship_date_from=None, ship_date_to=None, order_ids=None):
+    """Open orders of ``tenant`` shipping in the date range and/or with the given ids."""
+    orders = SalesOrder.all_objects.filter(tenant=tenant, is_completed=False).exclude(
+        order_status__in=WAVE_EXCLUDED_STATUSES,
+    )
+    if ship_date_from:
+        orders = orders.filter(ship_date__gte=ship_date_from)
+    if ship_date_to:
+        orders = orders.filter(ship_date__lte=ship_date_to)
+    if order_ids is not None:
+        orders = orders.filter(id__in=order_ids)
+    return orders
+
+
+def parse_wave_priority(value):
+    """Priority keys from a list or comma-separated string; raises ValueError for unknown keys."""
+    if isinstance(value, str):
+        value = value.split(",")
+    keys = tuple(key.strip() for key in value or () if key and key.strip()) or DEFAULT_WAVE_PRIORITY
+    unknown = [key for key in keys if key not in WAVE_PRIORITIES]
+    if unknown:
+        raise ValueError(f"Unknown priority {', '.join(unknown)}; use {', '.join(WAVE_PRIORITIES)}.")
+    return keys
+
+
+def allocate_wave(orders, priority=DEFAULT_WAVE_PRIORITY, user=None):
+    """
+    Allocate every order in the ``orders`` queryset in one pass and return a WaveResult.
+
+    Orders are served in ``priority`` order (keys of WAVE_PRIORITIES, ties
+    broken by order id) from shared FIFO queues per product, so the first
+    order in priority, not the first one clicked, gets the oldest stock.
+    Each order's existing allocations are released and re-planned.
+    """
+    ordering = [WAVE_PRIORITIES[key] for key in parse_wave_priority(priority)]
+    orders = list(orders.order_by(*ordering, "id"))
+    return _run(orders, user, reference=f"allocation wave ({len(orders)} orders)")
+
+
+def _run(orders, user, reference):
+    for _ in range(LOT_UPDATE_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                return _allocate(orders, user, reference)
+        except LotConflictError:
+            continue
+    raise LotConflictError(f"Lots kept changing while allocating {len(orders)} orders.")
+
+
+def _allocate(orders, user, reference):
+    if not orders:
+        return WaveResult(orders=0, lines=0, allocations=0, shortages=[])
+    tenant = orders[0].tenant
+    rank = {order.id: index for index, order in enumerate(orders)}
+    items = sorted(
+        SalesOrderItem.all_objects.filter(sales_order_id__in=rank, item_type="item").select_related("product"),
+        key=lambda item: (rank[item.sales_order_id], item.sort_order, item.id),
+    )
+    current = list(
+        SalesOrderAllocation.all_objects.filter(sales_order_item__sales_order_id__in=rank)
+        .values_list("id", "inventory_id", "quantity")
+    )
+    # Stock already held by these orders is released by the re-allocation, so it counts as available.
+    released = defaultdict(Decimal)
+    for _, inventory_id, quantity in current:
+        released[inventory_id] += _decimal(quantity)
+    queues = candidate_lots(tenant, {key for key in map(_line_key, items) if key}, released)
+    lots = {lot.id: lot for queue in queues.values() for lot in queue}
+    available = {
+        lot_id: _decimal(lot.unitsonhand) - _decimal(lot.unitsallocated) + released.get(lot_id, _ZERO)
+        for lot_id, lot in lots.items()
+    }
+    # Position of the first lot in each queue that may still have stock.
+    heads = defaultdict(int)
+
+    allocations = []
+    allocated = defaultdict(Decimal)
+    shortages = []
+    orders_by_id = {order.id: order for order in orders}
+    user_name = (user.get_full_name() or user.username) if user else ""
+    for item in items:
+        needed = _decimal(item.quantity)
+        key = _line_key(item)
+        if needed <= 0 or key is None:
+            continue
+        queue = queues.get(key, ())
+        position = heads[key]
+        while position < len(queue) and needed > 0:
+            lot = queue[position]
+            take = min(available[lot.id], needed)
+            if take > 0:
+                available[lot.id] -= take
+                allocated[lot.id] += take
+                needed -= take
+                allocations.append(SalesOrderAllocation(
+                    tenant_id=tenant.id,
+                    sales_order_item=item,
+                    inventory=lot,
+                    quantity=take,
+                    unit_type=item.unit_type or lot.unittype or "",
+                    allocated_by=user,
+                    allocated_by_name=user_name,
+                ))
+            if available[lot.id] <= 0:
+                position += 1
+        heads[key] = position
+        if needed > 0:
+            order = orders_by_id[item.sales_order_id]
+            shortages.append({
+                "order_id": order.id,
+                "order_number": order.order_number,
+                "customer_name": order.customer_name,
+                "item_id": item.id,
+                "item_name": _item_name(item),
+                "short_qty": round(float(needed), 4),
+            })
+
+    # Lots these orders release without re-allocating were not read above; their balances are needed too.
+    missing = set(released) - set(lots)
+    lots.update(
+        (lot.id, lot)
+        for lot in Inventory.all_objects.filter(id__in=missing).only(
+            "id", "tenant_id", "product_id", "unitsonhand", "unitsallocated", "version",
+        )
+    )
+    changes = []
+    for lot_id in sorted(set(released) | set(allocated)):
+        delta = allocated.get(lot_id, _ZERO) - released.get(lot_id, _ZERO)
+        if delta and lot_id in lots:
+            changes.append((lots[lot_id], "allocate" if delta > 0 else "release", _ZERO, delta))
+
+    with allocations_recorded_by_caller():
+        SalesOrderAllocation.all_objects.filter(id__in=[allocation_id for allocation_id, _, _ in current]).delete()
+        SalesOrderAllocation.all_objects.bulk_create(allocations, batch_size=1000)
+    record_lot_movements(changes, reference=reference, user=user)
+    invalidate_pick_lists(tenant.id)
+    return WaveResult(
+        orders=len(orders), lines=len(items), allocations=len(allocations), shortages=shortages,
+    )
@@ -0,0 +1,217 @@
+"""
+FIFO cost of goods sold and gross margin per sales line.
+
+Each product's lots are its cost layers, oldest receive date first:
+received lots at their actualcost (the product's raw_cost when blank),
+processing output lots at the cost of the batch that produced them (what
+its sources cost, spread over the output quantity, plus the output
+product's labor_pack_cost). Processing consumption (ProcessBatchSource) and
+sales allocations (SalesOrderAllocation) are the product's outflows, in date
+order, and each is charged for the layer quantity it uses up under FIFO.
+Lots without a product are costed on their own.
+
+Costing runs on NumPy arrays for the whole tenant at once. With every
+product's layers laid end to end, the cumulative quantity and cumulative
+cost form one piecewise-linear curve. An outflow's cost is the curve's rise
+over the stretch of its product's segment that the outflow covers, so
+np.interp costs every outflow in one call. Quantity beyond a product's
+layers is charged at its last layer's cost. Output lots are costed from the
+consumption of the previous pass; passes repeat until batch costs settle
+(one extra pass per level of processing).
+
+cost_tenant() writes SalesOrderItem.cost_of_goods and gross_margin (the
+line amount less cost of goods) for every line with allocations and clears
+them on lines that no longer have any.
+"""
+from dataclasses import dataclass
+from decimal import Decimal
+
+import numpy as np
+from django.db import connection, transaction
+from django.db.models import FloatField
+from django.db.models.functions import Cast, Coalesce
+
+from ..models import Inventory, ProcessBatchOutput, ProcessBatchSource, SalesOrderAllocation, SalesOrderItem
+
+MAX_PASSES = 10
+WRITE_BATCH_SIZE = 1000
+
+_CENT = Decimal("0.01")
+
+
+@dataclass
+class CostingResult:
+    lots: int
+    outflows: int
+    passes: int
+    lines_costed: int
+    lines_updated: int
+
+
+def fifo_outflow_costs(layer_group, layer_qty, layer_cost, outflow_group, outflow_qty, group_count):
+    """
+    FIFO cost of each outflow.
+
+    Layers and outflows are arrays sorted by group (dense ints below
+    ``group_count``), each group in FIFO/date order. Layer quantities must
+    not be negative. Quantity beyond a group's layers costs its last layer's
+    unit cost (nothing for a group without layers).
+    """
+    layer_counts = np.bincount(layer_group, minlength=group_count)
+    layer_ends = np.cumsum(layer_counts)
+    layer_starts = layer_ends - layer_counts
+    curve_qty = np.concatenate(([0.0], np.cumsum(layer_qty)))
+    curve_cost = np.concatenate(([0.0], np.cumsum(layer_qty * layer_cost)))
+    segment_start = curve_qty[layer_starts]
+    segment_length = curve_qty[layer_ends] - segment_start
+    last_cost = np.zeros(group_count)
+    has_layers = layer_counts > 0
+    last_cost[has_layers] = layer_cost[layer_ends[has_layers] - 1]
+
+    used_after = _group_cumsum(outflow_qty, outflow_group)
+    used_before = used_after - outflow_qty
+    start = segment_start[outflow_group]
+    length = segment_length[outflow_group]
+    covered = (
+        np.interp(start + np.minimum(used_after, length), curve_qty, curve_cost)
+        - np.interp(start + np.minimum(used_before, length), curve_qty, curve_cost)
+    )
+    beyond = np.maximum(used_after - length, 0) - np.maximum(used_before - length, 0)
+    return covered + beyond * last_cost[outflow_group]
+
+
+def _group_cumsum(values, groups):
+    """Running total of ``values`` restarting at every change of (sorted) ``groups``."""
+    if not len(values):
+        return values.copy()
+    totals = np.cumsum(values)
+    first = np.flatnonzero(np.concatenate(([True], groups[1:] != groups[:-1])))
+    offsets = (totals - values)[first]
+    return totals - np.repeat(offsets, np.diff(np.concatenate((first, [len(values)]))))
+
+
+def _as_float(field):
+    return Coalesce(Cast(field, FloatField()), 0.0)
+
+
+def _days(values):
+    """Day ordinals for dates/datetimes; undated rows sort first."""
+    return np.array([value.toordinal() if value else 0 for value in values], dtype=np.int64)
+
+
+def _floats(values):
+    return np.array([np.nan if value is None else value for value in values], dtype=float)
+
+
+def _columns(rows, count):
+    return [list(column) for column in zip(*rows)] if rows else [[] for _ in range(count)]
+
+
+def cost_tenant(tenant):
+    """Run FIFO costing for ``tenant`` and write cost of goods and margin on its sales lines."""
+    lot_ids, lot_products, lot_days, lot_qty, lot_cost, lot_raw_cost = _columns(list(
+        Inventory.all_objects.filter(tenant=tenant)
+        .values_list(
+            "id", "product_id", "receivedate", _as_float("unitsin"),
+            Cast("actualcost", FloatField()), Cast("product__raw_cost", FloatField()),
+        )
+        .order_by("id")
+    ), 6)
+    outputs = _columns(list(
+        ProcessBatchOutput.all_objects.filter(tenant=tenant, inventory__isnull=False)
+        .values_list("batch_id", "inventory_id", _as_float("quantity"), _as_float("product__labor_pack_cost"))
+    ), 4)
+    sources = _columns(list(
+        ProcessBatchSource.all_objects.filter(tenant=tenant)
+        .values_list("id", "batch_id", "inventory_id", _as_float("quantity"), "batch__started_at")
+    ), 5)
+    allocations = _columns(list(
+        SalesOrderAllocation.all_objects.filter(tenant=tenant)
+        .values_list(
+            "id", "sales_order_item_id", "inventory_id", _as_float("quantity"),
+            "sales_order_item__sales_order__order_date",
+        )
+    ), 5)
+
+    lot_ids = np.asarray(lot_ids, dtype=np.int64)
+    # Lots without a product form their own group (keyed by the negated lot id).
+    lot_keys = np.array([product or -lot for lot, product in zip(lot_ids.tolist(), lot_products)], dtype=np.int64)
+    keys, lot_group = np.unique(lot_keys, return_inverse=True)
+    group_count = len(keys)
+    received_cost = _floats(lot_cost)
+    received_cost = np.nan_to_num(np.where(np.isnan(received_cost), _floats(lot_raw_cost), received_cost))
+
+    def lot_index(inventory_ids):
+        return np.searchsorted(lot_ids, np.asarray(inventory_ids, dtype=np.int64))
+
+    layer_order = np.lexsort((lot_ids, _days(lot_days), lot_group))
+    layer_group = lot_group[layer_order]
+    layer_qty = np.maximum(np.asarray(lot_qty, dtype=float), 0)[layer_order]
+
+    # Outflows in date order per product; within a day processing draws before sales.
+    source_lots = lot_index(sources[2])
+    outflow_lot = np.concatenate((source_lots, lot_index(allocations[2])))
+    outflow_qty = np.asarray(sources[3] + allocations[3], dtype=float)
+    outflow_kind = np.concatenate((np.zeros(len(sources[0])), np.ones(len(allocations[0]))))
+    outflow_ids = np.asarray(sources[0] + allocations[0], dtype=np.int64)
+    outflow_order = np.lexsort((outflow_ids, outflow_kind, _days(sources[4] + allocations[4]), lot_group[outflow_lot]))
+    outflow_group = lot_group[outflow_lot][outflow_order]
+    sorted_qty = outflow_qty[outflow_order]
+
+    batch_ids, source_batch = np.unique(np.asarray(sources[1] + outputs[0], dtype=np.int64), return_inverse=True)
+    output_batch = source_batch[len(sources[1]):]
+    source_batch = source_batch[:len(sources[1])]
+    output_qty = np.asarray(outputs[2], dtype=float)
+    batch_output_qty = np.bincount(output_batch, weights=output_qty, minlength=len(batch_ids))
+    output_lots = lot_index(outputs[1])
+    output_labor = np.asarray(outputs[3], dtype=float)
+
+    lot_unit_cost = received_cost.copy()
+    costs = np.zeros(len(outflow_order))
+    passes = 0
+    while passes < MAX_PASSES:
+        passes += 1
+        sorted_costs = fifo_outflow_costs(
+            layer_group, layer_qty, lot_unit_cost[layer_order], outflow_group, sorted_qty, group_count,
+        )
+        costs[outflow_order] = sorted_costs
+        batch_cost = np.bincount(source_batch, weights=costs[:len(source_lots)], minlength=len(batch_ids))
+        per_unit = np.divide(batch_cost, batch_output_qty, out=np.zeros(len(batch_ids)), where=batch_output_qty > 0)
+        produced = lot_unit_cost.copy()
+        produced[output_lots] = per_unit[output_batch] + output_labor
+        if np.allclose(produced, lot_unit_cost, rtol=0, atol=1e-9):
+            break
+        lot_unit_cost = produced
+
+    item_ids, item_index = np.unique(np.asarray(allocations[1], dtype=np.int64), return_inverse=True)
+    item_costs = np.bincount(item_index, weights=costs[len(source_lots):], minlength=len(item_ids))
+    lines_updated = _write_line_costs(tenant, dict(zip(item_ids.tolist(), item_costs.tolist())))
+    return CostingResult(
+        lots=len(lot_ids), outflows=len(outflow_order), passes=passes,
+        lines_costed=len(item_ids), lines_updated=lines_updated,
+    )
+
+
+def _write_line_costs(tenant, costs_by_item):
+    changed = []
+    lines = SalesOrderItem.all_objects.filter(tenant=tenant).values_list(
+        "id", "amount", "quantity", "unit_price", "cost_of_goods", "gross_margin",
+    )
+    for item_id, amount, quantity, unit_price, old_cost, old_margin in lines.iterator(chunk_size=5000):
+        cost = margin = None
+        if item_id in costs_by_item:
+            cost = Decimal(str(costs_by_item[item_id])).quantize(_CENT)
+            if amount is None and quantity is not None and unit_price is not None:
+                amount = quantity * unit_price
+            margin = (Decimal(amount) - cost).quantize(_CENT) if amount is not None else None
+        if (cost, margin) != (old_cost, old_margin):
+            changed.append((cost, margin, item_id))
+    # One parameterised UPDATE per line; bulk_update's CASE expressions are far slower at this size.
+    table = connection.ops.quote_name(SalesOrderItem._meta.db_table)
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, len(changed), WRITE_BATCH_SIZE):
+            cursor.executemany(
+                f"UPDATE {table} SET cost_of_goods = %s, gross_margin = %s WHERE id = %s",
+                changed[start:start + WRITE_BATCH_SIZE],
+            )
+    return len(changed)
@@ -0,0 +1,179 @@
+"""
+Timing, query-count and memory benchmarks for the GET endpoints in core/urls/api.py.
+
+The benchmark_endpoints management command builds synthetic tenants at
+several scales and runs them through these helpers. Results are plain
+dicts so they can be stored as JSON baselines and compared later:
+
+    results = benchmark_tenant(client, tenant, discover_endpoints(), iterations=5)
+    regressions = compare_results(baseline, current, threshold_pct=20)
+"""
+import math
+import re
+import time
+import tracemalloc
+
+from django.db.models import Count
+from django.test.utils import override_settings
+from django.urls import URLPattern
+
+from ..models import Inventory, ProcessBatch, Product, PurchaseOrder, SalesOrder
+from ..urls.api import urlpatterns as api_urlpatterns
+from .request_metrics import capture_request_metrics
+
+API_PREFIX = "/api/"
+
+# Routes that change data, even if some of them would answer a GET.
+WRITE_ROUTE_RE = re.compile(
+    r"(^|/)(create|update|delete|import|add|complete|cancel|checkout|allocate-fifo|toggle-active|reset-operational-data)/$"
+)
+
+# Minimum absolute change before a timing difference counts as a regression.
+NOISE_FLOOR_MS = 2.0
+
+
+def discover_endpoints(urlpatterns=None):
+    """Return [(url name, route)] for every read-only pattern in the API urlconf."""
+    endpoints = []
+    for pattern in urlpatterns or api_urlpatterns:
+        if not isinstance(pattern, URLPattern):
+            continue
+        route = str(pattern.pattern)
+        if WRITE_ROUTE_RE.search(route):
+            continue
+        endpoints.append((pattern.name, route))
+    return endpoints
+
+
+def _busiest(queryset, relation):
+    return queryset.annotate(_size=Count(relation)).order_by("-_size", "id").first()
+
+
+def resolve_arguments(tenant):
+    """Pick the largest record of each kind so detail endpoints are measured at their worst."""
+    product = _busiest(Product.all_objects.filter(tenant=tenant), "inventory_lots")
+    lot = _busiest(Inventory.all_objects.filter(tenant=tenant), "sales_allocations")
+    return {
+        "item_id": product.id if product else None,
+        "lot_id": lot.id if lot else None,
+        "batch_id": getattr(_busiest(ProcessBatch.all_objects.filter(tenant=tenant), "sources"), "id", None),
+        "purchasing:order_id": getattr(_busiest(PurchaseOrder.all_objects.filter(tenant=tenant), "items"), "id", None),
+        "sales:order_id": getattr(_busiest(SalesOrder.all_objects.filter(tenant=tenant), "items"), "id", None),
+        "query:q": lot.vendorlot if lot else "",
+    }
+
+
+def build_path(route, arguments):
+    """Fill a route's converters from resolve_arguments(); returns None when a value is missing."""
+    section = route.split("/", 1)[0]
+    missing = False
+
+    def replace(match):
+        nonlocal missing
+        name = match.group(1)
+        value = arguments.get(f"{section}:{name}", arguments.get(name))
+        if value is None:
+            missing = True
+            return ""
+        return str(value)
+
+    path = re.sub(r"<(?:\w+:)?(\w+)>", replace, route)
+    if missing:
+        return None
+    query = arguments.get("query:q")
+    if route == "trace/" and query:
+        path += f"?q={query}"
+    return API_PREFIX + path
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+# The middleware would open its own capture around each request and log budget warnings.
+@override_settings(REQUEST_METRICS_ENABLED=False)
+def benchmark_endpoint(client, path, iterations=5):
+    client.get(path)  # warm caches and the tenant context
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        response = client.get(path)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    with capture_request_metrics() as metrics:
+        client.get(path)
+
+    tracemalloc.start()
+    try:
+        response = client.get(path)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    body = b"".join(response.streaming_content) if response.streaming else response.content
+    return {
+        "path": path,
+        "status": response.status_code,
+        "p50_ms": round(_percentile(timings, 50), 2),
+        "p95_ms": round(_percentile(timings, 95), 2),
+        "queries": metrics.queries,
+        "duplicate_queries": sum(count - 1 for count in metrics.duplicates().values()),
+        "peak_memory_kb": round(peak / 1024, 1),
+        "response_bytes": len(body),
+    }
+
+
+def benchmark_tenant(client, tenant, endpoints, iterations=5, progress=None):
+    """Benchmark ``endpoints`` as an already-logged-in ``client`` belonging to ``tenant``."""
+    arguments = resolve_arguments(tenant)
+    results = {}
+    for name, route in endpoints:
+        path = build_path(route, arguments)
+        if path is None:
+            results[name] = {"route": route, "skipped": "no matching record"}
+            continue
+        result = benchmark_endpoint(client, path, iterations)
+        if result["status"] == 405:
+            results[name] = {"route": route, "skipped": "GET not allowed"}
+            continue
+        results[name] = result
+        if progress:
+            progress(name, result)
+    return results
+
+
+def compare_results(baseline, current, threshold_pct=20.0):
+    """
+    Compare two result files and return a list of regressions.
+
+    Timings and peak memory regress when they grow by more than threshold_pct
+    (timings also need to move by more than NOISE_FLOOR_MS). Query counts are
+    deterministic, so any increase is reported.
+    """
+    regressions = []
+    for scale, scale_results in current.get("scales", {}).items():
+        baseline_endpoints = baseline.get("scales", {}).get(scale, {}).get("endpoints", {})
+        for name, result in scale_results.get("endpoints", {}).items():
+            before = baseline_endpoints.get(name)
+            if not before or "skipped" in before or "skipped" in result:
+                continue
+            for metric in ("p50_ms", "p95_ms", "peak_memory_kb", "queries", "duplicate_queries"):
+                old, new = before.get(metric), result.get(metric)
+                if old is None or new is None or new <= old:
+                    continue
+                if metric in ("queries", "duplicate_queries"):
+                    regressed = True
+                else:
+                    growth = (new - old) / old * 100 if old else math.inf
+                    regressed = growth > threshold_pct and not (metric.endswith("_ms") and new - old <= NOISE_FLOOR_MS)
+                if regressed:
+                    regressions.append({
+                        "scale": scale,
+                        "endpoint": name,
+                        "metric": metric,
+                        "baseline": old,
+                        "current": new,
+                        "change_pct": round((new - old) / old * 100, 1) if old else None,
+                    })
+    return regressions
@@ -5,8 +5,16 @@ Extracts business logic from views for testability and reuse.
 import io
 import csv
 import logging
+import time
 from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
 from ..models import Customer, CustomerProfile, Product
+from .inventory_summary import refresh_lot_products, schedule_inventory_summary_rebuild
+from .sequences import advance_sequence
 
 logger = logging.getLogger(__name__)
 
@@ -173,84 +181,204 @@ def validate_and_preview(raw_headers, raw_rows, existing_customer_ids):
     }
 
 
-def execute_import(tenant, rows):
-    """
-    Save validated import rows into Customer + CustomerProfile tables.
-    Returns dict with customers_created, customers_updated, profiles_created.
-    """
-    customers_created = 0
-    customers_updated = 0
-    profiles_created = 0
+# Rows written per chunk; a customer's lines always stay in one chunk.
+IMPORT_CHUNK_SIZE = 2000
+
+CUSTOMER_IMPORT_FIELDS = ('name', 'contact_name', 'phone', 'email', 'city', 'state')
+PROFILE_IMPORT_FIELDS = ('product_id', 'description', 'unit_type', 'pack_size', 'sales_price', 'comp_item_id', 'is_active')
 
-    by_customer = defaultdict(list)
-    for row in rows:
-        by_customer[row['customer_id']].append(row)
 
+def _decimal(value, places):
+    """``value`` as a Decimal rounded like the model field, or None when blank or not a number."""
+    if value is None or value == '':
+        return None
+    try:
+        return Decimal(str(value)).quantize(Decimal(1).scaleb(-places))
+    except (InvalidOperation, ValueError):
+        return None
+
+
+def _chunks(by_customer, size):
+    chunk, count = {}, 0
+    for customer_id, items in by_customer.items():
+        if chunk and count + len(items) > size:
+            yield chunk
+            chunk, count = {}, 0
+        chunk[customer_id] = items
+        count += len(items)
+    if chunk:
+        yield chunk
+
+
+def _upsert_customers(tenant, by_customer, stats):
+    existing = {
+        customer.customer_id: customer
+        for customer in Customer.all_objects.filter(tenant=tenant, customer_id__in=by_customer)
+    }
+    changed = []
     for customer_id, items in by_customer.items():
         first = items[0]
+        values = {
+            'name': first['customer_name'],
+            'contact_name': first['contact_name'] or '',
+            'phone': first['phone'] or '',
+            'email': first['email'] or '',
+            'city': first['city'] or '',
+            'state': first['state'] or '',
+        }
+        customer = existing.get(customer_id)
+        if customer is None:
+            stats['customers_created'] += 1
+        else:
+            stats['customers_updated'] += 1
+            if all(getattr(customer, field) == value for field, value in values.items()):
+                continue
+        changed.append(Customer(tenant=tenant, customer_id=customer_id, **values))
+    if changed:
+        Customer.all_objects.bulk_create(
+            changed, update_conflicts=True, unique_fields=['tenant', 'customer_id'],
+            update_fields=list(CUSTOMER_IMPORT_FIELDS),
+        )
+    # Imported numbers are taken; later customer_create calls must skip past them.
+    advance_sequence(tenant, 'customer', by_customer.keys())
+    if len(existing) == len(by_customer) and not changed:
+        return existing
+    return {
+        customer.customer_id: customer
+        for customer in Customer.all_objects.filter(tenant=tenant, customer_id__in=by_customer)
+    }
 
-        customer, created = Customer.all_objects.update_or_create(
+
+def _products_for(tenant, items, stats):
+    """Map each line description to its product, creating the missing ones as get_or_create would."""
+    descriptions = {item['description'] for item in items}
+    products = {}
+    for product in Product.all_objects.filter(tenant=tenant, description__in=descriptions).order_by('id'):
+        products.setdefault(product.description, product)
+    created = []
+    for item in items:
+        if item['description'] in products:
+            continue
+        product = Product(
             tenant=tenant,
-            customer_id=customer_id,
-            defaults={
-                'name': first['customer_name'],
-                'contact_name': first['contact_name'] or '',
-                'phone': first['phone'] or '',
-                'email': first['email'] or '',
-                'city': first['city'] or '',
-                'state': first['state'] or '',
-            }
+            description=item['description'],
+            unit_type=item['unit_type'] or '',
+            pack_size=_decimal(item.get('pack_size') or None, 2),
+            default_price=_decimal(item.get('price') or None, 4),
         )
+        product.set_lookup_keys()
+        products[product.description] = product
+        created.append(product)
+    if created:
+        # Products have no unique key to upsert on; only the missing ones are inserted.
+        Product.all_objects.bulk_create(created)
+        stats['products_created'] += len(created)
+        if refresh_lot_products(tenant.id, *(product.description for product in created)):
+            stats['lots_moved'] = True
+    return products
+
+
+def _sync_profiles(tenant, customers, by_customer, products, stats):
+    """Insert, update or delete only the profile lines that differ from the import."""
+    existing = defaultdict(list)
+    for profile in CustomerProfile.all_objects.filter(
+        tenant=tenant, customer__in=customers.values(),
+    ).order_by('customer_id', 'id'):
+        existing[(profile.customer_id, profile.description, profile.unit_type)].append(profile)
+
+    to_create, to_update = [], []
+    for customer_id, items in by_customer.items():
+        customer = customers[customer_id]
+        for item in items:
+            values = {
+                'product_id': products[item['description']].pk,
+                'description': item['description'],
+                'unit_type': item['unit_type'] or '',
+                'pack_size': _decimal(item.get('pack_size'), 2),
+                'sales_price': _decimal(item.get('price'), 4),
+                'comp_item_id': item.get('comp_item_id'),
+                'is_active': True,
+            }
+            matches = existing.get((customer.pk, values['description'], values['unit_type']))
+            if not matches:
+                to_create.append(CustomerProfile(tenant=tenant, customer=customer, **values))
+                continue
+            profile = matches.pop(0)
+            if all(getattr(profile, field) == value for field, value in values.items()):
+                stats['profiles_unchanged'] += 1
+                continue
+            for field, value in values.items():
+                setattr(profile, field, value)
+            # bulk_update() does not touch auto_now fields.
+            profile.updated_at = timezone.now()
+            to_update.append(profile)
+
+    stale = [profile.pk for profiles in existing.values() for profile in profiles]
+    if stale:
+        CustomerProfile.all_objects.filter(pk__in=stale).delete()
+    if to_update:
+        CustomerProfile.all_objects.bulk_update(to_update, [*PROFILE_IMPORT_FIELDS, 'updated_at'])
+    if to_create:
+        CustomerProfile.all_objects.bulk_create(to_create)
+    stats['profiles_created'] += len(to_create)
+    stats['profiles_updated'] += len(to_update)
+    stats['profiles_deleted'] += len(stale)
+
+
+def execute_import(tenant, rows, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Save validated import rows into Customer + CustomerProfile tables.
 
-        if created:
-            customers_created += 1
-        else:
-            customers_updated += 1
+    Each imported customer's profile becomes exactly its imported lines;
+    lines matching an existing one (same description and unit type) are
+    updated in place, so their other settings survive. Work is set-based,
+    a fixed number of queries per chunk of ``chunk_size`` rows.
 
-        CustomerProfile.all_objects.filter(tenant=tenant, customer=customer).delete()
+    Returns a dict with customers_created, customers_updated,
+    products_created, profiles_created, profiles_updated,
+    profiles_deleted, profiles_unchanged and per-phase timings in ms.
+    """
+    started = time.perf_counter()
+    stats = defaultdict(int)
+    timings = defaultdict(float)
 
-        for item in items:
-            try:
-                pack_size = float(item['pack_size']) if item.get('pack_size') else None
-            except (ValueError, TypeError):
-                pack_size = None
-            try:
-                price = float(item['price']) if item.get('price') else None
-            except (ValueError, TypeError):
-                price = None
-
-            product, _ = Product.objects.get_or_create(
-                tenant=tenant,
-                description=item['description'],
-                defaults={
-                    'unit_type': item['unit_type'] or '',
-                    'pack_size': pack_size,
-                    'default_price': price,
-                }
-            )
-
-            CustomerProfile.objects.create(
-                tenant=tenant,
-                customer=customer,
-                product=product,
-                description=item['description'],
-                unit_type=item['unit_type'] or '',
-                pack_size=item['pack_size'],
-                sales_price=item['price'],
-                comp_item_id=item.get('comp_item_id'),
-                is_active=True,
-            )
-            profiles_created += 1
+    by_customer = defaultdict(list)
+    for row in rows:
+        by_customer[row['customer_id']].append(row)
+
+    with transaction.atomic():
+        for chunk in _chunks(by_customer, chunk_size):
+            phase = time.perf_counter()
+            customers = _upsert_customers(tenant, chunk, stats)
+            timings['customers'] += time.perf_counter() - phase
+
+            phase = time.perf_counter()
+            products = _products_for(tenant, [item for items in chunk.values() for item in items], stats)
+            timings['products'] += time.perf_counter() - phase
+
+            phase = time.perf_counter()
+            _sync_profiles(tenant, customers, chunk, products, stats)
+            timings['profiles'] += time.perf_counter() - phase
+    if stats.pop('lots_moved', False):
+        schedule_inventory_summary_rebuild(tenant.id)
+    timings['total'] = time.perf_counter() - started
 
     logger.info(
         f"Tenant {tenant.name}: Import complete — "
-        f"{customers_created} created, {customers_updated} updated, {profiles_created} profiles"
+        f"{stats['customers_created']} created, {stats['customers_updated']} updated, "
+        f"{stats['profiles_created']} profiles added, {stats['profiles_updated']} changed, "
+        f"{stats['profiles_deleted']} removed in {timings['total'] * 1000:.0f} ms"
     )
 
     return {
-        'customers_created': customers_created,
-        'customers_updated': customers_updated,
-        'profiles_created': profiles_created,
+        'customers_created': stats['customers_created'],
+        'customers_updated': stats['customers_updated'],
+        'products_created': stats['products_created'],
+        'profiles_created': stats['profiles_created'],
+        'profiles_updated': stats['profiles_updated'],
+        'profiles_deleted': stats['profiles_deleted'],
+        'profiles_unchanged': stats['profiles_unchanged'],
+        'timings_ms': {phase: round(seconds * 1000, 2) for phase, seconds in timings.items()},
     }
 
 
@@ -0,0 +1,389 @@
+"""
+The inventory movement ledger.
+
+Every change to a lot's on-hand or allocated quantity is recorded as an
+InventoryMovement: receipts, processing consumption and output, restores
+when a batch is undone, sales allocations and their release, manual
+adjustments and lot deletion. record_movement() (with set_on_hand(),
+consume_available() and delete_lots()) is the only code path that changes
+those columns. It stores the lot's balances after the movement on the
+ledger row. The lot's unitsonhand, unitsallocated and unitsavailable (on
+hand minus allocated) are therefore always the balances of its latest
+movement. Lots with movements are never hard-deleted, so a lot's ledger is
+never lost.
+
+Lots are never locked. Each write is a conditional
+``UPDATE ... WHERE version = n`` computed from the balances read at version
+n; when another request changed the lot in between, no row matches and the
+movement is recomputed from fresh balances. Concurrent receiving,
+processing, adjustments and allocations on one lot therefore never lose
+each other's changes.
+
+Because each row carries running balances, "what did we hold at time T" is
+the latest movement per lot at or before T (an index seek on
+(inventory, occurred_at, id)), not a replay of every delta.
+
+Sales allocations are recorded from SalesOrderAllocation signals (see
+core/signals.py), so deletes cascading from an order are covered. Writes
+that skip record_movement() (bulk_create, QuerySet.update) are reported
+and repaired by the check_inventory_ledger management command.
+"""
+import contextvars
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from ..models import Inventory, InventoryMovement, SalesOrderAllocation
+from .inventory_summary import apply_lot_change, apply_product_deltas
+
+LOT_BALANCE_FIELDS = ("unitsonhand", "unitsallocated", "unitsavailable")
+LOT_UPDATE_ATTEMPTS = 10
+LEDGER_BATCH_SIZE = 500
+
+_ZERO = Decimal("0")
+
+_allocation_signals_muted = contextvars.ContextVar("inventory_ledger_allocation_signals_muted", default=False)
+
+
+def _decimal(value):
+    return Decimal(str(value or 0))
+
+
+class InsufficientStockError(ValueError):
+    """A movement would take a lot's on hand below zero."""
+
+
+class LotConflictError(Exception):
+    """A lot kept changing underneath an update for LOT_UPDATE_ATTEMPTS tries."""
+
+
+def record_movement(
+    lot, movement_type, on_hand=0, allocated=0, reference="", user=None, occurred_at=None, allow_negative=True,
+):
+    """
+    Apply ``on_hand``/``allocated`` deltas to ``lot`` and append the movement.
+
+    An unsaved lot is inserted with the movement as its opening balance.
+    With ``allow_negative=False`` a decrease that would leave less than zero
+    on hand raises InsufficientStockError instead. Returns the
+    InventoryMovement, or None when both deltas are zero.
+    """
+    on_hand, allocated = _decimal(on_hand), _decimal(allocated)
+    if not on_hand and not allocated and not lot._state.adding:
+        return None
+
+    def deltas(current_on_hand, current_allocated):
+        if not allow_negative and on_hand < 0 and current_on_hand + on_hand < 0:
+            raise InsufficientStockError(
+                f"Only {current_on_hand.normalize():f} on hand in lot {lot.vendorlot or lot.pk}."
+            )
+        return on_hand, allocated
+
+    return _apply_movement(lot, movement_type, deltas, reference, user, occurred_at)
+
+
+def set_on_hand(lot, quantity, movement_type="adjust", reference="", user=None):
+    """Record the movement that brings ``lot``'s on hand to ``quantity``."""
+    quantity = _decimal(quantity)
+    return _apply_movement(
+        lot, movement_type, lambda current_on_hand, current_allocated: (quantity - current_on_hand, _ZERO),
+        reference, user,
+    )
+
+
+def consume_available(lot, quantity, movement_type="consume", reference="", user=None):
+    """Take up to ``quantity`` from ``lot``'s on hand, never below zero; returns the movement or None."""
+    quantity = _decimal(quantity)
+    return _apply_movement(
+        lot, movement_type,
+        lambda current_on_hand, current_allocated: (-min(quantity, max(current_on_hand, _ZERO)), _ZERO),
+        reference, user,
+    )
+
+
+def delete_lots(lots, reference="", user=None):
+    """
+    Delete ``lots`` without losing their history.
+
+    Their allocations are released, their remaining stock leaves through a
+    "delete" movement and the lots are marked deleted (hidden from
+    Inventory.objects). The rows, their movements and the snapshot lines
+    that valued them stay, so past balances and valuations do not change.
+    """
+    lots = list(lots)
+    if not lots:
+        return
+    with transaction.atomic():
+        # The allocation signals record the releases.
+        SalesOrderAllocation.all_objects.filter(inventory_id__in=[lot.pk for lot in lots]).delete()
+        deleted_at = timezone.now()
+        for lot in lots:
+            set_on_hand(lot, 0, "delete", reference, user)
+            lot.deleted_at = deleted_at
+            lot.save(update_fields=["deleted_at"])
+
+
+def _apply_movement(lot, movement_type, deltas, reference="", user=None, occurred_at=None):
+    """
+    Write the movement ``deltas(on hand, allocated)`` returns for the lot's current balances.
+
+    Existing lots are changed with ``UPDATE ... WHERE version = n``; when
+    another request changed the lot since it was read, the balances are
+    read again and ``deltas`` re-evaluated, up to LOT_UPDATE_ATTEMPTS times.
+    """
+    with transaction.atomic():
+        if lot._state.adding:
+            on_hand, allocated = deltas(_ZERO, _ZERO)
+            lot.unitsonhand, lot.unitsallocated = on_hand, allocated
+            lot.unitsavailable = on_hand - allocated
+            lot.save()
+            return _append_movement(lot, movement_type, on_hand, allocated, reference, user, occurred_at)
+
+        lots = Inventory.all_objects.filter(pk=lot.pk)
+        for _ in range(LOT_UPDATE_ATTEMPTS):
+            product_id, units_in, current_on_hand, current_allocated, version = lots.values_list(
+                "product_id", "unitsin", "unitsonhand", "unitsallocated", "version",
+            ).get()
+            current_on_hand, current_allocated = _decimal(current_on_hand), _decimal(current_allocated)
+            on_hand, allocated = deltas(current_on_hand, current_allocated)
+            if not on_hand and not allocated:
+                return None
+            balances = {
+                "unitsonhand": current_on_hand + on_hand,
+                "unitsallocated": current_allocated + allocated,
+                "unitsavailable": current_on_hand + on_hand - current_allocated - allocated,
+            }
+            if lots.filter(version=version).update(version=version + 1, **balances):
+                break
+        else:
+            raise LotConflictError(f"Lot {lot.pk} changed {LOT_UPDATE_ATTEMPTS} times while being updated.")
+
+        for field, value in balances.items():
+            setattr(lot, field, value)
+        lot.version = version + 1
+        lot.remember_summary_values()
+        # QuerySet.update() skips the lot signals that maintain the product summary.
+        units_in = _decimal(units_in)
+        apply_lot_change(
+            lot.tenant_id,
+            (product_id, (units_in, current_allocated, current_on_hand)),
+            (product_id, (units_in, lot.unitsallocated, lot.unitsonhand)),
+        )
+        return _append_movement(lot, movement_type, on_hand, allocated, reference, user, occurred_at)
+
+
+def _append_movement(lot, movement_type, on_hand, allocated, reference, user, occurred_at):
+    return InventoryMovement.all_objects.create(
+        tenant_id=lot.tenant_id,
+        inventory=lot,
+        movement_type=movement_type,
+        on_hand_delta=on_hand,
+        allocated_delta=allocated,
+        on_hand_balance=lot.unitsonhand,
+        allocated_balance=lot.unitsallocated,
+        available_balance=lot.unitsavailable,
+        reference=reference[:100],
+        occurred_at=occurred_at or timezone.now(),
+        created_by=user,
+    )
+
+
+def record_lot_movements(changes, reference="", user=None):
+    """
+    Apply many movements in a constant number of queries.
+
+    ``changes`` is a list of (lot, movement_type, on_hand delta, allocated
+    delta), one per lot, where each lot holds the balances and version it
+    was read with. The lots are updated with one UPDATE per
+    LEDGER_BATCH_SIZE lots guarded by those versions. When any lot changed
+    since it was read, LotConflictError is raised and nothing is written;
+    the caller re-reads and retries. Returns the movements.
+    """
+    now = timezone.now()
+    movements = []
+    summary_deltas = {}
+    with transaction.atomic():
+        for start in range(0, len(changes), LEDGER_BATCH_SIZE):
+            batch = changes[start:start + LEDGER_BATCH_SIZE]
+            on_hand_delta = _per_lot_case((lot.pk, _decimal(on_hand)) for lot, _, on_hand, _ in batch)
+            allocated_delta = _per_lot_case((lot.pk, _decimal(allocated)) for lot, _, _, allocated in batch)
+            new_on_hand = Coalesce("unitsonhand", Value(_ZERO)) + on_hand_delta
+            new_allocated = Coalesce("unitsallocated", Value(_ZERO)) + allocated_delta
+            updated = Inventory.all_objects.filter(
+                pk__in=[lot.pk for lot, *_ in batch],
+                version=Case(*(When(pk=lot.pk, then=Value(lot.version)) for lot, *_ in batch)),
+            ).update(
+                unitsonhand=new_on_hand,
+                unitsallocated=new_allocated,
+                unitsavailable=new_on_hand - new_allocated,
+                version=F("version") + 1,
+            )
+            if updated != len(batch):
+                raise LotConflictError(f"{len(batch) - updated} lots changed while being updated.")
+
+        for lot, movement_type, on_hand, allocated in changes:
+            on_hand, allocated = _decimal(on_hand), _decimal(allocated)
+            lot.unitsonhand = _decimal(lot.unitsonhand) + on_hand
+            lot.unitsallocated = _decimal(lot.unitsallocated) + allocated
+            lot.unitsavailable = lot.unitsonhand - lot.unitsallocated
+            lot.version += 1
+            expected_delta, allocated_delta, on_hand_delta = summary_deltas.get(lot.product_id, (_ZERO, _ZERO, _ZERO))
+            summary_deltas[lot.product_id] = (expected_delta, allocated_delta + allocated, on_hand_delta + on_hand)
+            movements.append(InventoryMovement(
+                tenant_id=lot.tenant_id, inventory_id=lot.pk, movement_type=movement_type,
+                on_hand_delta=on_hand, allocated_delta=allocated, on_hand_balance=lot.unitsonhand,
+                allocated_balance=lot.unitsallocated, available_balance=lot.unitsavailable,
+                reference=reference[:100], occurred_at=now, created_by=user,
+            ))
+        apply_product_deltas(summary_deltas)
+        return InventoryMovement.all_objects.bulk_create(movements, batch_size=2000)
+
+
+def _per_lot_case(values):
+    return Case(
+        *(When(pk=pk, then=Value(value)) for pk, value in values),
+        default=Value(_ZERO),
+        output_field=DecimalField(max_digits=12, decimal_places=4),
+    )
+
+
+@contextmanager
+def allocations_recorded_by_caller():
+    """
+    Within this block, SalesOrderAllocation saves and deletes leave the ledger alone.
+
+    For bulk allocation writers that record the net movements themselves
+    with record_lot_movements().
+    """
+    token = _allocation_signals_muted.set(True)
+    try:
+        yield
+    finally:
+        _allocation_signals_muted.reset(token)
+
+
+def allocation_signals_muted():
+    return _allocation_signals_muted.get()
+
+
+def record_opening_balances(lots, movement_type="opening", reference="", user=None, occurred_at=None):
+    """
+    Append one movement per lot holding its current balances, for lots written without the ledger.
+
+    ``lots`` must be saved Inventory instances (e.g. returned by bulk_create).
+    """
+    occurred_at = occurred_at or timezone.now()
+    movements = []
+    for lot in lots:
+        on_hand, allocated = _decimal(lot.unitsonhand), _decimal(lot.unitsallocated)
+        movements.append(InventoryMovement(
+            tenant_id=lot.tenant_id, inventory_id=lot.pk, movement_type=movement_type,
+            on_hand_delta=on_hand, allocated_delta=allocated, on_hand_balance=on_hand,
+            allocated_balance=allocated, available_balance=on_hand - allocated,
+            reference=reference[:100], occurred_at=occurred_at, created_by=user,
+        ))
+    return InventoryMovement.all_objects.bulk_create(movements, batch_size=2000)
+
+
+def allocation_changed(previous, current, reference="", user=None):
+    """
+    Move allocated quantity for a sales allocation.
+
+    ``previous`` and ``current`` are (inventory id, quantity) or None.
+    """
+    if previous == current:
+        return
+    if previous and current and previous[0] == current[0]:
+        _allocate(current[0], _decimal(current[1]) - _decimal(previous[1]), reference, user)
+        return
+    if previous:
+        _allocate(previous[0], -_decimal(previous[1]), reference, user)
+    if current:
+        _allocate(current[0], _decimal(current[1]), reference, user)
+
+
+def _allocate(inventory_id, quantity, reference, user):
+    if not inventory_id or not quantity:
+        return
+    lot = Inventory.all_objects.filter(pk=inventory_id).first()
+    if lot is not None:
+        record_movement(lot, "allocate" if quantity > 0 else "release", allocated=quantity, reference=reference, user=user)
+
+
+def _latest_movement(moment):
+    return (
+        InventoryMovement.all_objects.filter(inventory=OuterRef("pk"), occurred_at__lte=moment)
+        .order_by("-occurred_at", "-id")
+    )
+
+
+def lot_balances_as_of(lots, moment):
+    """Annotate the ``lots`` queryset with on_hand_as_of/allocated_as_of/available_as_of at ``moment``."""
+    latest = _latest_movement(moment)
+    return lots.annotate(**{
+        f"{name}_as_of": Coalesce(Subquery(latest.values(f"{name}_balance")[:1]), Value(_ZERO))
+        for name in ("on_hand", "allocated", "available")
+    })
+
+
+def product_balances_as_of(tenant, moment):
+    """{product id: {"on_hand", "allocated", "available"}} summed over the tenant's lots at ``moment``."""
+    rows = (
+        lot_balances_as_of(Inventory.all_objects.filter(tenant=tenant, product__isnull=False), moment)
+        .values("product_id")
+        .annotate(
+            on_hand=Sum("on_hand_as_of"),
+            allocated=Sum("allocated_as_of"),
+            available=Sum("available_as_of"),
+        )
+        .order_by()
+    )
+    return {row.pop("product_id"): row for row in rows}
+
+
+def find_ledger_drift(tenant):
+    """Return (lots without movements, lots whose columns differ from their latest movement)."""
+    latest = InventoryMovement.all_objects.filter(inventory=OuterRef("pk")).order_by("-occurred_at", "-id")
+    lots = Inventory.all_objects.filter(tenant=tenant).annotate(
+        ledger_on_hand=Subquery(latest.values("on_hand_balance")[:1]),
+        ledger_allocated=Subquery(latest.values("allocated_balance")[:1]),
+    )
+    missing, drifted = [], []
+    for lot in lots.only("id", "tenant_id", *LOT_BALANCE_FIELDS).iterator(chunk_size=2000):
+        if lot.ledger_on_hand is None:
+            missing.append(lot)
+        elif (_decimal(lot.unitsonhand), _decimal(lot.unitsallocated)) != (lot.ledger_on_hand, lot.ledger_allocated):
+            drifted.append(lot)
+    return missing, drifted
+
+
+def repair_ledger(tenant, reference="ledger repair"):
+    """
+    Bring the ledger in line with lots written outside record_movement().
+
+    Lots without movements get an opening movement; lots whose columns moved
+    get an adjust movement for the difference. Returns (opened, adjusted).
+    """
+    missing, drifted = find_ledger_drift(tenant)
+    now = timezone.now()
+    adjustments = []
+    for lot in drifted:
+        on_hand, allocated = _decimal(lot.unitsonhand), _decimal(lot.unitsallocated)
+        adjustments.append(InventoryMovement(
+            tenant_id=lot.tenant_id, inventory_id=lot.pk, movement_type="adjust",
+            on_hand_delta=on_hand - lot.ledger_on_hand, allocated_delta=allocated - lot.ledger_allocated,
+            on_hand_balance=on_hand, allocated_balance=allocated, available_balance=on_hand - allocated,
+            reference=reference, occurred_at=now,
+        ))
+    with transaction.atomic():
+        record_opening_balances(missing, reference=reference, occurred_at=now)
+        InventoryMovement.all_objects.bulk_create(adjustments, batch_size=2000)
+        stale = [lot for lot in missing + drifted if _decimal(lot.unitsavailable) != _decimal(lot.unitsonhand) - _decimal(lot.unitsallocated)]
+        for lot in stale:
+            lot.unitsavailable = _decimal(lot.unitsonhand) - _decimal(lot.unitsallocated)
+        Inventory.all_objects.bulk_update(stale, ["unitsavailable"], batch_size=2000)
+    return len(missing), len(drifted)
@@ -0,0 +1,140 @@
+"""
+End-of-day inventory snapshots for point-in-time stock and valuation.
+
+take_inventory_snapshot() reads every lot's on-hand balance at the end of a
+day from the movement ledger and stores the lots with stock as
+InventorySnapshotLine rows (quantity, the lot's unit cost, value, and copies
+of the lot code and product name, so a line outlives its lot and product). The
+snapshot_inventory management command runs it for all tenants and is meant
+to be scheduled nightly.
+
+inventory_valuation_as_of() answers "what did we hold on date X and what was
+it worth" from the latest snapshot at or before X plus the ledger movements
+recorded after it, so a report reads one snapshot and a short range of
+(tenant, occurred_at) index entries instead of the tenant's whole history.
+Lots that arrived after the snapshot are valued at their current cost.
+"""
+from datetime import datetime, time
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from ..models import Inventory, InventoryMovement, InventorySnapshot, InventorySnapshotLine
+from .inventory_ledger import lot_balances_as_of
+
+SNAPSHOT_BATCH_SIZE = 5000
+
+_ZERO = Decimal("0")
+_VALUE_PLACES = Decimal("0.0001")
+
+
+def end_of_day(day):
+    """The last ledger moment that belongs to ``day``."""
+    return timezone.make_aware(datetime.combine(day, time.max))
+
+
+def _value(quantity, unit_cost):
+    return (quantity * unit_cost).quantize(_VALUE_PLACES)
+
+
+def _product_name(lot_desc, lot_productid, description, item_name, product_id):
+    return (description or item_name or product_id or lot_desc or lot_productid or "")[:255]
+
+
+@transaction.atomic
+def take_inventory_snapshot(tenant, snapshot_date=None):
+    """Write (or rewrite) ``tenant``'s snapshot for ``snapshot_date`` (default today) and return it."""
+    snapshot_date = snapshot_date or timezone.localdate()
+    taken_at = end_of_day(snapshot_date)
+    InventorySnapshot.all_objects.filter(tenant=tenant, snapshot_date=snapshot_date).delete()
+    snapshot = InventorySnapshot.all_objects.create(tenant=tenant, snapshot_date=snapshot_date, taken_at=taken_at)
+
+    lots = (
+        lot_balances_as_of(Inventory.all_objects.filter(tenant=tenant), taken_at)
+        .exclude(on_hand_as_of=0)
+        .values_list(
+            "id", "product_id", "actualcost", "on_hand_as_of", "vendorlot", "desc", "productid",
+            "product__description", "product__item_name", "product__product_id",
+        )
+        .order_by()
+    )
+    lines = []
+    for lot_id, product_id, unit_cost, quantity, vendorlot, *names in lots.iterator(chunk_size=SNAPSHOT_BATCH_SIZE):
+        unit_cost = unit_cost or _ZERO
+        lines.append(InventorySnapshotLine(
+            tenant=tenant, snapshot=snapshot, inventory_id=lot_id, product_id=product_id,
+            vendorlot=vendorlot or "", product_name=_product_name(*names),
+            quantity=quantity, unit_cost=unit_cost, value=_value(quantity, unit_cost),
+        ))
+        snapshot.lot_count += 1
+        snapshot.total_quantity += quantity
+        snapshot.total_value += lines[-1].value
+        if len(lines) >= SNAPSHOT_BATCH_SIZE:
+            InventorySnapshotLine.all_objects.bulk_create(lines)
+            lines = []
+    InventorySnapshotLine.all_objects.bulk_create(lines)
+    snapshot.save(update_fields=["lot_count", "total_quantity", "total_value"])
+    return snapshot
+
+
+def inventory_valuation_as_of(tenant, as_of_date):
+    """
+    Stock and value per product at the end of ``as_of_date``.
+
+    Returns {"as_of", "snapshot_date" (None when no snapshot precedes the
+    date and the ledger is read from the start), "products": {product id or
+    None: {"quantity", "value", "lot_count"}}, "quantity", "value"}.
+    """
+    moment = end_of_day(as_of_date)
+    snapshot = (
+        InventorySnapshot.all_objects.filter(tenant=tenant, taken_at__lte=moment)
+        .order_by("-taken_at")
+        .first()
+    )
+
+    products = {}
+    movements = InventoryMovement.all_objects.filter(tenant=tenant, occurred_at__lte=moment)
+    if snapshot is not None:
+        for row in snapshot.lines.values("product_id").annotate(
+            quantity=Sum("quantity"), value=Sum("value"), lot_count=Count("id"),
+        ).order_by():
+            products[row.pop("product_id")] = row
+        movements = movements.filter(occurred_at__gt=snapshot.taken_at)
+
+    deltas = dict(
+        movements.values("inventory_id")
+        .annotate(delta=Sum("on_hand_delta"))
+        .order_by()
+        .values_list("inventory_id", "delta")
+    )
+    # Only the lots that moved since the snapshot are looked at one by one.
+    moved = {}
+    if snapshot is not None and deltas:
+        for lot_id, product_id, quantity, unit_cost in snapshot.lines.filter(inventory_id__in=deltas).values_list(
+            "inventory_id", "product_id", "quantity", "unit_cost",
+        ):
+            moved[lot_id] = (product_id, quantity, unit_cost)
+    new_lot_ids = [lot_id for lot_id in deltas if lot_id not in moved]
+    for lot_id, product_id, unit_cost in Inventory.all_objects.filter(id__in=new_lot_ids).values_list(
+        "id", "product_id", "actualcost",
+    ):
+        moved[lot_id] = (product_id, _ZERO, unit_cost or _ZERO)
+
+    for lot_id, (product_id, before, unit_cost) in moved.items():
+        after = before + deltas[lot_id]
+        if after == before:
+            continue
+        entry = products.setdefault(product_id, {"quantity": _ZERO, "value": _ZERO, "lot_count": 0})
+        entry["quantity"] += after - before
+        entry["value"] += _value(after, unit_cost) - _value(before, unit_cost)
+        entry["lot_count"] += bool(after) - bool(before)
+    products = {product_id: entry for product_id, entry in products.items() if entry["lot_count"]}
+    return {
+        "as_of": as_of_date,
+        "snapshot_date": snapshot.snapshot_date if snapshot else None,
+        "products": products,
+        "quantity": sum((entry["quantity"] for entry in products.values()), _ZERO),
+        "value": sum((entry["value"] for entry in products.values()), _ZERO),
+    }
@@ -0,0 +1,227 @@
+"""
+Maintain ProductInventorySummary, the per-product rollup of lot quantities.
+
+Each lot contributes its unitsin/unitsallocated/unitsonhand to its
+Inventory.product (resolved on save, see product_lookup). The Inventory signals in core/signals.py
+apply the difference between a lot's previous and new contribution inside
+the lot's own transaction, so the item library can read one row per product
+instead of summing the tenant's whole lot history.
+
+Writes that skip model signals (QuerySet.update(), bulk_create()) can leave
+summaries stale. Catalog changes re-resolve the affected lots and schedule a
+rebuild of the tenant's summaries; the rest is repaired with
+rebuild_inventory_summaries() or the rebuild_inventory_summaries management
+command.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, Q, Sum, Value, When
+
+from ..models import Inventory, Product, ProductInventorySummary, Tenant
+from .product_lookup import build_product_lookup_maps, normalize_product_lookup, resolve_product_from_values
+
+LOT_QUANTITY_FIELDS = ("unitsin", "unitsallocated", "unitsonhand")
+# Field names (as given to save(update_fields=...)) that can change a lot's contribution.
+LOT_SUMMARY_FIELDS = frozenset({"product", "product_id", "deleted_at", *LOT_QUANTITY_FIELDS})
+
+_ZERO = Decimal("0")
+
+
+def lot_contribution(lot):
+    """(product id, (expected, allocated, on hand)) for a lot; None for a deleted lot."""
+    if lot.deleted_at is not None:
+        return None
+    return lot.product_id, tuple(Decimal(getattr(lot, field) or 0) for field in LOT_QUANTITY_FIELDS)
+
+
+def _apply(tenant_id, product_id, quantities, lots):
+    if product_id is None or (lots == 0 and not any(quantities)):
+        return
+    expected, allocated, on_hand = quantities
+    changes = {
+        "expected": F("expected") + expected,
+        "allocated": F("allocated") + allocated,
+        "on_hand": F("on_hand") + on_hand,
+        "lot_count": F("lot_count") + lots,
+    }
+    if ProductInventorySummary.all_objects.filter(product_id=product_id).update(**changes) or lots <= 0:
+        # Only a new lot starts a summary row; a missing row on update or removal (e.g. while the
+        # product itself is being deleted) is left for rebuild_inventory_summaries().
+        return
+    _, created = ProductInventorySummary.all_objects.get_or_create(
+        product_id=product_id,
+        defaults={
+            "tenant_id": tenant_id, "expected": expected, "allocated": allocated,
+            "on_hand": on_hand, "lot_count": lots,
+        },
+    )
+    if not created:
+        ProductInventorySummary.all_objects.filter(product_id=product_id).update(**changes)
+
+
+def apply_lot_change(tenant_id, previous, current):
+    """
+    Move a lot's contribution from ``previous`` to ``current``.
+
+    Both are lot_contribution() results, or None when the lot did not exist
+    before (or no longer exists).
+    """
+    if previous == current:
+        return
+    if previous and current and previous[0] == current[0]:
+        delta = tuple(new - old for new, old in zip(current[1], previous[1]))
+        _apply(tenant_id, current[0], delta, 0)
+        return
+    if previous:
+        _apply(tenant_id, previous[0], tuple(-value for value in previous[1]), -1)
+    if current:
+        _apply(tenant_id, current[0], current[1], 1)
+
+
+def apply_product_deltas(deltas):
+    """
+    Add {product id: (expected, allocated, on hand)} to the stored summaries in one UPDATE.
+
+    For set-based writers that change many lots without adding or removing
+    any (see inventory_ledger.record_lot_movements). Products without a
+    summary row are left for rebuild_inventory_summaries(), as in _apply().
+    """
+    deltas = {product_id: delta for product_id, delta in deltas.items() if product_id is not None and any(delta)}
+    if not deltas:
+        return
+
+    def added(field, index):
+        return F(field) + Case(
+            *(When(product_id=product_id, then=Value(delta[index])) for product_id, delta in deltas.items()),
+            default=Value(_ZERO),
+            output_field=DecimalField(max_digits=14, decimal_places=4),
+        )
+
+    ProductInventorySummary.all_objects.filter(product_id__in=deltas).update(
+        expected=added("expected", 0), allocated=added("allocated", 1), on_hand=added("on_hand", 2),
+    )
+
+
+def compute_inventory_summaries(tenant):
+    """Return {product id: {"expected", "allocated", "on_hand", "lot_count"}} computed from the lots."""
+    rows = (
+        Inventory.all_objects.filter(tenant=tenant, product__isnull=False, deleted_at__isnull=True)
+        .values("product_id")
+        .annotate(
+            expected=Sum("unitsin", default=_ZERO),
+            allocated=Sum("unitsallocated", default=_ZERO),
+            on_hand=Sum("unitsonhand", default=_ZERO),
+            lot_count=Count("id"),
+        )
+        .order_by()
+    )
+    return {row.pop("product_id"): row for row in rows}
+
+
+def refresh_lot_products(tenant_id, *names):
+    """
+    Re-resolve lots that may have changed product after a catalog edit.
+
+    Covers lots whose productid/desc match any of ``names`` (pass a
+    product's old and new names). Lots received against a PO line keep that
+    line's product. Returns the number of lots that moved.
+    """
+    keys = {normalize_product_lookup(name) for name in names} - {""}
+    if not keys:
+        return 0
+    lookups = Q()
+    for key in keys:
+        lookups |= Q(productid__iexact=key) | Q(desc__iexact=key)
+    lots = list(
+        Inventory.all_objects.filter(tenant_id=tenant_id, po_item__product__isnull=True)
+        .filter(lookups)
+        .only("id", "product_id", "productid", "desc")
+    )
+    if not lots:
+        return 0
+    products_by_id, products_by_name = build_product_lookup_maps(
+        Product.all_objects.filter(tenant_id=tenant_id).order_by("id")
+    )
+    moved = []
+    for lot in lots:
+        product = resolve_product_from_values(products_by_id, products_by_name, lot.productid, lot.desc)
+        product_id = product.id if product else None
+        if product_id != lot.product_id:
+            lot.product_id = product_id
+            moved.append(lot)
+    Inventory.all_objects.bulk_update(moved, ["product"], batch_size=1000)
+    return len(moved)
+
+
+@transaction.atomic
+def rebuild_inventory_summaries(tenant):
+    """
+    Recompute every summary for ``tenant`` from its lots.
+
+    Returns the ids of products whose stored summary was wrong (drifted).
+    """
+    computed = compute_inventory_summaries(tenant)
+    stored = {
+        row["product_id"]: row
+        for row in ProductInventorySummary.all_objects.select_for_update()
+        .filter(tenant=tenant)
+        .values("product_id", "expected", "allocated", "on_hand", "lot_count")
+    }
+    empty = {"expected": _ZERO, "allocated": _ZERO, "on_hand": _ZERO, "lot_count": 0}
+    drifted = sorted(
+        product_id
+        for product_id in set(computed) | set(stored)
+        if any(
+            computed.get(product_id, empty)[field] != stored.get(product_id, empty)[field]
+            for field in empty
+        )
+    )
+    ProductInventorySummary.all_objects.filter(tenant=tenant).delete()
+    ProductInventorySummary.all_objects.bulk_create(
+        ProductInventorySummary(tenant=tenant, product_id=product_id, **values)
+        for product_id, values in computed.items()
+    )
+    return drifted
+
+
+def schedule_inventory_summary_rebuild(tenant_id):
+    """Rebuild ``tenant_id``'s summaries once the current transaction commits (once per transaction)."""
+    pending = transaction.get_connection().run_on_commit
+    if any(
+        getattr(func, "inventory_summary_tenant_id", None) == tenant_id and not func.has_run
+        for _, func, _ in pending
+    ):
+        return
+
+    def rebuild():
+        rebuild.has_run = True
+        tenant = Tenant.objects.filter(id=tenant_id).first()
+        if tenant is not None:
+            rebuild_inventory_summaries(tenant)
+
+    rebuild.inventory_summary_tenant_id = tenant_id
+    rebuild.has_run = False
+    transaction.on_commit(rebuild)
+
+
+def summary_totals_by_product(tenant, product_ids):
+    """{product id: totals dict} for _product_to_dict(), read from the summary table."""
+    return {
+        summary.product_id: summary.totals()
+        for summary in ProductInventorySummary.all_objects.filter(tenant=tenant, product_id__in=product_ids)
+    }
+
+
+def available_to_promise(product):
+    """
+    On hand, allocated and available (free to promise) quantities of ``product``.
+
+    Reads the product's one summary row, so order entry can check stock for
+    a line without summing lots or allocations.
+    """
+    summary = ProductInventorySummary.all_objects.filter(product=product).first()
+    if summary is None:
+        return {"on_hand": _ZERO, "allocated": _ZERO, "available": _ZERO}
+    totals = summary.totals()
+    return {field: totals[field] for field in ("on_hand", "allocated", "available")}
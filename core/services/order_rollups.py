@@ -0,0 +1,138 @@
+"""
+Maintain the rollup columns stored on SalesOrder and PurchaseOrder.
+
+Order lists show each order's total, line count and product names, and for
+purchase orders the expected/received quantities, unit types and the
+receive status derived from the item lines. These are stored on the order
+row (items_total, line_count, products_summary, ...) so list endpoints read
+one table instead of joining or prefetching every line.
+
+The SalesOrderItem/PurchaseOrderItem signals in core/signals.py refresh an
+order whenever one of its lines is saved or deleted, and Product signals
+refresh the orders that name a product when it is renamed or deleted.
+Writes that skip model signals (bulk_create(), QuerySet.update()) are
+repaired with rebuild_order_rollups() or the rebuild_order_rollups
+management command.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from ..models import PurchaseOrder, PurchaseOrderItem, SalesOrder, SalesOrderItem
+
+# Product fields the rollups read; a change to any of them refreshes the product's orders.
+ROLLUP_PRODUCT_FIELDS = ("species", "item_name", "unit_type")
+SALES_ROLLUP_FIELDS = ("items_total", "line_count", "products_summary")
+PURCHASE_ROLLUP_FIELDS = (
+    *SALES_ROLLUP_FIELDS, "expected_quantity", "received_quantity", "unit_types", "item_receive_status",
+)
+# Line values the rollups are computed from (PurchaseOrderItem adds received_quantity).
+ROLLUP_ITEM_VALUES = (
+    "item_type", "amount", "quantity", "unit_type", "description",
+    "product_id", "product__species", "product__item_name", "product__unit_type",
+)
+_ZERO = Decimal("0")
+
+
+def _products_summary(item_rows):
+    return ", ".join(sorted(set(filter(None, (
+        (row["product__species"] or row["product__item_name"] or "") if row["product_id"] else row["description"]
+        for row in item_rows
+    )))))
+
+
+def sales_order_rollup(lines):
+    """Rollup values for a sales order with the given lines (dicts of ROLLUP_ITEM_VALUES)."""
+    item_rows = [row for row in lines if row["item_type"] == "item"]
+    return {
+        "items_total": sum((row["amount"] or _ZERO for row in lines), _ZERO),
+        "line_count": len(lines),
+        "products_summary": _products_summary(item_rows),
+    }
+
+
+def purchase_order_rollup(lines):
+    """Rollup values for a purchase order with the given lines (dicts of ROLLUP_ITEM_VALUES plus received_quantity)."""
+    item_rows = [row for row in lines if row["item_type"] == "item"]
+    if not item_rows:
+        receive_status = ""
+    elif all((row["received_quantity"] or 0) >= (row["quantity"] or 0) for row in item_rows):
+        receive_status = "received"
+    elif any((row["received_quantity"] or 0) > 0 for row in item_rows):
+        receive_status = "partial"
+    else:
+        receive_status = "not_received"
+    return {
+        **sales_order_rollup(lines),
+        "expected_quantity": sum((row["quantity"] or _ZERO for row in item_rows), _ZERO),
+        "received_quantity": sum((row["received_quantity"] or _ZERO for row in item_rows), _ZERO),
+        "unit_types": ", ".join(sorted(set(filter(None, (
+            row["unit_type"] or (row["product__unit_type"] if row["product_id"] else "") for row in item_rows
+        )))))[:255],
+        "item_receive_status": receive_status,
+    }
+
+
+def _refresh(order_model, item_model, order_field, values, rollup, fields, order_ids):
+    order_ids = {order_id for order_id in order_ids if order_id is not None}
+    if not order_ids:
+        return 0
+    lines = defaultdict(list)
+    rows = (
+        item_model.all_objects.filter(**{f"{order_field}__in": order_ids})
+        .order_by()
+        .values(order_field, *values)
+    )
+    for row in rows.iterator(chunk_size=5000):
+        lines[row[order_field]].append(row)
+    changed = []
+    for order in order_model.all_objects.filter(id__in=order_ids).only("id", *fields):
+        stored = {field: getattr(order, field) for field in fields}
+        computed = rollup(lines.get(order.id, []))
+        if computed != stored:
+            for field, value in computed.items():
+                setattr(order, field, value)
+            changed.append(order)
+    order_model.all_objects.bulk_update(changed, fields, batch_size=1000)
+    return len(changed)
+
+
+def refresh_sales_order_rollups(order_ids):
+    """Recompute the rollups of the given sales orders; returns how many were out of date."""
+    return _refresh(
+        SalesOrder, SalesOrderItem, "sales_order_id", ROLLUP_ITEM_VALUES,
+        sales_order_rollup, SALES_ROLLUP_FIELDS, order_ids,
+    )
+
+
+def refresh_purchase_order_rollups(order_ids):
+    """Recompute the rollups of the given purchase orders; returns how many were out of date."""
+    return _refresh(
+        PurchaseOrder, PurchaseOrderItem, "purchase_order_id", (*ROLLUP_ITEM_VALUES, "received_quantity"),
+        purchase_order_rollup, PURCHASE_ROLLUP_FIELDS, order_ids,
+    )
+
+
+def orders_with_product(product_id):
+    """(sales order ids, purchase order ids) with a line for ``product_id``."""
+    return (
+        set(SalesOrderItem.all_objects.filter(product_id=product_id).values_list("sales_order_id", flat=True)),
+        set(PurchaseOrderItem.all_objects.filter(product_id=product_id).values_list("purchase_order_id", flat=True)),
+    )
+
+
+def refresh_order_rollups(sales_order_ids=(), purchase_order_ids=()):
+    refresh_sales_order_rollups(sales_order_ids)
+    refresh_purchase_order_rollups(purchase_order_ids)
+
+
+def rebuild_order_rollups(tenant, chunk_size=2000):
+    """
+    Recompute the rollups of every order of ``tenant``.
+
+    Returns (sales orders corrected, purchase orders corrected).
+    """
+    corrected = []
+    for model, refresh in ((SalesOrder, refresh_sales_order_rollups), (PurchaseOrder, refresh_purchase_order_rollups)):
+        ids = list(model.all_objects.filter(tenant=tenant).order_by("id").values_list("id", flat=True))
+        corrected.append(sum(refresh(ids[start:start + chunk_size]) for start in range(0, len(ids), chunk_size)))
+    return tuple(corrected)
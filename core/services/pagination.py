@@ -0,0 +1,231 @@
+"""
+Keyset (cursor) pagination for the list endpoints.
+
+OFFSET pagination makes the database walk and throw away every row before
+the requested page, so deep pages get slower the further a user scrolls.
+KeysetPaginator instead filters on the sort columns of the last row seen
+("rows after this one"), which an index on those columns answers directly
+at any depth.
+
+The columns come from the queryset's own ordering (including the search
+rank added by core.services.search), with the primary key appended as a
+tie-breaker. NULLs are placed explicitly (last unless the ordering says
+otherwise) so every database pages the same way. Cursors are opaque
+URL-safe strings holding the boundary row's sort values and the paging
+direction. A cursor made for one ordering is rejected by another.
+
+Usage:
+    paginator = KeysetPaginator(queryset, page_size=100, cursor=request.GET.get("cursor"))
+    page = paginator.page(list(paginator.queryset))
+    page.items, page.next_cursor, page.prev_cursor
+
+Sort columns must be fields of the queryset's model or annotations on it.
+"""
+import base64
+import binascii
+import datetime
+import decimal
+import hashlib
+import json
+import uuid
+from dataclasses import dataclass
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import connections
+from django.db.models import F, OrderBy, Q
+
+
+class InvalidCursor(ValueError):
+    """A cursor that was tampered with or made for a different list or sort order."""
+
+
+@dataclass(frozen=True)
+class _Column:
+    name: str
+    descending: bool
+    nulls_first: bool
+    nullable: bool
+
+    def order_by(self):
+        # NOT NULL columns keep a plain ORDER BY so indexes built without NULLS FIRST/LAST still apply.
+        nulls = ({"nulls_first": True} if self.nulls_first else {"nulls_last": True}) if self.nullable else {}
+        expression = F(self.name)
+        return expression.desc(**nulls) if self.descending else expression.asc(**nulls)
+
+    def reversed(self):
+        return _Column(self.name, not self.descending, not self.nulls_first, self.nullable)
+
+    def after(self, value):
+        """Rows strictly after ``value`` in this column's order."""
+        if value is None:
+            return Q(**{f"{self.name}__isnull": False}) if self.nulls_first and self.nullable else Q(pk__in=[])
+        beyond = Q(**{f"{self.name}__{'lt' if self.descending else 'gt'}": value})
+        if self.nullable and not self.nulls_first:
+            beyond |= Q(**{f"{self.name}__isnull": True})
+        return beyond
+
+    def equal(self, value):
+        return Q(**{f"{self.name}__isnull": True}) if value is None else Q(**{self.name: value})
+
+
+@dataclass
+class Page:
+    items: list
+    next_cursor: str = None
+    prev_cursor: str = None
+    # None when the caller did not ask for a total.
+    total: int = None
+    total_is_estimate: bool = False
+
+    def meta(self):
+        """Pagination keys for the JSON response."""
+        meta = {"next_cursor": self.next_cursor, "prev_cursor": self.prev_cursor}
+        if self.total is not None:
+            meta["total"] = self.total
+            if self.total_is_estimate:
+                meta["total_is_estimate"] = True
+        return meta
+
+
+def _columns(queryset):
+    model = queryset.model
+    ordering = list(queryset.query.order_by or (model._meta.ordering if queryset.query.default_ordering else ()))
+    columns = []
+    for entry in ordering:
+        if isinstance(entry, OrderBy) and isinstance(entry.expression, F):
+            name, descending = entry.expression.name, entry.descending
+            nulls_first = bool(entry.nulls_first) if (entry.nulls_first or entry.nulls_last) else None
+        elif isinstance(entry, str) and entry != "?":
+            name, descending, nulls_first = entry.lstrip("-"), entry.startswith("-"), None
+        else:
+            raise ValueError(f"Keyset pagination cannot order by {entry!r}.")
+        if name == "pk":
+            name = model._meta.pk.name
+        try:
+            nullable = model._meta.get_field(name).null
+        except FieldDoesNotExist:
+            # An annotation (e.g. the search rank); these are never NULL here.
+            nullable = False
+        columns.append(_Column(name, descending, bool(nulls_first), nullable))
+    pk = model._meta.pk.name
+    if pk not in {column.name for column in columns}:
+        columns.append(_Column(pk, bool(columns) and columns[0].descending, False, False))
+    return columns
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    return value
+
+
+def _ordering_key(columns):
+    spec = ",".join(f"{'-' if c.descending else ''}{c.name}{'^' if c.nulls_first else ''}" for c in columns)
+    return hashlib.sha1(spec.encode()).hexdigest()[:8]
+
+
+def _order(queryset, columns):
+    return queryset.order_by(*(column.order_by() for column in columns))
+
+
+def keyset_ordered(queryset):
+    """
+    ``queryset`` ordered exactly as KeysetPaginator pages it.
+
+    Offset pages taken from it line up with the paginator's cursors.
+    """
+    return _order(queryset, _columns(queryset))
+
+
+def _keyset_filter(columns, values):
+    condition = Q(pk__in=[])
+    equal = Q()
+    for column, value in zip(columns, values):
+        condition |= equal & column.after(value)
+        equal &= column.equal(value)
+    return condition
+
+
+class KeysetPaginator:
+    """
+    One page of ``queryset`` after (or before) ``cursor``.
+
+    Evaluate ``paginator.queryset`` (sync or async) and pass the rows to
+    page(). Raises InvalidCursor for a cursor this ordering did not issue.
+    """
+
+    def __init__(self, queryset, page_size, cursor=None):
+        self.page_size = page_size
+        self.columns = _columns(queryset)
+        self.key = _ordering_key(self.columns)
+        self.backwards = False
+        self.cursor_given = bool(cursor)
+        columns = self.columns
+        if cursor:
+            self.backwards, values = self._decode(cursor)
+            if self.backwards:
+                columns = [column.reversed() for column in columns]
+            try:
+                queryset = queryset.filter(_keyset_filter(columns, values))
+            except (ValidationError, ValueError, TypeError):
+                raise InvalidCursor("Invalid cursor.") from None
+        self.queryset = _order(queryset, columns)[:page_size + 1]
+
+    def _decode(self, cursor):
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            key, direction, values = payload["k"], payload["d"], payload["v"]
+        except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, KeyError):
+            raise InvalidCursor("Invalid cursor.") from None
+        if key != self.key or direction not in ("next", "prev") or len(values) != len(self.columns):
+            raise InvalidCursor("This cursor belongs to a different list or sort order.")
+        return direction == "prev", values
+
+    def _encode(self, row, direction):
+        payload = {
+            "k": self.key,
+            "d": direction,
+            "v": [_encode_value(getattr(row, column.name)) for column in self.columns],
+        }
+        return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+    def page(self, rows):
+        """Build the Page from the evaluated ``queryset`` rows."""
+        rows = list(rows)
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.backwards:
+            rows.reverse()
+            has_next, has_prev = self.cursor_given, has_more
+        else:
+            has_next, has_prev = has_more, self.cursor_given
+        return Page(
+            items=rows,
+            next_cursor=self._encode(rows[-1], "next") if rows and has_next else None,
+            prev_cursor=self._encode(rows[0], "prev") if rows and has_prev else None,
+        )
+
+    def next_cursor_after(self, row):
+        """A cursor for the rows after ``row`` (e.g. the last row of an offset page)."""
+        return self._encode(row, "next")
+
+
+def estimate_count(queryset):
+    """
+    The row count of ``queryset``, estimated from the query plan on PostgreSQL.
+
+    Other databases have no cheap estimate and get an exact count.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return queryset.count()
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
@@ -0,0 +1,177 @@
+"""
+Pick lists for the shipping screen.
+
+build_pick_list() turns the sales order lines shipping in a date window into
+pick rows grouped by department and product, each with the lots allocated to
+the line in FIFO order (oldest receive date first). It reads the lines and
+their allocations in two queries, however many orders the window holds.
+
+Windows are always bounded: pick_list_window() fills in a missing end
+around today and refuses spans over PICK_LIST_MAX_WINDOW_DAYS, so a cached
+list never holds every open line a tenant has.
+
+The rows are cached per (tenant, ship-date window) in the Django cache,
+stamped with the tenant's pick-list generation; one get_many() reads the
+generation and the rows together. invalidate_pick_lists() drops all of a
+tenant's cached windows at once by moving to a new generation. core/signals.py calls it when orders, order
+lines, allocations, products or lot codes change; writers that skip
+signals (e.g. core.services.allocation) call it themselves. The generation
+lives in the cache too, so the cache must be shared by every worker process
+(core/checks.py rejects a per-process LocMemCache).
+"""
+import datetime
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from ..models import SalesOrderAllocation, SalesOrderItem
+
+CACHE_KEY_PREFIX = "pick-list"
+
+# Bump when the cached row shape changes so old entries are ignored.
+CACHE_VERSION = 2
+
+UNASSIGNED_DEPARTMENT = "Unassigned"
+# Product fields shown on pick rows; a change to any of them drops the tenant's cached pick lists.
+PICK_LIST_PRODUCT_FIELDS = ("product_id", "description", "item_name", "department", "unit_type")
+
+
+def _cache_timeout():
+    return getattr(settings, "PICK_LIST_CACHE_TIMEOUT", 300)
+
+
+def pick_list_window(ship_date_from=None, ship_date_to=None, today=None):
+    """
+    The (from, to) ship dates to pick for, as dates.
+
+    With no dates the window is today ± PICK_LIST_WINDOW_DAYS; with one, the
+    other end is that many days either side of it. Raises ValueError when
+    the window is reversed or longer than PICK_LIST_MAX_WINDOW_DAYS.
+    """
+    days = datetime.timedelta(days=getattr(settings, "PICK_LIST_WINDOW_DAYS", 7))
+    if ship_date_from is None and ship_date_to is None:
+        today = today or datetime.date.today()
+        ship_date_from, ship_date_to = today - days, today + days
+    elif ship_date_from is None:
+        ship_date_from = ship_date_to - 2 * days
+    elif ship_date_to is None:
+        ship_date_to = ship_date_from + 2 * days
+    if ship_date_to < ship_date_from:
+        raise ValueError("The ship date window ends before it starts.")
+    max_days = getattr(settings, "PICK_LIST_MAX_WINDOW_DAYS", 31)
+    if (ship_date_to - ship_date_from).days >= max_days:
+        raise ValueError(f"The ship date window can span at most {max_days} days.")
+    return ship_date_from, ship_date_to
+
+
+def _generation_key(tenant_id):
+    return f"{CACHE_KEY_PREFIX}:{tenant_id}:generation"
+
+
+def _generation(tenant_id):
+    key = _generation_key(tenant_id)
+    generation = cache.get(key, version=CACHE_VERSION)
+    if generation is None:
+        generation = time.time_ns()
+        # add() so a concurrent first reader and an invalidation don't overwrite each other.
+        if not cache.add(key, generation, None, version=CACHE_VERSION):
+            generation = cache.get(key, generation, version=CACHE_VERSION)
+    return generation
+
+
+def _bump_generation(tenant_id):
+    # incr() rather than a fresh timestamp: workers on different clocks must never step back to an older generation.
+    try:
+        cache.incr(_generation_key(tenant_id), version=CACHE_VERSION)
+    except ValueError:
+        _generation(tenant_id)
+
+
+def invalidate_pick_lists(tenant_id):
+    """Drop every cached pick list of a tenant, now and again once the transaction commits."""
+    _bump_generation(tenant_id)
+    transaction.on_commit(lambda: _bump_generation(tenant_id))
+
+
+def _item_name(row):
+    return row["description"] or row["product__description"] or row["product__item_name"] or row["product__product_id"] or ""
+
+
+def build_pick_list(tenant, ship_date_from, ship_date_to):
+    """
+    Pick rows for the sales order lines shipping from ``ship_date_from`` to ``ship_date_to``, uncached.
+
+    Rows are sorted by department, item name and order number. Each row is a
+    dict with department, item_name, order_number, so_id, customer, shipper,
+    shipping_route, fifo_lots, quantity and unit_type.
+    """
+    items = SalesOrderItem.all_objects.filter(
+        sales_order__tenant=tenant,
+        sales_order__ship_date__gte=ship_date_from,
+        sales_order__ship_date__lte=ship_date_to,
+    )
+    lines = list(items.order_by("id").values(
+        "id", "sales_order_id", "sales_order__order_number", "sales_order__customer_name",
+        "sales_order__shipper", "sales_order__shipping_route", "description", "quantity", "unit_type",
+        "product__product_id", "product__description", "product__item_name", "product__department",
+        "product__unit_type",
+    ))
+
+    lots = {}
+    allocations = (
+        SalesOrderAllocation.all_objects.filter(sales_order_item_id__in=items.values("id"), inventory__isnull=False)
+        .order_by(F("inventory__receivedate").asc(nulls_last=True), "inventory_id")
+        .values_list("sales_order_item_id", "inventory_id", "inventory__vendorlot")
+    )
+    for item_id, inventory_id, vendorlot in allocations:
+        lots.setdefault(item_id, []).append(vendorlot or f"LOT-{inventory_id}")
+
+    rows = [
+        {
+            "department": line["product__department"] or UNASSIGNED_DEPARTMENT,
+            "item_name": _item_name(line),
+            "order_number": line["sales_order__order_number"],
+            "so_id": line["sales_order_id"],
+            "customer": line["sales_order__customer_name"] or "",
+            "shipper": line["sales_order__shipper"] or "",
+            "shipping_route": line["sales_order__shipping_route"] or "",
+            "fifo_lots": lots.get(line["id"], []),
+            "quantity": float(line["quantity"] or 0),
+            "unit_type": line["unit_type"] or line["product__unit_type"] or "",
+        }
+        for line in lines
+    ]
+    rows.sort(key=lambda row: (row["department"], row["item_name"].lower(), row["order_number"]))
+    return rows
+
+
+def pick_list(tenant, ship_date_from, ship_date_to):
+    """build_pick_list() for the window, served from the cache while nothing behind it has changed."""
+    generation_key = _generation_key(tenant.id)
+    key = f"{CACHE_KEY_PREFIX}:{tenant.id}:{ship_date_from.isoformat()}:{ship_date_to.isoformat()}"
+    cached = cache.get_many([generation_key, key], version=CACHE_VERSION)
+    generation = cached.get(generation_key)
+    entry = cached.get(key)
+    if generation is not None and entry is not None and entry[0] == generation:
+        return entry[1]
+    if generation is None:
+        generation = _generation(tenant.id)
+    rows = build_pick_list(tenant, ship_date_from, ship_date_to)
+    cache.set(key, (generation, rows), _cache_timeout(), version=CACHE_VERSION)
+    return rows
+
+
+def matches_search(row, term):
+    """
+    Whether a pick row matches the picking screen's search box.
+
+    The order must match on number, customer, shipper or route, and the row
+    on department, item, order number or customer.
+    """
+    term = term.lower()
+    order_text = f"{row['order_number']} {row['customer']} {row['shipper']} {row['shipping_route']}".lower()
+    row_text = f"{row['department']} {row['item_name']} {row['order_number']} {row['customer']}".lower()
+    return term in order_text and term in row_text
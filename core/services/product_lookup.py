@@ -0,0 +1,125 @@
+"""
+Matching inventory lots to catalog products.
+
+Lots received against a PO line use that line's product. Older and imported
+lots only carry free-text productid/desc values, which are matched against
+product_id first and then the product's names, ignoring case and extra
+whitespace. When several products share a key, the maps built here keep the
+newest product for product_id matches and the oldest for name matches;
+find_product() applies the same rules in SQL against the normalized_*
+columns that Product.save() maintains.
+
+The resolved product is stored on Inventory.product when a lot is saved, so
+request code should join through that instead of matching strings.
+"""
+from django.db.models import Q
+
+PRODUCT_NAME_FIELDS = ("description", "item_name", "friendly_name", "qb_item_name")
+
+
+def normalize_product_lookup(value):
+    return " ".join(str(value or "").strip().lower().split())
+
+
+def build_product_lookup_maps(products):
+    """Map normalized keys to products; pass the products ordered by id."""
+    products_by_id = {}
+    products_by_name = {}
+
+    for product in products:
+        product_id_key = normalize_product_lookup(product.product_id)
+        if product_id_key:
+            products_by_id[product_id_key] = product
+
+        for candidate in [
+            product.description,
+            product.item_name,
+            product.friendly_name,
+            product.qb_item_name,
+        ]:
+            name_key = normalize_product_lookup(candidate)
+            if name_key and name_key not in products_by_name:
+                products_by_name[name_key] = product
+
+    return products_by_id, products_by_name
+
+
+def resolve_product_from_values(products_by_id, products_by_name, *values):
+    for value in values:
+        lookup_key = normalize_product_lookup(value)
+        if not lookup_key:
+            continue
+        if lookup_key in products_by_id:
+            return products_by_id[lookup_key]
+        if lookup_key in products_by_name:
+            return products_by_name[lookup_key]
+    return None
+
+
+def find_product(tenant_id, *values):
+    """Return the product matching the first of ``values`` that matches anything, using one query."""
+    from ..models import Product
+
+    keys = [key for key in (normalize_product_lookup(value) for value in values) if key]
+    if not keys:
+        return None
+    lookups = Q(normalized_product_id__in=keys)
+    for field in PRODUCT_NAME_FIELDS:
+        lookups |= Q(**{f"normalized_{field}__in": keys})
+    candidates = list(Product.all_objects.filter(tenant_id=tenant_id).filter(lookups).order_by("id"))
+    for key in keys:
+        by_id = [product for product in candidates if product.normalized_product_id == key]
+        if by_id:
+            return by_id[-1]
+        for product in candidates:
+            if key in (getattr(product, f"normalized_{field}") for field in PRODUCT_NAME_FIELDS):
+                return product
+    return None
+
+
+def resolve_lot_product_id(tenant_id, po_item_id, productid, desc):
+    """Return the id of the product a lot with these values belongs to, or None."""
+    from ..models import PurchaseOrderItem
+
+    if po_item_id:
+        product_id = PurchaseOrderItem.all_objects.filter(id=po_item_id).values_list("product_id", flat=True).first()
+        if product_id:
+            return product_id
+    product = find_product(tenant_id, productid, desc)
+    return product.id if product else None
+
+
+def backfill_lot_products(tenant, batch_size=2000):
+    """
+    Refresh the tenant's Product.normalized_* columns and Inventory.product.
+
+    For rows written before those columns existed or through bulk paths
+    that skip save(). Returns (products updated, lots updated).
+    """
+    from ..models import Inventory, Product
+
+    products = list(Product.all_objects.filter(tenant=tenant).order_by("id"))
+    normalized_fields = [f"normalized_{field}" for field in Product.LOOKUP_FIELDS]
+    stale_products = []
+    for product in products:
+        before = [getattr(product, field) for field in normalized_fields]
+        product.set_lookup_keys()
+        if [getattr(product, field) for field in normalized_fields] != before:
+            stale_products.append(product)
+    Product.all_objects.bulk_update(stale_products, normalized_fields, batch_size=batch_size)
+
+    products_by_id, products_by_name = build_product_lookup_maps(products)
+    lots = (
+        Inventory.all_objects.filter(tenant=tenant)
+        .values_list("id", "product_id", "po_item__product_id", "productid", "desc")
+    )
+    stale_lots = []
+    for lot_id, current_id, po_product_id, productid, desc in lots.iterator(chunk_size=batch_size):
+        product_id = po_product_id
+        if not product_id:
+            product = resolve_product_from_values(products_by_id, products_by_name, productid, desc)
+            product_id = product.id if product else None
+        if product_id != current_id:
+            stale_lots.append(Inventory(id=lot_id, product_id=product_id))
+    Inventory.all_objects.bulk_update(stale_lots, ["product"], batch_size=batch_size)
+    return len(stale_products), len(stale_lots)
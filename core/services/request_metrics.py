@@ -0,0 +1,237 @@
+"""
+Per-request query and latency instrumentation for the /api/ endpoints.
+
+RequestMetricsMiddleware opens a capture_request_metrics() block around each
+API request. While it is open every query on any connection used by the
+request (including the worker threads behind the async ORM) is counted,
+timed and fingerprinted, and JSON responses built with this module's
+JsonResponse record how long they took to encode. Finished requests are
+folded into a rolling window per view name, which backs the system admin
+stats endpoint.
+
+RequestMetricsViewMiddleware, last in MIDDLEWARE, marks where the view
+starts and ends. "queries", "db_ms" and the duplicate counts then cover the
+view's own work; the session, auth and tenant lookups of the middleware
+around it are reported separately as "overhead_queries". Without the marker
+every query counts as the view's.
+
+Budgets come from settings.REQUEST_METRICS_BUDGETS, keyed by view name with
+an optional "default" entry, e.g.:
+
+    REQUEST_METRICS_BUDGETS = {
+        "default": {"queries": 50, "db_ms": 500},
+        "api_shipping_picking": {"queries": 10, "total_ms": 300},
+    }
+
+Stats are kept in process memory, so each worker reports on its own traffic;
+request_stats() callers should say which worker answered (see
+system_admin_request_metrics).
+"""
+import contextvars
+import logging
+import math
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.http import JsonResponse as DjangoJsonResponse
+
+logger = logging.getLogger(__name__)
+
+_current_metrics = contextvars.ContextVar("fishtech_request_metrics", default=None)
+
+_IN_LIST_RE = re.compile(r"\bIN \((?:%s, )*%s\)")
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+METRIC_FIELDS = (
+    "queries", "db_ms", "duplicate_queries", "overhead_queries", "serialize_ms", "response_bytes", "total_ms",
+)
+
+
+def fingerprint_sql(sql):
+    """Collapse literals and IN lists so repeated shapes of the same query compare equal."""
+    sql = _IN_LIST_RE.sub("IN (...)", sql)
+    return _LITERAL_RE.sub("?", sql)
+
+
+class RequestMetrics:
+    """Measurements for one request."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.overhead_queries = 0
+        self.serialize_time = 0.0
+        self.fingerprints = Counter()
+        self._after_view = False
+        self._lock = threading.Lock()
+
+    def record_query(self, sql, duration):
+        with self._lock:
+            if self._after_view:
+                self.overhead_queries += 1
+                return
+            self.queries += 1
+            self.db_time += duration
+            self.fingerprints[fingerprint_sql(sql)] += 1
+
+    def view_started(self):
+        """Count everything recorded so far as middleware overhead rather than the view's."""
+        with self._lock:
+            self.overhead_queries += self.queries
+            self.queries = 0
+            self.db_time = 0.0
+            self.fingerprints.clear()
+
+    def view_finished(self):
+        self._after_view = True
+
+    def record_serialization(self, duration):
+        self.serialize_time += duration
+
+    def duplicates(self):
+        return {sql: count for sql, count in self.fingerprints.items() if count > 1}
+
+
+def _instrument_query(execute, sql, params, many, context):
+    metrics = _current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.record_query(sql, time.perf_counter() - started)
+
+
+def install_query_instrumentation(sender, connection, **kwargs):
+    """connection_created receiver: add the query recorder to every new connection."""
+    if _instrument_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_instrument_query)
+
+
+def current_request_metrics():
+    """The RequestMetrics of the enclosing capture_request_metrics() block, or None."""
+    return _current_metrics.get()
+
+
+@contextmanager
+def capture_request_metrics():
+    """Record queries and serialization for the enclosed block; yields the RequestMetrics."""
+    metrics = RequestMetrics()
+    token = _current_metrics.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current_metrics.reset(token)
+
+
+class JsonResponse(DjangoJsonResponse):
+    """django.http.JsonResponse that reports its encoding time to the current request metrics."""
+
+    def __init__(self, *args, **kwargs):
+        started = time.perf_counter()
+        super().__init__(*args, **kwargs)
+        metrics = _current_metrics.get()
+        if metrics is not None:
+            metrics.record_serialization(time.perf_counter() - started)
+
+
+class _MetricsStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {}
+
+    def add(self, view_name, sample):
+        window = getattr(settings, "REQUEST_METRICS_WINDOW", 500)
+        with self._lock:
+            samples = self._samples.get(view_name)
+            if samples is None or samples.maxlen != window:
+                samples = self._samples[view_name] = deque(samples or (), maxlen=window)
+            samples.append(sample)
+
+    def snapshot(self):
+        with self._lock:
+            return {view_name: list(samples) for view_name, samples in self._samples.items()}
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+
+_store = _MetricsStore()
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0
+    # Nearest-rank percentile.
+    return sorted_values[max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)]
+
+
+def record_request(view_name, metrics, total_time, response_bytes):
+    """Fold a finished request into the rolling stats and warn if it broke its budget."""
+    duplicates = metrics.duplicates()
+    sample = {
+        "queries": metrics.queries,
+        "db_ms": round(metrics.db_time * 1000, 2),
+        "duplicate_queries": sum(count - 1 for count in duplicates.values()),
+        "overhead_queries": metrics.overhead_queries,
+        "serialize_ms": round(metrics.serialize_time * 1000, 2),
+        "response_bytes": response_bytes,
+        "total_ms": round(total_time * 1000, 2),
+        "duplicate_fingerprints": sorted(duplicates.items(), key=lambda item: -item[1])[:5],
+    }
+    _store.add(view_name, sample)
+    _check_budget(view_name, sample)
+    return sample
+
+
+def _check_budget(view_name, sample):
+    budgets = getattr(settings, "REQUEST_METRICS_BUDGETS", {}) or {}
+    budget = budgets.get(view_name, budgets.get("default"))
+    if not budget:
+        return
+    exceeded = {
+        field: (sample[field], limit)
+        for field, limit in budget.items()
+        if field in METRIC_FIELDS and sample[field] > limit
+    }
+    if exceeded:
+        logger.warning(
+            "%s exceeded its request budget: %s",
+            view_name,
+            ", ".join(f"{field}={value} (limit {limit})" for field, (value, limit) in exceeded.items()),
+            extra={"view_name": view_name, "request_metrics": sample},
+        )
+
+
+def request_stats():
+    """Rolling p50/p95/p99 per view name, plus the most frequent duplicate query fingerprints."""
+    stats = {}
+    for view_name, samples in sorted(_store.snapshot().items()):
+        entry = {"requests": len(samples)}
+        for field in METRIC_FIELDS:
+            values = sorted(sample[field] for sample in samples)
+            entry[field] = {
+                "p50": _percentile(values, 50),
+                "p95": _percentile(values, 95),
+                "p99": _percentile(values, 99),
+                "max": values[-1] if values else 0,
+            }
+        duplicates = Counter()
+        for sample in samples:
+            for sql, count in sample["duplicate_fingerprints"]:
+                duplicates[sql] += count
+        entry["top_duplicate_queries"] = [
+            {"sql": sql, "count": count} for sql, count in duplicates.most_common(5)
+        ]
+        stats[view_name] = entry
+    return stats
+
+
+def reset_request_stats():
+    _store.clear()
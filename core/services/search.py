@@ -0,0 +1,175 @@
+"""
+Substring search for the list endpoints.
+
+search(queryset, fields, term) keeps the rows where any of ``fields``
+contains ``term`` (case-insensitively, like the ``__icontains`` ORs it
+replaces) and orders them by relevance: an exact match, then a prefix, then
+a word prefix, then a match anywhere, with the queryset's own ordering as the
+tie-breaker.
+
+How the rows are found depends on the database:
+
+- PostgreSQL: the same ``UPPER(col) LIKE`` SQL as ``__icontains``, served by
+  the pg_trgm GIN indexes added in migration 0068.
+- SQLite: FTS5 tables with the trigram tokenizer (``<table>_search``), kept
+  in sync by triggers. install_sqlite_search_tables() creates them after
+  every migrate, because SQLite drops triggers when Django rebuilds a table.
+  The trigram tokenizer needs SQLite 3.34+ built with FTS5; without it the
+  tables are not installed.
+- Anything else, tables without a search table, terms shorter than a
+  trigram, and fields that span relations fall back to plain ``__icontains``.
+"""
+import logging
+
+from django.db import OperationalError, connections
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+logger = logging.getLogger(__name__)
+
+# Columns covered by the search indexes, by table.
+SEARCH_COLUMNS = {
+    "inventory_inventory": ("desc", "vendorid", "vendorlot", "poid", "productid"),
+    "inventory_product": ("item_name", "description", "sku", "product_id", "friendly_name", "qb_item_name"),
+    "processing_batch": ("batch_number", "process_type"),
+    "purchasing_order": ("po_number", "vendor_name", "qb_po_number", "buyer"),
+    "sales_order": ("order_number", "customer_name", "shipper", "shipping_route"),
+}
+
+TRIGRAM_LENGTH = 3
+
+
+def search(queryset, fields, term):
+    """Filter ``queryset`` to rows where any of ``fields`` contains ``term``, best matches first."""
+    term = (term or "").strip()
+    if not term:
+        return queryset
+    backend = _BACKENDS.get(connections[queryset.db].vendor, _contains_filter)
+    ordering = list(queryset.query.order_by or (queryset.model._meta.ordering if queryset.query.default_ordering else ()))
+    return (
+        queryset.filter(backend(queryset, fields, term))
+        .annotate(search_rank=_rank(fields, term))
+        .order_by("-search_rank", *ordering)
+    )
+
+
+def _any(fields, lookup, value):
+    condition = Q()
+    for field in fields:
+        condition |= Q(**{f"{field}__{lookup}": value})
+    return condition
+
+
+def _rank(fields, term):
+    return Case(
+        When(_any(fields, "iexact", term), then=Value(4)),
+        When(_any(fields, "istartswith", term), then=Value(3)),
+        When(_any(fields, "icontains", f" {term}"), then=Value(2)),
+        default=Value(1),
+        output_field=IntegerField(),
+    )
+
+
+def _contains_filter(queryset, fields, term):
+    return _any(fields, "icontains", term)
+
+
+def _fts5_filter(queryset, fields, term):
+    table = queryset.model._meta.db_table
+    columns = _columns(queryset.model, fields)
+    if (
+        len(term) < TRIGRAM_LENGTH
+        or columns is None
+        or not set(columns) <= set(SEARCH_COLUMNS.get(table, ()))
+        or table not in _sqlite_search_tables(connections[queryset.db])
+    ):
+        return _contains_filter(queryset, fields, term)
+    match = '{%s} : "%s"' % (" ".join(columns), term.replace('"', '""'))
+    return Q(pk__in=RawSQL(f'SELECT rowid FROM "{table}_search" WHERE "{table}_search" MATCH %s', [match]))
+
+
+_BACKENDS = {
+    "postgresql": _contains_filter,
+    "sqlite": _fts5_filter,
+}
+
+
+def _columns(model, fields):
+    if any("__" in field for field in fields):
+        return None
+    return [model._meta.get_field(field).column for field in fields]
+
+
+# Source tables that have a ``<table>_search`` FTS5 table, by (alias, database name).
+_installed_search_tables = {}
+
+
+def _sqlite_search_tables(connection):
+    key = (connection.alias, connection.settings_dict["NAME"])
+    tables = _installed_search_tables.get(key)
+    if tables is None:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+            names = {name for (name,) in cursor.fetchall()}
+        tables = _installed_search_tables[key] = {table for table in SEARCH_COLUMNS if f"{table}_search" in names}
+    return tables
+
+
+def _fts5_trigram_supported(connection):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("CREATE VIRTUAL TABLE temp.fts5_trigram_probe USING fts5(value, tokenize='trigram')")
+            cursor.execute("DROP TABLE temp.fts5_trigram_probe")
+    except OperationalError:
+        return False
+    return True
+
+
+def install_sqlite_search_tables(connection):
+    """
+    Create (or repair) the FTS5 search tables and their sync triggers on SQLite.
+
+    Idempotent. A table is rebuilt from its source when it is new or when any
+    of its triggers had gone missing, since writes may have been missed.
+    Does nothing, and search falls back to ``__icontains``, when this SQLite
+    build has no FTS5 trigram tokenizer.
+    """
+    if connection.vendor != "sqlite":
+        return
+    _installed_search_tables.pop((connection.alias, connection.settings_dict["NAME"]), None)
+    if not _fts5_trigram_supported(connection):
+        logger.warning(
+            "SQLite %s has no FTS5 trigram tokenizer; search falls back to LIKE.", connection.Database.sqlite_version,
+        )
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT type, name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+        existing = set(cursor.fetchall())
+        for table, columns in SEARCH_COLUMNS.items():
+            if ("table", table) not in existing:
+                continue
+            fts = f"{table}_search"
+            triggers = [f"{fts}_ai", f"{fts}_ad", f"{fts}_au"]
+            if ("table", fts) in existing and all(("trigger", name) in existing for name in triggers):
+                continue
+            quoted = ", ".join(f'"{column}"' for column in columns)
+            new = ", ".join(f'new."{column}"' for column in columns)
+            old = ", ".join(f'old."{column}"' for column in columns)
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS "{fts}" USING fts5({quoted}, '
+                f"content='{table}', content_rowid='id', tokenize='trigram')"
+            )
+            cursor.execute(
+                f'CREATE TRIGGER IF NOT EXISTS "{fts}_ai" AFTER INSERT ON "{table}" BEGIN '
+                f'INSERT INTO "{fts}"(rowid, {quoted}) VALUES (new.id, {new}); END'
+            )
+            cursor.execute(
+                f'CREATE TRIGGER IF NOT EXISTS "{fts}_ad" AFTER DELETE ON "{table}" BEGIN '
+                f"INSERT INTO \"{fts}\"(\"{fts}\", rowid, {quoted}) VALUES ('delete', old.id, {old}); END"
+            )
+            cursor.execute(
+                f'CREATE TRIGGER IF NOT EXISTS "{fts}_au" AFTER UPDATE OF {quoted} ON "{table}" BEGIN '
+                f"INSERT INTO \"{fts}\"(\"{fts}\", rowid, {quoted}) VALUES ('delete', old.id, {old}); "
+                f'INSERT INTO "{fts}"(rowid, {quoted}) VALUES (new.id, {new}); END'
+            )
+            cursor.execute(f"INSERT INTO \"{fts}\"(\"{fts}\") VALUES ('rebuild')")
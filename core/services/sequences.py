@@ -0,0 +1,100 @@
+"""
+Per-tenant document numbers.
+
+next_value(tenant, kind) hands out the next number of a sequence and
+reserve_values(tenant, kind, count) a block of consecutive numbers for bulk
+creates. Each sequence is one TenantSequence row moved forward with a
+single ``UPDATE ... SET last_value = last_value + n``, so concurrent
+creators are serialized by the row lock and never receive the same number.
+Callers format the number (``f"SO-{n:04d}"``).
+
+A sequence starts above the highest number already in use for its kind,
+found once by scanning the existing documents when its row is first
+created. Imports that bring their own numbers call advance_sequence() so
+later numbers skip past them.
+"""
+import re
+from dataclasses import dataclass
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Max
+from django.db.models.functions import Greatest
+
+from ..models import Customer, Inventory, ProcessBatch, Product, PurchaseOrder, SalesOrder, TenantSequence, Vendor
+
+
+@dataclass(frozen=True)
+class SequenceKind:
+    model: type
+    field: str
+    # Numbers of this kind inside existing values; None for integer fields.
+    pattern: re.Pattern = None
+
+
+SEQUENCES = {
+    "purchase_order": SequenceKind(PurchaseOrder, "po_number", re.compile(r"(\d+)")),
+    "sales_order": SequenceKind(SalesOrder, "order_number", re.compile(r"SO-(\d+)")),
+    "process_batch": SequenceKind(ProcessBatch, "batch_number", re.compile(r"PB-(\d+)")),
+    "product": SequenceKind(Product, "product_id", re.compile(r"ITEM-(\d+)")),
+    "lot": SequenceKind(Inventory, "vendorlot", re.compile(r"LOT-(?:\d{8}|PB-\d+)-(\d+)")),
+    "customer": SequenceKind(Customer, "customer_id"),
+    "vendor": SequenceKind(Vendor, "vendor_id"),
+}
+
+
+def next_value(tenant, kind):
+    """Allocate the next number of ``kind`` for ``tenant``."""
+    return reserve_values(tenant, kind, 1)[0]
+
+
+def reserve_values(tenant, kind, count):
+    """Allocate ``count`` consecutive numbers of ``kind`` for ``tenant``; returns them as a range."""
+    if count < 1:
+        raise ValueError("count must be at least 1")
+    sequence = TenantSequence.all_objects.filter(tenant=tenant, kind=kind)
+    with transaction.atomic():
+        if not sequence.update(last_value=F("last_value") + count):
+            _create_sequence(tenant, kind)
+            sequence.update(last_value=F("last_value") + count)
+        last = sequence.values_list("last_value", flat=True).get()
+    return range(last - count + 1, last + 1)
+
+
+def advance_sequence(tenant, kind, values):
+    """Move ``kind`` past the numbers used by ``values`` (e.g. imported document numbers)."""
+    highest = max(_numbers(SEQUENCES[kind], values), default=0)
+    if not highest:
+        return
+    sequence = TenantSequence.all_objects.filter(tenant=tenant, kind=kind)
+    if not sequence.update(last_value=Greatest(F("last_value"), highest)):
+        _create_sequence(tenant, kind)
+        sequence.update(last_value=Greatest(F("last_value"), highest))
+
+
+def _create_sequence(tenant, kind):
+    try:
+        with transaction.atomic():
+            TenantSequence.all_objects.create(tenant=tenant, kind=kind, last_value=_highest_in_use(tenant, kind))
+    except IntegrityError:
+        # Another creator made the row first; its seed is as good as ours.
+        pass
+
+
+def _highest_in_use(tenant, kind):
+    spec = SEQUENCES[kind]
+    existing = spec.model._base_manager.filter(tenant=tenant)
+    if spec.pattern is None:
+        return existing.aggregate(top=Max(spec.field))["top"] or 0
+    values = existing.exclude(**{spec.field: ""}).values_list(spec.field, flat=True)
+    return max(_numbers(spec, values.iterator(chunk_size=5000)), default=0)
+
+
+def _numbers(spec, values):
+    for value in values:
+        if spec.pattern is None:
+            if isinstance(value, int):
+                yield value
+            continue
+        match = spec.pattern.fullmatch(str(value or "").strip())
+        if match:
+            yield int(match.group(1))
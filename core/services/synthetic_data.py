@@ -0,0 +1,595 @@
+"""
+Scale-parametric synthetic tenants for load testing.
+
+Each generated tenant gets vendors, customers, raw and processed products,
+purchase orders whose received lines become inventory lots, processing batches
+(sources, output lots and waste), sales orders allocated FIFO against the lots
+on hand at the order date, and CCP logs. History is simulated day by day, so
+lot balances, the inventory movement ledger, genealogy (raw lot -> batch ->
+output lot -> sales allocation) and order statuses agree with each other.
+Sales allocations stay reserved against their lots once the order closes, as
+they do in the app.
+
+Rows are written with bulk_create in chunks. Primary keys are reserved up front
+so children can reference parents without round trips; run the generator
+against a database nobody else is writing to. At scale 1 a tenant is roughly
+6k lots and 60k rows; scale 30 gives about 200k lots and two million rows.
+
+Usage:
+    generator = SyntheticDataGenerator(scale=5, seed=42)
+    tenants = generator.generate(tenant_count=2)
+"""
+import itertools
+import math
+import random
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User as DjangoUser
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from ..models import (
+    CCPLog,
+    Customer,
+    Inventory,
+    InventoryMovement,
+    ProcessBatch,
+    ProcessBatchOutput,
+    ProcessBatchSource,
+    ProcessBatchWaste,
+    Product,
+    PurchaseOrder,
+    PurchaseOrderItem,
+    SalesOrder,
+    SalesOrderAllocation,
+    SalesOrderItem,
+    Tenant,
+    TenantUser,
+    Vendor,
+)
+from .inventory_summary import rebuild_inventory_summaries
+from .order_rollups import rebuild_order_rollups
+
+DEFAULT_COUNTS = {
+    "vendors": 40,
+    "customers": 250,
+    "products": 200,
+    "purchase_orders": 2000,
+    "process_batches": 1500,
+    "sales_orders": 6000,
+    "ccp_logs": 4000,
+}
+
+# (species, department, origin, cost per lb)
+SPECIES = [
+    ("Atlantic Salmon", "Fin Fish", "Norway", 7.5),
+    ("King Salmon", "Fin Fish", "Alaska", 16.0),
+    ("Pacific Halibut", "Fin Fish", "Alaska", 14.0),
+    ("Yellowfin Tuna", "Fin Fish", "Ecuador", 12.5),
+    ("Black Cod", "Fin Fish", "Alaska", 13.0),
+    ("Rockfish", "Fin Fish", "California", 4.5),
+    ("Swordfish", "Fin Fish", "Chile", 11.0),
+    ("Mahi Mahi", "Fin Fish", "Peru", 8.0),
+    ("Sea Scallops", "Shellfish", "Massachusetts", 22.0),
+    ("Dungeness Crab", "Shellfish", "Oregon", 9.5),
+    ("Maine Lobster", "Shellfish", "Maine", 15.0),
+    ("Pacific Oysters", "US Oysters", "Washington", 6.0),
+    ("Manila Clams", "Shellfish", "Washington", 5.0),
+    ("Spot Prawns", "Shellfish", "British Columbia", 18.0),
+]
+RAW_FORMS = ["Whole", "Head-On Gutted", "Live", "Bulk"]
+CUTS = [("Fillet", 0.55), ("Portion 6oz", 0.48), ("Loin", 0.62), ("Steak", 0.70), ("Skin-Off Fillet", 0.50)]
+VENDOR_TYPES = ["Dealer", "Harvester", "Exporter", "Importer"]
+LOCATIONS = ["Cooler A1", "Cooler A2", "Cooler B1", "Cooler C3", "Freezer A1", "Freezer B2", "Dock"]
+WASTE_CATEGORIES = ["trim", "trim", "trim", "shell", "spoilage", "damage", "sample"]
+CCP_PROFILES = {
+    # ccp_type: (mean reading, stddev, min limit, max limit, weight)
+    "receiving_temp": (36.0, 2.0, None, 41.0, 4),
+    "cooler_temp": (35.0, 1.2, 28.0, 38.0, 5),
+    "processing_temp": (44.0, 3.0, None, 50.0, 3),
+    "product_temp": (37.0, 2.0, None, 41.0, 2),
+}
+
+
+class _Lot:
+    __slots__ = (
+        "id", "product", "day", "units_in", "on_hand", "allocated", "cost",
+        "vendor", "purchase_order_id", "po_item_id", "po_number", "vendorlot",
+    )
+
+    def __init__(self, id, product, day, units_in, cost, vendorlot, vendor=None,
+                 purchase_order_id=None, po_item_id=None, po_number=""):
+        self.id = id
+        self.product = product
+        self.day = day
+        self.units_in = units_in
+        # Raised by the lot's receive or produce movement.
+        self.on_hand = Decimal("0")
+        self.allocated = Decimal("0")
+        self.cost = cost
+        self.vendor = vendor
+        self.purchase_order_id = purchase_order_id
+        self.po_item_id = po_item_id
+        self.po_number = po_number
+        self.vendorlot = vendorlot
+
+    @property
+    def free(self):
+        return self.on_hand - self.allocated
+
+
+# auto_now_add fields that the generator fills with historical timestamps.
+BACKDATED_FIELDS = {
+    ProcessBatch: ["started_at"],
+    CCPLog: ["recorded_at"],
+}
+
+
+class _ChunkedWriter:
+    """Buffers unsaved instances per model and bulk_creates them chunk_size at a time."""
+
+    def __init__(self, chunk_size):
+        self.chunk_size = chunk_size
+        self.buffers = {}
+        self.counts = Counter()
+
+    def add(self, obj):
+        buffer = self.buffers.setdefault(type(obj), [])
+        buffer.append(obj)
+        if len(buffer) >= self.chunk_size:
+            self._flush(type(obj))
+
+    def _flush(self, model):
+        buffer = self.buffers.get(model)
+        if buffer:
+            fields = [model._meta.get_field(name) for name in BACKDATED_FIELDS.get(model, [])]
+            with _backdated_timestamps(*fields):
+                model._base_manager.bulk_create(buffer, batch_size=self.chunk_size)
+            self.counts[model._meta.object_name] += len(buffer)
+            buffer.clear()
+
+    def flush(self):
+        for model in list(self.buffers):
+            self._flush(model)
+
+
+@contextmanager
+def _backdated_timestamps(*fields):
+    """Let bulk_create keep the historical values we set on auto_now/auto_now_add fields."""
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field, _, _ in saved:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _money(value):
+    return Decimal(str(round(value, 2)))
+
+
+def _qty(value):
+    return Decimal(str(round(value, 2)))
+
+
+class SyntheticDataGenerator:
+    def __init__(self, scale=1.0, seed=None, chunk_size=5000, subdomain_prefix="loadtest", counts=None, days=365):
+        self.counts = {
+            key: max(1, int(round(value * scale)))
+            for key, value in {**DEFAULT_COUNTS, **(counts or {})}.items()
+        }
+        # Catalog sizes grow slower than transaction volume.
+        for key in ("vendors", "customers", "products"):
+            base = (counts or {}).get(key, DEFAULT_COUNTS[key])
+            self.counts[key] = max(1, int(round(base * math.sqrt(scale))))
+        self.rng = random.Random(seed)
+        self.chunk_size = chunk_size
+        self.subdomain_prefix = subdomain_prefix
+        self.days = days
+        self.today = timezone.localdate()
+        self.start = self.today - timedelta(days=days)
+        self.stats = Counter()
+
+    # ── Public API ──────────────────────────────────────────────────
+
+    def generate(self, tenant_count=1, progress=None):
+        """Create ``tenant_count`` tenants and return them. ``progress`` is called with status strings."""
+        progress = progress or (lambda message: None)
+        existing = Tenant.objects.filter(subdomain__startswith=f"{self.subdomain_prefix}-").count()
+        tenants = []
+        for number in range(existing + 1, existing + tenant_count + 1):
+            progress(f"Generating tenant {self.subdomain_prefix}-{number}...")
+            tenants.append(self.generate_tenant(number))
+            progress(", ".join(f"{name}={count}" for name, count in sorted(self.writer.counts.items())))
+        return tenants
+
+    @transaction.atomic
+    def generate_tenant(self, number):
+        subdomain = f"{self.subdomain_prefix}-{number}"
+        tenant = Tenant.objects.create(name=f"Load Test {number}", subdomain=subdomain, is_active=True)
+        user = DjangoUser.objects.create_user(username=f"{subdomain}-admin")
+        TenantUser.objects.create(tenant=tenant, user=user, is_admin=True)
+
+        self.tenant = tenant
+        self.user = user
+        self.writer = _ChunkedWriter(self.chunk_size)
+        self.ids = {
+            model: itertools.count((model._base_manager.aggregate(top=Max("id"))["top"] or 0) + 1)
+            for model in (
+                Vendor, Customer, Product, PurchaseOrder, PurchaseOrderItem, Inventory, ProcessBatch,
+                ProcessBatchSource, ProcessBatchOutput, ProcessBatchWaste, SalesOrder, SalesOrderItem,
+                SalesOrderAllocation, CCPLog,
+            )
+        }
+        self.lots = []
+        self.queues = {}
+        self.movement_clock = itertools.count()
+
+        self._create_catalog()
+        self._create_purchase_orders()
+        self._simulate_operations()
+        self._write_lots()
+        self._create_ccp_logs()
+        self.writer.flush()
+        self._reset_sequences()
+        rebuild_inventory_summaries(tenant)
+        rebuild_order_rollups(tenant)
+        return tenant
+
+    # ── Helpers ─────────────────────────────────────────────────────
+
+    def _next_id(self, model):
+        return next(self.ids[model])
+
+    def _date(self, day):
+        return self.start + timedelta(days=day)
+
+    def _datetime(self, day, hour):
+        return timezone.make_aware(datetime.combine(self._date(day), time(int(hour), int(hour % 1 * 60))))
+
+    def _move(self, lot, movement_type, day, on_hand=0, allocated=0, reference=""):
+        """Apply a movement to ``lot`` and queue its ledger row, one microsecond after the previous one."""
+        lot.on_hand += on_hand
+        lot.allocated += allocated
+        occurred_at = self._datetime(day, 6) + timedelta(microseconds=next(self.movement_clock))
+        self.writer.add(InventoryMovement(
+            tenant=self.tenant, inventory_id=lot.id, movement_type=movement_type, on_hand_delta=on_hand,
+            allocated_delta=allocated, on_hand_balance=lot.on_hand, allocated_balance=lot.allocated,
+            available_balance=lot.free, reference=reference, occurred_at=occurred_at, created_by=self.user,
+        ))
+
+    def _popularity(self, count, exponent=1.1):
+        """Zipf-like relative weights in random order."""
+        weights = [1 / (rank ** exponent) for rank in range(1, count + 1)]
+        self.rng.shuffle(weights)
+        return weights
+
+    def _zipf_weights(self, count, exponent=1.1):
+        return list(itertools.accumulate(self._popularity(count, exponent)))
+
+    def _pick(self, items, cumulative_weights):
+        return self.rng.choices(items, cum_weights=cumulative_weights)[0]
+
+    def _lognormal(self, median, sigma):
+        return self.rng.lognormvariate(math.log(median), sigma)
+
+    def _reset_sequences(self):
+        statements = connection.ops.sequence_reset_sql(no_style(), list(self.ids))
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+    # ── Catalog ─────────────────────────────────────────────────────
+
+    def _create_catalog(self):
+        tenant = self.tenant
+        self.vendors = []
+        for n in range(self.counts["vendors"]):
+            vendor = Vendor(
+                id=self._next_id(Vendor), tenant=tenant, vendor_id=n + 1,
+                name=f"{self.rng.choice(SPECIES)[2]} Seafood Supply {n + 1}",
+                vendor_type=self.rng.choice(VENDOR_TYPES), email=f"orders{n + 1}@vendor.example",
+            )
+            self.writer.add(vendor)
+            self.vendors.append(vendor)
+        self.vendor_weights = self._zipf_weights(len(self.vendors))
+
+        self.customers = []
+        for n in range(self.counts["customers"]):
+            customer = Customer(
+                id=self._next_id(Customer), tenant=tenant, customer_id=n + 1,
+                name=f"{self.rng.choice(['Harbor', 'Bay', 'Coastal', 'Pier', 'Market'])} Customer {n + 1}",
+                is_retail=self.rng.random() < 0.2,
+            )
+            self.writer.add(customer)
+            self.customers.append(customer)
+        self.customer_weights = self._zipf_weights(len(self.customers))
+
+        # Roughly a third of the catalog is processed cuts of the most popular raw products.
+        total = self.counts["products"]
+        raw_count = max(1, total - total // 3)
+        self.raw_products = [self._add_product(n, SPECIES[n % len(SPECIES)], self.rng.choice(RAW_FORMS)) for n in range(raw_count)]
+        raw_popularity = self._popularity(raw_count)
+        self.raw_weights = list(itertools.accumulate(raw_popularity))
+        by_popularity = sorted(range(raw_count), key=lambda index: -raw_popularity[index])
+
+        self.processed_products = []
+        self.raw_source = {}
+        sources = [by_popularity[n % raw_count] for n in range(total - raw_count)]
+        cuts_per_source = Counter(sources)
+        processed_popularity = []
+        for n, source_index in enumerate(sources, start=raw_count):
+            raw = self.raw_products[source_index]
+            species = next(entry for entry in SPECIES if entry[0] == raw.species)
+            form, yield_pct = self.rng.choice(CUTS)
+            product = self._add_product(n, species, form, yield_pct=yield_pct, cost=float(raw.raw_cost) / yield_pct)
+            self.processed_products.append(product)
+            self.raw_source[product.id] = raw
+            # Cuts sell in proportion to how much of their raw product comes in.
+            processed_popularity.append(raw_popularity[source_index] / cuts_per_source[source_index])
+        self.processed_weights = list(itertools.accumulate(processed_popularity))
+
+    def _add_product(self, n, species_entry, form, yield_pct=None, cost=None):
+        species, department, origin, base_cost = species_entry
+        cost = cost or base_cost * self.rng.uniform(0.85, 1.15)
+        name = f"{species} {form} #{n // len(SPECIES) + 1}"
+        product = Product(
+            id=self._next_id(Product), tenant=self.tenant, product_id=f"{species[:3].upper()}-{n + 1:05d}",
+            description=name, item_name=name, species=species, department=department, origin=origin,
+            country_of_origin=origin, unit_type="lb", inventory_unit_of_measure="lb", raw_cost=_money(cost),
+            list_price=_money(cost * 1.45), wholesale_price=_money(cost * 1.3),
+            yield_pct=Decimal(str(yield_pct)) if yield_pct else None, sort_order=n, is_active=True,
+        )
+        product.set_lookup_keys()
+        self.writer.add(product)
+        self.queues[product.id] = []
+        return product
+
+    # ── Purchasing and receiving ────────────────────────────────────
+
+    def _create_purchase_orders(self):
+        tenant = self.tenant
+        today_day = self.days
+        order_days = sorted(self.rng.randrange(self.days) for _ in range(self.counts["purchase_orders"]))
+        for number, order_day in enumerate(order_days, start=1):
+            vendor = self._pick(self.vendors, self.vendor_weights)
+            expected_day = order_day + self.rng.randint(1, 5)
+            cancelled = self.rng.random() < 0.02
+            if cancelled:
+                order_status, receive_status = "cancelled", "not_received"
+            elif expected_day <= today_day - 2:
+                order_status, receive_status = "closed", "received"
+            elif expected_day <= today_day:
+                order_status, receive_status = "open", "partial"
+            else:
+                order_status, receive_status = "open", "not_received"
+            order = PurchaseOrder(
+                id=self._next_id(PurchaseOrder), tenant=tenant, po_number=f"PO-{number:06d}",
+                vendor_id=vendor.id, vendor_name=vendor.name, order_status=order_status,
+                receive_status=receive_status, buyer=self.rng.choice(["Marco Ruiz", "Ariana Chen", "Dana Park"]),
+                order_date=self._date(order_day), expected_date=self._date(expected_day), created_by=self.user,
+            )
+            self.writer.add(order)
+
+            line_count = 1 + min(7, int(self.rng.expovariate(1 / 2.5)))
+            products = {
+                product.id: product
+                for product in (self._pick(self.raw_products, self.raw_weights) for _ in range(line_count))
+            }
+            for sort_order, product in enumerate(products.values()):
+                quantity = _qty(self._lognormal(120, 0.6))
+                unit_price = _money(float(product.raw_cost) * self.rng.gauss(1, 0.08))
+                received = Decimal("0")
+                if receive_status == "received" or (receive_status == "partial" and self.rng.random() < 0.6):
+                    received = _qty(float(quantity) * min(1.05, self.rng.gauss(1, 0.03)))
+                item = PurchaseOrderItem(
+                    id=self._next_id(PurchaseOrderItem), tenant=tenant, purchase_order_id=order.id,
+                    item_type="item", product_id=product.id, description=product.description,
+                    quantity=quantity, unit_type="lb", unit_price=unit_price, amount=_money(quantity * unit_price),
+                    sort_order=sort_order, received_quantity=received,
+                )
+                self.writer.add(item)
+                if received > 0:
+                    receive_day = min(today_day, max(order_day, expected_day + self.rng.choice([-1, 0, 0, 0, 1])))
+                    lot_id = self._next_id(Inventory)
+                    lot = _Lot(
+                        lot_id, product, receive_day, received, unit_price, f"LOT-{lot_id:07d}", vendor=vendor,
+                        purchase_order_id=order.id, po_item_id=item.id, po_number=order.po_number,
+                    )
+                    self._add_lot(lot)
+                    self._move(lot, "receive", receive_day, on_hand=received, reference=order.po_number)
+            if self.rng.random() < 0.3:
+                self.writer.add(PurchaseOrderItem(
+                    id=self._next_id(PurchaseOrderItem), tenant=tenant, purchase_order_id=order.id,
+                    item_type="fee", description="Cold-chain freight", amount=_money(self._lognormal(120, 0.4)),
+                    sort_order=line_count,
+                ))
+        for queue in self.queues.values():
+            queue.sort(key=lambda lot: (lot.day, lot.id))
+        self.queues = {product_id: deque(queue) for product_id, queue in self.queues.items()}
+
+    def _add_lot(self, lot):
+        self.lots.append(lot)
+        self.queues[lot.product.id].append(lot)
+
+    # ── Processing and sales, in date order ─────────────────────────
+
+    def _simulate_operations(self):
+        events = [(self.rng.randrange(self.days + 1), 0) for _ in range(self.counts["process_batches"] if self.processed_products else 0)]
+        # Weekends are quiet for sales.
+        sale_days = []
+        while len(sale_days) < self.counts["sales_orders"]:
+            day = self.rng.randrange(self.days + 1)
+            if self._date(day).weekday() < 5 or self.rng.random() < 0.3:
+                sale_days.append(day)
+        events += [(day, 1) for day in sale_days]
+        events.sort()
+        batch_number = sale_number = 0
+        for day, kind in events:
+            if kind == 0:
+                batch_number += 1
+                self._process_batch(day, batch_number)
+            else:
+                sale_number += 1
+                self._sales_order(day, sale_number)
+
+    def _take_fifo(self, product, day, wanted, limit_lots=None):
+        """Yield (lot, quantity) from the oldest lots of ``product`` received on or before ``day``."""
+        queue = self.queues[product.id]
+        while queue and queue[0].free <= 0:
+            queue.popleft()
+        taken = []
+        for lot in queue:
+            if wanted <= 0 or lot.day > day or (limit_lots and len(taken) >= limit_lots):
+                break
+            take = min(lot.free, wanted)
+            if take <= 0:
+                continue
+            taken.append((lot, take))
+            wanted -= take
+        return taken
+
+    def _process_batch(self, day, number):
+        tenant = self.tenant
+        output_product = self._pick(self.processed_products, self.processed_weights)
+        raw = self.raw_source[output_product.id]
+        taken = self._take_fifo(raw, day, _qty(self._lognormal(150, 0.5)), limit_lots=3)
+        if not taken:
+            self.stats["batches_without_stock"] += 1
+            return
+        input_total = sum(quantity for _, quantity in taken)
+        expected_yield = float(output_product.yield_pct)
+        actual_yield = max(0.2, min(0.95, self.rng.gauss(expected_yield, 0.05)))
+        output_qty = _qty(float(input_total) * actual_yield)
+        in_progress = day >= self.days - 1 and self.rng.random() < 0.5
+        started = self._datetime(day, self.rng.uniform(6, 14))
+        batch = ProcessBatch(
+            id=self._next_id(ProcessBatch), tenant=tenant, batch_number=f"PB-{tenant.id}-{number:06d}",
+            process_type="fish_cutting", status="in_progress" if in_progress else "completed",
+            started_at=started, completed_at=None if in_progress else started + timedelta(hours=self.rng.uniform(1, 4)),
+            created_by=self.user, total_input_weight=input_total, total_output_weight=output_qty,
+            actual_yield_pct=_qty(actual_yield * 100), expected_yield_pct=_qty(expected_yield * 100),
+            yield_variance_pct=_qty((actual_yield - expected_yield) * 100),
+            yield_flagged=(actual_yield - expected_yield) * 100 < -5,
+        )
+        self.writer.add(batch)
+        input_cost = Decimal("0")
+        for lot, quantity in taken:
+            self._move(lot, "consume", day, on_hand=-quantity, reference=batch.batch_number)
+            input_cost += quantity * lot.cost
+            self.writer.add(ProcessBatchSource(
+                id=self._next_id(ProcessBatchSource), tenant=tenant, batch_id=batch.id,
+                inventory_id=lot.id, quantity=quantity, unit_type="lb",
+            ))
+        output_lot = _Lot(
+            self._next_id(Inventory), output_product, day, output_qty,
+            _money(input_cost / output_qty) if output_qty else Decimal("0"), f"LOT-{batch.batch_number}",
+            vendor=taken[0][0].vendor,
+        )
+        self._add_lot(output_lot)
+        self._move(output_lot, "produce", day, on_hand=output_qty, reference=batch.batch_number)
+        self.writer.add(ProcessBatchOutput(
+            id=self._next_id(ProcessBatchOutput), tenant=tenant, batch_id=batch.id, inventory_id=output_lot.id,
+            product_id=output_product.id, quantity=output_qty, unit_type="lb", lot_id=output_lot.vendorlot,
+            yield_percent=_qty(actual_yield * 100),
+        ))
+        waste_total = input_total - output_qty
+        if waste_total > 0:
+            main = _qty(float(waste_total) * self.rng.uniform(0.7, 1.0))
+            for category, quantity in (("trim", main), (self.rng.choice(WASTE_CATEGORIES), waste_total - main)):
+                if quantity > 0:
+                    self.writer.add(ProcessBatchWaste(
+                        id=self._next_id(ProcessBatchWaste), tenant=tenant, batch_id=batch.id,
+                        source_inventory_id=taken[0][0].id, entry_type="waste", category=category,
+                        quantity=quantity, unit_type="lb", estimated_value=_money(quantity * taken[0][0].cost),
+                        created_by=self.user, created_by_name=self.user.username,
+                    ))
+
+    def _sales_order(self, day, number):
+        tenant = self.tenant
+        customer = self._pick(self.customers, self.customer_weights)
+        closed = day <= self.days - 3
+        cancelled = self.rng.random() < 0.01
+        order = SalesOrder(
+            id=self._next_id(SalesOrder), tenant=tenant, order_number=f"SO-{number:06d}", customer_id=customer.id,
+            customer_name=customer.name, order_status="cancelled" if cancelled else ("closed" if closed else "open"),
+            packed_status="packed" if closed else "not_packed", order_date=self._date(day),
+            ship_date=self._date(day + 1), delivery_date=self._date(day + 1),
+            delivery_status="delivered" if closed else "pending", is_completed=closed and not cancelled,
+            shipper=self.rng.choice(["Company Truck", "FedEx Overnight", "Customer Pickup"]),
+            shipping_route=self.rng.choice(["North", "South", "East", "West", "Downtown"]), created_by=self.user,
+        )
+        self.writer.add(order)
+        line_count = 1 + min(9, int(self.rng.expovariate(1 / 2.0)))
+        for sort_order in range(line_count):
+            if self.processed_products and self.rng.random() < 0.2:
+                product = self._pick(self.processed_products, self.processed_weights)
+            else:
+                product = self._pick(self.raw_products, self.raw_weights)
+            quantity = _qty(self._lognormal(30, 0.6))
+            unit_price = _money(float(product.raw_cost) * self.rng.uniform(1.25, 1.6))
+            item = SalesOrderItem(
+                id=self._next_id(SalesOrderItem), tenant=tenant, sales_order_id=order.id, item_type="item",
+                product_id=product.id, description=product.description, quantity=quantity, unit_type="lb",
+                unit_price=unit_price, amount=_money(quantity * unit_price), sort_order=sort_order,
+            )
+            self.writer.add(item)
+            if cancelled:
+                continue
+            taken = self._take_fifo(product, day, quantity)
+            if sum(q for _, q in taken) < quantity:
+                self.stats["short_lines"] += 1
+            for lot, take in taken:
+                self._move(lot, "allocate", day, allocated=take, reference=f"SO item {item.id}")
+                self.writer.add(SalesOrderAllocation(
+                    id=self._next_id(SalesOrderAllocation), tenant=tenant, sales_order_item_id=item.id,
+                    inventory_id=lot.id, quantity=take, unit_type="lb", allocated_by=self.user,
+                    allocated_by_name=self.user.username,
+                ))
+
+    # ── Lots and food-safety logs ───────────────────────────────────
+
+    def _write_lots(self):
+        tenant = self.tenant
+        for lot in self.lots:
+            product = lot.product
+            self.writer.add(Inventory(
+                id=lot.id, tenant=tenant, product_id=product.id, productid=product.product_id, desc=product.description,
+                vendorid=lot.vendor.name if lot.vendor else "", vendor_type=lot.vendor.vendor_type if lot.vendor else "",
+                receivedate=self._date(lot.day), vendorlot=lot.vendorlot, actualcost=lot.cost,
+                unittype="lb", unitsin=lot.units_in, unitsonhand=lot.on_hand, unitsallocated=lot.allocated,
+                unitsavailable=lot.free, poid=lot.po_number,
+                purchase_order_id=lot.purchase_order_id, po_item_id=lot.po_item_id, origin=product.origin,
+                location=self.rng.choice(LOCATIONS), receive_time=f"{self.rng.randint(5, 11)}:{self.rng.choice(['00', '15', '30', '45'])} am",
+                age=Decimal(self.days - lot.day),
+            ))
+
+    def _create_ccp_logs(self):
+        tenant = self.tenant
+        types = list(CCP_PROFILES)
+        weights = list(itertools.accumulate(CCP_PROFILES[ccp_type][4] for ccp_type in types))
+        for _ in range(self.counts["ccp_logs"]):
+            ccp_type = self._pick(types, weights)
+            mean, stddev, low, high, _ = CCP_PROFILES[ccp_type]
+            reading = _qty(self.rng.gauss(mean, stddev))
+            out_of_range = (high is not None and reading > high) or (low is not None and reading < low)
+            lot = self.rng.choice(self.lots) if ccp_type == "receiving_temp" and self.lots else None
+            day = lot.day if lot else self.rng.randrange(self.days + 1)
+            self.writer.add(CCPLog(
+                id=self._next_id(CCPLog), tenant=tenant, ccp_type=ccp_type, reading_value=reading, unit="°F",
+                critical_limit_min=Decimal(str(low)) if low is not None else None,
+                critical_limit_max=Decimal(str(high)) if high is not None else None,
+                result="fail" if out_of_range else "pass", out_of_range=out_of_range,
+                location=self.rng.choice(LOCATIONS), inventory_id=lot.id if lot else None,
+                corrective_action="Product moved to colder storage and re-checked." if out_of_range else "",
+                recorded_by=self.user, recorded_by_name=self.user.username,
+                recorded_at=self._datetime(day, self.rng.uniform(5, 18)),
+            ))
@@ -0,0 +1,138 @@
+"""
+Cached tenant resolution for authenticated requests.
+
+TenantMiddleware needs the logged-in user's tenant on every request, including
+every /api/ call a page fires on load. The answer changes rarely, so it is kept
+in the user's session, which SessionMiddleware has already loaded to
+authenticate the request: serving it costs no query at all.
+
+When the Tenant or TenantUser rows behind a context change (see
+core/signals.py), the context is removed from every session of the affected
+users. Those sessions are found through a per-user registry of session keys
+kept in the Django cache; it is only read and written when a context is
+resolved or dropped, never on the request path. A context also expires after
+TENANT_CONTEXT_CACHE_TIMEOUT seconds, which bounds staleness should a registry
+entry be evicted.
+"""
+import json
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import router, transaction
+
+from core.models import Tenant, TenantUser
+
+SESSION_KEY = "_tenant_context"
+CACHE_KEY_PREFIX = "tenant-context"
+
+# Bump when the stored payload shape changes so old entries are ignored.
+CACHE_VERSION = 2
+
+# Large columns that are left deferred on the rebuilt Tenant and only loaded
+# from the database if a template actually touches them.
+DEFERRED_TENANT_FIELDS = {"logo"}
+
+
+def _sessions_key(user_id):
+    return f"{CACHE_KEY_PREFIX}:sessions:{user_id}"
+
+
+def _cache_timeout():
+    return getattr(settings, "TENANT_CONTEXT_CACHE_TIMEOUT", 300)
+
+
+def _cached_tenant_fields():
+    return [
+        field
+        for field in Tenant._meta.concrete_fields
+        if field.attname not in DEFERRED_TENANT_FIELDS
+    ]
+
+
+def _load_context(user_id):
+    tenant_user = TenantUser.objects.select_related("tenant").filter(user_id=user_id).first()
+    if not tenant_user:
+        # Remember the miss too so tenant-less users (e.g. superusers) stay query-free.
+        return {}
+    values = {field.attname: getattr(tenant_user.tenant, field.attname) for field in _cached_tenant_fields()}
+    # Sessions are JSON; dates and decimals go in as strings and come back through Field.to_python().
+    return {"tenant": json.loads(json.dumps(values, cls=DjangoJSONEncoder)), "is_admin": tenant_user.is_admin}
+
+
+def _register_session(user_id, session_key):
+    key = _sessions_key(user_id)
+    session_keys = set(cache.get(key, (), version=CACHE_VERSION))
+    if session_key not in session_keys:
+        session_keys.add(session_key)
+        cache.set(key, sorted(session_keys), settings.SESSION_COOKIE_AGE, version=CACHE_VERSION)
+
+
+def resolve_tenant_context(request, user):
+    """
+    Return the tenant context for a request's user, or None when the user has no tenant.
+
+    The context is a dict with the tenant's field values under "tenant" and the
+    user's admin flag under "is_admin". It is read from ``request.session`` and
+    only resolved from the database when missing or expired.
+    """
+    session = request.session
+    stored = session.get(SESSION_KEY)
+    if (
+        stored
+        and stored.get("version") == CACHE_VERSION
+        and stored.get("user_id") == user.pk
+        and stored.get("session_key") == session.session_key
+        and stored.get("expires", 0) > time.time()
+    ):
+        return stored["context"] or None
+
+    context = _load_context(user.pk)
+    session[SESSION_KEY] = {
+        "version": CACHE_VERSION,
+        "user_id": user.pk,
+        "session_key": session.session_key,
+        "expires": time.time() + _cache_timeout(),
+        "context": context,
+    }
+    if session.session_key:
+        _register_session(user.pk, session.session_key)
+    return context or None
+
+
+def tenant_from_context(context):
+    """Rebuild a Tenant instance from a stored context without touching the database."""
+    values = context["tenant"]
+    fields = [field for field in _cached_tenant_fields() if field.attname in values]
+    return Tenant.from_db(
+        router.db_for_read(Tenant),
+        [field.attname for field in fields],
+        [field.to_python(values[field.attname]) for field in fields],
+    )
+
+
+def _drop_user_contexts(user_ids):
+    keys = {user_id: _sessions_key(user_id) for user_id in user_ids}
+    if not keys:
+        return
+    registered = cache.get_many(keys.values(), version=CACHE_VERSION)
+    session_store = import_module(settings.SESSION_ENGINE).SessionStore
+    for session_key in {key for session_keys in registered.values() for key in session_keys}:
+        session = session_store(session_key)
+        if session.pop(SESSION_KEY, None) is not None:
+            session.save()
+
+
+def invalidate_user_tenant_context(user_id):
+    """Drop the stored context for one user, now and again once the transaction commits."""
+    _drop_user_contexts([user_id])
+    transaction.on_commit(lambda: _drop_user_contexts([user_id]))
+
+
+def invalidate_tenant_contexts(tenant_id):
+    """Drop the stored context for every user that belongs to a tenant."""
+    user_ids = list(TenantUser.objects.filter(tenant_id=tenant_id).values_list("user_id", flat=True))
+    _drop_user_contexts(user_ids)
+    transaction.on_commit(lambda: _drop_user_contexts(user_ids))
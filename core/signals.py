@@ -0,0 +1,243 @@
+from types import SimpleNamespace
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from core.models import (
+    Inventory,
+    Product,
+    PurchaseOrder,
+    PurchaseOrderItem,
+    SalesOrder,
+    SalesOrderAllocation,
+    SalesOrderItem,
+    Tenant,
+    TenantUser,
+)
+from core.services.inventory_ledger import allocation_changed, allocation_signals_muted
+from core.services.inventory_summary import (
+    LOT_QUANTITY_FIELDS,
+    LOT_SUMMARY_FIELDS,
+    apply_lot_change,
+    lot_contribution,
+    refresh_lot_products,
+    schedule_inventory_summary_rebuild,
+)
+from core.services.order_rollups import (
+    ROLLUP_PRODUCT_FIELDS,
+    orders_with_product,
+    refresh_order_rollups,
+    refresh_purchase_order_rollups,
+    refresh_sales_order_rollups,
+)
+from core.services.pick_lists import PICK_LIST_PRODUCT_FIELDS, invalidate_pick_lists
+from core.services.request_metrics import install_query_instrumentation
+from core.services.search import install_sqlite_search_tables
+from core.services.tenant_cache import invalidate_tenant_contexts, invalidate_user_tenant_context
+
+
+@receiver([post_save, post_delete], sender=TenantUser)
+def drop_cached_tenant_user(sender, instance, **kwargs):
+    invalidate_user_tenant_context(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=Tenant)
+def drop_cached_tenant(sender, instance, **kwargs):
+    invalidate_tenant_contexts(instance.pk)
+
+
+_UNCHANGED = object()
+
+
+def _deleted_with(origin, *models):
+    return isinstance(origin, models) or getattr(origin, "model", None) in models
+
+
+@receiver(pre_save, sender=Inventory)
+def remember_previous_lot(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._summary_previous = None
+    if raw or instance._state.adding or not instance.pk:
+        return
+    if update_fields is not None and not LOT_SUMMARY_FIELDS.intersection(update_fields):
+        instance._summary_previous = _UNCHANGED
+        return
+    loaded = getattr(instance, "_loaded_summary", None)
+    if loaded is not None:
+        # Inventory remembers the values it last loaded or saved (see Inventory.remember_summary_values).
+        instance._summary_previous = SimpleNamespace(**loaded)
+    else:
+        # Built by hand or loaded with deferred fields: read what the row holds now.
+        instance._summary_previous = (
+            Inventory.all_objects.filter(pk=instance.pk).only("product", "deleted_at", *LOT_QUANTITY_FIELDS).first()
+        )
+
+
+@receiver(post_save, sender=Inventory)
+def update_summary_for_saved_lot(sender, instance, raw=False, **kwargs):
+    previous_lot = getattr(instance, "_summary_previous", None)
+    if raw or previous_lot is _UNCHANGED:
+        return
+    previous = lot_contribution(previous_lot) if previous_lot is not None else None
+    apply_lot_change(instance.tenant_id, previous, lot_contribution(instance))
+
+
+@receiver(post_delete, sender=Inventory)
+def update_summary_for_deleted_lot(sender, instance, **kwargs):
+    apply_lot_change(instance.tenant_id, lot_contribution(instance), None)
+
+
+# Product fields that lot resolution, order rollups and pick lists depend on.
+_WATCHED_PRODUCT_FIELDS = tuple(dict.fromkeys((*Product.LOOKUP_FIELDS, *ROLLUP_PRODUCT_FIELDS, *PICK_LIST_PRODUCT_FIELDS)))
+
+
+def _previous_product_values(instance, fields):
+    """The values ``fields`` had before this save, or None for a new product."""
+    previous = getattr(instance, "_previous_product_values", None)
+    return None if previous is None else tuple(previous[field] for field in fields)
+
+
+def _product_values(instance, fields):
+    return tuple(getattr(instance, field) for field in fields)
+
+
+@receiver(pre_save, sender=Product)
+def remember_previous_product_names(sender, instance, raw=False, **kwargs):
+    instance._previous_product_values = None
+    if raw or instance._state.adding or not instance.pk:
+        return
+    loaded = getattr(instance, "_loaded_values", None) or {}
+    if all(field in loaded for field in _WATCHED_PRODUCT_FIELDS):
+        instance._previous_product_values = {field: loaded[field] for field in _WATCHED_PRODUCT_FIELDS}
+    else:
+        # Built by hand or loaded with some watched fields deferred.
+        instance._previous_product_values = (
+            Product.all_objects.filter(pk=instance.pk).values(*_WATCHED_PRODUCT_FIELDS).first()
+        )
+
+
+@receiver(post_save, sender=Product)
+def move_lots_for_renamed_product(sender, instance, created, raw=False, **kwargs):
+    """A new or renamed product can change which product free-text lots resolve to."""
+    if raw:
+        return
+    names = _product_values(instance, Product.LOOKUP_FIELDS)
+    previous = _previous_product_values(instance, Product.LOOKUP_FIELDS) or ()
+    if not created and previous == names:
+        return
+    if refresh_lot_products(instance.tenant_id, *names, *previous):
+        schedule_inventory_summary_rebuild(instance.tenant_id)
+
+
+@receiver(post_save, sender=Product)
+def refresh_orders_for_renamed_product(sender, instance, created, raw=False, **kwargs):
+    previous = _previous_product_values(instance, ROLLUP_PRODUCT_FIELDS)
+    if raw or created or previous is None:
+        return
+    if previous != _product_values(instance, ROLLUP_PRODUCT_FIELDS):
+        refresh_order_rollups(*orders_with_product(instance.pk))
+
+
+@receiver(post_delete, sender=Product)
+def move_lots_for_deleted_product(sender, instance, **kwargs):
+    names = tuple(getattr(instance, field) for field in Product.LOOKUP_FIELDS)
+    if refresh_lot_products(instance.tenant_id, *names):
+        schedule_inventory_summary_rebuild(instance.tenant_id)
+
+
+@receiver(pre_delete, sender=Product)
+def remember_orders_for_deleted_product(sender, instance, **kwargs):
+    # The order lines are detached (SET_NULL) without signals; note their orders beforehand.
+    instance._rollup_orders = orders_with_product(instance.pk)
+
+
+@receiver(post_delete, sender=Product)
+def refresh_orders_for_deleted_product(sender, instance, origin=None, **kwargs):
+    if _deleted_with(origin, Tenant):
+        return
+    refresh_order_rollups(*getattr(instance, "_rollup_orders", ((), ())))
+
+
+@receiver([post_save, post_delete], sender=SalesOrderItem)
+def refresh_sales_order_for_item(sender, instance, raw=False, origin=None, **kwargs):
+    # Lines deleted along with their order (or tenant) leave nothing to refresh.
+    if raw or _deleted_with(origin, SalesOrder, Tenant):
+        return
+    refresh_sales_order_rollups([instance.sales_order_id])
+
+
+@receiver([post_save, post_delete], sender=PurchaseOrderItem)
+def refresh_purchase_order_for_item(sender, instance, raw=False, origin=None, **kwargs):
+    if raw or _deleted_with(origin, PurchaseOrder, Tenant):
+        return
+    refresh_purchase_order_rollups([instance.purchase_order_id])
+
+
+@receiver(pre_save, sender=SalesOrderAllocation)
+def remember_previous_allocation(sender, instance, raw=False, **kwargs):
+    instance._ledger_previous = None
+    if not raw and not instance._state.adding and instance.pk and not allocation_signals_muted():
+        instance._ledger_previous = (
+            SalesOrderAllocation.all_objects.filter(pk=instance.pk).values_list("inventory_id", "quantity").first()
+        )
+
+
+@receiver(post_save, sender=SalesOrderAllocation)
+def record_allocation(sender, instance, created, raw=False, **kwargs):
+    if raw or allocation_signals_muted():
+        return
+    previous = None if created else getattr(instance, "_ledger_previous", None)
+    allocation_changed(
+        previous, (instance.inventory_id, instance.quantity),
+        reference=f"SO item {instance.sales_order_item_id}", user=instance.allocated_by,
+    )
+
+
+@receiver(post_delete, sender=SalesOrderAllocation)
+def release_allocation(sender, instance, origin=None, **kwargs):
+    # Lots are only hard-deleted with their ledger (tenant deletion, data resets); there is nothing to release.
+    if _deleted_with(origin, Inventory, Tenant):
+        return
+    if allocation_signals_muted():
+        return
+    allocation_changed(
+        (instance.inventory_id, instance.quantity), None, reference=f"SO item {instance.sales_order_item_id}",
+    )
+
+
+@receiver([post_save, post_delete], sender=SalesOrder)
+@receiver([post_save, post_delete], sender=SalesOrderItem)
+@receiver([post_save, post_delete], sender=SalesOrderAllocation)
+@receiver(post_delete, sender=Product)
+def drop_cached_pick_lists(sender, instance, raw=False, origin=None, **kwargs):
+    # Writers that mute the allocation signals invalidate once for the whole batch.
+    if raw or _deleted_with(origin, Tenant) or (sender is SalesOrderAllocation and allocation_signals_muted()):
+        return
+    invalidate_pick_lists(instance.tenant_id)
+
+
+@receiver(post_save, sender=Product)
+def drop_cached_pick_lists_for_renamed_product(sender, instance, created, raw=False, **kwargs):
+    # A new product is on no order lines yet.
+    previous = _previous_product_values(instance, PICK_LIST_PRODUCT_FIELDS)
+    if raw or created or previous is None or previous == _product_values(instance, PICK_LIST_PRODUCT_FIELDS):
+        return
+    invalidate_pick_lists(instance.tenant_id)
+
+
+@receiver([post_save, post_delete], sender=Inventory)
+def drop_cached_pick_lists_for_lot(sender, instance, raw=False, update_fields=None, origin=None, **kwargs):
+    # Pick rows show lot codes; quantity-only saves leave them alone.
+    if raw or _deleted_with(origin, Tenant) or (update_fields is not None and "vendorlot" not in update_fields):
+        return
+    invalidate_pick_lists(instance.tenant_id)
+
+
+@receiver(post_migrate)
+def install_search_tables(sender, using, **kwargs):
+    if sender.label == "core":
+        install_sqlite_search_tables(connections[using])
+
+
+connection_created.connect(install_query_instrumentation, dispatch_uid="core.request_metrics")
@@ -0,0 +1,116 @@
+"""
+Current-tenant context used by TenantManager, views and background work.
+
+The tenant is stored in a ContextVar instead of a thread-local, so it follows
+asyncio tasks automatically and is never shared between requests served by
+the same thread. Worker threads do not inherit context on their own; use
+TenantThreadPoolExecutor or run_for_tenants() to fan work out safely.
+
+Usage:
+    with tenant_context(tenant):
+        lots = Inventory.objects.filter(unitsonhand__gt=0)
+
+    with TenantThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(rebuild, product_id) for product_id in product_ids]
+
+    results = run_for_tenants(Tenant.objects.filter(is_active=True), nightly_job)
+"""
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+_current_tenant = contextvars.ContextVar("fishtech_current_tenant", default=None)
+_strict_mode = contextvars.ContextVar("fishtech_tenant_strict_mode", default=None)
+
+
+class TenantContextError(RuntimeError):
+    """Raised when a tenant-scoped manager is queried without a tenant in strict mode."""
+
+
+def get_current_tenant():
+    return _current_tenant.get()
+
+
+def set_current_tenant(tenant):
+    """Set the tenant for the current context. Returns a token for reset_current_tenant()."""
+    return _current_tenant.set(tenant)
+
+
+def reset_current_tenant(token):
+    _current_tenant.reset(token)
+
+
+def is_strict_mode():
+    """Strict mode comes from the innermost strict_tenant_mode()/tenant_context(strict=...) or TENANT_STRICT_MODE."""
+    value = _strict_mode.get()
+    if value is None:
+        return getattr(settings, "TENANT_STRICT_MODE", False)
+    return value
+
+
+@contextmanager
+def strict_tenant_mode(enabled=True):
+    token = _strict_mode.set(enabled)
+    try:
+        yield
+    finally:
+        _strict_mode.reset(token)
+
+
+@contextmanager
+def tenant_context(tenant, strict=None):
+    """Scope TenantManager queries to ``tenant`` for the duration of the block."""
+    tenant_token = _current_tenant.set(tenant)
+    strict_token = _strict_mode.set(strict) if strict is not None else None
+    try:
+        yield tenant
+    finally:
+        if strict_token is not None:
+            _strict_mode.reset(strict_token)
+        _current_tenant.reset(tenant_token)
+
+
+def _run_in_worker(func, args, kwargs):
+    try:
+        return func(*args, **kwargs)
+    finally:
+        # Worker threads open their own connections; don't leave them dangling.
+        connections.close_all()
+
+
+class TenantThreadPoolExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor whose tasks run in a copy of the submitting thread's context."""
+
+    def submit(self, fn, /, *args, **kwargs):
+        context = contextvars.copy_context()
+        return super().submit(context.run, _run_in_worker, fn, args, kwargs)
+
+
+def run_for_tenants(tenants, func, max_workers=4, strict=True):
+    """
+    Call ``func(tenant)`` for every tenant on a thread pool, each inside its own
+    tenant_context. Returns a list of results in the order the tenants were given.
+    """
+    def run_one(tenant):
+        with tenant_context(tenant, strict=strict):
+            return func(tenant)
+
+    with TenantThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(run_one, list(tenants)))
+
+
+def create_tenant_task(coro, tenant=None, strict=None, name=None):
+    """
+    Schedule ``coro`` as an asyncio task bound to ``tenant`` (the current tenant
+    when omitted) without changing the caller's own context.
+    """
+    context = contextvars.copy_context()
+    if tenant is not None:
+        context.run(_current_tenant.set, tenant)
+    if strict is not None:
+        context.run(_strict_mode.set, strict)
+    return asyncio.get_running_loop().create_task(coro, name=name, context=context)
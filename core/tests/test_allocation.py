@@ -0,0 +1,140 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.models import (
+    Inventory,
+    InventoryMovement,
+    Product,
+    ProductInventorySummary,
+    SalesOrder,
+    SalesOrderAllocation,
+    SalesOrderItem,
+    Tenant,
+    TenantUser,
+)
+from core.services.allocation import allocate_order_fifo
+from core.services.inventory_ledger import find_ledger_drift, record_movement
+
+
+class FifoAllocationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tenant = Tenant.objects.create(name="Allocation Tenant", subdomain="allocation-tenant", is_active=True)
+        self.user = User.objects.create_user(username="allocator", password="password123")
+        TenantUser.objects.create(user=self.user, tenant=self.tenant, is_admin=True)
+        self.cod = Product.all_objects.create(tenant=self.tenant, product_id="COD", description="Atlantic Cod")
+
+    def _lot(self, product, quantity, received, desc=""):
+        lot = Inventory(
+            tenant=self.tenant, productid=product.product_id if product else "", desc=desc,
+            unitsin=quantity, receivedate=received,
+        )
+        record_movement(lot, "receive", on_hand=quantity)
+        return lot
+
+    def _order(self, number, *lines, **fields):
+        order = SalesOrder.all_objects.create(tenant=self.tenant, order_number=number, **fields)
+        for product, quantity in lines:
+            SalesOrderItem.all_objects.create(
+                tenant=self.tenant, sales_order=order, product=product, quantity=quantity,
+                description="" if product else "Mixed Shellfish",
+            )
+        return order
+
+    def _allocated(self, order):
+        return list(
+            SalesOrderAllocation.all_objects.filter(sales_order_item__sales_order=order)
+            .order_by("inventory_id").values_list("inventory_id", "quantity")
+        )
+
+    def test_allocates_oldest_free_stock_and_reports_shortages(self):
+        newer = self._lot(self.cod, 10, date(2026, 3, 2))
+        older = self._lot(self.cod, 10, date(2026, 3, 1))
+        shellfish = self._lot(None, 4, date(2026, 3, 1), desc="mixed shellfish")
+        other = self._order("SO-0001", (self.cod, 6))
+        self.assertEqual(allocate_order_fifo(other), [])
+        self.assertEqual(self._allocated(other), [(older.id, 6)])
+
+        order = self._order("SO-0002", (self.cod, 12), (None, 5))
+        self.client.force_login(self.user)
+        response = self.client.post(f"/api/sales/orders/{order.id}/allocate-fifo/")
+        # Only 4 lb of the older lot are free; the rest comes from the newer lot.
+        self.assertEqual(response.json()["shortages"], [{"item_name": "Mixed Shellfish", "short_qty": 1.0}])
+        self.assertEqual(self._allocated(order), [(newer.id, 8), (older.id, 4), (shellfish.id, 4)])
+
+        # Re-running nets against the order's own allocations: no movements, no drift.
+        movements = InventoryMovement.all_objects.count()
+        allocate_order_fifo(order)
+        self.assertEqual(InventoryMovement.all_objects.count(), movements)
+        self.assertEqual(self._allocated(order), [(newer.id, 8), (older.id, 4), (shellfish.id, 4)])
+        older.refresh_from_db()
+        self.assertEqual((older.unitsallocated, older.unitsavailable), (10, 0))
+        self.assertEqual(find_ledger_drift(self.tenant), ([], []))
+        self.assertEqual(ProductInventorySummary.all_objects.get(product=self.cod).allocated, Decimal("18"))
+
+        SalesOrderItem.all_objects.filter(sales_order=order, product=self.cod).update(quantity=2)
+        allocate_order_fifo(order)
+        newer.refresh_from_db()
+        self.assertEqual((newer.unitsallocated, newer.version), (0, 2))
+        self.assertEqual(self._allocated(order), [(older.id, 2), (shellfish.id, 4)])
+
+    def test_query_count_does_not_grow_with_order_size(self):
+        products = [
+            Product.all_objects.create(tenant=self.tenant, product_id=f"P{index}", description=f"Fish {index}")
+            for index in range(12)
+        ]
+        for index, product in enumerate(products):
+            self._lot(product, 5, date(2026, 3, 1))
+            self._lot(product, 5, date(2026, 3, 2 + index % 3))
+
+        def queries(order):
+            with CaptureQueriesContext(connection) as context:
+                allocate_order_fifo(order)
+            return len(context.captured_queries)
+
+        small = queries(self._order("SO-0010", *((product, 2) for product in products[:2])))
+        large = queries(self._order("SO-0011", *((product, 7) for product in products[2:])))
+        self.assertEqual(small, large)
+
+    def test_wave_serves_orders_by_priority_from_shared_queues(self):
+        older = self._lot(self.cod, 10, date(2026, 3, 1))
+        newer = self._lot(self.cod, 10, date(2026, 3, 2))
+        ship = date(2026, 3, 10)
+        zeta = self._order("SO-0020", (self.cod, 8), customer_name="Zeta Fish", shipping_route="A", ship_date=ship)
+        acme = self._order("SO-0021", (self.cod, 8), customer_name="Acme Grill", shipping_route="B", ship_date=ship)
+        late = self._order(
+            "SO-0022", (self.cod, 8), customer_name="Late Cafe", shipping_route="C", ship_date=date(2026, 3, 11),
+        )
+        self._order("SO-0023", (self.cod, 8), ship_date=ship, order_status="cancelled")
+
+        self.client.force_login(self.user)
+        response = self.client.post(
+            "/api/sales/orders/allocate-wave/",
+            data={"ship_date_from": "2026-03-10", "ship_date_to": "2026-03-10", "priority": ["customer"]},
+            content_type="application/json",
+        )
+        self.assertEqual((response.json()["orders"], response.json()["shortages"]), (2, []))
+        self.assertEqual(self._allocated(acme), [(older.id, 8)])
+        self.assertEqual(self._allocated(zeta), [(older.id, 2), (newer.id, 6)])
+
+        out = StringIO()
+        call_command(
+            "allocate_wave", tenant="allocation-tenant", orders=f"{zeta.id},{acme.id},{late.id}",
+            priority="route", stdout=out,
+        )
+        self.assertIn("SO-0022 Late Cafe: Atlantic Cod short 4", out.getvalue())
+        self.assertEqual(self._allocated(zeta), [(older.id, 8)])
+        self.assertEqual(find_ledger_drift(self.tenant), ([], []))
+
+        response = self.client.post(
+            "/api/sales/orders/allocate-wave/", data={"priority": "ship_date"}, content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
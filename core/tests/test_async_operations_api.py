@@ -0,0 +1,89 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+
+from core.models import (
+    Inventory,
+    ProcessBatch,
+    ProcessBatchOutput,
+    ProcessBatchSource,
+    Product,
+    PurchaseOrder,
+    PurchaseOrderItem,
+    SalesOrder,
+    SalesOrderAllocation,
+    SalesOrderItem,
+    Tenant,
+    TenantUser,
+)
+
+ENDPOINTS = [
+    "purchasing/orders/",
+    "receiving/lots/?page_size=1&page=2",
+    "inventory/items/",
+    "processing/source-lots/",
+    "processing/sold-results/",
+    "trace/?q=PO-100",
+    "trace/?q=SO-1",
+]
+
+
+class AsyncOperationsApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tenant = Tenant.objects.create(name="Async Tenant", subdomain="async-tenant", is_active=True)
+        self.user = User.objects.create_user(username="async", password="password123")
+        TenantUser.objects.create(user=self.user, tenant=self.tenant, is_admin=True)
+
+        product = Product.all_objects.create(
+            tenant=self.tenant, product_id="SALMON", description="Salmon", item_name="Salmon", unit_type="lb",
+        )
+        order = PurchaseOrder.all_objects.create(tenant=self.tenant, po_number="PO-100", vendor_name="ACME")
+        po_item = PurchaseOrderItem.all_objects.create(
+            tenant=self.tenant, purchase_order=order, product=product, quantity=40, amount=200,
+        )
+        source = Inventory.all_objects.create(
+            tenant=self.tenant, productid="SALMON", desc="Salmon", vendorlot="LOT-1", unitsonhand=30,
+            unitsin=40, receivedate="2026-04-01", purchase_order=order, po_item=po_item, poid="PO-100",
+        )
+        Inventory.all_objects.create(
+            tenant=self.tenant, productid="SALMON", desc="Salmon", vendorlot="LOT-2", unitsonhand=5,
+            unitsin=5, receivedate="2026-04-02", poid="PO-100",
+        )
+        output_lot = Inventory.all_objects.create(
+            tenant=self.tenant, productid="SALMON", desc="Salmon Fillet", vendorlot="LOT-3", unitsonhand=8,
+        )
+        batch = ProcessBatch.all_objects.create(tenant=self.tenant, batch_number="PB-1")
+        ProcessBatchSource.all_objects.create(tenant=self.tenant, batch=batch, inventory=source, quantity=10)
+        ProcessBatchOutput.all_objects.create(
+            tenant=self.tenant, batch=batch, inventory=output_lot, product=product, quantity=8,
+        )
+        sales_order = SalesOrder.all_objects.create(tenant=self.tenant, order_number="SO-1", customer_name="Buyer")
+        sales_item = SalesOrderItem.all_objects.create(
+            tenant=self.tenant, sales_order=sales_order, product=product, quantity=3, unit_price=12, amount=36,
+        )
+        SalesOrderAllocation.all_objects.create(
+            tenant=self.tenant, sales_order_item=sales_item, inventory=output_lot, quantity=3,
+        )
+
+    def test_async_endpoints_match_sync_responses(self):
+        self.client.force_login(self.user)
+        for endpoint in ENDPOINTS:
+            with self.subTest(endpoint=endpoint):
+                sync_response = self.client.get(f"/api/{endpoint}")
+                async_response = self.client.get(f"/api/async/{endpoint}")
+                self.assertEqual(sync_response.status_code, 200, sync_response.content)
+                self.assertEqual(async_response.status_code, 200, async_response.content)
+                self.assertEqual(async_response.json(), sync_response.json())
+
+    async def test_async_client_is_scoped_to_tenant(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get("/api/async/trace/", {"q": "LOT-1"})
+        self.assertEqual(response.status_code, 200, response.content)
+        data = response.json()
+        self.assertEqual([po["po_number"] for po in data["purchase_orders"]], ["PO-100"])
+        self.assertEqual([so["order_number"] for so in data["sales_orders"]], ["SO-1"])
+
+    async def test_anonymous_requests_are_redirected(self):
+        response = await self.async_client.get("/api/async/inventory/items/")
+        self.assertEqual(response.status_code, 302)
@@ -0,0 +1,85 @@
+from datetime import date, datetime
+from decimal import Decimal
+from io import StringIO
+
+import numpy as np
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import (
+    Inventory,
+    ProcessBatch,
+    ProcessBatchOutput,
+    ProcessBatchSource,
+    Product,
+    SalesOrder,
+    SalesOrderAllocation,
+    SalesOrderItem,
+    Tenant,
+)
+from core.services.costing import cost_tenant, fifo_outflow_costs
+
+
+class FifoCostingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tenant = Tenant.objects.create(name="Costing Tenant", subdomain="costing-tenant", is_active=True)
+        self.cod = Product.all_objects.create(tenant=self.tenant, product_id="COD", description="Cod", raw_cost=3)
+        self.fillet = Product.all_objects.create(
+            tenant=self.tenant, product_id="FILLET", description="Cod Fillet", labor_pack_cost=Decimal("0.5"),
+        )
+        self.older = self._lot(self.cod, 10, "2.00", date(2026, 3, 1))
+        self.newer = self._lot(self.cod, 10, "4.00", date(2026, 3, 2))
+
+    def _lot(self, product, quantity, cost, received):
+        return Inventory.all_objects.create(
+            tenant=self.tenant, productid=product.product_id, unitsin=quantity, unitsonhand=quantity,
+            actualcost=cost and Decimal(cost), receivedate=received,
+        )
+
+    def _sale(self, number, day, lot, quantity, amount):
+        order = SalesOrder.all_objects.create(tenant=self.tenant, order_number=number, order_date=date(2026, 3, day))
+        item = SalesOrderItem.all_objects.create(
+            tenant=self.tenant, sales_order=order, quantity=quantity, amount=Decimal(amount),
+        )
+        SalesOrderAllocation.all_objects.create(tenant=self.tenant, sales_order_item=item, inventory=lot, quantity=quantity)
+        return item
+
+    def _costs(self, item):
+        item.refresh_from_db()
+        return (item.cost_of_goods, item.gross_margin)
+
+    def test_layers_are_used_oldest_first_across_lots(self):
+        costs = fifo_outflow_costs(
+            np.array([0, 0, 1]), np.array([10.0, 5, 4]), np.array([2.0, 3, 7]),
+            np.array([0, 0, 0, 1]), np.array([4.0, 8, 5, 6]), 2,
+        )
+        # The last outflow of each group runs past its layers and is charged the last layer's cost.
+        self.assertEqual(costs.tolist(), [8.0, 18.0, 15.0, 42.0])
+
+    def test_costs_processing_output_and_sales_lines(self):
+        batch = ProcessBatch.all_objects.create(tenant=self.tenant, batch_number="PB-1", process_type="fish_cutting")
+        ProcessBatch.all_objects.filter(id=batch.id).update(started_at=timezone.make_aware(datetime(2026, 3, 3, 8)))
+        ProcessBatchSource.all_objects.create(tenant=self.tenant, batch=batch, inventory=self.newer, quantity=6)
+        fillet_lot = self._lot(self.fillet, 4, None, date(2026, 3, 3))
+        ProcessBatchOutput.all_objects.create(
+            tenant=self.tenant, batch=batch, inventory=fillet_lot, product=self.fillet, quantity=4,
+        )
+        # Sold from the newer lot, but FIFO charges the 4 lb left of the older one first.
+        cod_line = self._sale("SO-1", 4, self.newer, 6, "30.00")
+        fillet_line = self._sale("SO-2", 5, fillet_lot, 2, "20.00")
+
+        result = cost_tenant(self.tenant)
+        self.assertEqual((result.lines_costed, result.lines_updated, result.passes), (2, 2, 2))
+        self.assertEqual(self._costs(cod_line), (Decimal("16.00"), Decimal("14.00")))
+        # 6 lb at 2.00 over 4 lb of output, plus 0.50 labor: 3.50 per lb.
+        self.assertEqual(self._costs(fillet_line), (Decimal("7.00"), Decimal("13.00")))
+        self.assertEqual(cost_tenant(self.tenant).lines_updated, 0)
+
+        SalesOrderAllocation.all_objects.filter(sales_order_item=fillet_line).delete()
+        out = StringIO()
+        call_command("cost_inventory", tenant="costing-tenant", stdout=out)
+        self.assertIn("1 of 1 sales lines updated", out.getvalue())
+        self.assertEqual(self._costs(fillet_line), (None, None))
@@ -0,0 +1,51 @@
+from django.test import TestCase
+
+from core.services.endpoint_benchmarks import benchmark_tenant, build_path, compare_results, discover_endpoints
+from core.services.synthetic_data import SyntheticDataGenerator
+
+
+def _result(**metrics):
+    base = {"p50_ms": 10.0, "p95_ms": 12.0, "peak_memory_kb": 100.0, "queries": 4, "duplicate_queries": 0}
+    base.update(metrics)
+    return {"scales": {"1.0": {"endpoints": {"api_inventory_items": base}}}}
+
+
+class EndpointBenchmarkTests(TestCase):
+    def test_discovery_skips_write_routes(self):
+        routes = {route for _, route in discover_endpoints()}
+        self.assertIn("inventory/items/", routes)
+        self.assertIn("trace/", routes)
+        self.assertNotIn("purchasing/orders/create/", routes)
+        self.assertFalse(any(route.endswith("toggle-active/") for route in routes))
+
+    def test_build_path_prefers_section_specific_arguments(self):
+        arguments = {"order_id": 1, "sales:order_id": 7, "query:q": "LOT-1"}
+        self.assertEqual(build_path("sales/orders/<int:order_id>/", arguments), "/api/sales/orders/7/")
+        self.assertEqual(build_path("trace/", arguments), "/api/trace/?q=LOT-1")
+        self.assertIsNone(build_path("processing/batches/<int:batch_id>/sources/", arguments))
+
+    def test_compare_flags_regressions_beyond_threshold_and_noise(self):
+        baseline = _result()
+        self.assertEqual(compare_results(baseline, _result(p50_ms=11.5, p95_ms=30.0)), [
+            {"scale": "1.0", "endpoint": "api_inventory_items", "metric": "p95_ms",
+             "baseline": 12.0, "current": 30.0, "change_pct": 150.0},
+        ])
+        self.assertEqual([item["metric"] for item in compare_results(baseline, _result(queries=5))], ["queries"])
+        self.assertEqual(compare_results(baseline, _result(p50_ms=5.0, queries=3)), [])
+
+    def test_benchmark_tenant_measures_generated_data(self):
+        generator = SyntheticDataGenerator(scale=0.01, seed=3, subdomain_prefix="bench-test")
+        tenant = generator.generate()[0]
+        self.client.force_login(generator.user)
+        endpoints = [(name, route) for name, route in discover_endpoints() if route in (
+            "inventory/items/", "sales/orders/<int:order_id>/", "trace/",
+        )]
+
+        results = benchmark_tenant(self.client, tenant, endpoints, iterations=2)
+
+        self.assertEqual(set(results), {name for name, _ in endpoints})
+        for result in results.values():
+            self.assertEqual(result["status"], 200, result)
+            self.assertGreater(result["queries"], 0)
+            self.assertGreater(result["peak_memory_kb"], 0)
+            self.assertLessEqual(result["p50_ms"], result["p95_ms"])
@@ -0,0 +1,73 @@
+import csv
+import gzip
+import importlib.util
+import io
+from datetime import date
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+
+from core.models import Inventory, SalesOrder, Tenant, TenantUser
+
+
+class StreamingExportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tenant = Tenant.objects.create(name="Export Tenant", subdomain="export-tenant", is_active=True)
+        self.user = User.objects.create_user(username="exporter", password="password123")
+        TenantUser.objects.create(user=self.user, tenant=self.tenant, is_admin=True)
+        self.client.force_login(self.user)
+
+    def _rows(self, response, compressed=False):
+        body = b"".join(response.streaming_content)
+        return list(csv.reader(io.StringIO((gzip.decompress(body) if compressed else body).decode())))
+
+    def test_lot_export_streams_formatted_rows(self):
+        Inventory.all_objects.create(
+            tenant=self.tenant, vendorlot="L-1", productid="COD", receivedate=date(2026, 4, 1),
+            unitsonhand=Decimal("0"), unitsin=Decimal("5.5"),
+        )
+        other = Tenant.objects.create(name="Other", subdomain="other-export", is_active=True)
+        Inventory.all_objects.create(tenant=other, vendorlot="L-OTHER", productid="COD")
+
+        response = self.client.get("/api/receiving/lots/export/")
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="receiving_lots.csv"')
+        header, *rows = self._rows(response)
+        self.assertEqual(header[:5], ["vendorlot", "productid", "desc", "vendorid", "receivedate"])
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0][:1] + rows[0][4:], ["L-1", "2026-04-01", "", "", "5.5000", ""])
+
+    def test_shipping_log_shows_labels_and_gzips_on_request(self):
+        SalesOrder.all_objects.create(
+            tenant=self.tenant, order_number="SO-0001", order_status="needs_review", ship_date=date(2026, 5, 4),
+        )
+        response = self.client.get("/api/shipping/log/export/", {"compress": "gzip"})
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertIn('filename="shipping_log.csv.gz"', response["Content-Disposition"])
+        header, row = self._rows(response, compressed=True)
+        self.assertEqual(dict(zip(header, row))["ship_date"], "2026-05-04")
+        self.assertEqual(dict(zip(header, row))["order_status"], "Needs Review")
+
+        # An empty export still carries its header row.
+        SalesOrder.all_objects.all().delete()
+        self.assertEqual(len(self._rows(self.client.get("/api/shipping/log/export/"))), 1)
+
+    @skipUnless(importlib.util.find_spec("openpyxl"), "openpyxl is not installed")
+    def test_xlsx_export_keeps_typed_cells(self):
+        import openpyxl
+
+        Inventory.all_objects.create(
+            tenant=self.tenant, vendorlot="L-1", productid="COD", receivedate=date(2026, 4, 1), unitsin=Decimal("5.5"),
+        )
+        response = self.client.get("/api/receiving/lots/export/", {"format": "xlsx"})
+        self.assertIn('filename="receiving_lots.xlsx"', response["Content-Disposition"])
+        sheet = openpyxl.load_workbook(io.BytesIO(b"".join(response.streaming_content)), read_only=True).active
+        header, row = [list(values) for values in sheet.iter_rows(values_only=True)]
+        values = dict(zip(header, row))
+        self.assertEqual((values["receivedate"].date(), values["unitsin"]), (date(2026, 4, 1), 5.5))
+
+        self.assertEqual(self.client.get("/api/vendors/export/", {"format": "pdf"}).status_code, 400)
@@ -0,0 +1,60 @@
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Customer, CustomerProfile, Product, Tenant
+from core.services.import_service import execute_import
+
+
+def _row(customer_id, description, price, unit_type="LB", name=None):
+    return {
+        "customer_id": customer_id, "customer_name": name or f"Customer {customer_id}", "contact_name": "",
+        "phone": "", "email": "", "city": "", "state": "", "description": description,
+        "unit_type": unit_type, "pack_size": 10.0, "price": price, "comp_item_id": None,
+    }
+
+
+class CustomerImportTests(TestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name="Import Tenant", subdomain="import-tenant", is_active=True)
+
+    def test_reimport_only_touches_changed_lines(self):
+        first = execute_import(self.tenant, [
+            _row(1, "Salmon", 8.5), _row(1, "Cod", 6.25), _row(1, "Halibut", 12), _row(2, "Salmon", 9),
+        ])
+        self.assertEqual(
+            (first["customers_created"], first["products_created"], first["profiles_created"]), (2, 3, 4),
+        )
+        self.assertEqual(set(first["timings_ms"]), {"customers", "products", "profiles", "total"})
+
+        salmon = CustomerProfile.all_objects.get(customer__customer_id=1, description="Salmon")
+        salmon.instruction = "Skin off"
+        salmon.save()
+        second = execute_import(self.tenant, [
+            _row(1, "Salmon", 8.75, name="Customer One"), _row(1, "Cod", 6.25), _row(1, "Oysters", 1, "EA"),
+        ])
+        self.assertEqual(
+            {key: second[key] for key in ("customers_created", "customers_updated", "products_created")},
+            {"customers_created": 0, "customers_updated": 1, "products_created": 1},
+        )
+        self.assertEqual(
+            [second[key] for key in ("profiles_created", "profiles_updated", "profiles_deleted", "profiles_unchanged")],
+            [1, 1, 1, 1],
+        )
+        salmon.refresh_from_db()
+        self.assertEqual((salmon.sales_price, salmon.instruction), (Decimal("8.7500"), "Skin off"))
+        self.assertEqual(Customer.all_objects.get(tenant=self.tenant, customer_id=1).name, "Customer One")
+        # Customer 2 was not in the file and keeps its profile.
+        self.assertEqual(CustomerProfile.all_objects.filter(customer__customer_id=2).count(), 1)
+        self.assertEqual(Product.all_objects.filter(tenant=self.tenant).count(), 4)
+
+    def test_queries_are_set_based(self):
+        rows = [_row(customer, f"Item {line}", 5) for customer in range(30) for line in range(20)]
+        with CaptureQueriesContext(connection) as context:
+            execute_import(self.tenant, rows)
+        # 600 lines; SQLite's variable limit splits the bulk inserts into a few batches, and the
+        # first import also creates the customer sequence.
+        self.assertLess(len(context), 30)
+        self.assertEqual(CustomerProfile.all_objects.filter(tenant=self.tenant).count(), 600)
@@ -0,0 +1,71 @@
+import json
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+
+from core.models import Inventory, Tenant, TenantUser
+from core.utils import parse_date_value, parse_datetime_value
+
+
+class InventoryDateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tenant = Tenant.objects.create(name="Dates Tenant", subdomain="dates-tenant", is_active=True)
+        user = User.objects.create_user(username="dates", password="password123")
+        TenantUser.objects.create(user=user, tenant=self.tenant, is_admin=True)
+        self.client.force_login(user)
+
+    def _lot(self, vendorlot, receivedate):
+        return Inventory.all_objects.create(
+            tenant=self.tenant, productid="COD", vendorlot=vendorlot, receivedate=receivedate,
+        )
+
+    def test_parsers_accept_legacy_formats(self):
+        self.assertEqual(parse_date_value("2024-03-05"), date(2024, 3, 5))
+        self.assertEqual(parse_date_value("3/5/2024"), date(2024, 3, 5))
+        self.assertEqual(parse_date_value("2024-03-05 14:30:00"), date(2024, 3, 5))
+        self.assertIsNone(parse_date_value("not a date"))
+        self.assertIsNone(parse_date_value(""))
+        self.assertEqual(parse_datetime_value("2024-03-05 14:30").date(), date(2024, 3, 5))
+
+    def test_receiving_lots_filter_and_emit_iso_dates(self):
+        self._lot("LOT-A", date(2024, 1, 9))
+        self._lot("LOT-B", date(2024, 1, 10))
+        self._lot("LOT-C", date(2024, 2, 1))
+        self._lot("LOT-D", None)
+
+        response = self.client.get("/api/receiving/lots/?date_from=2024-01-10&date_to=2/1/2024")
+        lots = response.json()["lots"]
+        self.assertEqual([lot["trace_lot"] for lot in lots], ["LOT-C", "LOT-B"])
+        self.assertEqual(lots[0]["receive_date"], "2024-02-01")
+
+        response = self.client.get("/api/receiving/lots/?date_from=garbage")
+        self.assertEqual([lot["trace_lot"] for lot in response.json()["lots"]], ["LOT-C", "LOT-B", "LOT-A", "LOT-D"])
+
+    def test_create_and_update_accept_date_strings(self):
+        response = self.client.post(
+            "/api/receiving/lots/create/",
+            data=json.dumps({"product_id": "COD", "quantity": 4, "receive_date": "3/5/2024"}),
+            content_type="application/json",
+        )
+        lot = Inventory.all_objects.get(id=response.json()["id"])
+        self.assertEqual(lot.receivedate, date(2024, 3, 5))
+
+        self.client.post(
+            f"/api/receiving/lots/{lot.id}/update/",
+            data=json.dumps({"receive_date": "2024-03-07"}),
+            content_type="application/json",
+        )
+        response = self.client.get(f"/api/receiving/lots/{lot.id}/")
+        self.assertEqual(response.json()["receive_date"], "2024-03-07")
+
+        response = self.client.post(
+            f"/api/receiving/lots/{lot.id}/update/",
+            data=json.dumps({"receive_date": "next tuesday"}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+        lot.refresh_from_db()
+        self.assertEqual(lot.receivedate, date(2024, 3, 7))
@@ -0,0 +1,132 @@
+import json
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import (
+    Inventory,
+    InventoryMovement,
+    Product,
+    SalesOrder,
+    SalesOrderAllocation,
+    SalesOrderItem,
+    Tenant,
+    TenantUser,
+)
+from core.services.inventory_ledger import (
+    find_ledger_drift,
+    lot_balances_as_of,
+    product_balances_as_of,
+    record_movement,
+)
+
+
+class InventoryLedgerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tenant = Tenant.objects.create(name="Ledger Tenant", subdomain="ledger-tenant", is_active=True)
+        self.user = User.objects.create_user(username="ledger", password="password123")
+        TenantUser.objects.create(user=self.user, tenant=self.tenant, is_admin=True)
+        self.cod = Product.all_objects.create(tenant=self.tenant, product_id="COD", description="Atlantic Cod")
+
+    def _post(self, url, payload):
+        return self.client.post(url, data=json.dumps(payload), content_type="application/json")
+
+    def _movements(self, lot):
+        return list(
+            InventoryMovement.all_objects.filter(inventory=lot)
+            .values_list("movement_type", "on_hand_delta", "allocated_delta", "on_hand_balance", "available_balance")
+        )
+
+    def _balances(self, lot):
+        lot.refresh_from_db()
+        return (lot.unitsonhand, lot.unitsallocated, lot.unitsavailable)
+
+    def test_receive_process_and_restore_are_recorded(self):
+        self.client.force_login(self.user)
+        response = self._post("/api/receiving/lots/create/", {"product_id": "COD", "quantity": 100})
+        lot = Inventory.all_objects.get(id=response.json()["id"])
+        self.assertEqual(self._movements(lot), [("receive", 100, 0, 100, 100)])
+
+        response = self._post("/api/processing/batches/create/", {
+            "process_type": "fish_cutting",
+            "sources": [{"inventory_id": lot.id, "quantity": 60}],
+            "outputs": [{"product_id": "COD", "quantity": 45}],
+        })
+        self.assertEqual(response.status_code, 200)
+        output = Inventory.all_objects.exclude(id=lot.id).get()
+        self.assertEqual(self._balances(lot), (40, 0, 40))
+        self.assertEqual(self._movements(output), [("produce", 45, 0, 45, 45)])
+
+        batch_id = response.json()["id"]
+        self._post(f"/api/processing/batches/{batch_id}/delete/", {})
+        self.assertEqual(self._balances(lot), (100, 0, 100))
+        self.assertEqual([row[0] for row in self._movements(lot)], ["receive", "consume", "restore"])
+        # The output lot is soft-deleted: its stock leaves through the ledger, which it keeps.
+        self.assertEqual(self._movements(output), [("produce", 45, 0, 45, 45), ("delete", -45, 0, 0, 0)])
+        self.assertFalse(Inventory.objects.filter(tenant=self.tenant, id=output.id).exists())
+
+    def test_allocations_move_allocated_quantity(self):
+        lot = record_movement(Inventory(tenant=self.tenant, productid="COD", unitsin=50), "receive", on_hand=50).inventory
+        other = record_movement(Inventory(tenant=self.tenant, productid="COD", unitsin=5), "receive", on_hand=5).inventory
+        order = SalesOrder.all_objects.create(tenant=self.tenant, order_number="SO-1")
+        item = SalesOrderItem.all_objects.create(tenant=self.tenant, sales_order=order, product=self.cod, quantity=20)
+
+        allocation = SalesOrderAllocation.all_objects.create(tenant=self.tenant, sales_order_item=item, inventory=lot, quantity=20)
+        self.assertEqual(self._balances(lot), (50, 20, 30))
+        allocation.quantity = Decimal("12")
+        allocation.save()
+        self.assertEqual(self._balances(lot), (50, 12, 38))
+        allocation.inventory = other
+        allocation.quantity = Decimal("5")
+        allocation.save()
+        self.assertEqual((self._balances(lot), self._balances(other)), ((50, 0, 50), (5, 5, 0)))
+
+        self.client.force_login(self.user)
+        self._post(f"/api/sales/orders/{order.id}/delete/", {})
+        self.assertEqual(self._balances(other), (5, 0, 5))
+        self.assertEqual(
+            [row[0] for row in self._movements(other)], ["receive", "allocate", "release"],
+        )
+        self.assertEqual(self.cod.inventory_summary.allocated, 0)
+
+    def test_balances_as_of_a_moment(self):
+        start = timezone.now() - timedelta(days=10)
+        lot = record_movement(
+            Inventory(tenant=self.tenant, productid="COD"), "receive", on_hand=30, occurred_at=start,
+        ).inventory
+        record_movement(lot, "consume", on_hand=-10, occurred_at=start + timedelta(days=2))
+        record_movement(lot, "allocate", allocated=5, occurred_at=start + timedelta(days=4))
+
+        def as_of(days):
+            row = lot_balances_as_of(Inventory.all_objects.filter(id=lot.id), start + timedelta(days=days)).get()
+            return (row.on_hand_as_of, row.allocated_as_of, row.available_as_of)
+
+        self.assertEqual(as_of(-1), (0, 0, 0))
+        self.assertEqual(as_of(1), (30, 0, 30))
+        self.assertEqual(as_of(3), (20, 0, 20))
+        self.assertEqual(as_of(5), (20, 5, 15))
+        self.assertEqual(
+            product_balances_as_of(self.tenant, start + timedelta(days=3)),
+            {self.cod.id: {"on_hand": 20, "allocated": 0, "available": 20}},
+        )
+
+    def test_check_command_repairs_writes_outside_the_ledger(self):
+        lot = record_movement(Inventory(tenant=self.tenant, productid="COD"), "receive", on_hand=30).inventory
+        Inventory.all_objects.filter(id=lot.id).update(unitsonhand=25)
+        Inventory.all_objects.bulk_create([Inventory(tenant=self.tenant, productid="COD", unitsonhand=7)])
+
+        out = StringIO()
+        call_command("check_inventory_ledger", tenant="ledger-tenant", stdout=out)
+        self.assertIn("found 1 lots without movements and 1 drifted lots", out.getvalue())
+
+        call_command("check_inventory_ledger", fix=True, stdout=StringIO())
+        self.assertEqual(find_ledger_drift(self.tenant), ([], []))
+        self.assertEqual(self._movements(lot)[-1], ("adjust", -5, 0, 25, 25))
+        self.assertEqual(Inventory.all_objects.filter(unitsavailable=7).count(), 1)
@@ -0,0 +1,88 @@
+from datetime import date, datetime
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import Inventory, InventorySnapshot, Product, Tenant, TenantUser
+from core.services.inventory_ledger import delete_lots, product_balances_as_of, record_movement
+from core.services.inventory_snapshots import end_of_day, inventory_valuation_as_of, take_inventory_snapshot
+
+
+def _noon(day):
+    return timezone.make_aware(datetime(2026, 3, day, 12))
+
+
+class InventorySnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tenant = Tenant.objects.create(name="Snapshot Tenant", subdomain="snapshot-tenant", is_active=True)
+        self.cod = Product.all_objects.create(tenant=self.tenant, product_id="COD", description="Atlantic Cod")
+        self.hake = Product.all_objects.create(tenant=self.tenant, product_id="HAKE", description="Hake")
+        self.cod_lot = self._receive("COD", 100, "2.50", day=1)
+        record_movement(self.cod_lot, "consume", on_hand=-40, occurred_at=_noon(3))
+        self.hake_lot = self._receive("HAKE", 20, "4.00", day=4)
+        record_movement(self.cod_lot, "consume", on_hand=-10, occurred_at=_noon(5))
+
+    def _receive(self, product_id, quantity, cost, day):
+        lot = Inventory(tenant=self.tenant, productid=product_id, actualcost=Decimal(cost))
+        return record_movement(lot, "receive", on_hand=quantity, occurred_at=_noon(day)).inventory
+
+    def _valuation(self, day):
+        valuation = inventory_valuation_as_of(self.tenant, date(2026, 3, day))
+        products = {
+            product_id: (entry["quantity"], entry["value"]) for product_id, entry in valuation["products"].items()
+        }
+        return valuation["snapshot_date"], products, valuation["value"]
+
+    def test_snapshot_plus_movements_matches_the_ledger(self):
+        snapshot = take_inventory_snapshot(self.tenant, date(2026, 3, 3))
+        self.assertEqual((snapshot.lot_count, snapshot.total_quantity, snapshot.total_value), (1, 60, 150))
+
+        self.assertEqual(self._valuation(2), (None, {self.cod.id: (100, 250)}, 250))
+        self.assertEqual(self._valuation(3), (date(2026, 3, 3), {self.cod.id: (60, 150)}, 150))
+        self.assertEqual(
+            self._valuation(5),
+            (date(2026, 3, 3), {self.cod.id: (50, 125), self.hake.id: (20, 80)}, 205),
+        )
+        ledger = product_balances_as_of(self.tenant, end_of_day(date(2026, 3, 5)))
+        self.assertEqual({pid: row["on_hand"] for pid, row in ledger.items()}, {self.cod.id: 50, self.hake.id: 20})
+
+    def test_snapshot_keeps_the_cost_at_the_time(self):
+        take_inventory_snapshot(self.tenant, date(2026, 3, 3))
+        Inventory.all_objects.filter(id=self.cod_lot.id).update(actualcost=Decimal("9"))
+        self.assertEqual(self._valuation(4)[1][self.cod.id], (60, 150))
+
+    def test_deleting_a_lot_leaves_past_snapshots_alone(self):
+        snapshot = take_inventory_snapshot(self.tenant, date(2026, 3, 5))
+        before = self._valuation(5)
+        delete_lots([self.cod_lot])
+        self.cod.delete()
+
+        line = snapshot.lines.get(vendorlot=self.cod_lot.vendorlot, quantity=50)
+        self.assertEqual((line.inventory_id, line.product_name, line.quantity), (self.cod_lot.id, "Atlantic Cod", 50))
+        self.assertEqual(self._valuation(5)[2], before[2])
+        self.assertEqual(sum(line.value for line in snapshot.lines.all()), snapshot.total_value)
+
+    def test_command_and_endpoint(self):
+        out = StringIO()
+        call_command("snapshot_inventory", tenant="snapshot-tenant", since="2026-03-01", date="2026-03-04", stdout=out)
+        self.assertIn("Done. 4 snapshots written.", out.getvalue())
+        call_command("snapshot_inventory", tenant="snapshot-tenant", date="2026-03-04", stdout=StringIO())
+        self.assertEqual(InventorySnapshot.all_objects.filter(tenant=self.tenant).count(), 4)
+
+        user = User.objects.create_user(username="snapshot", password="password123")
+        TenantUser.objects.create(user=user, tenant=self.tenant, is_admin=True)
+        self.client.force_login(user)
+        response = self.client.get("/api/inventory/valuation/?as_of=2026-03-05")
+        data = response.json()
+        self.assertEqual((data["snapshot_date"], data["value"]), ("2026-03-04", 205))
+        self.assertEqual(
+            [(item["product_id"], item["quantity"], item["value"]) for item in data["items"]],
+            [("COD", 50, 125), ("HAKE", 20, 80)],
+        )
+        self.assertEqual(self.client.get("/api/inventory/valuation/?as_of=someday").status_code, 400)
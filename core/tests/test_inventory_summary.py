@@ -0,0 +1,157 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.models import (
+    Inventory,
+    Product,
+    ProductInventorySummary,
+    PurchaseOrder,
+    PurchaseOrderItem,
+    SalesOrder,
+    SalesOrderAllocation,
+    SalesOrderItem,
+    Tenant,
+    TenantUser,
+)
+from core.services.inventory_ledger import record_movement
+from core.services.inventory_summary import (
+    available_to_promise,
+    compute_inventory_summaries,
+    rebuild_inventory_summaries,
+)
+from core.services.product_lookup import backfill_lot_products
+
+
+class ProductInventorySummaryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tenant = Tenant.objects.create(name="Summary Tenant", subdomain="summary-tenant", is_active=True)
+        self.cod = Product.all_objects.create(tenant=self.tenant, product_id="COD", description="Atlantic Cod")
+        self.hake = Product.all_objects.create(tenant=self.tenant, product_id="HAKE", description="Hake")
+
+    def _summary(self, product):
+        summary = ProductInventorySummary.all_objects.filter(product=product).first()
+        if summary is None:
+            return None
+        return (summary.expected, summary.allocated, summary.on_hand, summary.lot_count)
+
+    def _lot(self, **fields):
+        return Inventory.all_objects.create(tenant=self.tenant, **fields)
+
+    def test_lot_lifecycle_updates_summary(self):
+        lot = self._lot(productid="cod", unitsin=10, unitsonhand=10)
+        self._lot(desc="atlantic  cod", unitsin=5, unitsonhand=4, unitsallocated=1)
+        self.assertEqual(self._summary(self.cod), (15, 1, 14, 2))
+
+        lot.unitsonhand = Decimal("3")
+        lot.save(update_fields=["unitsonhand"])
+        self.assertEqual(self._summary(self.cod), (15, 1, 7, 2))
+
+        lot.productid = "HAKE"
+        lot.save()
+        self.assertEqual(self._summary(self.cod), (5, 1, 4, 1))
+        self.assertEqual(self._summary(self.hake), (10, 0, 3, 1))
+
+        lot.delete()
+        self.assertEqual(self._summary(self.hake), (0, 0, 0, 0))
+
+    def test_po_line_product_wins_over_free_text(self):
+        order = PurchaseOrder.all_objects.create(tenant=self.tenant, po_number="PO-1")
+        line = PurchaseOrderItem.all_objects.create(tenant=self.tenant, purchase_order=order, product=self.hake, quantity=8)
+        self._lot(productid="COD", po_item=line, unitsin=8, unitsonhand=8)
+        self.assertEqual(self._summary(self.hake), (8, 0, 8, 1))
+        self.assertIsNone(self._summary(self.cod))
+
+    def test_rebuild_repairs_drift_from_bulk_updates(self):
+        self._lot(productid="COD", unitsin=10, unitsonhand=10)
+        Inventory.all_objects.filter(tenant=self.tenant).update(unitsonhand=2)
+        Inventory.all_objects.bulk_create([Inventory(tenant=self.tenant, productid="HAKE", unitsin=4, unitsonhand=4)])
+        self.assertEqual(backfill_lot_products(self.tenant), (0, 1))
+
+        self.assertEqual(rebuild_inventory_summaries(self.tenant), sorted([self.cod.id, self.hake.id]))
+        self.assertEqual(self._summary(self.cod), (10, 0, 2, 1))
+        self.assertEqual(self._summary(self.hake), (4, 0, 4, 1))
+        self.assertEqual(rebuild_inventory_summaries(self.tenant), [])
+
+    def test_renaming_a_product_rebuilds_after_commit(self):
+        self._lot(desc="Pacific Cod", unitsin=6, unitsonhand=6)
+        self.assertIsNone(self._summary(self.cod))
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.cod.friendly_name = "Pacific Cod"
+            self.cod.save()
+            self.cod.save()
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(self._summary(self.cod), (6, 0, 6, 1))
+
+    def test_saving_a_loaded_lot_does_not_reread_it(self):
+        lot = Inventory.all_objects.get(pk=self._lot(productid="COD", unitsin=10, unitsonhand=10).pk)
+        record_movement(lot, "adjust", on_hand=-4)
+        lot.unitsin = Decimal("12")
+        with CaptureQueriesContext(connection) as context:
+            lot.save(update_fields=["unitsin"])
+        reads = [q["sql"] for q in context.captured_queries if q["sql"].startswith('SELECT') and "inventory_inventory" in q["sql"]]
+        self.assertEqual(reads, [])
+        self.assertEqual(self._summary(self.cod), (12, 0, 6, 1))
+
+        lot.refresh_from_db(fields=["unitsonhand"])
+        lot.unitsin = Decimal("8")
+        lot.save()
+        self.assertEqual(self._summary(self.cod), (8, 0, 6, 1))
+
+    def test_inventory_items_reads_summary(self):
+        user = User.objects.create_user(username="summary", password="password123")
+        TenantUser.objects.create(user=user, tenant=self.tenant, is_admin=True)
+        self.client.force_login(user)
+        self._lot(productid="COD", unitsin=10, unitsonhand=7, unitsallocated=2)
+        self._lot(productid="COD", unitsin=3, unitsonhand=3)
+
+        self.client.get("/api/inventory/items/")
+        # Session, user, products and their summaries; the tenant comes from the session.
+        with self.assertNumQueries(4):
+            response = self.client.get("/api/inventory/items/")
+        items = {item["product_id"]: item for item in response.json()["items"]}
+        self.assertEqual(
+            (items["COD"]["expected"], items["COD"]["allocated"], items["COD"]["on_hand"], items["COD"]["available"]),
+            (13, 2, 10, 8),
+        )
+        self.assertEqual(items["HAKE"]["on_hand"], 0)
+        self.assertEqual(set(compute_inventory_summaries(self.tenant)), {self.cod.id})
+
+    def test_available_to_promise_follows_allocations(self):
+        user = User.objects.create_user(username="atp", password="password123")
+        TenantUser.objects.create(user=user, tenant=self.tenant, is_admin=True)
+        self.client.force_login(user)
+        lot = Inventory(tenant=self.tenant, productid="COD", unitsin=10)
+        record_movement(lot, "receive", on_hand=10)
+        order = SalesOrder.all_objects.create(tenant=self.tenant, order_number="SO-0001")
+        item = SalesOrderItem.all_objects.create(tenant=self.tenant, sales_order=order, product=self.cod, quantity=6)
+        allocation = SalesOrderAllocation.all_objects.create(
+            tenant=self.tenant, sales_order_item=item, inventory=lot, quantity=6,
+        )
+        self.assertEqual(available_to_promise(self.cod), {"on_hand": 10, "allocated": 6, "available": 4})
+
+        response = self.client.post(
+            f"/api/sales/orders/{order.id}/items/add/",
+            data={"product_id": "COD", "quantity": 5}, content_type="application/json",
+        )
+        self.assertEqual(
+            response.json()["availability"], {"on_hand": 10, "allocated": 6, "available": 4, "short": 1},
+        )
+        lots = self.client.get(f"/api/inventory/items/{self.cod.id}/lots/").json()
+        self.assertEqual((lots["lots"][0]["available"], lots["available"]), (4, 4))
+
+        allocation.delete()
+        self.assertEqual(available_to_promise(self.cod)["available"], 10)
+        self.assertEqual(available_to_promise(self.hake)["available"], 0)
+
+    def test_tenant_can_be_deleted(self):
+        self._lot(productid="COD", unitsin=1, unitsonhand=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tenant.delete()
+        self.assertFalse(ProductInventorySummary.all_objects.exists())
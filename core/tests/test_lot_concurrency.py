@@ -0,0 +1,116 @@
+import threading
+import time
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import OperationalError, connection
+from django.db.models import F
+from django.test import TestCase, TransactionTestCase
+
+from core.models import Inventory, InventoryMovement, Product, ProductInventorySummary, Tenant
+from core.services.inventory_ledger import (
+    InsufficientStockError,
+    LotConflictError,
+    _apply_movement,
+    consume_available,
+    record_movement,
+)
+
+
+class LotVersionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tenant = Tenant.objects.create(name="Version Tenant", subdomain="version-tenant", is_active=True)
+        self.cod = Product.all_objects.create(tenant=self.tenant, product_id="COD", description="Atlantic Cod")
+        self.lot = Inventory(tenant=self.tenant, productid="COD", unitsin=50)
+        record_movement(self.lot, "receive", on_hand=50)
+
+    def _bump(self, on_hand):
+        # Another request writing the lot between our read and our update.
+        Inventory.all_objects.filter(pk=self.lot.pk).update(unitsonhand=on_hand, version=F("version") + 1)
+
+    def test_conflicting_write_is_retried_from_fresh_balances(self):
+        seen = []
+
+        def deltas(on_hand, allocated):
+            seen.append(on_hand)
+            if len(seen) == 1:
+                self._bump(30)
+            return Decimal("-5"), Decimal("0")
+
+        _apply_movement(self.lot, "consume", deltas)
+        self.assertEqual(seen, [50, 30])
+        self.lot.refresh_from_db()
+        self.assertEqual((self.lot.unitsonhand, self.lot.version), (25, 2))
+        self.assertEqual(ProductInventorySummary.all_objects.get(product=self.cod).on_hand, 45)
+
+    def test_guards_and_exhausted_retries(self):
+        stale = Inventory.all_objects.get(pk=self.lot.pk)
+        record_movement(self.lot, "consume", on_hand=-45)
+        with self.assertRaises(InsufficientStockError):
+            record_movement(stale, "consume", on_hand=-10, allow_negative=False)
+        self.assertEqual(consume_available(stale, 10).on_hand_delta, -5)
+
+        def always_conflicting(on_hand, allocated):
+            self._bump(on_hand)
+            return Decimal("1"), Decimal("0")
+
+        with self.assertRaises(LotConflictError):
+            _apply_movement(self.lot, "adjust", always_conflicting)
+        self.assertEqual(InventoryMovement.all_objects.filter(inventory=self.lot).count(), 3)
+
+        stale.desc = "Cod, gutted"
+        stale.save()
+        self.lot.refresh_from_db()
+        self.assertEqual((self.lot.desc, self.lot.unitsonhand), ("Cod, gutted", 0))
+        # The failed update rolled back along with the conflicting writes it kept running into.
+        self.assertEqual(self.lot.version, 2)
+
+
+class LotConcurrencyStressTests(TransactionTestCase):
+    THREADS = 8
+    MOVES_PER_THREAD = 10
+
+    def test_concurrent_moves_on_one_lot_are_not_lost(self):
+        tenant = Tenant.objects.create(name="Stress Tenant", subdomain="stress-tenant", is_active=True)
+        lot = Inventory(tenant=tenant, productid="COD", unitsin=200)
+        record_movement(lot, "receive", on_hand=200)
+        errors = []
+
+        def worker(index):
+            try:
+                for step in range(self.MOVES_PER_THREAD):
+                    # Alternate consumption and allocation so both balances are contended.
+                    kwargs = {"on_hand": -2} if (index + step) % 2 else {"allocated": 1}
+                    while True:
+                        try:
+                            record_movement(Inventory.all_objects.get(pk=lot.pk), "adjust", **kwargs)
+                            break
+                        except OperationalError:
+                            # SQLite locks the whole database per write; just wait for our turn.
+                            time.sleep(0.001)
+            except Exception as exc:  # pragma: no cover - surfaced by the assertion below
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        moves = self.THREADS * self.MOVES_PER_THREAD
+        lot.refresh_from_db()
+        self.assertEqual((lot.unitsonhand, lot.unitsallocated), (200 - moves, moves / 2))
+        self.assertEqual(lot.unitsavailable, lot.unitsonhand - lot.unitsallocated)
+        self.assertEqual(lot.version, moves)
+        balances = list(
+            InventoryMovement.all_objects.filter(inventory=lot).order_by("id")
+            .values_list("on_hand_delta", "allocated_delta", "on_hand_balance", "allocated_balance")
+        )
+        on_hand = allocated = 0
+        for on_hand_delta, allocated_delta, on_hand_balance, allocated_balance in balances:
+            on_hand, allocated = on_hand + on_hand_delta, allocated + allocated_delta
+            self.assertEqual((on_hand_balance, allocated_balance), (on_hand, allocated))
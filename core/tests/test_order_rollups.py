@@ -0,0 +1,83 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Product, PurchaseOrder, PurchaseOrderItem, SalesOrder, SalesOrderItem, Tenant, TenantUser
+
+
+class OrderRollupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tenant = Tenant.objects.create(name="Rollup Tenant", subdomain="rollup-tenant", is_active=True)
+        self.user = User.objects.create_user(username="rollups", password="password123")
+        TenantUser.objects.create(user=self.user, tenant=self.tenant, is_admin=True)
+        self.cod = Product.all_objects.create(
+            tenant=self.tenant, product_id="COD", item_name="Cod Fillet", species="Cod", unit_type="lb",
+        )
+        self.client.force_login(self.user)
+
+    def _po_line(self, order, quantity, amount, **fields):
+        return PurchaseOrderItem.all_objects.create(
+            tenant=self.tenant, purchase_order=order, quantity=quantity, amount=amount, **fields,
+        )
+
+    def test_purchase_order_rollups_follow_line_changes(self):
+        order = PurchaseOrder.all_objects.create(tenant=self.tenant, po_number="00001", vendor_name="North Fleet")
+        cod = self._po_line(order, 10, 50, product=self.cod)
+        self._po_line(order, 4, 20, description="Halibut", unit_type="case")
+        self._po_line(order, None, 15, item_type="fee", description="Freight")
+
+        order.refresh_from_db()
+        self.assertEqual(
+            (order.items_total, order.line_count, order.products_summary, order.expected_quantity, order.unit_types),
+            (Decimal("85"), 3, "Cod, Halibut", Decimal("14"), "case, lb"),
+        )
+        self.assertEqual(order.item_receive_status, "not_received")
+
+        cod.received_quantity = 10
+        cod.save(update_fields=["received_quantity"])
+        self.cod.species = "Atlantic Cod"
+        self.cod.save()
+        row = self.client.get("/api/purchasing/orders/").json()["orders"][0]
+        self.assertEqual(
+            (row["total"], row["arrived"], row["receive_status"], row["products"]),
+            (85.0, 10.0, "partial", "Atlantic Cod, Halibut"),
+        )
+
+        self.cod.delete()
+        order.items.get(description="Halibut").delete()
+        order.refresh_from_db()
+        self.assertEqual((order.line_count, order.products_summary, order.item_receive_status), (2, "", "received"))
+
+    def test_sales_order_list_reads_stored_rollups(self):
+        for number in range(3):
+            order = SalesOrder.all_objects.create(tenant=self.tenant, order_number=f"SO-000{number}")
+            for _ in range(number * 3):
+                SalesOrderItem.all_objects.create(
+                    tenant=self.tenant, sales_order=order, product=self.cod, quantity=2, amount=Decimal("12.50"),
+                )
+
+        with CaptureQueriesContext(connection) as context:
+            rows = self.client.get("/api/sales/orders/").json()["orders"]
+        self.assertEqual({row["order_number"]: row["total"] for row in rows}, {
+            "SO-0000": 0, "SO-0001": 37.5, "SO-0002": 75.0,
+        })
+        self.assertEqual(rows[0]["products"], "Cod")
+        self.assertFalse([query for query in context.captured_queries if "sales_order_item" in query["sql"]])
+
+        # Lines written without signals are repaired by the rebuild command.
+        order = SalesOrder.all_objects.get(order_number="SO-0000")
+        SalesOrderItem.all_objects.bulk_create([
+            SalesOrderItem(tenant=self.tenant, sales_order=order, description="Oysters", amount=Decimal("30")),
+        ])
+        out = StringIO()
+        call_command("rebuild_order_rollups", tenant="rollup-tenant", stdout=out)
+        self.assertIn("corrected 1 sales orders and 0 purchase orders", out.getvalue())
+        order.refresh_from_db()
+        self.assertEqual((order.items_total, order.products_summary), (Decimal("30"), "Oysters"))
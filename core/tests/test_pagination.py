@@ -0,0 +1,64 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+
+from core.models import SalesOrder, Tenant, TenantUser, Vendor
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tenant = Tenant.objects.create(name="Paging Tenant", subdomain="paging-tenant", is_active=True)
+        self.user = User.objects.create_user(username="pager", password="password123")
+        TenantUser.objects.create(user=self.user, tenant=self.tenant, is_admin=True)
+        self.client.force_login(self.user)
+        # Ties on order_date and NULL dates exercise the tie-breaker and NULL placement.
+        for number in range(11):
+            SalesOrder.all_objects.create(
+                tenant=self.tenant, order_number=f"SO-{number:04d}",
+                order_date=date(2026, 3, 1 + number % 4) if number % 5 else None,
+            )
+
+    def _numbers(self, body):
+        return [order["order_number"] for order in body["orders"]]
+
+    def test_cursors_walk_the_same_rows_as_offset_pages(self):
+        everything = self.client.get("/api/sales/orders/", {"page_size": 50}).json()
+        self.assertEqual((everything["total"], everything["next_cursor"]), (11, None))
+
+        seen, pages, cursor = [], [], ""
+        while cursor is not None:
+            body = self.client.get("/api/sales/orders/", {"cursor": cursor, "page_size": 4}).json()
+            self.assertNotIn("total", body)
+            pages.append(body)
+            seen += self._numbers(body)
+            cursor = body["next_cursor"]
+        self.assertEqual(seen, self._numbers(everything))
+        self.assertEqual([len(page["orders"]) for page in pages], [4, 4, 3])
+
+        back = self.client.get("/api/sales/orders/", {"cursor": pages[2]["prev_cursor"], "page_size": 4}).json()
+        self.assertEqual(self._numbers(back), self._numbers(pages[1]))
+        first = self.client.get("/api/sales/orders/", {"cursor": back["prev_cursor"], "page_size": 4}).json()
+        self.assertEqual((self._numbers(first), first["prev_cursor"]), (self._numbers(pages[0]), None))
+
+        # Offset pages hand out a cursor that continues where they stopped.
+        offset = self.client.get("/api/sales/orders/", {"page": 2, "page_size": 4}).json()
+        resumed = self.client.get("/api/sales/orders/", {"cursor": offset["next_cursor"], "total": "exact"}).json()
+        self.assertEqual((self._numbers(resumed), resumed["total"]), (seen[8:], 11))
+
+    def test_bad_cursors_are_rejected_and_short_lists_stay_unpaged(self):
+        response = self.client.get("/api/sales/orders/", {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
+        cursor = self.client.get("/api/sales/orders/", {"cursor": "", "page_size": 2}).json()["next_cursor"]
+        response = self.client.get("/api/shipping/packing/", {"cursor": cursor})
+        self.assertEqual(response.json()["error"], "This cursor belongs to a different list or sort order.")
+
+        for vendor_id, name in enumerate(("Zeta Seafood", "Acme Fish", "Blue Harbor"), start=1):
+            Vendor.all_objects.create(tenant=self.tenant, vendor_id=vendor_id, name=name)
+        body = self.client.get("/api/vendors/list/").json()
+        self.assertEqual([vendor["name"] for vendor in body["vendors"]], ["Acme Fish", "Blue Harbor", "Zeta Seafood"])
+        body = self.client.get("/api/vendors/list/", {"cursor": "", "page_size": 2}).json()
+        body = self.client.get("/api/vendors/list/", {"cursor": body["next_cursor"], "page_size": 2}).json()
+        self.assertEqual([vendor["name"] for vendor in body["vendors"]], ["Zeta Seafood"])
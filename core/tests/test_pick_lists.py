@@ -0,0 +1,92 @@
+from datetime import date, timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Inventory, Product, SalesOrder, SalesOrderAllocation, SalesOrderItem, Tenant, TenantUser
+from core.services.allocation import allocate_order_fifo
+from core.services.inventory_ledger import record_movement
+from core.services.pick_lists import invalidate_pick_lists
+
+
+class PickListTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tenant = Tenant.objects.create(name="Pick Tenant", subdomain="pick-tenant", is_active=True)
+        self.user = User.objects.create_user(username="picker", password="password123")
+        TenantUser.objects.create(user=self.user, tenant=self.tenant, is_admin=True)
+        self.cod = Product.all_objects.create(tenant=self.tenant, product_id="COD", description="Cod", department="Fresh")
+        self.tuna = Product.all_objects.create(tenant=self.tenant, product_id="TUNA", description="Tuna", department="Frozen")
+        self.client.force_login(self.user)
+
+    def _lot(self, code, received):
+        lot = Inventory(tenant=self.tenant, productid="COD", vendorlot=code, unitsin=5, receivedate=received)
+        record_movement(lot, "receive", on_hand=5)
+        return lot
+
+    def _order(self, number, ship_date, *lines):
+        order = SalesOrder.all_objects.create(
+            tenant=self.tenant, order_number=number, customer_name=f"Customer {number}", ship_date=ship_date,
+        )
+        for product, quantity in lines:
+            SalesOrderItem.all_objects.create(tenant=self.tenant, sales_order=order, product=product, quantity=quantity)
+        return order
+
+    def _pick(self, **params):
+        return self.client.get("/api/shipping/picking/", {"date_from": "2026-05-04", "date_to": "2026-05-04", **params})
+
+    def test_rows_are_grouped_paged_and_cached_until_allocations_change(self):
+        self._lot("L-NEW", date(2026, 4, 2))
+        older = self._lot("L-OLD", date(2026, 4, 1))
+        first = self._order("SO-0002", date(2026, 5, 4), (self.cod, 7), (self.tuna, 1))
+        self._order("SO-0001", date(2026, 5, 4), (self.cod, 1))
+        self._order("SO-0003", date(2026, 5, 5), (self.cod, 1))
+
+        body = self._pick().json()
+        self.assertEqual((body["total"], body["total_departments"]), (3, 2))
+        self.assertEqual([group["department"] for group in body["departments"]], ["Fresh", "Frozen"])
+        self.assertEqual([row["order_number"] for row in body["departments"][0]["items"]], ["SO-0001", "SO-0002"])
+
+        with CaptureQueriesContext(connection) as context:
+            self._pick()
+        self.assertFalse([query for query in context.captured_queries if "sales_order_item" in query["sql"]])
+
+        allocate_order_fifo(first)
+        rows = self._pick(search="SO-0002").json()["departments"][0]["items"]
+        self.assertEqual(rows[0]["fifo_lots"], ["L-OLD", "L-NEW"])
+
+        SalesOrderAllocation.all_objects.filter(inventory=older).delete()
+        body = self._pick(page=2, page_size=2, sort="department_desc").json()
+        self.assertEqual(body["departments"], [{"department": "Fresh", "items": [{
+            "item_name": "Cod", "order_number": "SO-0002", "so_id": first.id, "fifo_lots": ["L-NEW"],
+            "quantity": 7.0, "unit_type": "",
+        }]}])
+
+    def test_invalidation_from_another_cache_instance_reaches_this_one(self):
+        self._order("SO-0001", date(2026, 5, 4), (self.cod, 1))
+        self.assertEqual(self._pick().json()["total"], 1)
+
+        # Another worker: its own connection to the shared cache, and a write that skipped the signals.
+        other_worker = caches.create_connection("default")
+        self.assertIsNot(other_worker, cache)
+        SalesOrder.all_objects.filter(order_number="SO-0001").update(ship_date=date(2026, 5, 5))
+        with mock.patch("core.services.pick_lists.cache", other_worker):
+            invalidate_pick_lists(self.tenant.id)
+
+        self.assertEqual(self._pick().json()["total"], 0)
+
+    def test_window_defaults_around_today_and_is_bounded(self):
+        self._order("SO-TODAY", date.today(), (self.cod, 1))
+        self._order("SO-LATER", date.today() + timedelta(days=60), (self.cod, 1))
+
+        body = self.client.get("/api/shipping/picking/").json()
+        self.assertEqual(body["total"], 1)
+        self.assertEqual(body["date_to"], (date.today() + timedelta(days=7)).isoformat())
+
+        too_long = self.client.get("/api/shipping/picking/", {"date_from": "2026-01-01", "date_to": "2026-06-30"})
+        self.assertEqual(too_long.status_code, 400)
+        self.assertEqual(self._pick(date_from="someday").status_code, 400)
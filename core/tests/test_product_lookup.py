@@ -0,0 +1,105 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Inventory, Product, ProductInventorySummary, PurchaseOrder, PurchaseOrderItem, Tenant
+from core.services.product_lookup import find_product
+
+
+class ProductLookupTests(TestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name="Lookup Tenant", subdomain="lookup-tenant", is_active=True)
+        self.cod = Product.all_objects.create(
+            tenant=self.tenant, product_id="COD-1", description="Atlantic  Cod", friendly_name="Cod Loin",
+        )
+
+    def _lot(self, **fields):
+        return Inventory.all_objects.create(tenant=self.tenant, **fields)
+
+    def test_save_maintains_normalized_columns(self):
+        self.assertEqual(
+            (self.cod.normalized_product_id, self.cod.normalized_description, self.cod.normalized_friendly_name),
+            ("cod-1", "atlantic cod", "cod loin"),
+        )
+        self.cod.qb_item_name = "  COD  Whole "
+        self.cod.save(update_fields=["qb_item_name"])
+        self.cod.refresh_from_db()
+        self.assertEqual(self.cod.normalized_qb_item_name, "cod whole")
+
+    def test_find_product_prefers_product_id_then_oldest_name_match(self):
+        newer = Product.all_objects.create(tenant=self.tenant, product_id="X", description="Cod Loin")
+        self.assertEqual(find_product(self.tenant.id, "cod loin"), self.cod)
+        self.assertEqual(find_product(self.tenant.id, "", " x "), newer)
+        self.assertEqual(find_product(self.tenant.id, "x", "cod loin"), newer)
+        self.assertIsNone(find_product(self.tenant.id, "halibut"))
+
+    def test_lot_product_is_resolved_on_save(self):
+        lot = self._lot(productid="", desc="atlantic cod")
+        self.assertEqual(lot.product, self.cod)
+
+        hake = Product.all_objects.create(tenant=self.tenant, product_id="HAKE")
+        lot.productid = "hake"
+        lot.save(update_fields=["productid"])
+        lot.refresh_from_db()
+        self.assertEqual(lot.product, hake)
+
+        order = PurchaseOrder.all_objects.create(tenant=self.tenant, po_number="PO-1")
+        line = PurchaseOrderItem.all_objects.create(tenant=self.tenant, purchase_order=order, product=self.cod)
+        self.assertEqual(self._lot(productid="HAKE", po_item=line).product, self.cod)
+        self.assertEqual(self._lot(productid="unknown", product=hake).product, hake)
+
+    def test_catalog_changes_move_free_text_lots(self):
+        lot = self._lot(productid="SOLE", unitsin=3, unitsonhand=3)
+        self.assertIsNone(lot.product_id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            sole = Product.all_objects.create(tenant=self.tenant, product_id="SOLE")
+        lot.refresh_from_db()
+        self.assertEqual(lot.product, sole)
+        self.assertEqual(ProductInventorySummary.all_objects.get(product=sole).on_hand, 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            sole.product_id = "DOVER-SOLE"
+            sole.save()
+        lot.refresh_from_db()
+        self.assertIsNone(lot.product_id)
+        self.assertFalse(ProductInventorySummary.all_objects.filter(product=sole).exists())
+
+    def test_rename_compares_against_the_loaded_names(self):
+        lot = self._lot(productid="COD-1", unitsin=2, unitsonhand=2)
+        cod = Product.all_objects.get(pk=self.cod.pk)
+        cod.product_id = "COD-2"
+        with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as context:
+            cod.save()
+        sql = [query["sql"] for query in context.captured_queries]
+        update = next(i for i, query in enumerate(sql) if query.startswith('UPDATE "inventory_product"'))
+        self.assertFalse([query for query in sql[:update] if 'FROM "inventory_product"' in query])
+        lot.refresh_from_db()
+        self.assertIsNone(lot.product_id)
+
+        # Deferred names are unknown, so the receiver reads them from the database instead.
+        cod = Product.all_objects.only("id", "tenant", "product_id").get(pk=self.cod.pk)
+        cod.product_id = "COD-1"
+        with self.captureOnCommitCallbacks(execute=True):
+            cod.save(update_fields=["product_id"])
+        lot.refresh_from_db()
+        self.assertEqual(lot.product_id, self.cod.pk)
+
+    def test_backfill_command_links_bulk_created_lots(self):
+        Inventory.all_objects.bulk_create([
+            Inventory(tenant=self.tenant, productid="cod-1", unitsin=2, unitsonhand=2),
+            Inventory(tenant=self.tenant, desc="Cod  loin", unitsin=1, unitsonhand=1),
+            Inventory(tenant=self.tenant, desc="Unknown", unitsin=5, unitsonhand=5),
+        ])
+        Product.all_objects.filter(id=self.cod.id).update(normalized_product_id="")
+
+        out = StringIO()
+        call_command("backfill_inventory_products", "--tenant", "lookup-tenant", stdout=out)
+
+        self.assertIn("1 products re-keyed, 2 lots re-linked", out.getvalue())
+        self.assertEqual(Inventory.all_objects.filter(product=self.cod).count(), 2)
+        summary = ProductInventorySummary.all_objects.get(product=self.cod)
+        self.assertEqual((summary.on_hand, summary.lot_count), (3, 2))
@@ -0,0 +1,70 @@
+import os
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from core.models import Inventory, Product, SalesOrder, SalesOrderAllocation, SalesOrderItem, Tenant, TenantUser
+from core.services.request_metrics import fingerprint_sql, reset_request_stats
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_request_stats()
+        self.tenant = Tenant.objects.create(name="Metrics Tenant", subdomain="metrics-tenant", is_active=True)
+        self.user = User.objects.create_user(username="metrics", password="password123", is_superuser=True)
+        TenantUser.objects.create(user=self.user, tenant=self.tenant, is_admin=True)
+        self.client.force_login(self.user)
+
+        product = Product.all_objects.create(tenant=self.tenant, product_id="COD", description="Cod", department="Fresh")
+        for order_number in ("SO-1", "SO-2", "SO-3"):
+            order = SalesOrder.all_objects.create(tenant=self.tenant, order_number=order_number, ship_date=date.today())
+            for n in range(2):
+                lot = Inventory.all_objects.create(tenant=self.tenant, productid="COD", vendorlot=f"{order_number}-{n}")
+                item = SalesOrderItem.all_objects.create(tenant=self.tenant, sales_order=order, product=product, quantity=1)
+                SalesOrderAllocation.all_objects.create(tenant=self.tenant, sales_order_item=item, inventory=lot, quantity=1)
+
+    def test_shipping_picking_has_no_duplicate_queries_and_is_reported(self):
+        response = self.client.get("/api/shipping/picking/")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(len(response.json()["departments"][0]["items"]), 6)
+
+        stats = self.client.get("/operations/system-admin/request-metrics/").json()["endpoints"]
+        picking = stats["api_shipping_picking"]
+        self.assertEqual(picking["requests"], 1)
+        self.assertEqual(picking["duplicate_queries"]["max"], 0, picking["top_duplicate_queries"])
+        self.assertLessEqual(picking["queries"]["p99"], 10)
+        # The session and user lookups are middleware overhead, not the view's queries.
+        self.assertGreaterEqual(picking["overhead_queries"]["max"], 2)
+        self.assertEqual(picking["response_bytes"]["p50"], len(response.content))
+        self.assertGreater(picking["serialize_ms"]["max"], 0)
+
+    @override_settings(REQUEST_METRICS_BUDGETS={"api_shipping_picking": {"queries": 1}})
+    def test_budget_breach_logs_warning(self):
+        with self.assertLogs("core.services.request_metrics", level="WARNING") as logs:
+            self.client.get("/api/shipping/picking/")
+        self.assertIn("api_shipping_picking exceeded its request budget: queries=", logs.output[0])
+
+    def test_stats_name_the_worker_that_kept_them(self):
+        body = self.client.get("/operations/system-admin/request-metrics/").json()
+        self.assertEqual((body["scope"], body["worker_pid"]), ("worker", os.getpid()))
+
+    def test_warm_list_requests_stay_within_their_budgets(self):
+        self.client.get("/api/receiving/lots/")
+        with self.assertNoLogs("core.services.request_metrics", level="WARNING"):
+            for path in ("/api/receiving/lots/", "/api/purchasing/orders/", "/api/inventory/items/"):
+                self.client.get(path)
+
+    def test_stats_endpoint_requires_system_admin(self):
+        self.user.is_superuser = False
+        self.user.save()
+        response = self.client.get("/operations/system-admin/request-metrics/")
+        self.assertEqual(response.status_code, 403)
+
+    def test_fingerprint_collapses_literals_and_in_lists(self):
+        self.assertEqual(
+            fingerprint_sql('SELECT * FROM "t" WHERE "t"."id" IN (%s, %s, %s) LIMIT 21'),
+            fingerprint_sql('SELECT * FROM "t" WHERE "t"."id" IN (%s) LIMIT 1'),
+        )
@@ -0,0 +1,76 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+
+from core.models import Inventory, Product, Tenant, TenantUser
+from core.services import search as search_module
+from core.services.search import install_sqlite_search_tables, search
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tenant = Tenant.objects.create(name="Search Tenant", subdomain="search-tenant", is_active=True)
+        self.other_tenant = Tenant.objects.create(name="Other Tenant", subdomain="other-search", is_active=True)
+
+    def _lots(self, term, fields=("desc", "vendorlot")):
+        return list(
+            search(Inventory.all_objects.filter(tenant=self.tenant).order_by("id"), fields, term)
+            .values_list("vendorlot", flat=True)
+        )
+
+    def test_results_are_ranked_by_relevance(self):
+        user = User.objects.create_user(username="search", password="password123")
+        TenantUser.objects.create(user=user, tenant=self.tenant, is_admin=True)
+        self.client.force_login(user)
+        for product_id, description in [
+            ("P1", "Halibut Cheeks"), ("P2", "Pacific Halibut"), ("P3", "Halibut"), ("P4", "Scallops"),
+            ("P5", "Whole Halibutfish"),
+        ]:
+            Product.all_objects.create(tenant=self.tenant, product_id=product_id, description=description)
+        Product.all_objects.create(tenant=self.other_tenant, product_id="P9", description="Halibut")
+
+        response = self.client.get("/api/inventory/items/?search=halibut")
+        names = [item["description"] for item in response.json()["items"]]
+        self.assertEqual(names, ["Halibut", "Halibut Cheeks", "Pacific Halibut", "Whole Halibutfish"])
+
+    def test_index_follows_inserts_updates_and_deletes(self):
+        lot = Inventory.all_objects.create(tenant=self.tenant, desc="King Salmon", vendorlot="LOT-1")
+        Inventory.all_objects.create(tenant=self.other_tenant, desc="King Salmon", vendorlot="LOT-X")
+        Inventory.all_objects.bulk_create([Inventory(tenant=self.tenant, desc="Salmon Roe", vendorlot="LOT-2")])
+        self.assertEqual(self._lots("salmon"), ["LOT-2", "LOT-1"])
+
+        Inventory.all_objects.filter(id=lot.id).update(desc="Sockeye")
+        self.assertEqual(self._lots("salmon"), ["LOT-2"])
+        self.assertEqual(self._lots("sockeye"), ["LOT-1"])
+
+        lot.delete()
+        self.assertEqual(self._lots("sockeye"), [])
+
+    def test_short_quoted_and_related_terms(self):
+        Inventory.all_objects.create(tenant=self.tenant, desc='Cod "Jumbo"', vendorlot="AB-7")
+        Inventory.all_objects.create(tenant=self.tenant, desc="Hake", vendorlot="LOT-9")
+        self.assertEqual(self._lots("b-"), ["AB-7"])
+        self.assertEqual(self._lots('"jumbo"'), ["AB-7"])
+        self.assertEqual(self._lots("hake", fields=("desc", "tenant__name")), ["LOT-9"])
+        self.assertEqual(self._lots("  "), ["AB-7", "LOT-9"])
+
+    def test_search_falls_back_without_fts5_trigram_support(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("SQLite search tables only")
+        self.addCleanup(search_module._installed_search_tables.clear)
+        Inventory.all_objects.create(tenant=self.tenant, desc="King Salmon", vendorlot="LOT-1")
+        with connection.cursor() as cursor:
+            for suffix in ("ai", "ad", "au"):
+                cursor.execute(f'DROP TRIGGER "inventory_inventory_search_{suffix}"')
+            cursor.execute('DROP TABLE "inventory_inventory_search"')
+
+        with mock.patch.object(search_module, "_fts5_trigram_supported", return_value=False):
+            with self.assertLogs("core.services.search", level="WARNING"):
+                install_sqlite_search_tables(connection)
+        self.assertNotIn("inventory_inventory", search_module._sqlite_search_tables(connection))
+        Inventory.all_objects.create(tenant=self.tenant, desc="Salmon Roe", vendorlot="LOT-2")
+        self.assertEqual(self._lots("salmon"), ["LOT-2", "LOT-1"])
@@ -0,0 +1,68 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+
+from core.models import Customer, Inventory, ProcessBatch, PurchaseOrder, SalesOrder, Tenant, TenantSequence, TenantUser
+from core.services.import_service import execute_import
+from core.services.sequences import advance_sequence, next_value, reserve_values
+from core.views.operations_api import _ensure_products_for_inventory_lots
+
+
+class TenantSequenceTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tenant = Tenant.objects.create(name="Sequence Tenant", subdomain="sequence-tenant", is_active=True)
+        self.other = Tenant.objects.create(name="Other Tenant", subdomain="other-sequence-tenant", is_active=True)
+        self.user = User.objects.create_user(username="sequences", password="password123")
+        TenantUser.objects.create(user=self.user, tenant=self.tenant, is_admin=True)
+
+    def _post(self, url, payload):
+        return self.client.post(url, data=json.dumps(payload), content_type="application/json")
+
+    def test_sequences_start_after_existing_numbers_and_are_per_tenant(self):
+        SalesOrder.all_objects.create(tenant=self.tenant, order_number="SO-0041")
+        SalesOrder.all_objects.create(tenant=self.tenant, order_number="WEB-900")
+
+        self.assertEqual(next_value(self.tenant, "sales_order"), 42)
+        self.assertEqual(list(reserve_values(self.tenant, "sales_order", 3)), [43, 44, 45])
+        self.assertEqual(next_value(self.other, "sales_order"), 1)
+        self.assertEqual(
+            TenantSequence.all_objects.get(tenant=self.tenant, kind="sales_order").last_value, 45,
+        )
+
+        advance_sequence(self.tenant, "sales_order", ["SO-0100", "SO-0007", "bogus"])
+        self.assertEqual(next_value(self.tenant, "sales_order"), 101)
+
+    def test_views_and_imports_share_the_sequence(self):
+        self.client.force_login(self.user)
+        PurchaseOrder.all_objects.create(tenant=self.tenant, po_number="00009")
+
+        response = self._post("/api/purchasing/orders/create/", {"vendor_name": "North Fleet"})
+        self.assertEqual(response.json()["po_number"], "00010")
+
+        self._post("/api/sales/orders/import/", {"rows": [{"order_number": "SO-0200"}]})
+        self._post("/api/sales/orders/create/", {"customer_name": "Harbor Grill"})
+        self.assertTrue(SalesOrder.all_objects.filter(tenant=self.tenant, order_number="SO-0201").exists())
+
+    def test_batch_numbers_are_unique_per_tenant(self):
+        ProcessBatch.all_objects.create(tenant=self.tenant, batch_number="PB-0001", process_type="fish_cutting")
+        ProcessBatch.all_objects.create(tenant=self.other, batch_number="PB-0001", process_type="fish_cutting")
+        self.assertEqual(next_value(self.tenant, "process_batch"), 2)
+
+    def test_imported_customers_and_backfilled_products_advance_their_sequences(self):
+        self.client.force_login(self.user)
+        self.assertEqual(next_value(self.tenant, "customer"), 1)
+        execute_import(self.tenant, [{
+            "customer_id": 2, "customer_name": "Imported", "contact_name": "", "phone": "", "email": "",
+            "city": "", "state": "", "description": "Cod", "unit_type": "LB", "pack_size": 1, "price": 5,
+        }])
+        response = self._post("/api/sales/customers/create/", {"name": "Harbor Grill"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Customer.all_objects.get(tenant=self.tenant, name="Harbor Grill").customer_id, 3)
+
+        next_value(self.tenant, "product")
+        Inventory.all_objects.create(tenant=self.tenant, productid="ITEM-0007", unitsonhand=1)
+        _ensure_products_for_inventory_lots(self.tenant)
+        self.assertEqual(next_value(self.tenant, "product"), 8)
@@ -0,0 +1,43 @@
+from django.db.models import F, Sum
+from django.test import TestCase
+
+from core.models import Inventory, ProcessBatchOutput, SalesOrderAllocation, Tenant, Vendor
+from core.services.inventory_ledger import find_ledger_drift
+from core.services.synthetic_data import SyntheticDataGenerator
+
+
+class SyntheticDataGeneratorTests(TestCase):
+    def setUp(self):
+        generator = SyntheticDataGenerator(scale=0.05, seed=3, chunk_size=200, days=60)
+        self.tenant, = generator.generate()
+
+    def test_generates_linked_tenant_history(self):
+        self.assertEqual(self.tenant.subdomain, "loadtest-1")
+        lots = Inventory.all_objects.filter(tenant=self.tenant)
+        self.assertTrue(lots.filter(purchase_order__isnull=False).exists())
+        self.assertFalse(lots.filter(unitsonhand__lt=0).exists())
+        self.assertFalse(lots.filter(unitsavailable__lt=0).exists())
+        self.assertTrue(
+            ProcessBatchOutput.all_objects.filter(tenant=self.tenant, inventory__vendorlot=F("lot_id")).exists()
+        )
+
+    def test_allocations_never_use_lots_received_after_the_order(self):
+        allocations = SalesOrderAllocation.all_objects.filter(tenant=self.tenant).values_list(
+            "inventory__receivedate", "sales_order_item__sales_order__order_date"
+        )
+        self.assertTrue(allocations)
+        for receivedate, order_date in allocations:
+            self.assertLessEqual(receivedate, order_date)
+
+    def test_lots_agree_with_their_ledger_and_allocations(self):
+        self.assertEqual(find_ledger_drift(self.tenant), ([], []))
+        lot = (
+            Inventory.all_objects.filter(tenant=self.tenant, unitsallocated__gt=0)
+            .annotate(reserved=Sum("sales_allocations__quantity"))
+            .first()
+        )
+        self.assertEqual(lot.unitsallocated, lot.reserved)
+
+    def test_reserved_ids_leave_sequences_usable(self):
+        vendor = Vendor.all_objects.create(tenant=Tenant.objects.create(name="After", subdomain="after"), vendor_id=1, name="After")
+        self.assertGreater(vendor.id, Vendor.all_objects.exclude(id=vendor.id).latest("id").id)
@@ -0,0 +1,66 @@
+import asyncio
+
+from django.test import TestCase, override_settings
+
+from core.models import Tenant, Vendor
+from core.tenancy import (
+    TenantContextError,
+    TenantThreadPoolExecutor,
+    create_tenant_task,
+    get_current_tenant,
+    run_for_tenants,
+    strict_tenant_mode,
+    tenant_context,
+)
+
+
+class TenantContextTests(TestCase):
+    def setUp(self):
+        self.tenant_a = Tenant.objects.create(name="Tenant A", subdomain="tenant-a", is_active=True)
+        self.tenant_b = Tenant.objects.create(name="Tenant B", subdomain="tenant-b", is_active=True)
+        Vendor.all_objects.create(tenant=self.tenant_a, vendor_id=1, name="Vendor A")
+        Vendor.all_objects.create(tenant=self.tenant_b, vendor_id=2, name="Vendor B")
+
+    def test_tenant_context_scopes_queries_and_restores_previous_tenant(self):
+        with tenant_context(self.tenant_a):
+            with tenant_context(self.tenant_b):
+                self.assertEqual(list(Vendor.objects.values_list("name", flat=True)), ["Vendor B"])
+            self.assertEqual(get_current_tenant(), self.tenant_a)
+            self.assertEqual(list(Vendor.objects.values_list("name", flat=True)), ["Vendor A"])
+        self.assertIsNone(get_current_tenant())
+
+    def test_strict_mode_rejects_unscoped_queries(self):
+        with strict_tenant_mode():
+            with self.assertRaises(TenantContextError):
+                Vendor.objects.count()
+            self.assertEqual(Vendor.all_objects.count(), 2)
+
+        with override_settings(TENANT_STRICT_MODE=True):
+            with self.assertRaises(TenantContextError):
+                Vendor.objects.count()
+            with tenant_context(self.tenant_a):
+                self.assertEqual(Vendor.objects.count(), 1)
+
+    def test_thread_pool_workers_inherit_submitting_tenant(self):
+        with tenant_context(self.tenant_b):
+            with TenantThreadPoolExecutor(max_workers=2) as pool:
+                future = pool.submit(get_current_tenant)
+        self.assertEqual(future.result(), self.tenant_b)
+
+    def test_run_for_tenants_isolates_each_tenant(self):
+        tenant_ids = run_for_tenants([self.tenant_a, self.tenant_b], lambda tenant: get_current_tenant().id)
+        self.assertEqual(tenant_ids, [self.tenant_a.id, self.tenant_b.id])
+        self.assertIsNone(get_current_tenant())
+
+    def test_create_tenant_task_binds_tenant_without_leaking(self):
+        async def current():
+            await asyncio.sleep(0)
+            return get_current_tenant()
+
+        async def main():
+            task_a = create_tenant_task(current(), tenant=self.tenant_a)
+            task_b = create_tenant_task(current(), tenant=self.tenant_b)
+            return await task_a, await task_b, get_current_tenant()
+
+        seen_a, seen_b, caller = asyncio.run(main())
+        self.assertEqual((seen_a, seen_b, caller), (self.tenant_a, self.tenant_b, None))
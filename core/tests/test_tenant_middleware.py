@@ -0,0 +1,75 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from core.checks import check_shared_cache
+from core.models import Tenant, TenantUser
+
+
+class TenantMiddlewareCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tenant = Tenant.objects.create(name="Cached Tenant", subdomain="cached-tenant", is_active=True)
+        self.user = User.objects.create_user(username="cached", password="password123")
+        self.tenant_user = TenantUser.objects.create(user=self.user, tenant=self.tenant, is_admin=False)
+        self.client.force_login(self.user)
+
+    def _tenant_user_queries(self, path):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [q["sql"] for q in ctx.captured_queries if TenantUser._meta.db_table in q["sql"]], response
+
+    def test_tenant_is_resolved_once_then_served_from_cache(self):
+        first, response = self._tenant_user_queries("/api/settings/account/")
+        self.assertEqual(len(first), 1)
+        self.assertEqual(response.json()["name"], "Cached Tenant")
+
+        second, response = self._tenant_user_queries("/api/settings/account/")
+        self.assertEqual(second, [])
+        self.assertEqual(response.json()["name"], "Cached Tenant")
+
+    def test_tenant_changes_invalidate_cached_context(self):
+        self.client.get("/api/settings/account/")
+        self.tenant.name = "Renamed Tenant"
+        self.tenant.save()
+
+        response = self.client.get("/api/settings/account/")
+        self.assertEqual(response.json()["name"], "Renamed Tenant")
+
+    def test_admin_flag_comes_from_cached_context(self):
+        response = self.client.post("/api/settings/reset-operational-data/")
+        self.assertEqual(response.status_code, 403)
+
+        self.tenant_user.is_admin = True
+        self.tenant_user.save()
+
+        response = self.client.post("/api/settings/reset-operational-data/")
+        self.assertEqual(response.status_code, 200, response.content)
+
+    def test_stored_context_costs_no_query_under_default_settings(self):
+        self.client.get("/api/settings/account/")
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get("/api/settings/account/")
+        tables = ("django_cache", TenantUser._meta.db_table, Tenant._meta.db_table)
+        self.assertEqual([q["sql"] for q in ctx.captured_queries if any(table in q["sql"] for table in tables)], [])
+
+    def test_admin_change_reaches_every_session_of_the_user(self):
+        other = self.client_class()
+        other.force_login(self.user)
+        for client in (self.client, other):
+            self.assertEqual(client.post("/api/settings/reset-operational-data/").status_code, 403)
+
+        self.tenant_user.is_admin = True
+        self.tenant_user.save()
+
+        for client in (self.client, other):
+            self.assertEqual(client.post("/api/settings/reset-operational-data/").status_code, 200)
+
+    def test_a_per_process_cache_fails_the_system_check(self):
+        self.assertEqual(check_shared_cache(None), [])
+        locmem = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+        with override_settings(CACHES=locmem):
+            self.assertEqual([error.id for error in check_shared_cache(None)], ["core.E001"])
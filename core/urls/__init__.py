@@ -6,6 +6,7 @@ from ..views.auth import (
 )
 from .operations import urlpatterns as operations_urls
 from .api import urlpatterns as api_urls
+from .api_async import urlpatterns as api_async_urls
 from ..views.operations_pages import sales_order_detail
 
 urlpatterns = [
@@ -15,6 +16,7 @@ urlpatterns = [
     path('logout/', logout_view, name='logout'),
 
     path('operations/', include(operations_urls)),
+    path('api/async/', include(api_async_urls)),
     path('api/', include(api_urls)),
 
     path('sales/<int:order_id>/', sales_order_detail, name='sales_order_detail'),
@@ -14,6 +14,7 @@ from ..views.operations_api import (
     inventory_items_export,
     product_orders,
     inventory_items_import,
+    inventory_valuation,
     operations_summary,
     processing_batch_cancel,
     processing_batch_delete,
@@ -54,6 +55,7 @@ from ..views.operations_api import (
     customer_update,
     sales_customers,
     sales_order_allocate_fifo,
+    sales_orders_allocate_wave,
     sales_order_delete,
     sales_order_allocations,
     sales_order_detail_api,
@@ -128,6 +130,7 @@ urlpatterns = [
     path("inventory/groups/", inventory_groups, name="api_inventory_groups"),
     path("inventory/groups/create/", inventory_group_create, name="api_inventory_group_create"),
     path("inventory/items/", inventory_items, name="api_inventory_items"),
+    path("inventory/valuation/", inventory_valuation, name="api_inventory_valuation"),
     path("inventory/items/create/", inventory_item_create, name="api_inventory_item_create"),
     path("inventory/items/<int:item_id>/lots/", inventory_item_lots, name="api_inventory_item_lots"),
     path("inventory/items/<int:item_id>/adjustments/", inventory_item_adjustments, name="api_inventory_item_adjustments"),
@@ -161,6 +164,7 @@ urlpatterns = [
     path("sales/orders/<int:order_id>/delete/", sales_order_delete, name="api_sales_order_delete"),
     path("sales/orders/<int:order_id>/allocations/", sales_order_allocations, name="api_sales_order_allocations"),
     path("sales/orders/<int:order_id>/allocate-fifo/", sales_order_allocate_fifo, name="api_sales_order_allocate_fifo"),
+    path("sales/orders/allocate-wave/", sales_orders_allocate_wave, name="api_sales_orders_allocate_wave"),
     path("sales/orders/export/", sales_orders_export, name="api_sales_orders_export"),
     path("sales/orders/import/", sales_orders_import, name="api_sales_orders_import"),
     path("purchasing/orders/export/", purchasing_orders_export, name="api_purchasing_orders_export"),
@@ -0,0 +1,20 @@
+from django.urls import path
+
+from ..views.operations_async_api import (
+    inventory_items,
+    processing_sold_results,
+    processing_source_lots,
+    purchasing_orders,
+    receiving_lots,
+    trace_lookup,
+)
+
+
+urlpatterns = [
+    path("purchasing/orders/", purchasing_orders, name="api_async_purchasing_orders"),
+    path("receiving/lots/", receiving_lots, name="api_async_receiving_lots"),
+    path("processing/source-lots/", processing_source_lots, name="api_async_processing_source_lots"),
+    path("processing/sold-results/", processing_sold_results, name="api_async_processing_sold_results"),
+    path("inventory/items/", inventory_items, name="api_async_inventory_items"),
+    path("trace/", trace_lookup, name="api_async_trace_lookup"),
+]
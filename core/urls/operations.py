@@ -17,6 +17,7 @@ from ..views.operations_pages import (
     shipping_packing,
     shipping_picking,
     system_admin_page,
+    system_admin_request_metrics,
     trace_page,
     vendor_list_page,
 )
@@ -37,6 +38,7 @@ urlpatterns = [
     path('shipping/packing/', shipping_packing, name='shipping_packing'),
     path('shipping/loading/', shipping_loading, name='shipping_loading'),
     path('system-admin/', system_admin_page, name='system_admin_page'),
+    path('system-admin/request-metrics/', system_admin_request_metrics, name='system_admin_request_metrics'),
     path('settings/', settings_page, name='settings_page'),
     path('vendors/', vendor_list_page, name='vendor_list_page'),
     path('customers/', customer_list_page, name='customer_list_page'),
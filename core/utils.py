@@ -1,3 +1,12 @@
+from datetime import date, datetime
+
+from django.utils import timezone
+
+# Formats seen in receive/pack dates entered by hand or imported from spreadsheets.
+DATE_INPUT_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y", "%Y/%m/%d", "%m-%d-%Y", "%d-%b-%Y", "%b %d, %Y")
+DATETIME_INPUT_FORMATS = ("%m/%d/%Y %H:%M:%S", "%m/%d/%Y %H:%M", "%m/%d/%Y %I:%M %p", "%m/%d/%Y %I:%M:%S %p")
+
+
 def get_default_company_logo(index=1):
     """Return a base64-encoded SVG fish icon based on index (1-4)"""
     colors = {
@@ -27,4 +36,51 @@ def get_default_company_logo(index=1):
 
     import base64
     encoded = base64.b64encode(svg.encode()).decode()
-    return f"data:image/svg+xml;base64,{encoded}"
\ No newline at end of file
+    return f"data:image/svg+xml;base64,{encoded}"
+
+
+def parse_date_value(value):
+    """Parse a date, datetime or date string (ISO or a common US format); None if blank or invalid."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    value = str(value or "").strip()
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value[:10])
+    except ValueError:
+        pass
+    for fmt in DATE_INPUT_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    parsed = parse_datetime_value(value)
+    return parsed.date() if parsed else None
+
+
+def parse_datetime_value(value):
+    """Parse a datetime string into an aware datetime (date-only values become midnight); None if invalid."""
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        value = str(value or "").strip()
+        if not value:
+            return None
+        parsed = None
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            for fmt in DATETIME_INPUT_FORMATS + DATE_INPUT_FORMATS:
+                try:
+                    parsed = datetime.strptime(value, fmt)
+                    break
+                except ValueError:
+                    continue
+        if parsed is None:
+            return None
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
@@ -50,15 +50,8 @@ def operations_hub(request):
     if not request.tenant:
         return redirect('admin:index')
     
-    # Check if user is admin
-    try:
-        tenant_user = TenantUser.objects.get(user=request.user, tenant=request.tenant)
-        is_admin = tenant_user.is_admin
-    except TenantUser.DoesNotExist:
-        is_admin = False
-    
     return render(request, 'core/operations_hub.html', {
-        'is_admin': is_admin
+        'is_admin': request.tenant_is_admin
     })
 
 
@@ -1,4 +1,3 @@
-import csv
 import io
 import json
 from decimal import Decimal
@@ -9,8 +8,7 @@ from django.conf import settings
 from django.contrib.auth.models import User as DjangoUser
 from django.contrib.auth.decorators import login_required
 from django.db import transaction
-from django.db.models import Q, Sum
-from django.http import HttpResponse, JsonResponse
+from django.db.models import F, Q
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.views.decorators.http import require_POST
@@ -20,6 +18,7 @@ from core.models import (
     Customer,
     Inventory,
     InventoryAdjustment,
+    InventoryMovement,
     ItemGroup,
     ProcessBatch,
     ProcessBatchOutput,
@@ -37,6 +36,30 @@ from core.models import (
     TenantUser,
     Vendor,
 )
+from core.services.allocation import allocate_order_fifo, allocate_wave, parse_wave_priority, wave_orders
+from core.services.inventory_ledger import (
+    InsufficientStockError,
+    consume_available,
+    delete_lots,
+    record_movement,
+    record_opening_balances,
+    set_on_hand,
+)
+from core.services.exports import ExportColumn, blank_if_empty, csv_export_response, xlsx_export_response
+from core.services.inventory_snapshots import inventory_valuation_as_of
+from core.services.inventory_summary import (
+    available_to_promise,
+    refresh_lot_products,
+    schedule_inventory_summary_rebuild,
+    summary_totals_by_product,
+)
+from core.services.pagination import InvalidCursor, KeysetPaginator, Page, estimate_count, keyset_ordered
+from core.services.pick_lists import matches_search, pick_list, pick_list_window
+from core.services.product_lookup import build_product_lookup_maps, find_product, resolve_product_from_values
+from core.services.request_metrics import JsonResponse
+from core.services.search import search
+from core.services.sequences import advance_sequence, next_value, reserve_values
+from core.utils import parse_date_value
 
 
 def _tenant(request):
@@ -51,8 +74,8 @@ def _require_tenant(request):
 
 
 def _require_tenant_admin(request, tenant):
-    tenant_user = TenantUser.objects.filter(tenant=tenant, user=request.user).first()
-    if not tenant_user or not tenant_user.is_admin:
+    # TenantMiddleware resolves the admin flag alongside the tenant, so no lookup is needed here.
+    if not tenant or not getattr(request, "tenant_is_admin", False):
         return JsonResponse({"error": "Admin access is required."}, status=403)
     return None
 
@@ -90,13 +113,11 @@ def _restore_and_delete_process_batch(batch):
 
     for source in batch.sources.select_related("inventory").all():
         if source.inventory_id and source.inventory:
-            source.inventory.unitsonhand = (source.inventory.unitsonhand or 0) + source.quantity
-            source.inventory.save(update_fields=["unitsonhand"])
+            record_movement(source.inventory, "restore", on_hand=source.quantity, reference=batch.batch_number)
 
     output_inventory_ids = [output.inventory_id for output in batch.outputs.all() if output.inventory_id]
     if output_inventory_ids:
-        SalesOrderAllocation.objects.filter(tenant=tenant, inventory_id__in=output_inventory_ids).delete()
-        Inventory.objects.filter(tenant=tenant, id__in=output_inventory_ids).delete()
+        delete_lots(Inventory.objects.filter(tenant=tenant, id__in=output_inventory_ids), reference=batch.batch_number)
 
     batch.sources.all().delete()
     batch.outputs.all().delete()
@@ -147,6 +168,7 @@ def _ensure_products_for_inventory_lots(tenant):
         .values("productid", "desc", "unittype")
         .distinct()
     )
+    created = []
     for lot in orphan_lots:
         product_id = (lot.get("productid") or "").strip()
         if not product_id:
@@ -161,106 +183,80 @@ def _ensure_products_for_inventory_lots(tenant):
             unit_type=(lot.get("unittype") or "").strip(),
         )
         existing_product_ids.add(product_id)
+        created.append(product_id)
+    # Lot codes such as ITEM-12 now belong to products; new product numbers skip past them.
+    advance_sequence(tenant, "product", created)
 
 
-def _normalize_product_lookup(value):
-    return " ".join(str(value or "").strip().lower().split())
-
-
-def _build_product_lookup_maps(products):
-    products_by_id = {}
-    products_by_name = {}
-
-    for product in products:
-        product_id_key = _normalize_product_lookup(product.product_id)
-        if product_id_key:
-            products_by_id[product_id_key] = product
-
-        for candidate in [
-            product.description,
-            product.item_name,
-            product.friendly_name,
-            product.qb_item_name,
-        ]:
-            name_key = _normalize_product_lookup(candidate)
-            if name_key and name_key not in products_by_name:
-                products_by_name[name_key] = product
-
-    return products_by_id, products_by_name
-
+def _page_bounds(request, default_page_size=100):
+    page = max(int(request.GET.get("page", 1) or 1), 1)
+    page_size = max(int(request.GET.get("page_size", default_page_size) or default_page_size), 1)
+    start = (page - 1) * page_size
+    return start, start + page_size
 
-def _resolve_product_from_values(products_by_id, products_by_name, *values):
-    for value in values:
-        lookup_key = _normalize_product_lookup(value)
-        if not lookup_key:
-            continue
-        if lookup_key in products_by_id:
-            return products_by_id[lookup_key]
-        if lookup_key in products_by_name:
-            return products_by_name[lookup_key]
-    return None
 
+def _page_request(request, default_page_size):
+    """
+    How the request wants a list paged: ("cursor", size), ("offset", size) or ("all", None).
 
-def _resolve_product_for_lot(lot, products_by_id, products_by_name):
-    po_item = getattr(lot, "po_item", None)
-    if po_item and po_item.product_id and po_item.product:
-        return po_item.product
-    return _resolve_product_from_values(
-        products_by_id,
-        products_by_name,
-        lot.productid,
-        lot.desc,
-    )
+    A ``cursor`` parameter (empty for the first page) selects keyset paging;
+    otherwise page/page_size page by offset. Lists that used to return every
+    row pass ``default_page_size=None`` and stay unpaged unless asked.
+    """
+    if "cursor" in request.GET:
+        return "cursor", max(int(request.GET.get("page_size") or default_page_size or 100), 1)
+    if default_page_size is None and "page" not in request.GET and "page_size" not in request.GET:
+        return "all", None
+    return "offset", default_page_size or 100
 
 
-def _inventory_totals_by_product(products, lots):
-    totals_by_product_id = {
-        product.id: {"expected": 0, "allocated": 0, "on_hand": 0}
-        for product in products
-    }
-    products_by_id, products_by_name = _build_product_lookup_maps(products)
+def _offset_page(queryset, rows, total, page_size, end):
+    page = Page(items=rows, total=total)
+    if rows and end < total:
+        page.next_cursor = KeysetPaginator(queryset, page_size).next_cursor_after(rows[-1])
+    return page
 
-    for lot in lots:
-        product = _resolve_product_for_lot(lot, products_by_id, products_by_name)
-        if not product:
-            continue
-        totals = totals_by_product_id.setdefault(product.id, {"expected": 0, "allocated": 0, "on_hand": 0})
-        totals["expected"] += _to_float(lot.unitsin) or 0
-        totals["allocated"] += _to_float(lot.unitsallocated) or 0
-        totals["on_hand"] += _to_float(lot.unitsonhand) or 0
 
-    return totals_by_product_id, products_by_id, products_by_name
+def _keyset_paginator(request, queryset, page_size):
+    try:
+        return KeysetPaginator(queryset, page_size, request.GET["cursor"].strip()), None
+    except InvalidCursor as exc:
+        return None, JsonResponse({"error": str(exc)}, status=400)
 
 
 def _paginate(request, queryset, default_page_size=100):
-    page = max(int(request.GET.get("page", 1) or 1), 1)
-    page_size = max(int(request.GET.get("page_size", default_page_size) or default_page_size), 1)
-    total = queryset.count()
-    start = (page - 1) * page_size
-    end = start + page_size
-    return queryset[start:end], total
+    """
+    Page ``queryset`` for a list endpoint; returns (Page, error response).
+
+    Keyset pages carry next/prev cursors and, with ``total=exact`` or
+    ``total=estimate``, a row count. Offset pages always carry the exact
+    total plus a next_cursor to continue by keyset.
+    """
+    mode, page_size = _page_request(request, default_page_size)
+    if mode == "all":
+        return Page(items=list(queryset)), None
+    if mode == "offset":
+        start, end = _page_bounds(request, page_size)
+        rows = list(keyset_ordered(queryset)[start:end])
+        return _offset_page(queryset, rows, queryset.count(), end - start, end), None
+    paginator, error = _keyset_paginator(request, queryset, page_size)
+    if error:
+        return None, error
+    page = paginator.page(paginator.queryset)
+    total = request.GET.get("total", "").strip()
+    if total == "exact":
+        page.total = queryset.count()
+    elif total == "estimate":
+        page.total, page.total_is_estimate = estimate_count(queryset), True
+    return page, None
 
 
 def _po_to_dict(order):
-    item_rows = [item for item in order.items.all() if item.item_type == "item"]
-    expected = getattr(order, "expected_total", None)
-    if expected is None:
-        expected = sum((item.quantity or 0) for item in item_rows)
-    arrived = sum((item.received_quantity or 0) for item in item_rows)
-    total = getattr(order, "order_total", None)
-    if total is None:
-        total = order.total or 0
     vendor_type = ""
     if order.vendor_id and order.vendor:
         vendor_type = order.vendor.vendor_type or ""
-    unit_types = sorted(set(filter(None, [
-        (item.unit_type or (item.product.unit_type if item.product_id and item.product else ""))
-        for item in item_rows
-    ])))
-    any_received = any((item.received_quantity or 0) > 0 for item in item_rows)
-    all_received = bool(item_rows) and all((item.received_quantity or 0) >= (item.quantity or 0) for item in item_rows)
-    derived_receive_status = "received" if all_received else ("partial" if any_received else "not_received")
-    receive_status = derived_receive_status if item_rows else order.receive_status
+    # Stored rollups (core.services.order_rollups); orders without item lines keep their own status.
+    receive_status = order.item_receive_status or order.receive_status
     receive_status_display = {
         "not_received": "Not Received",
         "partial": "Partial",
@@ -277,16 +273,13 @@ def _po_to_dict(order):
         "vendor_name": order.vendor_name,
         "vendor_type": vendor_type,
         "buyer": order.buyer,
-        "total": _to_float(total) or 0,
-        "expected": _to_float(expected) or 0,
-        "arrived": _to_float(arrived) or 0,
-        "unit_type": ", ".join(unit_types) or "",
+        "total": _to_float(order.items_total) or 0,
+        "expected": _to_float(order.expected_quantity) or 0,
+        "arrived": _to_float(order.received_quantity) or 0,
+        "unit_type": order.unit_types,
         "order_date": _date_str(order.order_date),
         "expected_date": _date_str(order.expected_date),
-        "products": ", ".join(sorted(set(filter(None, (
-            (item.product.species or item.product.item_name or "") if item.product else item.description
-            for item in order.items.all() if item.item_type == "item"
-        ))))) or "",
+        "products": order.products_summary,
     }
 
 
@@ -325,48 +318,26 @@ def _product_to_dict(product, totals=None):
         "expected": _to_float(totals.get("expected")) or 0,
         "allocated": _to_float(totals.get("allocated")) or 0,
         "on_hand": _to_float(totals.get("on_hand")) or 0,
+        "available": _to_float(totals.get("available")) or 0,
     }
 
 
 def _next_product_id(tenant):
-    existing_ids = Product.objects.filter(tenant=tenant).values_list("product_id", flat=True)
-    highest = 0
-    for value in existing_ids:
-        if not value:
-            continue
-        value = str(value).strip()
-        if not value.startswith("ITEM-"):
-            continue
-        suffix = value[5:]
-        if suffix.isdigit():
-            highest = max(highest, int(suffix))
-    return f"ITEM-{highest + 1:04d}"
-
-
-def _sales_order_total(order):
-    total = getattr(order, "order_total", None)
-    if total is None:
-        total = order.items.aggregate(total=Sum("amount"))["total"]
-    return _to_float(total) or 0
+    return f"ITEM-{next_value(tenant, 'product'):04d}"
 
 
 def _filter_sales_orders_for_shipping(request, queryset):
-    search = request.GET.get("search", "").strip()
-    if search:
-        queryset = queryset.filter(
-            Q(order_number__icontains=search)
-            | Q(customer_name__icontains=search)
-            | Q(shipper__icontains=search)
-            | Q(shipping_route__icontains=search)
-        )
-
     date_from = request.GET.get("date_from", "").strip()
     date_to = request.GET.get("date_to", "").strip()
     if date_from:
         queryset = queryset.filter(ship_date__gte=date_from)
     if date_to:
         queryset = queryset.filter(ship_date__lte=date_to)
-    return queryset
+    return search(
+        queryset,
+        ("order_number", "customer_name", "shipper", "shipping_route"),
+        request.GET.get("search", ""),
+    )
 
 
 def _sales_item_name(item):
@@ -410,16 +381,15 @@ def _rollback_process_batch(batch):
     for source in source_rows:
         if not source.inventory_id or not source.inventory:
             continue
-        source.inventory.unitsonhand = (source.inventory.unitsonhand or 0) + (source.quantity or 0)
-        source.inventory.unitsavailable = (source.inventory.unitsavailable or 0) + (source.quantity or 0)
-        source.inventory.save(update_fields=["unitsonhand", "unitsavailable"])
+        record_movement(source.inventory, "restore", on_hand=source.quantity, reference=batch.batch_number)
 
     if output_inventory_ids:
-        Inventory.objects.filter(id__in=output_inventory_ids).delete()
+        delete_lots(Inventory.objects.filter(id__in=output_inventory_ids), reference=batch.batch_number)
 
     batch.delete()
 
 
+@transaction.atomic
 def _create_processing_batch_for_sales_item(request, tenant, sales_item, data):
     process_type = _normalize_process_type(data.get("process_type"))
     if not process_type or sales_item.item_type != "item":
@@ -463,12 +433,9 @@ def _create_processing_batch_for_sales_item(request, tenant, sales_item, data):
     if remaining > 0:
         raise ValueError("Not enough quantity in the selected source lots to cover this sale.")
 
-    last = ProcessBatch.objects.filter(tenant=tenant).order_by("-id").first()
-    next_num = (last.id + 1) if last else 1
-    batch_number = f"PB-{next_num:04d}"
     batch = ProcessBatch.objects.create(
         tenant=tenant,
-        batch_number=batch_number,
+        batch_number=f"PB-{next_value(tenant, 'process_batch'):04d}",
         process_type=process_type,
         status="completed",
         completed_at=timezone.now(),
@@ -485,24 +452,25 @@ def _create_processing_batch_for_sales_item(request, tenant, sales_item, data):
             quantity=source["quantity"],
             unit_type=source["unit_type"],
         )
-        lot.unitsonhand = max(Decimal("0"), (lot.unitsonhand or 0) - source["quantity"])
-        lot.unitsavailable = max(Decimal("0"), (lot.unitsavailable or 0) - source["quantity"])
-        lot.save(update_fields=["unitsonhand", "unitsavailable"])
+        # Raises (and rolls the batch back) when another request took the lot's stock in the meantime.
+        record_movement(
+            lot, "consume", on_hand=-source["quantity"], reference=batch.batch_number, user=request.user,
+            allow_negative=False,
+        )
 
-    output_inventory = Inventory.objects.create(
+    output_inventory = Inventory(
         tenant=tenant,
         productid=sales_item.product.product_id,
         desc=sales_item.description or sales_item.product.description or sales_item.product.item_name or sales_item.product.product_id,
         vendorid=selected_lots[0].vendorid if selected_lots else "",
         vendorlot=f"LOT-{batch.batch_number}-{sales_item.id}",
         unittype=(sales_item.unit_type or selected_lots[0].unittype if selected_lots else "").strip(),
-        unitsonhand=requested_qty,
-        unitsavailable=requested_qty,
         unitsin=requested_qty,
-        receivedate=timezone.now().date().isoformat(),
+        receivedate=timezone.localdate(),
         vendor_type=selected_lots[0].vendor_type if selected_lots else "",
         purchase_order=selected_lots[0].purchase_order if selected_lots and hasattr(selected_lots[0], "purchase_order") else None,
     )
+    record_movement(output_inventory, "produce", on_hand=requested_qty, reference=batch.batch_number, user=request.user)
     ProcessBatchOutput.objects.create(
         tenant=tenant,
         batch=batch,
@@ -565,30 +533,8 @@ def _po_item_to_dict(item):
     }
 
 
-@login_required
-def purchasing_orders(request):
-    tenant, error = _require_tenant(request)
-    if error:
-        return error
-
-    orders = (
-        PurchaseOrder.objects.filter(tenant=tenant)
-        .select_related("vendor")
-        .prefetch_related("items__product")
-        .annotate(
-            order_total=Sum("items__amount"),
-            expected_total=Sum("items__quantity", filter=Q(items__item_type="item")),
-        )
-    )
-
-    search = request.GET.get("search", "").strip()
-    if search:
-        orders = orders.filter(
-            Q(po_number__icontains=search)
-            | Q(vendor_name__icontains=search)
-            | Q(qb_po_number__icontains=search)
-            | Q(buyer__icontains=search)
-        )
+def _purchase_orders_queryset(request, tenant):
+    orders = PurchaseOrder.objects.filter(tenant=tenant).select_related("vendor")
 
     for key, lookup in {
         "vendor": "vendor_name__iexact",
@@ -614,9 +560,23 @@ def purchasing_orders(request):
     if expected_to:
         orders = orders.filter(expected_date__lte=expected_to)
 
-    orders = orders.order_by("-order_date", "-created_at")
-    paged, total = _paginate(request, orders)
-    return JsonResponse({"orders": [_po_to_dict(order) for order in paged], "total": total})
+    return search(
+        orders.order_by("-order_date", "-created_at"),
+        ("po_number", "vendor_name", "qb_po_number", "buyer"),
+        request.GET.get("search", ""),
+    )
+
+
+@login_required
+def purchasing_orders(request):
+    tenant, error = _require_tenant(request)
+    if error:
+        return error
+
+    page, error = _paginate(request, _purchase_orders_queryset(request, tenant))
+    if error:
+        return error
+    return JsonResponse({"orders": [_po_to_dict(order) for order in page.items], **page.meta()})
 
 
 @login_required
@@ -625,9 +585,11 @@ def shipping_log(request):
     if error:
         return error
 
-    orders = SalesOrder.objects.filter(tenant=tenant).annotate(order_total=Sum("items__amount"))
-    orders = _filter_sales_orders_for_shipping(request, orders).order_by("-ship_date", "-created_at")
-    paged, total = _paginate(request, orders)
+    orders = SalesOrder.objects.filter(tenant=tenant).order_by("-ship_date", "-created_at")
+    orders = _filter_sales_orders_for_shipping(request, orders)
+    page, error = _paginate(request, orders)
+    if error:
+        return error
     return JsonResponse(
         {
             "orders": [
@@ -640,11 +602,11 @@ def shipping_log(request):
                     "shipping_route": order.shipping_route or "",
                     "packed_status": order.packed_status,
                     "packed_status_display": order.get_packed_status_display(),
-                    "total": _sales_order_total(order),
+                    "total": _to_float(order.items_total) or 0,
                 }
-                for order in paged
+                for order in page.items
             ],
-            "total": total,
+            **page.meta(),
         }
     )
 
@@ -679,40 +641,44 @@ def shipping_picking(request):
     if error:
         return error
 
-    orders = SalesOrder.objects.filter(tenant=tenant).prefetch_related(
-        "items__product",
-        "items__allocations__inventory",
-    )
-    orders = _filter_sales_orders_for_shipping(request, orders)
-    sort = request.GET.get("sort", "department")
-    search = request.GET.get("search", "").strip().lower()
+    dates = {}
+    for param in ("date_from", "date_to"):
+        value = request.GET.get(param, "").strip()
+        dates[param] = _parse_date(value) if value else None
+        if value and dates[param] is None:
+            return JsonResponse({"error": f"Invalid {param}."}, status=400)
+    try:
+        date_from, date_to = pick_list_window(dates["date_from"], dates["date_to"])
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
 
-    departments = {}
-    for order in orders:
-        for item in order.items.all():
-            item_name = _sales_item_name(item)
-            department = item.product.department if item.product_id and item.product and item.product.department else "Unassigned"
-            fifo_lots = [
-                allocation.inventory.vendorlot or f"LOT-{allocation.inventory_id}"
-                for allocation in item.allocations.select_related("inventory").all()
-                if allocation.inventory_id
-            ]
-            row = {
-                "item_name": item_name,
-                "order_number": order.order_number,
-                "so_id": order.id,
-                "fifo_lots": fifo_lots,
-                "quantity": _to_float(item.quantity) or 0,
-                "unit_type": item.unit_type or (item.product.unit_type if item.product_id and item.product else ""),
-            }
-            haystack = " ".join([department, item_name, order.order_number, order.customer_name or ""]).lower()
-            if search and search not in haystack:
-                continue
-            departments.setdefault(department, []).append(row)
+    rows = pick_list(tenant, date_from, date_to)
+    search_text = request.GET.get("search", "").strip()
+    if search_text:
+        rows = [row for row in rows if matches_search(row, search_text)]
+    if request.GET.get("sort", "department") == "department_desc":
+        # Rows are grouped by department; reverse the groups, not the rows within them.
+        rows = sorted(rows, key=lambda row: row["department"], reverse=True)
 
-    department_names = sorted(departments.keys(), reverse=(sort == "department_desc"))
-    payload = [{"department": name, "items": departments[name]} for name in department_names]
-    return JsonResponse({"departments": payload, "total_departments": len(payload)})
+    start, end = _page_bounds(request, default_page_size=200)
+    departments = {}
+    for row in rows[start:end]:
+        departments.setdefault(row["department"], []).append({
+            "item_name": row["item_name"],
+            "order_number": row["order_number"],
+            "so_id": row["so_id"],
+            "fifo_lots": row["fifo_lots"],
+            "quantity": row["quantity"],
+            "unit_type": row["unit_type"],
+        })
+    payload = [{"department": name, "items": items} for name, items in departments.items()]
+    return JsonResponse({
+        "departments": payload,
+        "total_departments": len({row["department"] for row in rows}),
+        "total": len(rows),
+        "date_from": _date_str(date_from),
+        "date_to": _date_str(date_to),
+    })
 
 
 @login_required
@@ -724,18 +690,21 @@ def shipping_packing(request):
     orders = SalesOrder.objects.filter(tenant=tenant).prefetch_related("items__product")
     orders = _filter_sales_orders_for_shipping(request, orders)
     sort = request.GET.get("sort", "old_to_new")
-    search = request.GET.get("search", "").strip().lower()
+    search_text = request.GET.get("search", "").strip().lower()
     orders = orders.order_by("ship_date" if sort == "old_to_new" else "-ship_date", "order_number")
+    page, error = _paginate(request, orders, default_page_size=None)
+    if error:
+        return error
 
     payload = []
-    for order in orders:
+    for order in page.items:
         order_haystack = f"{order.order_number} {order.customer_name or ''}".lower()
         items = []
         for item in order.items.all():
             item_name = _sales_item_name(item)
             packed_status = "packed" if order.packed_status == "packed" else ("partial" if order.packed_status == "need_to_send" else "not_packed")
             item_haystack = f"{order_haystack} {item_name} {item.notes or ''}".lower()
-            if search and search not in item_haystack:
+            if search_text and search_text not in item_haystack:
                 continue
             items.append(
                 {
@@ -756,7 +725,7 @@ def shipping_packing(request):
                     "items": items,
                 }
             )
-    return JsonResponse({"orders": payload, "total_orders": len(payload)})
+    return JsonResponse({"orders": payload, "total_orders": len(payload), **page.meta()})
 
 
 @login_required
@@ -768,13 +737,16 @@ def shipping_loading(request):
     orders = SalesOrder.objects.filter(tenant=tenant).prefetch_related("items__product")
     orders = _filter_sales_orders_for_shipping(request, orders).order_by("ship_date", "shipper", "order_number")
     sort = request.GET.get("sort", "old_to_new")
-    search = request.GET.get("search", "").strip().lower()
+    search_text = request.GET.get("search", "").strip().lower()
+    page, error = _paginate(request, orders, default_page_size=None)
+    if error:
+        return error
 
     grouped = {}
-    for order in orders:
+    for order in page.items:
         key = _date_str(order.ship_date) or "No Ship Date"
         order_haystack = f"{order.shipper or ''} {order.order_number} {order.customer_name or ''}".lower()
-        if search and search not in order_haystack:
+        if search_text and search_text not in order_haystack:
             continue
         order_payload = {
             "id": order.id,
@@ -798,7 +770,7 @@ def shipping_loading(request):
     ship_dates = sorted(grouped.keys(), reverse=(sort == "new_to_old"))
     payload = [{"ship_date": ship_date, "orders": grouped[ship_date]} for ship_date in ship_dates]
     total_sequences = sum(len(group["orders"]) for group in payload)
-    return JsonResponse({"groups": payload, "total_sequences": total_sequences})
+    return JsonResponse({"groups": payload, "total_sequences": total_sequences, **page.meta()})
 
 
 @login_required
@@ -851,15 +823,9 @@ def purchasing_order_create(request):
         return JsonResponse({"error": "Vendor name is required."}, status=400)
 
     vendor = Vendor.objects.filter(tenant=tenant, name=vendor_name).first()
-    next_id = PurchaseOrder.objects.filter(tenant=tenant).count() + 1
-    po_number = f"{next_id:05d}"
-    while PurchaseOrder.objects.filter(tenant=tenant, po_number=po_number).exists():
-        next_id += 1
-        po_number = f"{next_id:05d}"
-
     order = PurchaseOrder.objects.create(
         tenant=tenant,
-        po_number=po_number,
+        po_number=f"{next_value(tenant, 'purchase_order'):05d}",
         vendor=vendor,
         vendor_name=vendor_name,
         buyer=(request.user.get_full_name() or request.user.get_username() or "").strip(),
@@ -903,7 +869,7 @@ def purchasing_order_detail(request, order_id):
                     "product_name": lot.desc or lot.productid or "",
                     "on_hand": _to_float(lot.unitsonhand) or 0,
                     "unit_type": lot.unittype or "",
-                    "receive_date": lot.receivedate or "",
+                    "receive_date": _date_str(lot.receivedate),
                 }
                 for lot in received_lots
             ],
@@ -1050,7 +1016,11 @@ def vendors_list(request):
     tenant, error = _require_tenant(request)
     if error:
         return error
-    vendors = Vendor.objects.filter(tenant=tenant, is_active=True).order_by("name")
+    page, error = _paginate(
+        request, Vendor.objects.filter(tenant=tenant, is_active=True).order_by("name"), default_page_size=None,
+    )
+    if error:
+        return error
     return JsonResponse({
         "vendors": [
             {
@@ -1074,8 +1044,9 @@ def vendors_list(request):
                 "mailing_zipcode": v.mailing_zipcode or "",
                 "cert": v.cert or "",
             }
-            for v in vendors
-        ]
+            for v in page.items
+        ],
+        **page.meta(),
     })
 
 
@@ -1089,8 +1060,7 @@ def vendors_create(request):
     name = (data.get("name") or "").strip()
     if not name:
         return JsonResponse({"error": "Company name is required."}, status=400)
-    max_id = Vendor.objects.filter(tenant=tenant).order_by("-vendor_id").values_list("vendor_id", flat=True).first() or 0
-    v = Vendor(tenant=tenant, vendor_id=max_id + 1, name=name)
+    v = Vendor(tenant=tenant, vendor_id=next_value(tenant, "vendor"), name=name)
     for field in ("vendor_type", "contact_name", "email", "phone", "phone_extension",
                   "fax", "billing_email", "address", "city", "state", "zipcode",
                   "mailing_address", "mailing_city", "mailing_state", "mailing_zipcode", "cert"):
@@ -1101,63 +1071,59 @@ def vendors_create(request):
     return JsonResponse({"ok": True, "id": v.id})
 
 
-@login_required
-def receiving_lots(request):
-    tenant, error = _require_tenant(request)
-    if error:
-        return error
-
+def _receiving_lots_queryset(request, tenant):
     lots = Inventory.objects.filter(tenant=tenant).select_related("purchase_order")
 
-    search = request.GET.get("search", "").strip()
-    if search:
-        lots = lots.filter(
-            Q(desc__icontains=search)
-            | Q(vendorid__icontains=search)
-            | Q(vendorlot__icontains=search)
-            | Q(poid__icontains=search)
-        )
-
     vendor = request.GET.get("vendor", "").strip()
     if vendor:
         lots = lots.filter(vendorid__iexact=vendor)
     vendor_type = request.GET.get("vendor_type", "").strip()
     if vendor_type:
         lots = lots.filter(vendor_type__iexact=vendor_type)
-    date_from = request.GET.get("date_from", "").strip()
+    date_from = _parse_date(request.GET.get("date_from", ""))
     if date_from:
         lots = lots.filter(receivedate__gte=date_from)
-    date_to = request.GET.get("date_to", "").strip()
+    date_to = _parse_date(request.GET.get("date_to", ""))
     if date_to:
         lots = lots.filter(receivedate__lte=date_to)
 
-    lots = lots.order_by("-receivedate", "-id")
-    paged, total = _paginate(request, lots)
-    return JsonResponse(
-        {
-            "lots": [
-                {
-                    "id": lot.id,
-                    "trace_lot": lot.vendorlot or f"LOT-{lot.id}",
-                    "location": lot.location or "",
-                    "receive_date": lot.receivedate or "",
-                    "purchase_order": lot.purchase_order.po_number if lot.purchase_order_id and lot.purchase_order else lot.poid,
-                    "receive_time": lot.receive_time or "",
-                    "received_at": f"{lot.receivedate or ''} {lot.receive_time or ''}".strip(),
-                    "product_name": lot.desc or lot.productid or "",
-                    "vendor": lot.vendorid or "",
-                    "vendor_type": lot.vendor_type or "",
-                    "cost": _to_float(lot.actualcost),
-                    "on_hand": _to_float(lot.unitsonhand) or 0,
-                    "unit_type": lot.unittype or "",
-                }
-                for lot in paged
-            ],
-            "total": total,
-        }
+    return search(
+        lots.order_by(F("receivedate").desc(nulls_last=True), "-id"),
+        ("desc", "vendorid", "vendorlot", "poid"),
+        request.GET.get("search", ""),
     )
 
 
+def _receiving_lot_to_dict(lot):
+    return {
+        "id": lot.id,
+        "trace_lot": lot.vendorlot or f"LOT-{lot.id}",
+        "location": lot.location or "",
+        "receive_date": _date_str(lot.receivedate),
+        "purchase_order": lot.purchase_order.po_number if lot.purchase_order_id and lot.purchase_order else lot.poid,
+        "receive_time": lot.receive_time or "",
+        "received_at": f"{_date_str(lot.receivedate)} {lot.receive_time or ''}".strip(),
+        "product_name": lot.desc or lot.productid or "",
+        "vendor": lot.vendorid or "",
+        "vendor_type": lot.vendor_type or "",
+        "cost": _to_float(lot.actualcost),
+        "on_hand": _to_float(lot.unitsonhand) or 0,
+        "unit_type": lot.unittype or "",
+    }
+
+
+@login_required
+def receiving_lots(request):
+    tenant, error = _require_tenant(request)
+    if error:
+        return error
+
+    page, error = _paginate(request, _receiving_lots_queryset(request, tenant))
+    if error:
+        return error
+    return JsonResponse({"lots": [_receiving_lot_to_dict(lot) for lot in page.items], **page.meta()})
+
+
 @login_required
 def receiving_lot_detail(request, lot_id):
     tenant, error = _require_tenant(request)
@@ -1192,7 +1158,7 @@ def receiving_lot_detail(request, lot_id):
                 "type": vendor.vendor_type if vendor else lot.vendor_type,
                 "cert": vendor.cert if vendor else "",
             },
-            "receive_date": lot.receivedate or "",
+            "receive_date": _date_str(lot.receivedate),
             "location": lot.location or "",
             "origin": lot.origin or "",
             "cost": _to_float(lot.actualcost),
@@ -1209,7 +1175,7 @@ def receiving_lot_detail(request, lot_id):
                     "type": "Received",
                     "order": lot.purchase_order.po_number if lot.purchase_order_id and lot.purchase_order else (lot.poid or "--"),
                     "customer_vendor": lot.vendorid or "--",
-                    "date": lot.receivedate or "",
+                    "date": _date_str(lot.receivedate),
                     "quantity": f"{_to_str(lot.unitsin or lot.unitsonhand or 0)} {lot.unittype or ''}".strip(),
                 }
             ],
@@ -1238,7 +1204,9 @@ def receiving_lot_update(request, lot_id):
     if "vendor" in data:
         lot.vendorid = (data.get("vendor") or "").strip()
     if "receive_date" in data:
-        lot.receivedate = (data.get("receive_date") or "").strip()
+        lot.receivedate, date_error = _receive_date(data)
+        if date_error:
+            return date_error
     if "unit_type" in data:
         lot.unittype = (data.get("unit_type") or "").strip()
     if "cost" in data:
@@ -1263,13 +1231,14 @@ def receiving_lot_update(request, lot_id):
         on_hand = Decimal(str(_to_float(data.get("on_hand")) or 0))
         if on_hand < 0:
             return JsonResponse({"error": "On hand quantity cannot be negative."}, status=400)
-        lot.unitsonhand = on_hand
-        lot.unitsavailable = on_hand
     elif "incoming" in data and previous_unitsonhand == previous_unitsin:
-        lot.unitsonhand = lot.unitsin
-        lot.unitsavailable = lot.unitsin
+        on_hand = lot.unitsin
+    else:
+        on_hand = None
 
     lot.save()
+    if on_hand is not None:
+        set_on_hand(lot, on_hand, reference="receiving edit", user=request.user)
 
     if lot.purchase_order_id and lot.purchase_order:
         _sync_purchase_order_receive_status(lot.purchase_order)
@@ -1321,6 +1290,9 @@ def receiving_lot_create(request):
         return JsonResponse({"error": "Please select a product."}, status=400)
     if not quantity or quantity <= 0:
         return JsonResponse({"error": "Please enter a valid quantity."}, status=400)
+    receivedate, date_error = _receive_date(data)
+    if date_error:
+        return date_error
 
     purchase_order = None
     po_item = None
@@ -1340,9 +1312,7 @@ def receiving_lot_create(request):
     if po_item and po_item.product_id and po_item.product:
         product = po_item.product
     else:
-        product_candidates = list(Product.objects.filter(tenant=tenant))
-        products_by_id, products_by_name = _build_product_lookup_maps(product_candidates)
-        product = _resolve_product_from_values(products_by_id, products_by_name, product_id, description)
+        product = find_product(tenant.id, product_id, description)
 
     if not product and (product_id or description):
         item_name = (description or product_id).strip()
@@ -1370,18 +1340,16 @@ def receiving_lot_create(request):
 
     receive_time = (data.get("receive_time") or "").strip() or _time_str(timezone.localtime().time())
 
-    lot = Inventory.objects.create(
+    lot = Inventory(
         tenant=tenant,
         productid=resolved_product_id,
         desc=resolved_description,
         vendorid=(data.get("vendor") or "").strip(),
-        vendorlot=f"LOT-{timezone.now().strftime('%Y%m%d')}-{Inventory.objects.filter(tenant=tenant).count() + 1}",
+        vendorlot=f"LOT-{timezone.now().strftime('%Y%m%d')}-{next_value(tenant, 'lot')}",
         actualcost=data.get("cost") or None,
         unittype=resolved_unit_type,
-        unitsonhand=quantity,
-        unitsavailable=quantity,
         unitsin=quantity,
-        receivedate=(data.get("receive_date") or "").strip(),
+        receivedate=receivedate,
         poid=po_number,
         purchase_order=purchase_order,
         po_item=po_item,
@@ -1390,6 +1358,7 @@ def receiving_lot_create(request):
         receive_time=receive_time,
         vendor_type=(data.get("vendor_type") or "").strip(),
     )
+    record_movement(lot, "receive", on_hand=quantity, reference=po_number, user=request.user)
 
     if po_item:
         po_item.received_quantity = (po_item.received_quantity or 0) + Decimal(str(quantity))
@@ -1411,11 +1380,7 @@ def processing_products(request):
         .select_related("item_group")
         .order_by("sort_order", "description")[:1000]
     )
-    inventory_lots = list(
-        Inventory.objects.filter(tenant=tenant)
-        .select_related("po_item__product")
-    )
-    inventory_totals, _, _ = _inventory_totals_by_product(products, inventory_lots)
+    inventory_totals = summary_totals_by_product(tenant, [product.id for product in products])
     product_ids = [product.product_id for product in products if product.product_id]
     recent_cutoff = timezone.now() - timezone.timedelta(days=14)
     recent_processed = {}
@@ -1454,82 +1419,77 @@ def processing_products(request):
     )
 
 
-@login_required
-def processing_source_lots(request):
-    """Return original received inventory lots available for processing."""
-    tenant, error = _require_tenant(request)
-    if error:
-        return error
+def _processing_source_lots_queryset(request, tenant):
     lots = Inventory.objects.filter(
         tenant=tenant,
         unitsonhand__gt=0,
     ).filter(
         Q(purchase_order__isnull=False) | ~Q(poid="")
-    ).select_related("po_item__product").order_by("-id")
-    search = request.GET.get("search", "").strip()
-    if search:
-        lots = lots.filter(
-            Q(desc__icontains=search) | Q(vendorlot__icontains=search)
-            | Q(vendorid__icontains=search) | Q(productid__icontains=search)
-        )
-    products_by_id, products_by_name = _build_product_lookup_maps(
-        list(Product.objects.filter(tenant=tenant, is_active=True))
-    )
-    return JsonResponse({
-        "lots": [
-            {
-                "id": lot.id,
-                "lot_id": lot.vendorlot or f"LOT-{lot.id}",
-                "trace_lot": lot.vendorlot or f"LOT-{lot.id}",
-                "item_name": ((resolved_product.description or resolved_product.item_name) if resolved_product else (lot.desc or lot.productid or "")),
-                "product_id": (resolved_product.product_id if resolved_product else (lot.productid or "")),
-                "product": ((resolved_product.description or resolved_product.item_name) if resolved_product else (lot.desc or lot.productid or "")),
-                "product_spec": " · ".join(filter(None, [
-                    (resolved_product.quantity_description if resolved_product else ""),
-                    (resolved_product.size_cull if resolved_product else ""),
-                ])),
-                "vendor": lot.vendorid or "",
-                "vendor_lot": lot.vendorlot or "",
-                "incoming": _to_float(lot.unitsin) or 0,
-                "on_hand": _to_float(lot.unitsonhand) or 0,
-                "unit_type": lot.unittype or "",
-                "cost": _to_float(lot.actualcost) or 0,
-                "location": lot.location or "",
-                "origin": lot.origin or "",
-                "receive_date": lot.receivedate or "",
-            }
-            for lot in lots
-            for resolved_product in [_resolve_product_for_lot(lot, products_by_id, products_by_name)]
-        ]
-    })
+    ).select_related("product").order_by("-id")
+    return search(lots, ("desc", "vendorlot", "vendorid", "productid"), request.GET.get("search", ""))
+
+
+def _source_lot_to_dict(lot):
+    resolved_product = lot.product
+    return {
+        "id": lot.id,
+        "lot_id": lot.vendorlot or f"LOT-{lot.id}",
+        "trace_lot": lot.vendorlot or f"LOT-{lot.id}",
+        "item_name": ((resolved_product.description or resolved_product.item_name) if resolved_product else (lot.desc or lot.productid or "")),
+        "product_id": (resolved_product.product_id if resolved_product else (lot.productid or "")),
+        "product": ((resolved_product.description or resolved_product.item_name) if resolved_product else (lot.desc or lot.productid or "")),
+        "product_spec": " · ".join(filter(None, [
+            (resolved_product.quantity_description if resolved_product else ""),
+            (resolved_product.size_cull if resolved_product else ""),
+        ])),
+        "vendor": lot.vendorid or "",
+        "vendor_lot": lot.vendorlot or "",
+        "incoming": _to_float(lot.unitsin) or 0,
+        "on_hand": _to_float(lot.unitsonhand) or 0,
+        "unit_type": lot.unittype or "",
+        "cost": _to_float(lot.actualcost) or 0,
+        "location": lot.location or "",
+        "origin": lot.origin or "",
+        "receive_date": _date_str(lot.receivedate),
+    }
 
 
 @login_required
-def processing_sold_results(request):
+def processing_source_lots(request):
+    """Return original received inventory lots available for processing."""
     tenant, error = _require_tenant(request)
     if error:
         return error
+    lots = _processing_source_lots_queryset(request, tenant)
+    return JsonResponse({"lots": [_source_lot_to_dict(lot) for lot in lots]})
+
 
-    outputs = list(
+def _sold_outputs_queryset(tenant):
+    return (
         ProcessBatchOutput.objects.filter(tenant=tenant, inventory__isnull=False)
         .select_related("inventory", "batch", "product")
         .order_by("-id")
     )
-    if not outputs:
-        return JsonResponse({"results": []})
-
-    output_by_inventory = {output.inventory_id: output for output in outputs if output.inventory_id}
-    batch_ids = {output.batch_id for output in outputs if output.batch_id}
 
-    source_map = {}
-    for source in ProcessBatchSource.objects.filter(tenant=tenant, batch_id__in=batch_ids).select_related("inventory"):
-        source_map.setdefault(source.batch_id, []).append(source)
 
+def _sold_related_querysets(tenant, outputs):
+    """Batch sources and sales allocations needed to describe ``outputs``."""
+    inventory_ids = {output.inventory_id for output in outputs if output.inventory_id}
+    batch_ids = {output.batch_id for output in outputs if output.batch_id}
+    sources = ProcessBatchSource.objects.filter(tenant=tenant, batch_id__in=batch_ids).select_related("inventory")
     allocs = (
-        SalesOrderAllocation.objects.filter(tenant=tenant, inventory_id__in=output_by_inventory.keys())
+        SalesOrderAllocation.objects.filter(tenant=tenant, inventory_id__in=inventory_ids)
         .select_related("inventory", "sales_order_item__sales_order", "sales_order_item__product")
         .order_by("-created_at", "-id")
     )
+    return sources, allocs
+
+
+def _sold_results(outputs, sources, allocs):
+    source_map = {}
+    for source in sources:
+        source_map.setdefault(source.batch_id, []).append(source)
+
     allocs_by_inventory = {}
     for alloc in allocs:
         allocs_by_inventory.setdefault(alloc.inventory_id, []).append(alloc)
@@ -1601,7 +1561,22 @@ def processing_sold_results(request):
                 }
             )
 
-    return JsonResponse({"results": results})
+    return results
+
+
+@login_required
+def processing_sold_results(request):
+    tenant, error = _require_tenant(request)
+    if error:
+        return error
+
+    page, error = _paginate(request, _sold_outputs_queryset(tenant), default_page_size=None)
+    if error:
+        return error
+    if not page.items:
+        return JsonResponse({"results": [], **page.meta()})
+    sources, allocs = _sold_related_querysets(tenant, page.items)
+    return JsonResponse({"results": _sold_results(page.items, sources, allocs), **page.meta()})
 
 
 @login_required
@@ -1664,10 +1639,9 @@ def processing_sold_result_update(request, batch_id, order_id):
         if output.inventory_id and output.inventory:
             output.inventory.desc = description or output.inventory.desc
             output.inventory.unittype = unit_type
-            output.inventory.unitsonhand = quantity
-            output.inventory.unitsavailable = quantity
             output.inventory.unitsin = quantity
-            output.inventory.save(update_fields=["desc", "unittype", "unitsonhand", "unitsavailable", "unitsin"])
+            output.inventory.save(update_fields=["desc", "unittype", "unitsin"])
+            set_on_hand(output.inventory, quantity, reference=batch.batch_number, user=request.user)
 
     batch.calculate_yield()
     batch.save(update_fields=["total_input_weight", "total_output_weight", "actual_yield_pct", "expected_yield_pct", "yield_variance_pct", "yield_flagged"])
@@ -1683,15 +1657,14 @@ def processing_batches(request):
 
     batches = ProcessBatch.objects.filter(tenant=tenant).prefetch_related("sources__inventory")
     status = request.GET.get("status", "").strip()
-    search = request.GET.get("search", "").strip()
     if status:
         batches = batches.filter(status=status)
-    if search:
-        batches = batches.filter(Q(batch_number__icontains=search) | Q(process_type__icontains=search))
-    batches = batches.order_by("-started_at")
-    page_size = request.GET.get("page_size", "").strip()
-    if page_size:
-        batches = batches[: max(int(page_size), 1)]
+    batches = search(
+        batches.order_by("-started_at"), ("batch_number", "process_type"), request.GET.get("search", "")
+    )
+    page, error = _paginate(request, batches, default_page_size=None)
+    if error:
+        return error
     return JsonResponse(
         {
             "batches": [
@@ -1709,8 +1682,9 @@ def processing_batches(request):
                         for s in batch.sources.all() if s.inventory
                     ))) or "",
                 }
-                for batch in batches
-            ]
+                for batch in page.items
+            ],
+            **page.meta(),
         }
     )
 
@@ -1907,12 +1881,7 @@ def processing_batch_cancel(request, batch_id):
     return JsonResponse({"ok": True})
 
 
-@login_required
-def inventory_items(request):
-    tenant, error = _require_tenant(request)
-    if error:
-        return error
-
+def _inventory_items_queryset(request, tenant):
     items = Product.objects.filter(tenant=tenant).select_related("item_group")
     show = request.GET.get("show", "").strip()
     if show == "active":
@@ -1920,25 +1889,26 @@ def inventory_items(request):
     elif show == "inactive":
         items = items.filter(is_active=False)
 
-    search = request.GET.get("search", "").strip()
-    if search:
-        items = items.filter(
-            Q(item_name__icontains=search)
-            | Q(description__icontains=search)
-            | Q(sku__icontains=search)
-            | Q(product_id__icontains=search)
-            | Q(friendly_name__icontains=search)
-            | Q(qb_item_name__icontains=search)
-        )
-
-    items = list(items.order_by("sort_order", "description")[:1000])
-    inventory_lots = list(
-        Inventory.objects.filter(tenant=tenant)
-        .select_related("po_item__product")
+    items = search(
+        items.order_by("sort_order", "description"),
+        ("item_name", "description", "sku", "product_id", "friendly_name", "qb_item_name"),
+        request.GET.get("search", ""),
     )
-    inventory_totals, _, _ = _inventory_totals_by_product(items, inventory_lots)
+    return items[:1000]
+
+
+@login_required
+def inventory_items(request):
+    tenant, error = _require_tenant(request)
+    if error:
+        return error
+
+    items = list(_inventory_items_queryset(request, tenant))
+    inventory_totals = summary_totals_by_product(tenant, [item.id for item in items])
 
     return JsonResponse({"items": [_product_to_dict(item, inventory_totals.get(item.id)) for item in items]})
+
+
 @login_required
 def inventory_item_lots(request, item_id):
     """Return inventory lots for a product, with aggregate totals."""
@@ -1946,9 +1916,7 @@ def inventory_item_lots(request, item_id):
     if error:
         return error
     product = get_object_or_404(Product, id=item_id, tenant=tenant)
-    lots = Inventory.objects.filter(
-        tenant=tenant, productid=product.product_id
-    ).order_by("-id")
+    lots = Inventory.objects.filter(tenant=tenant, product=product).order_by("-id")
     total_expected = 0
     total_allocated = 0
     total_on_hand = 0
@@ -1965,8 +1933,10 @@ def inventory_item_lots(request, item_id):
             "id": lot.id,
             "lot_id": lot.vendorlot or f"LOT-{lot.id}",
             "status": status,
-            "date": lot.receivedate or "",
+            "date": _date_str(lot.receivedate),
             "on_hand": on_hand,
+            "allocated": allocated,
+            "available": _to_float(lot.unitsavailable) or 0,
             "unit_type": lot.unittype or "",
         })
     return JsonResponse({
@@ -1974,6 +1944,44 @@ def inventory_item_lots(request, item_id):
         "expected": total_expected,
         "allocated": total_allocated,
         "on_hand": total_on_hand,
+        "available": total_on_hand - total_allocated,
+    })
+
+
+@login_required
+def inventory_valuation(request):
+    """Stock on hand and its value per product at the end of ``as_of`` (default today)."""
+    tenant, error = _require_tenant(request)
+    if error:
+        return error
+    as_of = timezone.localdate()
+    if request.GET.get("as_of"):
+        as_of = _parse_date(request.GET.get("as_of"))
+        if as_of is None:
+            return JsonResponse({"error": "Invalid as_of date."}, status=400)
+
+    valuation = inventory_valuation_as_of(tenant, as_of)
+    products = Product.objects.filter(tenant=tenant, id__in=[pid for pid in valuation["products"] if pid]).in_bulk()
+    items = []
+    for product_id, entry in valuation["products"].items():
+        product = products.get(product_id)
+        items.append({
+            "id": product_id,
+            "product_id": product.product_id if product else "",
+            "display_name": (
+                product.description or product.item_name or product.friendly_name or product.qb_item_name or product.product_id
+            ) if product else "Unassigned lots",
+            "quantity": _to_float(entry["quantity"]),
+            "value": _to_float(entry["value"]),
+            "lot_count": entry["lot_count"],
+        })
+    items.sort(key=lambda item: (-item["value"], item["display_name"]))
+    return JsonResponse({
+        "as_of": _date_str(as_of),
+        "snapshot_date": _date_str(valuation["snapshot_date"]),
+        "items": items,
+        "quantity": _to_float(valuation["quantity"]),
+        "value": _to_float(valuation["value"]),
     })
 
 
@@ -2025,20 +2033,24 @@ def inventory_item_adjustment_create(request, item_id):
         qty = Decimal(str(qty_str))
     except Exception:
         return JsonResponse({"error": "Invalid quantity."}, status=400)
-    before = lot.unitsonhand or Decimal("0")
-    if adj_type == "increase":
-        after = before + qty
-    elif adj_type == "decrease":
-        after = before - qty
-        if after < 0:
-            return JsonResponse({"error": "Cannot decrease below zero."}, status=400)
-    elif adj_type == "set_count":
-        after = qty
-        qty = after - before
-    else:
+    if adj_type not in ("increase", "decrease", "set_count"):
         return JsonResponse({"error": "Invalid adjustment type."}, status=400)
-    lot.unitsonhand = after
-    lot.save(update_fields=["unitsonhand"])
+    # Before/after come from the ledger write itself, not the lot as loaded above.
+    try:
+        with transaction.atomic():
+            if adj_type == "set_count":
+                movement = set_on_hand(lot, qty, reference=reason or adj_type, user=request.user)
+            else:
+                movement = record_movement(
+                    lot, "adjust", on_hand=qty if adj_type == "increase" else -qty,
+                    reference=reason or adj_type, user=request.user, allow_negative=adj_type != "decrease",
+                )
+    except InsufficientStockError:
+        return JsonResponse({"error": "Cannot decrease below zero."}, status=400)
+    after = lot.unitsonhand or Decimal("0")
+    before = after - movement.on_hand_delta if movement else after
+    if adj_type == "set_count":
+        qty = after - before
     InventoryAdjustment.objects.create(
         tenant=tenant,
         inventory=lot,
@@ -2071,6 +2083,7 @@ def inventory_item_create(request):
     if not product.product_id:
         product.product_id = _next_product_id(tenant)
     product.save()
+    advance_sequence(tenant, "product", [product.product_id])
     return JsonResponse({"success": True, "id": product.id, "item": _product_to_dict(product)})
 
 
@@ -2086,6 +2099,7 @@ def inventory_item_update(request, item_id):
     data = _parse_json(request)
     _apply_product_payload(product, tenant, data)
     product.save()
+    advance_sequence(tenant, "product", [product.product_id])
     return JsonResponse({"success": True, "id": product.id, "item": _product_to_dict(product)})
 
 
@@ -2100,8 +2114,6 @@ def inventory_item_delete(request, item_id):
     try:
         with transaction.atomic():
             CustomerProfile.objects.filter(tenant=tenant, product=product).update(product=None)
-            PurchaseOrderItem.objects.filter(tenant=tenant, product=product).update(product=None)
-            SalesOrderItem.objects.filter(tenant=tenant, product=product).update(product=None)
             ProcessBatchOutput.objects.filter(tenant=tenant, product=product).update(product=None)
             ProductImage.objects.filter(product=product).delete()
             product.delete()
@@ -2263,8 +2275,10 @@ def settings_reset_operational_data(request):
         return admin_error
 
     deleted_summary = {}
+    # A lot's movements must go before the lot itself (InventoryMovement.inventory is RESTRICT).
+    models = sorted(_editable_operational_models(), key=lambda model: model is not InventoryMovement)
     with transaction.atomic():
-        for model in _editable_operational_models():
+        for model in models:
             count = model.all_objects.filter(tenant=tenant).count() if hasattr(model, "all_objects") else model.objects.filter(tenant=tenant).count()
             if not count:
                 continue
@@ -2378,7 +2392,9 @@ def sales_customers(request):
     tenant, error = _require_tenant(request)
     if error:
         return error
-    customers = Customer.objects.filter(tenant=tenant).order_by("name")
+    page, error = _paginate(request, Customer.objects.filter(tenant=tenant).order_by("name"), default_page_size=None)
+    if error:
+        return error
     return JsonResponse({
         "customers": [
             {
@@ -2396,8 +2412,9 @@ def sales_customers(request):
                 "ship_state": c.ship_state or "",
                 "ship_zipcode": c.ship_zipcode or "",
             }
-            for c in customers
-        ]
+            for c in page.items
+        ],
+        **page.meta(),
     })
 
 
@@ -2411,9 +2428,7 @@ def customer_create(request):
     name = (data.get("name") or "").strip()
     if not name:
         return JsonResponse({"error": "Customer name is required."}, status=400)
-    last = Customer.objects.filter(tenant=tenant).order_by("-customer_id").first()
-    next_id = (last.customer_id + 1) if last else 1
-    c = Customer.objects.create(tenant=tenant, customer_id=next_id, name=name)
+    c = Customer.objects.create(tenant=tenant, customer_id=next_value(tenant, "customer"), name=name)
     for field in ["contact_name", "email", "phone", "address", "city", "state", "zipcode",
                    "ship_address", "ship_city", "ship_state", "ship_zipcode"]:
         val = data.get(field)
@@ -2458,8 +2473,10 @@ def sales_orders(request):
     if error:
         return error
 
-    orders = SalesOrder.objects.filter(tenant=tenant).prefetch_related("items__product").annotate(order_total=Sum("items__amount")).order_by("-order_date", "-created_at")
-    paged, total = _paginate(request, orders)
+    orders = SalesOrder.objects.filter(tenant=tenant).order_by("-order_date", "-created_at")
+    page, error = _paginate(request, orders)
+    if error:
+        return error
     return JsonResponse(
         {
             "orders": [
@@ -2476,15 +2493,12 @@ def sales_orders(request):
                     "shipping_route": order.shipping_route or "",
                     "sales_rep": order.sales_rep or "",
                     "qb_invoice_number": order.qb_invoice_number or "",
-                    "total": _sales_order_total(order),
-                    "products": ", ".join(sorted(set(filter(None, (
-                        (item.product.species or item.product.item_name or "") if item.product else item.description
-                        for item in order.items.all() if item.item_type == "item"
-                    ))))) or "",
+                    "total": _to_float(order.items_total) or 0,
+                    "products": order.products_summary,
                 }
-                for order in paged
+                for order in page.items
             ],
-            "total": total,
+            **page.meta(),
         }
     )
 
@@ -2499,15 +2513,7 @@ def sales_orders_create(request):
     customer_name = (data.get("customer_name") or "").strip()
     if not customer_name:
         return JsonResponse({"error": "Customer name is required."}, status=400)
-    # Auto-generate order number
-    last = SalesOrder.objects.filter(tenant=tenant).order_by("-id").first()
-    next_num = 1
-    if last:
-        try:
-            next_num = int(last.order_number.split("-")[-1]) + 1
-        except (ValueError, IndexError):
-            next_num = last.id + 1
-    order_number = f"SO-{next_num:04d}"
+    order_number = f"SO-{next_value(tenant, 'sales_order'):04d}"
     customer = Customer.objects.filter(tenant=tenant, name=customer_name).first()
     so = SalesOrder.objects.create(
         tenant=tenant,
@@ -2548,6 +2554,8 @@ def sales_order_detail_api(request, order_id):
             "unit_price": _to_float(item.unit_price) or 0,
             "margin": item.margin if hasattr(item, "margin") else "",
             "amount": _to_float(item.amount) or 0,
+            "cost_of_goods": _to_float(item.cost_of_goods),
+            "gross_margin": _to_float(item.gross_margin),
             "process_type": item.process_type or "",
             "process_source_lot_ids": _selected_source_lot_ids({"process_source_lot_ids": item.process_source_lot_ids}),
             "process_batch_id": item.process_batch_id,
@@ -2684,7 +2692,14 @@ def sales_order_item_add(request, order_id):
         SalesOrderAllocation.objects.filter(tenant=tenant, sales_order_item=item).delete()
         item.delete()
         return JsonResponse({"error": str(exc)}, status=400)
-    return JsonResponse({"success": True, "id": item.id})
+    response = {"success": True, "id": item.id}
+    if product:
+        # Free stock for the order entry warning; a line tied to a lot or batch is already allocated.
+        atp = {field: _to_float(value) or 0 for field, value in available_to_promise(product).items()}
+        allocated_now = bool(linked_output_inventory or item.process_batch_id)
+        atp["short"] = 0 if allocated_now else max(0, quantity - atp["available"])
+        response["availability"] = atp
+    return JsonResponse(response)
 
 
 @login_required
@@ -2754,60 +2769,46 @@ def sales_order_allocate_fifo(request, order_id):
         return JsonResponse({"error": "POST required"}, status=405)
 
     so = get_object_or_404(SalesOrder.objects.filter(tenant=tenant), id=order_id)
-    items = so.items.filter(item_type="item").select_related("product")
-
-    # Clear existing allocations
-    SalesOrderAllocation.objects.filter(tenant=tenant, sales_order_item__sales_order=so).delete()
-
-    shortages = []
-    for item in items:
-        needed = _to_float(item.quantity) or 0
-        if needed <= 0:
-            continue
+    shortages = allocate_order_fifo(so, user=request.user)
+    return JsonResponse({"success": True, "shortages": shortages})
 
-        # Find matching inventory lots, oldest first (FIFO)
-        product_filter = Q()
-        if item.product:
-            product_filter = Q(productid=item.product.product_id) | Q(desc=item.product.item_name)
-        elif item.description:
-            product_filter = Q(desc__iexact=item.description)
-        else:
-            continue
 
-        lots = Inventory.objects.filter(
-            tenant=tenant
-        ).filter(product_filter).filter(
-            unitsonhand__gt=0
-        ).order_by("receivedate", "id")
-
-        allocated = 0
-        for lot in lots:
-            if allocated >= needed:
-                break
-            available = _to_float(lot.unitsonhand) or 0
-            if available <= 0:
-                continue
-            take = min(available - 0, needed - allocated)
-            if take <= 0:
-                continue
-            SalesOrderAllocation.objects.create(
-                tenant=tenant,
-                sales_order_item=item,
-                inventory=lot,
-                quantity=take,
-                unit_type=item.unit_type or lot.unittype or "",
-                allocated_by=request.user,
-                allocated_by_name=request.user.get_full_name() or request.user.username,
-            )
-            allocated += take
+@login_required
+@require_POST
+def sales_orders_allocate_wave(request):
+    """
+    Allocate all open orders shipping in a date range (or the given order ids) in one FIFO pass.
 
-        if allocated < needed:
-            shortages.append({
-                "item_name": item.description or (item.product.item_name if item.product else ""),
-                "short_qty": round(needed - allocated, 4),
-            })
+    Body: {"ship_date_from", "ship_date_to", "order_ids": [...], "priority": ["ship_date", "customer", "route"]}.
+    """
+    tenant, error = _require_tenant(request)
+    if error:
+        return error
+    data = _parse_json(request)
+    ship_date_from = _parse_date(data.get("ship_date_from"))
+    ship_date_to = _parse_date(data.get("ship_date_to"))
+    order_ids = data.get("order_ids")
+    if order_ids is not None:
+        try:
+            order_ids = [int(order_id) for order_id in order_ids]
+        except (TypeError, ValueError):
+            return JsonResponse({"error": "order_ids must be a list of order ids."}, status=400)
+    if not (ship_date_from or ship_date_to or order_ids):
+        return JsonResponse({"error": "Choose a ship date range or orders to allocate."}, status=400)
+    try:
+        priority = parse_wave_priority(data.get("priority"))
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
 
-    return JsonResponse({"success": True, "shortages": shortages})
+    orders = wave_orders(tenant, ship_date_from, ship_date_to, order_ids)
+    result = allocate_wave(orders, priority=priority, user=request.user)
+    return JsonResponse({
+        "success": True,
+        "orders": result.orders,
+        "lines": result.lines,
+        "allocations": result.allocations,
+        "shortages": result.shortages,
+    })
 
 
 @login_required
@@ -2823,13 +2824,9 @@ def processing_batches_create(request):
         return JsonResponse({"error": str(exc)}, status=400)
     if not process_type:
         return JsonResponse({"error": "Process type is required."}, status=400)
-    # Auto-generate batch number
-    last = ProcessBatch.objects.filter(tenant=tenant).order_by("-id").first()
-    next_num = (last.id + 1) if last else 1
-    batch_number = f"PB-{next_num:04d}"
     batch = ProcessBatch.objects.create(
         tenant=tenant,
-        batch_number=batch_number,
+        batch_number=f"PB-{next_value(tenant, 'process_batch'):04d}",
         process_type=process_type,
         status="in_progress",
         notes=(data.get("notes") or "").strip(),
@@ -2853,15 +2850,15 @@ def processing_batches_create(request):
         if src.inventory:
             if not first_source:
                 first_source = src.inventory
-            src.inventory.unitsonhand = max(Decimal("0"), (src.inventory.unitsonhand or 0) - src.quantity)
-            src.inventory.save(update_fields=["unitsonhand"])
+            consume_available(src.inventory, src.quantity, reference=batch.batch_number, user=request.user)
             total_input += src.quantity
 
     # Create output entries with new inventory records
     total_output = Decimal("0")
-    lot_counter = Inventory.objects.filter(tenant=tenant).count()
+    outputs = data.get("outputs") or []
+    lot_numbers = iter(reserve_values(tenant, "lot", len(outputs)) if outputs else ())
     created_outputs = []
-    for out in data.get("outputs") or []:
+    for out in outputs:
         product = None
         pid = out.get("product_id")
         if pid:
@@ -2870,8 +2867,8 @@ def processing_batches_create(request):
         qty = Decimal(str(out.get("quantity", 0)))
         total_output += qty
         unit_type = out.get("unit_type", "")
-        lot_counter += 1
-        lot_id = out.get("lot_id", "").strip() or f"LOT-{batch.batch_number}-{lot_counter}"
+        lot_number = next(lot_numbers)
+        lot_id = out.get("lot_id", "").strip() or f"LOT-{batch.batch_number}-{lot_number}"
 
         # Determine product name for the output lot
         out_desc = ""
@@ -2883,19 +2880,18 @@ def processing_batches_create(request):
             out_desc = first_source.desc or first_source.productid or ""
 
         # Create new inventory record for the output
-        out_inv = Inventory.objects.create(
+        out_inv = Inventory(
             tenant=tenant,
             productid=pid or (first_source.productid if first_source else ""),
             desc=out_desc,
             vendorid=first_source.vendorid if first_source else "",
             vendorlot=lot_id,
             unittype=unit_type,
-            unitsonhand=qty,
-            unitsavailable=qty,
             unitsin=qty,
-            receivedate=timezone.now().date().isoformat(),
+            receivedate=timezone.localdate(),
             vendor_type=first_source.vendor_type if first_source else "",
         )
+        record_movement(out_inv, "produce", on_hand=qty, reference=batch.batch_number, user=request.user)
 
         ProcessBatchOutput.objects.create(
             tenant=tenant,
@@ -2976,27 +2972,48 @@ def _parse_import(request):
         return None, JsonResponse({"error": f"Invalid request: {e}"}, status=400)
 
 
-def _csv_response(rows, filename):
-    """Build an HttpResponse with CSV content."""
-    resp = HttpResponse(content_type="text/csv")
-    resp["Content-Disposition"] = f'attachment; filename="{filename}"'
-    if not rows:
-        return resp
-    writer = csv.DictWriter(resp, fieldnames=rows[0].keys())
-    writer.writeheader()
-    writer.writerows(rows)
-    return resp
+def _export_response(request, queryset, columns, name):
+    """
+    Download ``queryset`` as ``<name>.csv``, or ``<name>.xlsx`` with ``?format=xlsx``.
+
+    ``?compress=gzip`` gzips a CSV download on the way out.
+    """
+    export_format = request.GET.get("format", "csv").lower()
+    if export_format == "xlsx":
+        try:
+            return xlsx_export_response(queryset, columns, f"{name}.xlsx")
+        except ValueError as exc:
+            return JsonResponse({"error": str(exc)}, status=400)
+    if export_format != "csv":
+        return JsonResponse({"error": "format must be csv or xlsx."}, status=400)
+    compress = request.GET.get("compress", "").lower() == "gzip"
+    return csv_export_response(queryset, columns, f"{name}.csv", compress=compress)
+
+
+def _choice_label(model, field_name):
+    """A formatter showing a choice field's label, as get_<field>_display() does."""
+    labels = {value: str(label) for value, label in model._meta.get_field(field_name).flatchoices}
+    return lambda value: labels.get(value, value)
+
+
+def _datetime_minutes(value):
+    return value.strftime("%Y-%m-%d %H:%M") if value else ""
 
 
 def _parse_date(val):
     """Parse a date string, returning None if blank/invalid."""
-    if not val or not val.strip():
-        return None
-    try:
-        from datetime import datetime
-        return datetime.strptime(val.strip(), "%Y-%m-%d").date()
-    except ValueError:
-        return None
+    return parse_date_value(val)
+
+
+def _receive_date(data):
+    """(date, error response) for a lot form's ``receive_date``; a blank value clears the date."""
+    value = str(data.get("receive_date") or "").strip()
+    if not value:
+        return None, None
+    received = _parse_date(value)
+    if received is None:
+        return None, JsonResponse({"error": "Invalid receive date."}, status=400)
+    return received, None
 
 
 def _parse_decimal(val):
@@ -3016,25 +3033,11 @@ def sales_orders_export(request):
     if error:
         return error
     orders = SalesOrder.objects.filter(tenant=tenant).order_by("-order_date", "-created_at")
-    rows = [
-        {
-            "order_number": o.order_number,
-            "customer_name": o.customer_name,
-            "order_status": o.order_status,
-            "packed_status": o.packed_status,
-            "qb_invoice_number": o.qb_invoice_number,
-            "sales_rep": o.sales_rep,
-            "po_number": o.po_number,
-            "order_date": o.order_date or "",
-            "delivery_date": o.delivery_date or "",
-            "ship_date": o.ship_date or "",
-            "shipper": o.shipper,
-            "shipping_route": o.shipping_route,
-            "notes": o.notes,
-        }
-        for o in orders
-    ]
-    return _csv_response(rows, "sales_orders.csv")
+    columns = [ExportColumn(name) for name in (
+        "order_number", "customer_name", "order_status", "packed_status", "qb_invoice_number", "sales_rep",
+        "po_number", "order_date", "delivery_date", "ship_date", "shipper", "shipping_route", "notes",
+    )]
+    return _export_response(request, orders, columns, "sales_orders")
 
 
 @login_required
@@ -3073,6 +3076,7 @@ def sales_orders_import(request):
         ))
         existing.add(on)
     SalesOrder.objects.bulk_create(created)
+    advance_sequence(tenant, "sales_order", (order.order_number for order in created))
     return JsonResponse({"imported": len(created), "skipped": skipped})
 
 
@@ -3084,22 +3088,11 @@ def purchasing_orders_export(request):
     if error:
         return error
     orders = PurchaseOrder.objects.filter(tenant=tenant).order_by("-order_date", "-created_at")
-    rows = [
-        {
-            "po_number": o.po_number,
-            "vendor_name": o.vendor_name,
-            "order_status": o.order_status,
-            "receive_status": o.receive_status,
-            "qb_po_number": o.qb_po_number,
-            "buyer": o.buyer,
-            "vendor_invoice_number": o.vendor_invoice_number,
-            "order_date": o.order_date or "",
-            "expected_date": o.expected_date or "",
-            "notes": o.notes,
-        }
-        for o in orders
-    ]
-    return _csv_response(rows, "purchase_orders.csv")
+    columns = [ExportColumn(name) for name in (
+        "po_number", "vendor_name", "order_status", "receive_status", "qb_po_number", "buyer",
+        "vendor_invoice_number", "order_date", "expected_date", "notes",
+    )]
+    return _export_response(request, orders, columns, "purchase_orders")
 
 
 @login_required
@@ -3135,6 +3128,7 @@ def purchasing_orders_import(request):
         ))
         existing.add(pn)
     PurchaseOrder.objects.bulk_create(created)
+    advance_sequence(tenant, "purchase_order", (order.po_number for order in created))
     return JsonResponse({"imported": len(created), "skipped": skipped})
 
 
@@ -3145,23 +3139,19 @@ def receiving_lots_export(request):
     tenant, error = _require_tenant(request)
     if error:
         return error
-    lots = Inventory.objects.filter(tenant=tenant).order_by("-receivedate")
-    rows = [
-        {
-            "vendorlot": lot.vendorlot,
-            "productid": lot.productid,
-            "desc": lot.desc,
-            "vendorid": lot.vendorid,
-            "receivedate": lot.receivedate,
-            "vendorlot": lot.vendorlot,
-            "unittype": lot.unittype,
-            "unitsonhand": lot.unitsonhand or "",
-            "unitsin": lot.unitsin or "",
-            "actualcost": lot.actualcost or "",
-        }
-        for lot in lots
+    lots = Inventory.objects.filter(tenant=tenant).order_by(F("receivedate").desc(nulls_last=True), "-id")
+    columns = [
+        ExportColumn("vendorlot"),
+        ExportColumn("productid"),
+        ExportColumn("desc"),
+        ExportColumn("vendorid"),
+        ExportColumn("receivedate"),
+        ExportColumn("unittype"),
+        ExportColumn("unitsonhand", csv_format=blank_if_empty),
+        ExportColumn("unitsin", csv_format=blank_if_empty),
+        ExportColumn("actualcost", csv_format=blank_if_empty),
     ]
-    return _csv_response(rows, "receiving_lots.csv")
+    return _export_response(request, lots, columns, "receiving_lots")
 
 
 @login_required
@@ -3180,15 +3170,22 @@ def receiving_lots_import(request):
             productid=row.get("productid", "").strip(),
             desc=row.get("desc", "").strip(),
             vendorid=row.get("vendorid", "").strip(),
-            receivedate=row.get("receivedate", "").strip(),
+            receivedate=_parse_date(row.get("receivedate")),
             vendorlot=row.get("vendorlot", "").strip(),
             unittype=row.get("unittype", "").strip(),
             unitsonhand=_parse_decimal(row.get("unitsonhand")),
             unitsin=_parse_decimal(row.get("unitsin")),
             actualcost=_parse_decimal(row.get("actualcost")),
         )
+        lot.unitsavailable = lot.unitsonhand
         created.append(lot)
-    Inventory.objects.bulk_create(created)
+    products_by_id, products_by_name = build_product_lookup_maps(Product.objects.filter(tenant=tenant).order_by("id"))
+    for lot in created:
+        lot.product = resolve_product_from_values(products_by_id, products_by_name, lot.productid, lot.desc)
+    with transaction.atomic():
+        Inventory.objects.bulk_create(created)
+        record_opening_balances(created, movement_type="receive", reference="import", user=request.user)
+    schedule_inventory_summary_rebuild(tenant.id)
     return JsonResponse({"imported": len(created), "skipped": 0})
 
 
@@ -3200,18 +3197,15 @@ def processing_batches_export(request):
     if error:
         return error
     batches = ProcessBatch.objects.filter(tenant=tenant).order_by("-started_at")
-    rows = [
-        {
-            "batch_number": b.batch_number,
-            "process_type": b.process_type,
-            "status": b.status,
-            "started_at": b.started_at.strftime("%Y-%m-%d %H:%M") if b.started_at else "",
-            "completed_at": b.completed_at.strftime("%Y-%m-%d %H:%M") if b.completed_at else "",
-            "notes": b.notes,
-        }
-        for b in batches
+    columns = [
+        ExportColumn("batch_number"),
+        ExportColumn("process_type"),
+        ExportColumn("status"),
+        ExportColumn("started_at", csv_format=_datetime_minutes),
+        ExportColumn("completed_at", csv_format=_datetime_minutes),
+        ExportColumn("notes"),
     ]
-    return _csv_response(rows, "processing_batches.csv")
+    return _export_response(request, batches, columns, "processing_batches")
 
 
 @login_required
@@ -3241,6 +3235,7 @@ def processing_batches_import(request):
         ))
         existing.add(bn)
     ProcessBatch.objects.bulk_create(created)
+    advance_sequence(tenant, "process_batch", (batch.batch_number for batch in created))
     return JsonResponse({"imported": len(created), "skipped": skipped})
 
 
@@ -3252,26 +3247,15 @@ def inventory_items_export(request):
     if error:
         return error
     items = Product.objects.filter(tenant=tenant, is_active=True).order_by("item_name")
-    rows = [
-        {
-            "qb_item_name": p.qb_item_name,
-            "friendly_name": p.friendly_name,
-            "description": p.description,
-            "species": p.species,
-            "size_cull": p.size_cull,
-            "sku": p.sku,
-            "quantity_description": p.quantity_description,
-            "country_of_origin": p.country_of_origin,
-            "brand": p.brand,
-            "department": p.department,
-            "inventory_unit_of_measure": p.inventory_unit_of_measure,
-            "list_price": p.list_price or "",
-            "wholesale_price": p.wholesale_price or "",
-            "upc": p.upc,
-        }
-        for p in items
+    columns = [ExportColumn(name) for name in (
+        "qb_item_name", "friendly_name", "description", "species", "size_cull", "sku", "quantity_description",
+        "country_of_origin", "brand", "department", "inventory_unit_of_measure",
+    )] + [
+        ExportColumn("list_price", csv_format=blank_if_empty),
+        ExportColumn("wholesale_price", csv_format=blank_if_empty),
+        ExportColumn("upc"),
     ]
-    return _csv_response(rows, "inventory_items.csv")
+    return _export_response(request, items, columns, "inventory_items")
 
 
 @login_required
@@ -3303,8 +3287,11 @@ def inventory_items_import(request):
             upc=row.get("upc", "").strip(),
         )
         p.item_name = p.generate_item_name()
+        p.set_lookup_keys()
         created.append(p)
     Product.objects.bulk_create(created)
+    refresh_lot_products(tenant.id, *(getattr(p, field) for p in created for field in Product.LOOKUP_FIELDS))
+    schedule_inventory_summary_rebuild(tenant.id)
     return JsonResponse({"imported": len(created), "skipped": 0})
 
 
@@ -3316,24 +3303,11 @@ def vendors_export(request):
     if error:
         return error
     vendors = Vendor.objects.filter(tenant=tenant, is_active=True).order_by("name")
-    rows = [
-        {
-            "name": v.name,
-            "vendor_type": v.vendor_type,
-            "contact_name": v.contact_name,
-            "email": v.email,
-            "phone": v.phone,
-            "address": v.address,
-            "city": v.city,
-            "state": v.state,
-            "zipcode": v.zipcode,
-            "cert": v.cert,
-            "fax": v.fax,
-            "billing_email": v.billing_email,
-        }
-        for v in vendors
-    ]
-    return _csv_response(rows, "vendors.csv")
+    columns = [ExportColumn(name) for name in (
+        "name", "vendor_type", "contact_name", "email", "phone", "address", "city", "state", "zipcode",
+        "cert", "fax", "billing_email",
+    )]
+    return _export_response(request, vendors, columns, "vendors")
 
 
 @login_required
@@ -3345,13 +3319,13 @@ def vendors_import(request):
     rows, err = _parse_import(request)
     if err:
         return err
-    # Auto-assign vendor_id
-    max_id = Vendor.objects.filter(tenant=tenant).order_by("-vendor_id").values_list("vendor_id", flat=True).first() or 0
+    # Auto-assign vendor_id from one reserved block
+    vendor_ids = iter(reserve_values(tenant, "vendor", len(rows)) if rows else ())
     created = []
-    for i, row in enumerate(rows, start=1):
+    for row in rows:
         v = Vendor(
             tenant=tenant,
-            vendor_id=max_id + i,
+            vendor_id=next(vendor_ids),
             name=row.get("name", "").strip(),
             vendor_type=row.get("vendor_type", "").strip(),
             contact_name=row.get("contact_name", "").strip(),
@@ -3380,126 +3354,32 @@ def shipping_log_export(request):
     orders = SalesOrder.objects.filter(tenant=tenant).exclude(
         order_status__in=["draft", "cancelled"]
     ).order_by("-ship_date", "-order_date")
-    rows = [
-        {
-            "order_number": o.order_number,
-            "customer_name": o.customer_name,
-            "ship_date": o.ship_date or "",
-            "shipper": o.shipper,
-            "shipping_route": o.shipping_route,
-            "packed_status": o.get_packed_status_display(),
-            "order_status": o.get_order_status_display(),
-        }
-        for o in orders
+    columns = [
+        ExportColumn("order_number"),
+        ExportColumn("customer_name"),
+        ExportColumn("ship_date"),
+        ExportColumn("shipper"),
+        ExportColumn("shipping_route"),
+        ExportColumn("packed_status", format=_choice_label(SalesOrder, "packed_status")),
+        ExportColumn("order_status", format=_choice_label(SalesOrder, "order_status")),
     ]
-    return _csv_response(rows, "shipping_log.csv")
+    return _export_response(request, orders, columns, "shipping_log")
 
 
 # ── Traceability ────────────────────────────────────────────────
 
 
-@login_required
-def trace_lookup(request):
-    """Trace a product through the full workflow: PO → Receiving → Processing → Sales."""
-    tenant, error = _require_tenant(request)
-    if error:
-        return error
-
-    q = request.GET.get("q", "").strip()
-    if not q:
-        return JsonResponse({"error": "Search query required."}, status=400)
-
-    # Collect all related inventory lot IDs
-    lot_ids = set()
-
-    # Search by PO number
-    pos = PurchaseOrder.objects.filter(tenant=tenant, po_number__icontains=q)
-    po_ids = set(pos.values_list("id", flat=True))
-
-    # Search by lot code
-    lots_by_code = Inventory.objects.filter(tenant=tenant).filter(
-        Q(vendorlot__icontains=q) | Q(desc__icontains=q) | Q(productid__icontains=q)
+def _trace_result_querysets(tenant, po_ids, lot_ids, batch_ids, so_ids):
+    return (
+        PurchaseOrder.objects.filter(tenant=tenant, id__in=po_ids),
+        Inventory.objects.filter(tenant=tenant, id__in=lot_ids).select_related("purchase_order"),
+        ProcessBatch.objects.filter(tenant=tenant, id__in=batch_ids).prefetch_related("sources__inventory", "outputs"),
+        SalesOrder.objects.filter(tenant=tenant, id__in=so_ids).prefetch_related("items__allocations__inventory"),
     )
-    lot_ids.update(lots_by_code.values_list("id", flat=True))
-
-    # Search by batch number
-    batches_by_num = ProcessBatch.objects.filter(tenant=tenant, batch_number__icontains=q)
-    for batch in batches_by_num.prefetch_related("sources__inventory"):
-        for src in batch.sources.all():
-            if src.inventory_id:
-                lot_ids.add(src.inventory_id)
-
-    # Search by sales order number
-    sos_by_num = SalesOrder.objects.filter(tenant=tenant, order_number__icontains=q)
-    so_ids = set(sos_by_num.values_list("id", flat=True))
-    sales_product_ids = set()
-    sales_item_descriptions = set()
-    so_items = SalesOrderItem.objects.filter(
-        tenant=tenant,
-        sales_order__in=sos_by_num,
-        item_type="item",
-    ).select_related("product")
-    for item in so_items:
-        if item.product_id and item.product and item.product.product_id:
-            sales_product_ids.add(item.product.product_id)
-        elif item.description:
-            sales_item_descriptions.add(item.description.strip())
-    so_allocs = SalesOrderAllocation.objects.filter(
-        tenant=tenant, sales_order_item__sales_order__in=sos_by_num
-    )
-    lot_ids.update(so_allocs.values_list("inventory_id", flat=True))
 
-    # If the SO has no allocations yet, fall back to matching lots by ordered product.
-    if sales_product_ids or sales_item_descriptions:
-        matching_sales_lots = Inventory.objects.filter(tenant=tenant).filter(
-            Q(productid__in=sales_product_ids) |
-            Q(desc__in=sales_item_descriptions)
-        )
-        lot_ids.update(matching_sales_lots.values_list("id", flat=True))
 
-    # Expand from POs → lots
-    if po_ids:
-        po_numbers = set(
-            PurchaseOrder.objects.filter(tenant=tenant, id__in=po_ids).values_list("po_number", flat=True)
-        )
-        po_lots = Inventory.objects.filter(tenant=tenant).filter(
-            Q(purchase_order_id__in=po_ids) | Q(poid__in=po_numbers)
-        )
-        lot_ids.update(po_lots.values_list("id", flat=True))
-
-    # Now build the full chain from all discovered lots
-    # Expand lots → POs (backward)
-    all_lots = Inventory.objects.filter(tenant=tenant, id__in=lot_ids).select_related("purchase_order")
-    for lot in all_lots:
-        if lot.purchase_order_id:
-            po_ids.add(lot.purchase_order_id)
-        elif lot.poid:
-            matched_po = PurchaseOrder.objects.filter(tenant=tenant, po_number=lot.poid).values_list("id", flat=True).first()
-            if matched_po:
-                po_ids.add(matched_po)
-
-    # Expand lots → processing batches (forward)
-    batch_sources = ProcessBatchSource.objects.filter(tenant=tenant, inventory_id__in=lot_ids).select_related("batch")
-    batch_ids = set(bs.batch_id for bs in batch_sources)
-
-    # Also include output lots from those batches
-    batch_outputs = ProcessBatchOutput.objects.filter(tenant=tenant, batch_id__in=batch_ids)
-    output_lot_ids = set(bo.inventory_id for bo in batch_outputs if bo.inventory_id)
-    lot_ids.update(output_lot_ids)
-
-    # Expand lots → sales orders (forward)
-    all_allocs = SalesOrderAllocation.objects.filter(
-        tenant=tenant, inventory_id__in=lot_ids
-    ).select_related("sales_order_item__sales_order")
-    so_ids.update(a.sales_order_item.sales_order_id for a in all_allocs)
-
-    # Build response
-    purchase_orders = PurchaseOrder.objects.filter(tenant=tenant, id__in=po_ids).prefetch_related("items__product")
-    receiving_lots = Inventory.objects.filter(tenant=tenant, id__in=lot_ids).select_related("purchase_order")
-    processing = ProcessBatch.objects.filter(tenant=tenant, id__in=batch_ids).prefetch_related("sources__inventory", "outputs")
-    sales_orders = SalesOrder.objects.filter(tenant=tenant, id__in=so_ids).prefetch_related("items__allocations__inventory")
-
-    return JsonResponse({
+def _trace_payload(purchase_orders, receiving_lots, processing, sales_orders):
+    return {
         "purchase_orders": [
             {
                 "id": po.id,
@@ -3507,11 +3387,8 @@ def trace_lookup(request):
                 "vendor_name": po.vendor_name,
                 "order_status": po.get_order_status_display(),
                 "order_date": _date_str(po.order_date),
-                "products": ", ".join(sorted(set(filter(None, (
-                    (item.product.species or item.product.item_name or "") if item.product else item.description
-                    for item in po.items.all() if item.item_type == "item"
-                ))))) or "",
-                "total": _to_float(sum((item.amount or 0) for item in po.items.all())),
+                "products": po.products_summary,
+                "total": _to_float(po.items_total),
             }
             for po in purchase_orders
         ],
@@ -3521,7 +3398,7 @@ def trace_lookup(request):
                 "trace_lot": lot.vendorlot or f"LOT-{lot.id}",
                 "product_name": lot.desc or lot.productid or "",
                 "vendor": lot.vendorid or "",
-                "receive_date": lot.receivedate or "",
+                "receive_date": _date_str(lot.receivedate),
                 "on_hand": _to_float(lot.unitsonhand) or 0,
                 "unit_type": lot.unittype or "",
                 "po_number": lot.purchase_order.po_number if lot.purchase_order_id and lot.purchase_order else (lot.poid or ""),
@@ -3554,7 +3431,7 @@ def trace_lookup(request):
                 "customer_name": so.customer_name,
                 "order_status": so.get_order_status_display(),
                 "order_date": _date_str(so.order_date),
-                "total": _sales_order_total(so),
+                "total": _to_float(so.items_total) or 0,
                 "allocated_lots": list(set(
                     a.inventory.vendorlot or f"LOT-{a.inventory_id}"
                     for item in so.items.all()
@@ -3564,7 +3441,110 @@ def trace_lookup(request):
             }
             for so in sales_orders
         ],
-    })
+    }
+
+
+def _trace_querysets(tenant, q):
+    """
+    Expand a trace search into the records on its chain: PO → Receiving → Processing → Sales.
+
+    Runs the id-collecting queries and returns the unevaluated result querysets
+    of _trace_result_querysets(). Shared by the sync and async trace views.
+    """
+    def ids(queryset, field="id"):
+        return set(queryset.values_list(field, flat=True))
+
+    # Seed the chain from the POs, lots, batches and sales orders the search matches.
+    po_ids = ids(search(PurchaseOrder.objects.filter(tenant=tenant), ("po_number",), q))
+    lot_ids = ids(search(Inventory.objects.filter(tenant=tenant), ("vendorlot", "desc", "productid"), q))
+    lot_ids |= ids(
+        ProcessBatchSource.objects.filter(
+            tenant=tenant,
+            batch__in=search(ProcessBatch.objects.filter(tenant=tenant), ("batch_number",), q),
+            inventory_id__isnull=False,
+        ),
+        "inventory_id",
+    )
+
+    sos_by_num = search(SalesOrder.objects.filter(tenant=tenant), ("order_number",), q)
+    so_ids = ids(sos_by_num)
+    sales_product_ids = set()
+    sales_item_descriptions = set()
+    so_items = SalesOrderItem.objects.filter(
+        tenant=tenant,
+        sales_order__in=sos_by_num,
+        item_type="item",
+    ).select_related("product")
+    for item in so_items:
+        if item.product_id and item.product and item.product.product_id:
+            sales_product_ids.add(item.product.product_id)
+        elif item.description:
+            sales_item_descriptions.add(item.description.strip())
+    lot_ids |= ids(
+        SalesOrderAllocation.objects.filter(
+            tenant=tenant, sales_order_item__sales_order__in=sos_by_num, inventory_id__isnull=False,
+        ),
+        "inventory_id",
+    )
+
+    # If the SO has no allocations yet, fall back to matching lots by ordered product.
+    if sales_product_ids or sales_item_descriptions:
+        lot_ids |= ids(Inventory.objects.filter(tenant=tenant).filter(
+            Q(productid__in=sales_product_ids) | Q(desc__in=sales_item_descriptions)
+        ))
+
+    # Expand from POs → lots
+    if po_ids:
+        po_numbers = ids(PurchaseOrder.objects.filter(tenant=tenant, id__in=po_ids), "po_number")
+        lot_ids |= ids(Inventory.objects.filter(tenant=tenant).filter(
+            Q(purchase_order_id__in=po_ids) | Q(poid__in=po_numbers)
+        ))
+
+    # Expand lots → POs (backward); lots without an FK match on their PO number in one query.
+    unlinked_poids = set()
+    for purchase_order_id, poid in Inventory.objects.filter(tenant=tenant, id__in=lot_ids).values_list(
+        "purchase_order_id", "poid"
+    ):
+        if purchase_order_id:
+            po_ids.add(purchase_order_id)
+        elif poid:
+            unlinked_poids.add(poid)
+    if unlinked_poids:
+        first_po_by_number = {}
+        for po_id, po_number in PurchaseOrder.objects.filter(
+            tenant=tenant, po_number__in=unlinked_poids
+        ).order_by("id").values_list("id", "po_number"):
+            first_po_by_number.setdefault(po_number, po_id)
+        po_ids.update(first_po_by_number.values())
+
+    # Expand lots → processing batches (forward), then pull in their output lots.
+    batch_ids = ids(ProcessBatchSource.objects.filter(tenant=tenant, inventory_id__in=lot_ids), "batch_id")
+    lot_ids |= ids(
+        ProcessBatchOutput.objects.filter(tenant=tenant, batch_id__in=batch_ids, inventory_id__isnull=False),
+        "inventory_id",
+    )
+
+    # Expand lots → sales orders (forward)
+    so_ids |= ids(
+        SalesOrderAllocation.objects.filter(tenant=tenant, inventory_id__in=lot_ids),
+        "sales_order_item__sales_order_id",
+    )
+
+    return _trace_result_querysets(tenant, po_ids, lot_ids, batch_ids, so_ids)
+
+
+@login_required
+def trace_lookup(request):
+    """Trace a product through the full workflow: PO → Receiving → Processing → Sales."""
+    tenant, error = _require_tenant(request)
+    if error:
+        return error
+
+    q = request.GET.get("q", "").strip()
+    if not q:
+        return JsonResponse({"error": "Search query required."}, status=400)
+
+    return JsonResponse(_trace_payload(*_trace_querysets(tenant, q)))
 
 
 # ── Product orders lookup ───────────────────────────────────────
@@ -3648,7 +3628,7 @@ def receiving_lot_delete(request, lot_id):
     if error:
         return error
     lot = get_object_or_404(Inventory.objects.filter(tenant=tenant), id=lot_id)
-    lot.delete()
+    delete_lots([lot], reference="deleted", user=request.user)
     return JsonResponse({"success": True})
 
 
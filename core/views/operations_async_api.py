@@ -0,0 +1,149 @@
+"""
+Async variants of the read-heavy operations API endpoints.
+
+These mirror the views of the same name in operations_api and share their
+queryset builders and serializers, but run queries through Django's async ORM
+so an ASGI worker can keep many DB-bound requests in flight at once. They are
+mounted under /api/async/ (see core/urls/api_async.py).
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+
+from core.models import ProductInventorySummary
+from core.services.pagination import Page, estimate_count, keyset_ordered
+from core.services.request_metrics import JsonResponse
+from core.views.operations_api import (
+    _inventory_items_queryset,
+    _keyset_paginator,
+    _offset_page,
+    _page_bounds,
+    _page_request,
+    _po_to_dict,
+    _processing_source_lots_queryset,
+    _product_to_dict,
+    _purchase_orders_queryset,
+    _receiving_lot_to_dict,
+    _receiving_lots_queryset,
+    _require_tenant,
+    _sold_outputs_queryset,
+    _sold_related_querysets,
+    _sold_results,
+    _source_lot_to_dict,
+    _trace_payload,
+    _trace_querysets,
+)
+
+
+async def _alist(queryset):
+    return [obj async for obj in queryset]
+
+
+async def _apaginate(request, queryset, default_page_size=100):
+    """operations_api._paginate() with the queries run through the async ORM."""
+    mode, page_size = _page_request(request, default_page_size)
+    if mode == "all":
+        return Page(items=await _alist(queryset)), None
+    if mode == "offset":
+        start, end = _page_bounds(request, page_size)
+        rows = await _alist(keyset_ordered(queryset)[start:end])
+        return _offset_page(queryset, rows, await queryset.acount(), end - start, end), None
+    paginator, error = _keyset_paginator(request, queryset, page_size)
+    if error:
+        return None, error
+    page = paginator.page(await _alist(paginator.queryset))
+    total = request.GET.get("total", "").strip()
+    if total == "exact":
+        page.total = await queryset.acount()
+    elif total == "estimate":
+        page.total, page.total_is_estimate = await sync_to_async(estimate_count)(queryset), True
+    return page, None
+
+
+@login_required
+async def purchasing_orders(request):
+    tenant, error = _require_tenant(request)
+    if error:
+        return error
+
+    page, error = await _apaginate(request, _purchase_orders_queryset(request, tenant))
+    if error:
+        return error
+    return JsonResponse({"orders": [_po_to_dict(order) for order in page.items], **page.meta()})
+
+
+@login_required
+async def receiving_lots(request):
+    tenant, error = _require_tenant(request)
+    if error:
+        return error
+
+    page, error = await _apaginate(request, _receiving_lots_queryset(request, tenant))
+    if error:
+        return error
+    return JsonResponse({"lots": [_receiving_lot_to_dict(lot) for lot in page.items], **page.meta()})
+
+
+@login_required
+async def inventory_items(request):
+    tenant, error = _require_tenant(request)
+    if error:
+        return error
+
+    items = await _alist(_inventory_items_queryset(request, tenant))
+    inventory_totals = {
+        summary.product_id: summary.totals()
+        async for summary in ProductInventorySummary.objects.filter(
+            tenant=tenant, product_id__in=[item.id for item in items]
+        )
+    }
+
+    return JsonResponse({"items": [_product_to_dict(item, inventory_totals.get(item.id)) for item in items]})
+
+
+@login_required
+async def processing_source_lots(request):
+    """Return original received inventory lots available for processing."""
+    tenant, error = _require_tenant(request)
+    if error:
+        return error
+    lots = await _alist(_processing_source_lots_queryset(request, tenant))
+    return JsonResponse({"lots": [_source_lot_to_dict(lot) for lot in lots]})
+
+
+@login_required
+async def processing_sold_results(request):
+    tenant, error = _require_tenant(request)
+    if error:
+        return error
+
+    page, error = await _apaginate(request, _sold_outputs_queryset(tenant), default_page_size=None)
+    if error:
+        return error
+    if not page.items:
+        return JsonResponse({"results": [], **page.meta()})
+    sources, allocs = _sold_related_querysets(tenant, page.items)
+    return JsonResponse({
+        "results": _sold_results(page.items, await _alist(sources), await _alist(allocs)),
+        **page.meta(),
+    })
+
+
+@login_required
+async def trace_lookup(request):
+    """Trace a product through the full workflow: PO → Receiving → Processing → Sales."""
+    tenant, error = _require_tenant(request)
+    if error:
+        return error
+
+    q = request.GET.get("q", "").strip()
+    if not q:
+        return JsonResponse({"error": "Search query required."}, status=400)
+
+    # The id expansion is a chain of dependent queries, so it runs as one sync call.
+    purchase_orders, receiving_lots, processing, sales_orders = await sync_to_async(_trace_querysets)(tenant, q)
+    return JsonResponse(_trace_payload(
+        await _alist(purchase_orders),
+        await _alist(receiving_lots),
+        await _alist(processing),
+        await _alist(sales_orders),
+    ))
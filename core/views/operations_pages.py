@@ -1,5 +1,8 @@
+import os
+
 from django.contrib.auth.decorators import login_required
 from django.conf import settings
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 
 from core.models import ProcessBatch, Product, PurchaseOrder
@@ -9,6 +12,7 @@ from core.services.billing import (
     sync_billing_profile_from_checkout_session,
     system_admin_billing_rows,
 )
+from core.services.request_metrics import request_stats, reset_request_stats
 
 
 PROCESS_LABELS = {
@@ -141,6 +145,20 @@ def system_admin_page(request):
     )
 
 
+@login_required
+def system_admin_request_metrics(request):
+    """
+    Rolling per-endpoint query/latency stats for the worker that answers; POST with reset=1 clears them.
+
+    Each worker process keeps its own window, so the response names the worker (pid) it came from.
+    """
+    if not _is_system_admin(request.user):
+        return JsonResponse({"error": "System admin access is required."}, status=403)
+    if request.method == "POST" and request.POST.get("reset"):
+        reset_request_stats()
+    return JsonResponse({"scope": "worker", "worker_pid": os.getpid(), "endpoints": request_stats()})
+
+
 @login_required
 def processing_new(request):
     if not getattr(request, "tenant", None):
@@ -53,7 +53,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.middleware.StaticFilesMiddleware',
+    'core.middleware.RequestMetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -61,6 +62,8 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'core.middleware.TenantMiddleware',
+    # Last, so request metrics can tell the view's queries from the middleware's.
+    'core.middleware.RequestMetricsViewMiddleware',
 ]
 
 ROOT_URLCONF = 'fishtech.urls'
@@ -94,6 +97,26 @@ DATABASES = {
     )
 }
 
+# Pick lists and the tenant-context session registry are cached and
+# invalidated on write, so every worker process must share one cache (see
+# core/checks.py). Redis when REDIS_URL is set; otherwise a table in the main
+# database, created by migration 0076. Tenant contexts themselves live in the
+# session and cost no cache lookup per request.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -151,6 +174,34 @@ STRIPE_MONTHLY_PRICE_CENTS = int(os.environ.get('STRIPE_MONTHLY_PRICE_CENTS', '6
 STRIPE_PAYMENT_LINK_URL = os.environ.get('STRIPE_PAYMENT_LINK_URL', '').strip()
 ENFORCE_SUBSCRIPTION_BILLING = os.environ.get('ENFORCE_SUBSCRIPTION_BILLING', 'false').lower() in {'1', 'true', 'yes', 'on'}
 
+# Seconds a resolved tenant context stays cached for TenantMiddleware.
+TENANT_CONTEXT_CACHE_TIMEOUT = int(os.environ.get('TENANT_CONTEXT_CACHE_TIMEOUT', '300'))
+# Raise instead of returning every tenant's rows when a TenantManager is queried without a tenant.
+TENANT_STRICT_MODE = os.environ.get('TENANT_STRICT_MODE', 'false').lower() in {'1', 'true', 'yes', 'on'}
+# Seconds a pick list stays cached; order, allocation and product changes drop it sooner.
+PICK_LIST_CACHE_TIMEOUT = int(os.environ.get('PICK_LIST_CACHE_TIMEOUT', '300'))
+# Days either side of today (or of the one date given) that the picking screen covers by default.
+PICK_LIST_WINDOW_DAYS = int(os.environ.get('PICK_LIST_WINDOW_DAYS', '7'))
+# Longest ship-date window one pick list may cover.
+PICK_LIST_MAX_WINDOW_DAYS = int(os.environ.get('PICK_LIST_MAX_WINDOW_DAYS', '31'))
+
+# Per-view query/latency stats for /api/ requests (see core/services/request_metrics.py).
+REQUEST_METRICS_ENABLED = os.environ.get('REQUEST_METRICS_ENABLED', 'true').lower() in {'1', 'true', 'yes', 'on'}
+REQUEST_METRICS_WINDOW = int(os.environ.get('REQUEST_METRICS_WINDOW', '500'))
+# Keyed by URL name; a breach of any limit is logged as a warning. "queries" is
+# the view's own queries; session, auth and tenant lookups are reported apart as
+# "overhead_queries". Limits sit just above the worst case measured with
+# benchmark_endpoints (warm, scale 1) and the test suite (cold caches):
+# picking 9 cold / 2 warm, the list endpoints 2-3, batch create 48.
+REQUEST_METRICS_BUDGETS = {
+    'default': {'queries': 50, 'db_ms': 1000, 'total_ms': 3000},
+    'api_shipping_picking': {'queries': 12, 'total_ms': 200},
+    'api_purchasing_orders': {'queries': 5},
+    'api_receiving_lots': {'queries': 5},
+    'api_inventory_items': {'queries': 5},
+    'api_processing_batches_create': {'queries': 60},
+}
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 